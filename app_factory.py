@@ -6,12 +6,12 @@ template configuration, and static files setup.
 """
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
@@ -23,10 +23,22 @@ from pycommerce.models.product import ProductManager
 from pycommerce.models.order import OrderManager
 from pycommerce.models.user import UserManager
 from pycommerce.services.media_service import MediaService
+from pycommerce.services.credentials_manager import preload_credentials
+from pycommerce.plugins.payment.webhooks import start_webhook_processor, stop_webhook_processor
+from pycommerce.services.ai_job_service import start_ai_job_runner, stop_ai_job_runner
+from pycommerce.services.cart_store import start_cart_store, stop_cart_store
+from pycommerce.services.event_bus import start_event_dispatcher, stop_event_dispatcher
+from pycommerce.services.job_runner import start_job_runner, stop_job_runner
+from pycommerce.plugins.payment.transport import close_transports
+from pycommerce.middleware.http_cache import HTTPCacheMiddleware
+from pycommerce.middleware.compression import CompressionMiddleware
+from pycommerce.core.lazy_routes import LazyRouterMiddleware
+from pycommerce.middleware.static_files import PrecompressedStaticFiles
+from pycommerce.utils.static_assets import static_url
 from pycommerce.plugins import StripePaymentPlugin, StandardShippingPlugin
 
 # Import route registration
-from routes import register_routes
+from routes import register_routes, get_router_registry
 
 logger = logging.getLogger(__name__)
 
@@ -36,10 +48,46 @@ templates_dir = Path("templates")
 templates = Jinja2Templates(directory=str(templates_dir))
 templates.env.globals.update({
     "DEBUG": True,
+    "static_url": static_url,
 })
 templates.env.auto_reload = True
 templates.env.cache_size = 0  # Disable caching completely
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown."""
+    # Warm the credential cache so payment requests skip DB reads and decryption
+    preload_credentials()
+
+    # Process stored payment webhooks in the background
+    await start_webhook_processor()
+
+    # Process queued AI generation jobs in the background
+    await start_ai_job_runner()
+
+    # Write cart changes behind and sweep expired carts
+    await start_cart_store()
+
+    # Deliver order lifecycle events (mail, cache invalidation) to subscribers
+    await start_event_dispatcher()
+
+    # Run scheduled maintenance jobs (cache warmup, low-stock scan, ledger compaction, cart purge)
+    await start_job_runner()
+
+    try:
+        yield
+    finally:
+        await stop_job_runner()
+        await stop_event_dispatcher()
+        await stop_cart_store()
+        await stop_ai_job_runner()
+        await stop_webhook_processor()
+
+        # Close pooled payment provider connections
+        await close_transports()
+
+
 def create_app():
     """
     Create and configure a FastAPI application.
@@ -60,10 +108,14 @@ def create_app():
         openapi_url="/api/openapi.json",  # Enable OpenAPI for API documentation
         docs_url=None,  # Disable default docs path, we'll use our custom path
         redoc_url=None,  # Disable default redoc path, we'll use our custom path
+        lifespan=lifespan,
     )
 
     # Mount static files
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+    # Import admin routers on the first request to their prefix
+    app.add_middleware(LazyRouterMiddleware, registry=get_router_registry(app, templates))
 
     # Add session middleware
     app.add_middleware(
@@ -72,6 +124,12 @@ def create_app():
         max_age=7 * 24 * 60 * 60  # 1 week
     )
 
+    # Add ETag/Cache-Control handling for routes that declare a cache policy
+    app.add_middleware(HTTPCacheMiddleware)
+
+    # Compress HTML/JSON responses (outermost, so it sees final bodies)
+    app.add_middleware(CompressionMiddleware)
+
     # Register all modular routes
     register_routes(app, templates)
 
@@ -0,0 +1,27 @@
+"""
+Shared pytest fixtures.
+"""
+import itertools
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def make_session_factory(tmp_path):
+    """
+    Build session factories bound to fresh sqlite databases.
+
+    Call it with the models whose tables the test needs; the engine is
+    available as ``factory.kw["bind"]``.
+    """
+    counter = itertools.count()
+
+    def make(*models):
+        engine = create_engine(f"sqlite:///{tmp_path / f'test-{next(counter)}.db'}")
+        for model in models:
+            model.__table__.create(engine)
+        return sessionmaker(bind=engine)
+
+    return make
@@ -24,8 +24,10 @@ logger = logging.getLogger(__name__)
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.abspath("."))
 
-# Start the uvicorn server in a separate process
-start_uvicorn_server()
+# Start the uvicorn server in a separate process. proxy_to_uvicorn starts it on
+# the first request anyway, so only pay for it at import time when asked to.
+if os.environ.get("UVICORN_PRESTART", "false").lower() in ("true", "1", "yes"):
+    start_uvicorn_server()
 
 # Create the API documentation app
 from flask import Flask, jsonify, redirect, render_template_string, send_from_directory
@@ -333,7 +335,8 @@ if __name__ == "__main__":
     try:
         if not any(getattr(route, "path", "") == "/static" for route in fastapi_app.routes):
             logger.info("Mounting static files directory")
-            fastapi_app.mount("/static", StaticFiles(directory="static"), name="static")
+            from pycommerce.middleware.static_files import PrecompressedStaticFiles
+            fastapi_app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
             logger.info("Static files mounted successfully")
     except Exception as e:
         logger.error(f"Error mounting static files: {e}")
@@ -18,6 +18,11 @@ from models import (
 
 # Import the Shipment and ShipmentItem for proper type checking
 from pycommerce.models.shipment import Shipment, ShipmentItem
+# Low-stock flags and counts are shared with the pycommerce inventory manager
+from pycommerce.models.db_registry import LowStockCount
+from pycommerce.services.low_stock_index import sync_low_stock
+# Product descriptions are stored sanitized, like page builder content
+from pycommerce.services.wysiwyg_service import sanitize_html
 # Type variables for type annotations
 from typing import TypeVar
 # Define type variables with concrete bound types
@@ -113,6 +118,8 @@ class ProductManager:
         try:
             if categories is None:
                 categories = []
+            if description:
+                description = sanitize_html(description)
                 
             product = Product(
                 id=str(uuid.uuid4()),
@@ -171,6 +178,8 @@ class ProductManager:
         if not product:
             return None
         
+        if kwargs.get("description"):
+            kwargs["description"] = sanitize_html(kwargs["description"])
         for key, value in kwargs.items():
             if hasattr(product, key):
                 setattr(product, key, value)
@@ -809,6 +818,7 @@ class InventoryManager:
                         inventory_record_id=inventory.id,
                         transaction_type="adjustment",
                         quantity=quantity - old_quantity,  # Can be positive or negative
+                        on_hand_change=quantity - old_quantity,
                         notes=f"Adjusted quantity from {old_quantity} to {quantity}",
                         created_at=datetime.utcnow()
                     )
@@ -838,6 +848,7 @@ class InventoryManager:
                     inventory_record_id=inventory.id,
                     transaction_type="initial",
                     quantity=quantity,
+                    on_hand_change=quantity,
                     notes="Initial inventory setup",
                     created_at=datetime.utcnow()
                 )
@@ -849,6 +860,7 @@ class InventoryManager:
                 product.stock = quantity
                 product.updated_at = datetime.utcnow()
             
+            sync_low_stock(db.session, inventory)
             db.session.commit()
             logger.info(f"Created/updated inventory for product {product_id} with quantity {quantity}")
             return inventory
@@ -894,6 +906,7 @@ class InventoryManager:
                 inventory_record_id=inventory.id,
                 transaction_type="sale",
                 quantity=-quantity,  # Negative because it's a reservation/reduction
+                reserved_change=quantity,
                 reference_id=reference_id,
                 reference_type=reference_type,
                 notes=f"Reserved {quantity} units for {reference_type} {reference_id}",
@@ -901,6 +914,7 @@ class InventoryManager:
             )
             db.session.add(transaction)
             
+            sync_low_stock(db.session, inventory)
             db.session.commit()
             logger.info(f"Reserved {quantity} units of product {product_id} for {reference_type} {reference_id}")
             return True
@@ -923,8 +937,10 @@ class InventoryManager:
                 logger.warning(f"No inventory found for product {product_id}")
                 return False
             
-            # Update inventory quantities
-            inventory.reserved_quantity = max(0, inventory.reserved_quantity - quantity)
+            # The reserved units leave stock
+            consumed = min(quantity, inventory.reserved_quantity)
+            inventory.reserved_quantity -= consumed
+            inventory.quantity -= consumed
             inventory.updated_at = datetime.utcnow()
             
             # Don't change available_quantity since it was already reduced when reserving
@@ -934,7 +950,9 @@ class InventoryManager:
                 id=str(uuid.uuid4()),
                 inventory_record_id=inventory.id,
                 transaction_type="sale",
-                quantity=0,  # No change in total quantity, just converting reserved to sold
+                quantity=0,  # Already shown as a reduction when it was reserved
+                on_hand_change=-consumed,
+                reserved_change=-consumed,
                 reference_id=reference_id,
                 reference_type=f"{reference_type}_completion",
                 notes=f"Completed sale of {quantity} units for {reference_type} {reference_id}",
@@ -947,6 +965,7 @@ class InventoryManager:
             if product:
                 product.stock = inventory.quantity
             
+            sync_low_stock(db.session, inventory)
             db.session.commit()
             logger.info(f"Completed sale of {quantity} units of product {product_id} for {reference_type} {reference_id}")
             return True
@@ -980,6 +999,7 @@ class InventoryManager:
                 inventory_record_id=inventory.id,
                 transaction_type="return",
                 quantity=quantity,  # Positive because it's an addition
+                on_hand_change=quantity,
                 reference_id=reference_id,
                 reference_type="return",
                 notes=notes or f"Return of {quantity} units, reference: {reference_id}",
@@ -992,6 +1012,7 @@ class InventoryManager:
             if product:
                 product.stock = inventory.quantity
             
+            sync_low_stock(db.session, inventory)
             db.session.commit()
             logger.info(f"Processed return of {quantity} units of product {product_id}")
             return True
@@ -1003,33 +1024,37 @@ class InventoryManager:
     def get_low_stock_items(self, tenant_id: str) -> List[Dict[str, Any]]:
         """Get items that are at or below their reorder point."""
         try:
-            # Find inventory records where quantity is at or below reorder point
-            low_stock_records = InventoryRecord.query.filter(
+            # Flagged records only, read through the partial low-stock index
+            rows = db.session.query(InventoryRecord, Product).join(
+                Product, Product.id == InventoryRecord.product_id
+            ).filter(
                 InventoryRecord.tenant_id == tenant_id,
-                InventoryRecord.quantity <= InventoryRecord.reorder_point,
-                InventoryRecord.reorder_point > 0  # Only include items with a reorder point set
-            ).all()
-            
-            result = []
-            for record in low_stock_records:
-                product = Product.query.filter_by(id=record.product_id).first()
-                if product:
-                    result.append({
-                        "inventory_id": record.id,
-                        "product_id": record.product_id,
-                        "product_name": product.name,
-                        "sku": record.sku or product.sku,
-                        "quantity": record.quantity,
-                        "reorder_point": record.reorder_point,
-                        "reorder_quantity": record.reorder_quantity,
-                        "location": record.location
-                    })
+                InventoryRecord.is_low_stock.is_(True)
+            ).order_by(InventoryRecord.available_quantity).all()
             
-            return result
+            return [
+                {
+                    "inventory_id": record.id,
+                    "product_id": record.product_id,
+                    "product_name": product.name,
+                    "sku": record.sku or product.sku,
+                    "quantity": record.quantity,
+                    "available_quantity": record.available_quantity,
+                    "reorder_point": record.reorder_point,
+                    "reorder_quantity": record.reorder_quantity,
+                    "location": record.location
+                }
+                for record, product in rows
+            ]
         except Exception as e:
             logger.error(f"Error getting low stock items: {e}")
             return []
     
+    def get_low_stock_count(self, tenant_id: str) -> int:
+        """Get the number of items at or below their reorder point."""
+        counter = db.session.get(LowStockCount, tenant_id)
+        return counter.low_stock_count if counter else 0
+    
     def get_inventory_transactions(
         self,
         product_id: str,
@@ -1058,4 +1083,22 @@ class InventoryManager:
             return query.order_by(InventoryTransaction.created_at.desc()).all()
         except Exception as e:
             logger.error(f"Error getting inventory transactions: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def get_inventory_transaction_page(
+        self,
+        product_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        transaction_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get one page of inventory transactions for a product, newest first."""
+        from pycommerce.services.inventory_ledger import transaction_page
+        
+        inventory = self.get_inventory_by_product(product_id)
+        if not inventory:
+            return {"transactions": [], "next_cursor": None}
+        
+        return transaction_page(
+            db.session, inventory.id, limit=limit, cursor=cursor, transaction_type=transaction_type
+        )
\ No newline at end of file
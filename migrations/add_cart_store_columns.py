@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Migration script to prepare the carts tables for the shared cart store.
+
+This script makes the following changes to the carts table:
+- tenant_id becomes nullable (storefront carts can hold products from any store)
+- cart_metadata (JSON): Cart metadata
+- expires_at (TIMESTAMP): When the cart expires unless it changes again
+
+It also indexes carts.user_id, carts.expires_at and cart_items.cart_id, used
+to load a user's cart, sweep expired carts and load a cart's lines.
+"""
+
+import os
+import sys
+import logging
+from sqlalchemy import text
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycommerce.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "ix_carts_user_id": "carts (user_id)",
+    "ix_carts_expires_at": "carts (expires_at)",
+    "ix_cart_items_cart_id": "cart_items (cart_id)",
+}
+
+def upgrade():
+    """
+    Add the cart store columns and indexes.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('carts');"))
+        table_exists = result.scalar()
+
+        if not table_exists:
+            logger.error("Table carts not found in database")
+            return False
+
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'carts';"))
+        existing_columns = [row[0] for row in result]
+
+        # Allow carts without a tenant
+        logger.info("Making carts.tenant_id nullable")
+        conn.execute(text("ALTER TABLE carts ALTER COLUMN tenant_id DROP NOT NULL;"))
+
+        # Add cart_metadata column
+        if 'cart_metadata' not in existing_columns:
+            logger.info("Adding cart_metadata column to carts table")
+            conn.execute(text("ALTER TABLE carts ADD COLUMN cart_metadata JSON;"))
+        else:
+            logger.info("cart_metadata column already exists")
+
+        # Add expires_at column
+        if 'expires_at' not in existing_columns:
+            logger.info("Adding expires_at column to carts table")
+            conn.execute(text("ALTER TABLE carts ADD COLUMN expires_at TIMESTAMP;"))
+        else:
+            logger.info("expires_at column already exists")
+
+        # Add indexes
+        for name, columns in INDEXES.items():
+            logger.info(f"Creating {name} index")
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {columns};"))
+
+        # Commit transaction
+        conn.commit()
+
+    logger.info("Migration completed successfully")
+    return True
+
+def downgrade():
+    """
+    Remove the indexes and columns added in the upgrade.
+
+    carts.tenant_id stays nullable, since carts without a tenant may exist.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('carts');"))
+        table_exists = result.scalar()
+
+        if not table_exists:
+            logger.error("Table carts not found in database")
+            return False
+
+        for name in INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name};"))
+
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'carts';"))
+        existing_columns = [row[0] for row in result]
+
+        # Remove cart_metadata column
+        if 'cart_metadata' in existing_columns:
+            logger.info("Removing cart_metadata column from carts table")
+            conn.execute(text("ALTER TABLE carts DROP COLUMN cart_metadata;"))
+
+        # Remove expires_at column
+        if 'expires_at' in existing_columns:
+            logger.info("Removing expires_at column from carts table")
+            conn.execute(text("ALTER TABLE carts DROP COLUMN expires_at;"))
+
+        # Commit transaction
+        conn.commit()
+
+    logger.info("Downgrade completed successfully")
+    return True
+
+if __name__ == '__main__':
+    # Run the migration
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        logger.info("Running downgrade...")
+        downgrade()
+    else:
+        logger.info("Running upgrade...")
+        upgrade()
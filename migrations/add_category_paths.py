@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Migration script to add materialized paths to the categories table.
+
+This script adds the following columns to the categories table:
+- path (VARCHAR): Ancestor ids from the root down to the category ("/<root id>/.../<id>/")
+- depth (INTEGER): Number of ancestors
+
+It also adds a (tenant_id, path) index used for subtree queries and fills in
+the paths of existing categories.
+"""
+
+import os
+import sys
+import logging
+from sqlalchemy import text
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycommerce.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKFILL_PATHS = """
+WITH RECURSIVE tree AS (
+    SELECT id, '/' || id || '/' AS path, 0 AS depth
+    FROM categories
+    WHERE parent_id IS NULL
+    UNION ALL
+    SELECT c.id, tree.path || c.id || '/', tree.depth + 1
+    FROM categories c
+    JOIN tree ON c.parent_id = tree.id
+)
+UPDATE categories
+SET path = tree.path, depth = tree.depth
+FROM tree
+WHERE categories.id = tree.id;
+"""
+
+def upgrade():
+    """
+    Add the path columns and index, then backfill paths.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('categories');"))
+        table_exists = result.scalar()
+        
+        if not table_exists:
+            logger.error("Table categories not found in database")
+            return False
+        
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'categories';"))
+        existing_columns = [row[0] for row in result]
+        
+        # Add path column
+        if 'path' not in existing_columns:
+            logger.info("Adding path column to categories table")
+            conn.execute(text("ALTER TABLE categories ADD COLUMN path VARCHAR(1024);"))
+        else:
+            logger.info("path column already exists")
+        
+        # Add depth column
+        if 'depth' not in existing_columns:
+            logger.info("Adding depth column to categories table")
+            conn.execute(text("ALTER TABLE categories ADD COLUMN depth INTEGER DEFAULT 0;"))
+        else:
+            logger.info("depth column already exists")
+        
+        # Add subtree index; text_pattern_ops lets prefix LIKE use it under any collation
+        logger.info("Creating ix_categories_tenant_path index")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_categories_tenant_path "
+            "ON categories (tenant_id, path text_pattern_ops);"
+        ))
+        
+        # Fill in paths for existing categories
+        result = conn.execute(text(BACKFILL_PATHS))
+        logger.info(f"Backfilled paths for {result.rowcount} categories")
+        
+        # Commit transaction
+        conn.commit()
+    
+    logger.info("Migration completed successfully")
+    return True
+
+def downgrade():
+    """
+    Remove the index and columns added in the upgrade.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('categories');"))
+        table_exists = result.scalar()
+        
+        if not table_exists:
+            logger.error("Table categories not found in database")
+            return False
+        
+        conn.execute(text("DROP INDEX IF EXISTS ix_categories_tenant_path;"))
+        
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'categories';"))
+        existing_columns = [row[0] for row in result]
+        
+        # Remove path column
+        if 'path' in existing_columns:
+            logger.info("Removing path column from categories table")
+            conn.execute(text("ALTER TABLE categories DROP COLUMN path;"))
+        
+        # Remove depth column
+        if 'depth' in existing_columns:
+            logger.info("Removing depth column from categories table")
+            conn.execute(text("ALTER TABLE categories DROP COLUMN depth;"))
+        
+        # Commit transaction
+        conn.commit()
+    
+    logger.info("Downgrade completed successfully")
+    return True
+
+if __name__ == '__main__':
+    # Run the migration
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        logger.info("Running downgrade...")
+        downgrade()
+    else:
+        logger.info("Running upgrade...")
+        upgrade()
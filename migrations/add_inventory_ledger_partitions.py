@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Migration script to turn inventory_transactions into a partitioned ledger.
+
+This script makes the following changes (PostgreSQL 13 or later):
+- on_hand_change / reserved_change (INTEGER): each transaction's change to
+  its record's quantity and reserved_quantity
+- inventory_transactions becomes range-partitioned by month on created_at.
+  The existing table is kept as the partition for everything before next
+  month (inventory_transactions_legacy), followed by monthly partitions and
+  a default partition
+- ix_inventory_transactions_record_created on (inventory_record_id,
+  created_at, id) for keyset pagination of a record's history
+- a trigger rejecting updates, since the ledger is append-only
+- inventory_snapshots, seeded with every record's current quantities, since
+  existing transactions carry no quantity changes
+
+Run it while the application is stopped: transactions written during the
+migration would be folded into the seed snapshots.
+"""
+
+import os
+import sys
+import logging
+from datetime import datetime
+from sqlalchemy import text
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycommerce.core.db import engine
+from pycommerce.services.inventory_ledger import ensure_partitions, month_start
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def upgrade():
+    """
+    Partition the inventory ledger and add snapshots.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('inventory_transactions');"))
+        table_exists = result.scalar()
+
+        if not table_exists:
+            logger.error("Table inventory_transactions not found in database")
+            return False
+
+        result = conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('inventory_transactions');"
+        ))
+        if result.scalar():
+            logger.info("inventory_transactions is already partitioned")
+            return True
+
+        # Add quantity change columns
+        logger.info("Adding on_hand_change and reserved_change columns to inventory_transactions table")
+        conn.execute(text("ALTER TABLE inventory_transactions ADD COLUMN IF NOT EXISTS on_hand_change INTEGER NOT NULL DEFAULT 0;"))
+        conn.execute(text("ALTER TABLE inventory_transactions ADD COLUMN IF NOT EXISTS reserved_change INTEGER NOT NULL DEFAULT 0;"))
+
+        # The partition key must be part of the primary key and never NULL
+        conn.execute(text("UPDATE inventory_transactions SET created_at = '1970-01-01' WHERE created_at IS NULL;"))
+        conn.execute(text("ALTER TABLE inventory_transactions ALTER COLUMN created_at SET NOT NULL;"))
+
+        # Recreated on the partitioned table below (create_all may have added it to the old one)
+        conn.execute(text("DROP INDEX IF EXISTS ix_inventory_transactions_record_created;"))
+
+        logger.info("Keeping existing transactions as inventory_transactions_legacy")
+        conn.execute(text("ALTER TABLE inventory_transactions RENAME TO inventory_transactions_legacy;"))
+        conn.execute(text("ALTER TABLE inventory_transactions_legacy RENAME CONSTRAINT inventory_transactions_pkey TO inventory_transactions_legacy_pkey;"))
+
+        logger.info("Creating partitioned inventory_transactions table")
+        conn.execute(text("""
+            CREATE TABLE inventory_transactions (
+                LIKE inventory_transactions_legacy INCLUDING DEFAULTS,
+                PRIMARY KEY (id, created_at),
+                FOREIGN KEY (inventory_record_id) REFERENCES inventory_records (id)
+            ) PARTITION BY RANGE (created_at);
+        """))
+        boundary = month_start(datetime.utcnow(), 1)
+        conn.execute(text(
+            "ALTER TABLE inventory_transactions ATTACH PARTITION inventory_transactions_legacy "
+            f"FOR VALUES FROM (MINVALUE) TO ('{boundary:%Y-%m-%d}');"
+        ))
+        conn.execute(text("CREATE TABLE inventory_transactions_default PARTITION OF inventory_transactions DEFAULT;"))
+
+        logger.info("Creating ix_inventory_transactions_record_created index")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_inventory_transactions_record_created "
+            "ON inventory_transactions (inventory_record_id, created_at, id);"
+        ))
+
+        logger.info("Making inventory_transactions append-only")
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION inventory_transactions_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'inventory_transactions is append-only';
+            END;
+            $$ LANGUAGE plpgsql;
+        """))
+        conn.execute(text(
+            "CREATE TRIGGER inventory_transactions_append_only BEFORE UPDATE ON inventory_transactions "
+            "FOR EACH ROW EXECUTE FUNCTION inventory_transactions_append_only();"
+        ))
+
+        logger.info("Creating inventory_snapshots table")
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS inventory_snapshots (
+                id VARCHAR(36) PRIMARY KEY,
+                inventory_record_id VARCHAR(36) NOT NULL REFERENCES inventory_records (id),
+                taken_at TIMESTAMP NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                reserved_quantity INTEGER NOT NULL DEFAULT 0,
+                transaction_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP
+            );
+        """))
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_inventory_snapshots_record_taken "
+            "ON inventory_snapshots (inventory_record_id, taken_at);"
+        ))
+
+        logger.info("Seeding inventory snapshots from current quantities")
+        conn.execute(text("""
+            INSERT INTO inventory_snapshots (id, inventory_record_id, taken_at, quantity, reserved_quantity, transaction_count, created_at)
+            SELECT gen_random_uuid()::text, r.id, NOW() AT TIME ZONE 'utc', COALESCE(r.quantity, 0),
+                   COALESCE(r.reserved_quantity, 0),
+                   (SELECT COUNT(*) FROM inventory_transactions t WHERE t.inventory_record_id = r.id),
+                   NOW() AT TIME ZONE 'utc'
+            FROM inventory_records r;
+        """))
+
+        # Commit transaction
+        conn.commit()
+
+    # Monthly partitions from the legacy partition's bound onwards
+    ensure_partitions(engine)
+
+    logger.info("Migration completed successfully")
+    return True
+
+def downgrade():
+    """
+    Merge the partitions back into a single table and drop the snapshots.
+
+    Partitions already moved to the inventory_archive schema are left there.
+    """
+    with engine.connect() as conn:
+        result = conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('inventory_transactions');"
+        ))
+        if not result.scalar():
+            logger.error("inventory_transactions is not partitioned")
+            return False
+
+        conn.execute(text("ALTER TABLE inventory_transactions DETACH PARTITION inventory_transactions_legacy;"))
+        conn.execute(text("INSERT INTO inventory_transactions_legacy SELECT * FROM inventory_transactions;"))
+        conn.execute(text("DROP TABLE inventory_transactions;"))
+        conn.execute(text("DROP FUNCTION IF EXISTS inventory_transactions_append_only() CASCADE;"))
+        conn.execute(text("ALTER TABLE inventory_transactions_legacy RENAME TO inventory_transactions;"))
+        conn.execute(text("ALTER TABLE inventory_transactions RENAME CONSTRAINT inventory_transactions_legacy_pkey TO inventory_transactions_pkey;"))
+
+        # Remove quantity change columns
+        logger.info("Removing on_hand_change and reserved_change columns from inventory_transactions table")
+        conn.execute(text("ALTER TABLE inventory_transactions DROP COLUMN IF EXISTS on_hand_change;"))
+        conn.execute(text("ALTER TABLE inventory_transactions DROP COLUMN IF EXISTS reserved_change;"))
+
+        conn.execute(text("DROP TABLE IF EXISTS inventory_snapshots;"))
+
+        # Commit transaction
+        conn.commit()
+
+    logger.info("Downgrade completed successfully")
+    return True
+
+if __name__ == '__main__':
+    # Run the migration
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        logger.info("Running downgrade...")
+        downgrade()
+    else:
+        logger.info("Running upgrade...")
+        upgrade()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the low-stock index to inventory records.
+
+This script makes the following changes:
+- inventory_records.is_low_stock (BOOLEAN): available_quantity is at or
+  below a non-zero reorder_point
+- ix_inventory_records_low_stock: partial index on tenant_id of the
+  low-stock records
+- inventory_low_stock_counts: number of low-stock records per tenant
+
+Existing records are flagged and the counts filled in from their current
+quantities.
+"""
+
+import os
+import sys
+import logging
+from sqlalchemy import text
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycommerce.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOW_STOCK = "COALESCE(reorder_point, 0) > 0 AND COALESCE(available_quantity, 0) <= reorder_point"
+
+def upgrade():
+    """
+    Add the low-stock flag, index and counts, and backfill them.
+    """
+    with engine.connect() as conn:
+        # Check if table exists
+        result = conn.execute(text("SELECT to_regclass('inventory_records');"))
+        table_exists = result.scalar()
+
+        if not table_exists:
+            logger.error("Table inventory_records not found in database")
+            return False
+
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'inventory_records';"))
+        existing_columns = [row[0] for row in result]
+
+        # Add is_low_stock column
+        if 'is_low_stock' not in existing_columns:
+            logger.info("Adding is_low_stock column to inventory_records table")
+            conn.execute(text("ALTER TABLE inventory_records ADD COLUMN is_low_stock BOOLEAN NOT NULL DEFAULT FALSE;"))
+        else:
+            logger.info("is_low_stock column already exists")
+
+        logger.info("Flagging low-stock inventory records")
+        conn.execute(text(f"UPDATE inventory_records SET is_low_stock = ({LOW_STOCK}) WHERE is_low_stock <> ({LOW_STOCK});"))
+
+        logger.info("Creating ix_inventory_records_low_stock index")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_inventory_records_low_stock "
+            "ON inventory_records (tenant_id) WHERE is_low_stock;"
+        ))
+
+        logger.info("Creating inventory_low_stock_counts table")
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS inventory_low_stock_counts (
+                tenant_id VARCHAR(36) PRIMARY KEY,
+                low_stock_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP
+            );
+        """))
+        conn.execute(text("DELETE FROM inventory_low_stock_counts;"))
+        conn.execute(text("""
+            INSERT INTO inventory_low_stock_counts (tenant_id, low_stock_count, updated_at)
+            SELECT tenant_id, COUNT(*), NOW() FROM inventory_records
+            WHERE is_low_stock GROUP BY tenant_id;
+        """))
+
+        # Commit transaction
+        conn.commit()
+
+    logger.info("Migration completed successfully")
+    return True
+
+def downgrade():
+    """
+    Remove the low-stock counts, index and flag.
+    """
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS inventory_low_stock_counts;"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_inventory_records_low_stock;"))
+
+        # Get existing columns
+        result = conn.execute(text("SELECT column_name FROM information_schema.columns WHERE table_name = 'inventory_records';"))
+        existing_columns = [row[0] for row in result]
+
+        # Remove is_low_stock column
+        if 'is_low_stock' in existing_columns:
+            logger.info("Removing is_low_stock column from inventory_records table")
+            conn.execute(text("ALTER TABLE inventory_records DROP COLUMN is_low_stock;"))
+
+        # Commit transaction
+        conn.commit()
+
+    logger.info("Downgrade completed successfully")
+    return True
+
+if __name__ == '__main__':
+    # Run the migration
+    if len(sys.argv) > 1 and sys.argv[1] == 'downgrade':
+        logger.info("Running downgrade...")
+        downgrade()
+    else:
+        logger.info("Running upgrade...")
+        upgrade()
@@ -0,0 +1,24 @@
+"""Add version column to pages
+
+Revision ID: 20251018_page_version
+Revises: 20250409_order_status_string
+Create Date: 2025-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_page_version'
+down_revision = '20250409_order_status_string'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Optimistic concurrency control for page builder tree saves
+    op.add_column('pages', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('pages', 'version')
@@ -0,0 +1,73 @@
+"""Add ai_jobs, ai_job_items and ai_result_cache tables
+
+Revision ID: 20251018_ai_jobs
+Revises: 20251018_webhook_events
+Create Date: 2025-10-18 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_ai_jobs'
+down_revision = '20251018_webhook_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # AI generation runs as queued jobs processed by a worker pool
+    op.create_table(
+        'ai_jobs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('tenant_id', sa.String(36), nullable=True),
+        sa.Column('kind', sa.String(30), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('options', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.String(255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_ai_jobs_tenant_created', 'ai_jobs', ['tenant_id', 'created_at'])
+
+    op.create_table(
+        'ai_job_items',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('job_id', sa.String(36), sa.ForeignKey('ai_jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('tenant_id', sa.String(36), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('target_id', sa.String(64), nullable=True),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('prompt_hash', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('cached', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_ai_job_items_status_next_attempt', 'ai_job_items', ['status', 'next_attempt_at'])
+    op.create_index('ix_ai_job_items_job_position', 'ai_job_items', ['job_id', 'position'])
+
+    op.create_table(
+        'ai_result_cache',
+        sa.Column('prompt_hash', sa.String(64), primary_key=True),
+        sa.Column('provider', sa.String(50), nullable=False),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('ai_result_cache')
+    op.drop_index('ix_ai_job_items_job_position', table_name='ai_job_items')
+    op.drop_index('ix_ai_job_items_status_next_attempt', table_name='ai_job_items')
+    op.drop_table('ai_job_items')
+    op.drop_index('ix_ai_jobs_tenant_created', table_name='ai_jobs')
+    op.drop_table('ai_jobs')
@@ -0,0 +1,31 @@
+"""Add number_sequences table
+
+Revision ID: 20251018_number_sequences
+Revises: 20251018_order_list_indexes
+Create Date: 2025-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_number_sequences'
+down_revision = '20251018_order_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-tenant order, return and estimate number sequences, reserved in blocks
+    op.create_table(
+        'number_sequences',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('tenant_id', sa.String(36), nullable=False, server_default=''),
+        sa.Column('kind', sa.String(20), nullable=False),
+        sa.Column('next_value', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.UniqueConstraint('tenant_id', 'kind', name='uq_number_sequences_tenant_kind'),
+    )
+
+
+def downgrade():
+    op.drop_table('number_sequences')
@@ -0,0 +1,30 @@
+"""Add indexes for the admin order list
+
+Revision ID: 20251018_order_list_indexes
+Revises: 20251018_ai_jobs
+Create Date: 2025-10-18 18:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20251018_order_list_indexes'
+down_revision = '20251018_ai_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Item and note counts are correlated subqueries on order_id
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_order_notes_order_id', 'order_notes', ['order_id'])
+    # Paging through orders newest first, per tenant or across all tenants
+    op.create_index('ix_orders_tenant_created', 'orders', ['tenant_id', 'created_at'])
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_tenant_created', table_name='orders')
+    op.drop_index('ix_order_notes_order_id', table_name='order_notes')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
@@ -0,0 +1,44 @@
+"""Add outbox_events table
+
+Revision ID: 20251018_outbox_events
+Revises: 20251018_number_sequences
+Create Date: 2025-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_outbox_events'
+down_revision = '20251018_number_sequences'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Order lifecycle events, written with the state change and delivered by the event bus
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('event_type', sa.String(100), nullable=False),
+        sa.Column('aggregate_id', sa.String(64), nullable=True),
+        sa.Column('tenant_id', sa.String(36), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('delivered_to', sa.Text(), nullable=True),
+        sa.Column('claim_token', sa.String(36), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_outbox_events_status_next_attempt', 'outbox_events', ['status', 'next_attempt_at'])
+    op.create_index('ix_outbox_events_claim_token', 'outbox_events', ['claim_token'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_claim_token', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_status_next_attempt', table_name='outbox_events')
+    op.drop_table('outbox_events')
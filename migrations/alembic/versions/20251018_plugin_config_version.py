@@ -0,0 +1,32 @@
+"""Add version and enabled columns to plugin_configs
+
+Revision ID: 20251018_plugin_config_version
+Revises: 20251018_page_version
+Create Date: 2025-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_plugin_config_version'
+down_revision = '20251018_page_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Workers compare versions to pick up configuration saved by other workers
+    op.add_column('plugin_configs', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('plugin_configs', sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.true()))
+    # Global configuration is stored without a tenant
+    op.alter_column('plugin_configs', 'tenant_id', existing_type=sa.String(36), nullable=True)
+    op.create_index('ix_plugin_configs_tenant_plugin', 'plugin_configs', ['tenant_id', 'plugin_id'])
+
+
+def downgrade():
+    op.drop_index('ix_plugin_configs_tenant_plugin', table_name='plugin_configs')
+    op.execute("DELETE FROM plugin_configs WHERE tenant_id IS NULL")
+    op.alter_column('plugin_configs', 'tenant_id', existing_type=sa.String(36), nullable=False)
+    op.drop_column('plugin_configs', 'enabled')
+    op.drop_column('plugin_configs', 'version')
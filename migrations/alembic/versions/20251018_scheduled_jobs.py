@@ -0,0 +1,55 @@
+"""Add scheduled_jobs and job_runs tables
+
+Revision ID: 20251018_scheduled_jobs
+Revises: 20251018_outbox_events
+Create Date: 2025-10-18 21:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_scheduled_jobs'
+down_revision = '20251018_outbox_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Maintenance job schedules, leases and run history
+    op.create_table(
+        'scheduled_jobs',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('schedule', sa.String(100), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('next_run_at', sa.DateTime(), nullable=True),
+        sa.Column('lease_owner', sa.String(100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+        sa.Column('last_status', sa.String(20), nullable=True),
+        sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_scheduled_jobs_next_run', 'scheduled_jobs', ['enabled', 'next_run_at'])
+
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('job_name', sa.String(100), nullable=False),
+        sa.Column('worker', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='running'),
+        sa.Column('started_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_job_runs_job_started', 'job_runs', ['job_name', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_job_runs_job_started', table_name='job_runs')
+    op.drop_table('job_runs')
+    op.drop_index('ix_scheduled_jobs_next_run', table_name='scheduled_jobs')
+    op.drop_table('scheduled_jobs')
@@ -0,0 +1,45 @@
+"""Add webhook_events table
+
+Revision ID: 20251018_webhook_events
+Revises: 20251018_plugin_config_version
+Create Date: 2025-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251018_webhook_events'
+down_revision = '20251018_plugin_config_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Payment webhooks are stored on receipt and processed by a worker pool
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('provider', sa.String(20), nullable=False),
+        sa.Column('event_id', sa.String(255), nullable=False),
+        sa.Column('event_type', sa.String(100), nullable=False),
+        sa.Column('order_id', sa.String(64), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('signature_verified', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('provider', 'event_id', name='uq_webhook_events_provider_event'),
+    )
+    op.create_index('ix_webhook_events_status_next_attempt', 'webhook_events', ['status', 'next_attempt_at'])
+    op.create_index('ix_webhook_events_order_received', 'webhook_events', ['order_id', 'received_at'])
+
+
+def downgrade():
+    op.drop_index('ix_webhook_events_order_received', table_name='webhook_events')
+    op.drop_index('ix_webhook_events_status_next_attempt', table_name='webhook_events')
+    op.drop_table('webhook_events')
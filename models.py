@@ -7,7 +7,7 @@ This module contains SQLAlchemy models for the Flask app.
 import os
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, JSON, Text, Index, text
 from sqlalchemy.orm import relationship
 from database import db
 
@@ -61,10 +61,17 @@ class Category(db.Model):
     description = Column(String(500), nullable=True)
     slug = Column(String(100), nullable=False)
     parent_id = Column(String(36), ForeignKey("categories.id"), nullable=True)
+    # Materialized path of ancestor ids ("/<root id>/.../<own id>/"), maintained by CategoryManager
+    path = Column(String(1024), nullable=True)
+    depth = Column(Integer, default=0)
     active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_categories_tenant_path", "tenant_id", "path", postgresql_ops={"path": "text_pattern_ops"}),
+    )
+    
     # Relationships
     tenant = relationship("Tenant", back_populates="categories")
     parent = relationship("Category", remote_side=[id], backref="subcategories")
@@ -113,11 +120,13 @@ class Cart(db.Model):
     __tablename__ = "carts"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=True)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=True, index=True)
     session_id = Column(String(100), nullable=True)
+    cart_metadata = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=True, index=True)
     
     # Relationships
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
@@ -130,7 +139,7 @@ class CartItem(db.Model):
     __tablename__ = "cart_items"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    cart_id = Column(String(36), ForeignKey("carts.id"), nullable=False)
+    cart_id = Column(String(36), ForeignKey("carts.id"), nullable=False, index=True)
     product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -290,6 +299,10 @@ class ShipmentItem(db.Model):
 class InventoryRecord(db.Model):
     """Inventory record model."""
     __tablename__ = "inventory_records"
+    __table_args__ = (
+        Index("ix_inventory_records_low_stock", "tenant_id",
+              postgresql_where=text("is_low_stock"), sqlite_where=text("is_low_stock")),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False)
@@ -301,6 +314,7 @@ class InventoryRecord(db.Model):
     reserved_quantity = Column(Integer, default=0)   # Reserved for orders
     reorder_point = Column(Integer, default=0)       # When to reorder
     reorder_quantity = Column(Integer, default=0)    # How much to reorder
+    is_low_stock = Column(Boolean, nullable=False, default=False)  # available_quantity <= reorder_point
     last_counted = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -314,13 +328,18 @@ class InventoryRecord(db.Model):
         return f"<InventoryRecord {self.id} for product {self.product_id}>"
 
 class InventoryTransaction(db.Model):
-    """Inventory transaction model."""
+    """Inventory transaction model (append-only ledger)."""
     __tablename__ = "inventory_transactions"
+    __table_args__ = (
+        Index("ix_inventory_transactions_record_created", "inventory_record_id", "created_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     inventory_record_id = Column(String(36), ForeignKey("inventory_records.id"), nullable=False)
     transaction_type = Column(String(50), nullable=False)
     quantity = Column(Integer, nullable=False)  # Positive for additions, negative for reductions
+    on_hand_change = Column(Integer, nullable=False, default=0)   # Change to the record's quantity
+    reserved_change = Column(Integer, nullable=False, default=0)  # Change to the record's reserved_quantity
     reference_id = Column(String(100), nullable=True)  # Optional reference (order ID, etc.)
     reference_type = Column(String(50), nullable=True)  # Type of reference (order, shipment, etc.)
     notes = Column(Text, nullable=True)
@@ -339,19 +339,26 @@ def admin_inventory_detail(product_id):
     from models import InventoryRecord
     inventory = InventoryRecord.query.filter_by(product_id=product_id, tenant_id=tenant_id).first()
     
-    # Get transaction history
-    from models import InventoryTransaction
+    # Get one page of transaction history
     transactions = []
+    next_cursor = None
     if inventory:
-        transactions = InventoryTransaction.query.filter_by(
-            inventory_record_id=inventory.id
-        ).order_by(InventoryTransaction.created_at.desc()).all()
+        try:
+            page = InventoryManager().get_inventory_transaction_page(
+                product_id, cursor=request.args.get('cursor')
+            )
+        except ValueError:
+            return redirect(url_for('order_routes.admin_inventory_detail', product_id=product_id))
+        transactions = page['transactions']
+        next_cursor = page['next_cursor']
     
     return render_template(
         'admin/inventory_detail.html',
         product=product,
         inventory=inventory,
         transactions=transactions,
+        next_cursor=next_cursor,
+        is_first_page=not request.args.get('cursor'),
         title=f'Inventory - {product.name}',
         active_nav='inventory'
     )
\ No newline at end of file
@@ -5,6 +5,7 @@ This module provides API endpoints for generating and enhancing content using va
 """
 
 import os
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from uuid import UUID
@@ -16,6 +17,8 @@ from starlette.requests import Request
 from pycommerce.plugins.ai.config import load_ai_config, get_ai_providers
 from pycommerce.plugins.ai.providers import get_ai_provider
 from pycommerce.models.plugin_config import PluginConfigManager
+from pycommerce.services.ai_job_service import get_ai_job_service
+from pycommerce.core.exceptions import AIRateLimitError
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -89,10 +92,15 @@ async def generate_content(
         # Get provider
         provider = get_ai_provider(provider_id, provider_config)
         
-        # Generate content
-        content = provider.generate_text(request.prompt)
+        # Generate content (cached by prompt, rate limited per tenant)
+        result = await asyncio.to_thread(
+            get_ai_job_service().generate_now, request.prompt, "generate", tenant_id, provider=provider
+        )
         
-        return AIContentResponse(content=content)
+        return AIContentResponse(content=result["content"])
+    
+    except AIRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after or 1) + 1)})
     
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
@@ -135,10 +143,15 @@ async def enhance_content(
         # Get provider
         provider = get_ai_provider(provider_id, provider_config)
         
-        # Enhance content
-        content = provider.enhance_text(request.text, request.instructions)
+        # Enhance content (cached by text and instructions, rate limited per tenant)
+        result = await asyncio.to_thread(
+            get_ai_job_service().generate_now, request.text, "enhance", tenant_id, request.instructions, provider=provider
+        )
         
-        return AIContentResponse(content=content)
+        return AIContentResponse(content=result["content"])
+    
+    except AIRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after or 1) + 1)})
     
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
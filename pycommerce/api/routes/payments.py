@@ -307,4 +307,4 @@ async def get_payment_status(payment_id: str, provider: str = Query(..., descrip
     
     except Exception as e:
         logger.error(f"Unexpected payment status error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Payment status check failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Payment status check failed: {str(e)}")
@@ -12,6 +12,8 @@ from fastapi import APIRouter, HTTPException, Query, Depends, Request, Path, Bod
 from fastapi.responses import JSONResponse
 
 from pycommerce.models.product import Product, ProductManager
+from pycommerce.middleware.http_cache import cache_policy, set_cache_validators
+from pycommerce.services.product_cache import purge_product_http_cache
 # Import enhanced query optimizer functions
 try:
     from pycommerce.services.enhanced_query_optimizer import (
@@ -135,6 +137,7 @@ async def get_tenant_id(request: Request) -> str:
              401: {"description": "Unauthorized"},
              500: {"description": "Internal server error"}
          })
+@cache_policy(max_age=0, s_maxage=60, stale_while_revalidate=30)
 async def list_products(
     request: Request,
     category: Optional[str] = Query(None, description="Filter products by category name"),
@@ -175,7 +178,14 @@ async def list_products(
                 limit=limit,
                 offset=offset
             )
-            return result.get("products", [])
+            products = result.get("products", [])
+            set_cache_validators(
+                request,
+                last_modified=max((p["updated_at"] for p in products if p.get("updated_at")), default=None),
+                version=result.get("count"),
+                surrogate_keys=[f"tenant:{tenant_id}:products"]
+            )
+            return products
         else:
             # Fall back to standard method
             logger.info(f"Using standard query method for tenant {tenant_id}")
@@ -186,6 +196,12 @@ async def list_products(
                 max_price=max_price,
                 in_stock=in_stock
             )
+            set_cache_validators(
+                request,
+                last_modified=max((p.updated_at for p in products), default=None),
+                version=len(products),
+                surrogate_keys=[f"tenant:{tenant_id}:products"]
+            )
             return products
     except Exception as e:
         logger.error(f"Error listing products for tenant {tenant_id}: {str(e)}")
@@ -242,7 +258,9 @@ async def search_products(
              404: {"description": "Product not found"},
              500: {"description": "Internal server error"}
          })
+@cache_policy(max_age=0, s_maxage=300, stale_while_revalidate=60)
 async def get_product(
+    request: Request,
     product_id: str = Path(..., description="Unique identifier of the product to retrieve"),
     tenant_id: str = Depends(get_tenant_id)
 ):
@@ -269,12 +287,28 @@ async def get_product(
                     status_code=404,
                     detail=f"Product not found: {product_id}"
                 )
+            set_cache_validators(
+                request,
+                last_modified=product.get("updated_at"),
+                surrogate_keys=[f"product:{product_id}", f"tenant:{tenant_id}:products"]
+            )
             return product
         else:
             # Fall back to standard method
             logger.info(f"Using standard query method to get product {product_id}")
             product_manager = get_product_manager(tenant_id)
-            return product_manager.get(product_id)
+            product = product_manager.get(product_id)
+            if product is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Product not found: {product_id}"
+                )
+            set_cache_validators(
+                request,
+                last_modified=product.updated_at,
+                surrogate_keys=[f"product:{product_id}", f"tenant:{tenant_id}:products"]
+            )
+            return product
     except HTTPException as e:
         # Re-raise HTTP exceptions
         raise
@@ -327,6 +361,7 @@ async def create_product(
         product = product_manager.create(product_data)
         product_id = str(product.id)
         logger.info(f"Created product: {product_id} for tenant {tenant_id}")
+        purge_product_http_cache(tenant_id)
         
         # Invalidate cache if using enhanced query optimizer
         if ENHANCED_OPTIMIZER_AVAILABLE:
@@ -390,6 +425,7 @@ async def update_product(
         product_manager = get_product_manager(tenant_id)
         product = product_manager.update(product_id, product_data)
         logger.info(f"Updated product: {product.id} for tenant {tenant_id}")
+        purge_product_http_cache(tenant_id, product_id)
         
         # Invalidate cache if using enhanced query optimizer
         if ENHANCED_OPTIMIZER_AVAILABLE:
@@ -442,6 +478,7 @@ async def delete_product(
         product_manager = get_product_manager(tenant_id)
         product_manager.delete(product_id)
         logger.info(f"Deleted product: {product_id} for tenant {tenant_id}")
+        purge_product_http_cache(tenant_id, product_id)
         
         # Invalidate cache if using enhanced query optimizer
         if ENHANCED_OPTIMIZER_AVAILABLE:
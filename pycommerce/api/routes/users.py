@@ -13,6 +13,7 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
 from pycommerce.models.user import User, UserManager, UserRole
+from pycommerce.services.password_hashing import PasswordVerifierBusy, get_password_verifier_pool
 
 # Define response models for authentication
 class Token(BaseModel):
@@ -246,6 +247,23 @@ async def get_user_by_email(
         )
 
 
+async def _hash_password(password: str) -> str:
+    """
+    Hash a password on the process-wide verifier pool.
+    
+    Raises:
+        HTTPException: 503 if the pool is saturated
+    """
+    try:
+        return await get_password_verifier_pool().hash(password)
+    except PasswordVerifierBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password changes in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
 @router.post("", response_model=UserResponse)
 async def create_user(
     user_data: UserCreate,
@@ -263,16 +281,16 @@ async def create_user(
     Raises:
         HTTPException: If user creation fails
     """
+    # Hash on the verifier pool so registration cannot stall the event loop
+    password_hash = await _hash_password(user_data.password)
+    
     try:
-        # Extract password from the model
-        password = user_data.password
-        
         # Convert to dict and remove password field
         user_dict = user_data.dict()
         del user_dict["password"]
         
         # Create user with hashed password
-        user = user_manager.create(user_dict, password)
+        user = user_manager.create(user_dict, password_hash=password_hash)
         logger.info(f"Created user: {user.id}")
         return UserResponse.from_user(user)
     except ValueError as e:
@@ -309,8 +327,15 @@ async def login_for_access_token(
     email = form_data.username
     password = form_data.password
     
-    # Authenticate user
-    auth_result = user_manager.authenticate(email, password)
+    # Authenticate user (password checks run off the event loop)
+    try:
+        auth_result = await user_manager.authenticate_async(email, password)
+    except PasswordVerifierBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     if not auth_result:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -351,17 +376,19 @@ async def update_user(
     Raises:
         HTTPException: If the user is not found or update fails
     """
+    # Hash a new password on the verifier pool, off the event loop
+    password_hash = None
+    if user_data.password:
+        password_hash = await _hash_password(user_data.password)
+    
     try:
-        # Extract password if provided
-        password = user_data.password
-        
         # Convert to dict and remove password field
         user_dict = user_data.dict(exclude_unset=True, exclude_none=True)
         if "password" in user_dict:
             del user_dict["password"]
         
         # Update the user
-        user = user_manager.update(user_id, user_dict, password)
+        user = user_manager.update(user_id, user_dict, password_hash=password_hash)
         logger.info(f"Updated user: {user.id}")
         return UserResponse.from_user(user)
     except ValueError as e:
@@ -58,13 +58,20 @@ def init_db() -> None:
             Tenant, 
             Product, 
             InventoryRecord,
+            LowStockCount,
             PluginConfig,
             MediaFile
         )
         
         # Explicitly import models that define tables but aren't in the registry
         # We need to ensure they're imported before creating tables
-        from pycommerce.models.inventory import InventoryTransaction
+        from pycommerce.models.inventory import InventoryTransaction, InventorySnapshot
+        from pycommerce.models.webhook_event import WebhookEvent
+        from pycommerce.models.ai_job import AIJob, AIJobItem, AIResultCache
+        from pycommerce.models.number_sequence import NumberSequence
+        from pycommerce.models.outbox_event import OutboxEvent
+        from pycommerce.models.scheduled_job import ScheduledJob, JobRun
+        from pycommerce.models.auth_revocation import RevokedToken, UserClaimsVersion
         
         # Create tables with checkfirst=True to avoid errors for existing tables
         Base.metadata.create_all(bind=engine, checkfirst=True)
@@ -64,6 +64,14 @@ class PaymentProcessingError(PaymentError):
         super().__init__(message, error_code="payment_processing_error")
 
 
+class PaymentProviderUnavailableError(PaymentProcessingError):
+    """Exception raised when calls to a payment provider are rejected to fail fast."""
+    
+    def __init__(self, message: str = "Payment provider is temporarily unavailable"):
+        super().__init__(message)
+        self.error_code = "payment_provider_unavailable"
+
+
 class PaymentValidationError(PaymentError):
     """Exception raised when payment data validation fails."""
     
@@ -79,6 +87,28 @@ class PaymentRefundError(PaymentError):
         super().__init__(message, error_code="payment_refund_error")
 
 
+class PaymentWebhookError(PaymentError):
+    """Exception raised when a payment webhook is rejected or cannot be processed."""
+
+    def __init__(self, message: str = "Payment webhook could not be processed"):
+        super().__init__(message, error_code="payment_webhook_error")
+
+
+class AIError(PyCommerceError):
+    """Exception raised for errors in AI content generation."""
+
+    def __init__(self, message: str = "An error occurred with AI content generation"):
+        super().__init__(message)
+
+
+class AIRateLimitError(AIError):
+    """Exception raised when a tenant exceeds its AI generation rate limit."""
+
+    def __init__(self, message: str = "AI generation rate limit exceeded", retry_after: float = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
 class ShippingError(PyCommerceError):
     """Exception raised for errors in shipping operations."""
     
@@ -98,3 +128,25 @@ class ConfigError(PyCommerceError):
     
     def __init__(self, message: str = "An error occurred with configuration operations"):
         super().__init__(message)
+
+
+class PageError(PyCommerceError):
+    """Exception raised for errors in page builder operations."""
+    
+    def __init__(self, message: str = "An error occurred with page operations"):
+        super().__init__(message)
+
+
+class PageNotFoundError(PageError):
+    """Exception raised when a page does not exist."""
+    
+    def __init__(self, message: str = "Page not found"):
+        super().__init__(message)
+
+
+class PageVersionConflictError(PageError):
+    """Exception raised when a page was changed since the editor loaded it."""
+    
+    def __init__(self, message: str = "Page was modified by someone else", current_version: int = None):
+        self.current_version = current_version
+        super().__init__(message)
@@ -0,0 +1,212 @@
+"""
+Lazy router registration for PyCommerce.
+
+Admin and plugin route modules pull in managers, payment SDKs, AI providers
+and market analysis on import. This module lets an application register
+those modules by URL prefix and import them on the first request that
+needs them, so workers boot quickly and only pay memory for the admin code
+they actually serve.
+
+Behaviour is controlled by environment variables:
+
+- ``LAZY_ROUTERS``: ``true`` (default) to import routers on first request,
+  ``false`` to import everything at startup.
+- ``WORKER_ROLE``: ``all`` (default), ``storefront`` or ``admin``. Storefront
+  workers never register admin routers and admin workers skip storefront
+  routers, so a reverse proxy can send ``/admin`` to a separate pool, e.g.::
+
+      WORKER_ROLE=storefront gunicorn -k uvicorn.workers.UvicornWorker -w 8 web_app:app -b :8001
+      WORKER_ROLE=admin gunicorn -k uvicorn.workers.UvicornWorker -w 2 web_app:app -b :8002
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+WORKER_ROLES = ("all", "storefront", "admin")
+
+
+def get_worker_role() -> str:
+    """
+    Get the role of this worker process.
+
+    Returns:
+        One of ``all``, ``storefront`` or ``admin``
+    """
+    role = os.environ.get("WORKER_ROLE", "all").strip().lower()
+    if role not in WORKER_ROLES:
+        logger.warning(f"Unknown WORKER_ROLE '{role}', serving all routes")
+        return "all"
+    return role
+
+
+def serves_group(group: str, role: Optional[str] = None) -> bool:
+    """
+    Check whether this worker serves a route group.
+
+    Args:
+        group: ``admin`` or ``storefront``
+        role: Worker role, defaults to get_worker_role()
+
+    Returns:
+        True if routes of the group should be registered
+    """
+    role = role or get_worker_role()
+    return role == "all" or role == group
+
+
+def lazy_routers_enabled() -> bool:
+    """Whether routers should be imported on first request."""
+    return os.environ.get("LAZY_ROUTERS", "true").lower() in ("true", "1", "yes")
+
+
+class LazyRouter:
+    """A route module registered for import on first use."""
+
+    def __init__(
+        self,
+        module_path: str,
+        prefixes: Sequence[str],
+        setup: str = "setup_routes",
+        setup_args: Optional[Callable[[], Sequence[Any]]] = None,
+    ):
+        self.module_path = module_path
+        self.prefixes = [p.rstrip("/") for p in prefixes]
+        self.setup = setup
+        self.setup_args = setup_args
+        self.loaded = False
+        self.failed = False
+
+    def matches(self, path: str) -> bool:
+        """Check whether a request path falls under one of the prefixes."""
+        for prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return True
+        return False
+
+
+class LazyRouterRegistry:
+    """Registry of route modules that are imported and included on demand."""
+
+    def __init__(self, app, templates=None, group: str = "admin"):
+        """
+        Initialize the registry.
+
+        Args:
+            app: The FastAPI application routers are included into
+            templates: Jinja2Templates passed to ``setup_routes(templates)``
+            group: Route group served by this registry (see WORKER_ROLE)
+        """
+        self.app = app
+        self.templates = templates
+        self.group = group
+        self.enabled = serves_group(group)
+        self.lazy = lazy_routers_enabled()
+        self._routers: Dict[str, LazyRouter] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        module_path: str,
+        prefixes: Sequence[str],
+        setup: str = "setup_routes",
+        pass_templates: bool = True,
+    ) -> None:
+        """
+        Register a route module.
+
+        Registering the same module twice is a no-op, so several entry points
+        can declare overlapping route sets.
+
+        Args:
+            module_path: Dotted module path, e.g. ``routes.admin.orders``
+            prefixes: URL prefixes whose first request imports the module
+            setup: Name of the module function returning the router
+            pass_templates: Whether the setup function takes the templates
+        """
+        if not self.enabled or module_path in self._routers:
+            return
+
+        setup_args = (lambda: (self.templates,)) if pass_templates else (lambda: ())
+        self._routers[module_path] = LazyRouter(module_path, prefixes, setup, setup_args)
+        if not self.lazy:
+            self._load(self._routers[module_path])
+
+    def pending(self) -> List[str]:
+        """
+        Get the modules that have not been imported yet.
+
+        Returns:
+            List of module paths
+        """
+        return [m for m, r in self._routers.items() if not r.loaded and not r.failed]
+
+    def load_for_path(self, path: str) -> int:
+        """
+        Import and include every pending router whose prefix matches a path.
+
+        Args:
+            path: The request path
+
+        Returns:
+            The number of routers loaded
+        """
+        candidates = [r for r in self._routers.values() if not r.loaded and not r.failed and r.matches(path)]
+        if not candidates:
+            return 0
+        with self._lock:
+            loaded = 0
+            for router in candidates:
+                if not router.loaded and not router.failed:
+                    loaded += self._load(router)
+            return loaded
+
+    def load_all(self) -> int:
+        """
+        Import and include all pending routers, e.g. before building OpenAPI docs.
+
+        Returns:
+            The number of routers loaded
+        """
+        with self._lock:
+            return sum(self._load(r) for r in list(self._routers.values()) if not r.loaded and not r.failed)
+
+    def _load(self, router: LazyRouter) -> int:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(router.module_path)
+            setup_func = getattr(module, router.setup)
+            api_router = setup_func(*router.setup_args())
+            if api_router is not None:
+                self.app.include_router(api_router)
+            router.loaded = True
+        except Exception as e:
+            # Don't retry on every request; the module is broken until redeploy
+            router.failed = True
+            logger.error(f"Failed to load routes from {router.module_path}: {str(e)}")
+            return 0
+
+        logger.info(
+            f"Loaded routes from {router.module_path} in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        return 1
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware that loads registered routers before routing a request."""
+
+    def __init__(self, app: ASGIApp, registry: LazyRouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and self.registry.lazy:
+            self.registry.load_for_path(scope.get("path", ""))
+        await self.app(scope, receive, send)
@@ -5,12 +5,15 @@ This module provides the base Plugin class and PluginManager for
 extending the SDK's functionality through plugins.
 """
 
+import copy
 import logging
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Type, Any, Callable
 import importlib
 import inspect
 import os
+import threading
+import time
 from fastapi import FastAPI, APIRouter
 import json
 
@@ -208,46 +211,154 @@ class PluginManager:
                 logger.debug(f"Registered API routes for plugin {name} at {prefix}")
 
 
-# ----- Plugin Discovery Functions -----
+# ----- Plugin Configuration -----
+
+# Seconds a worker trusts its cached configuration before comparing versions
+# with the database, so saves made by other workers are picked up
+CONFIG_REVALIDATE_SECONDS = float(os.environ.get("PLUGIN_CONFIG_REVALIDATE_SECONDS", "5"))
+
+# Callbacks run as callback(plugin_id, tenant_id) after a configuration changes
+_config_listeners: List[Callable[[str, Optional[str]], None]] = []
+
+
+def add_config_listener(callback: Callable[[str, Optional[str]], None]) -> None:
+    """
+    Register a callback to run whenever a plugin configuration changes.
+    
+    Used to invalidate data compiled from plugin configuration, such as
+    cached shipping rate tables. Listeners only see changes made in this
+    process, so caches should also expire on their own.
+    
+    Args:
+        callback: Function called with the plugin ID and tenant ID (None for global)
+    """
+    if callback not in _config_listeners:
+        _config_listeners.append(callback)
+
+
+def _notify_config_changed(plugin_id: str, tenant_id: Optional[str]) -> None:
+    """Run the registered configuration listeners."""
+    for callback in list(_config_listeners):
+        try:
+            callback(plugin_id, str(tenant_id) if tenant_id else None)
+        except Exception as e:
+            logger.error(f"Error in plugin configuration listener: {str(e)}")
+
+
+def _plugin_type_for(plugin_id: str) -> str:
+    """Guess the plugin type stored alongside a configuration."""
+    if plugin_id in ("stripe", "paypal") or "payment" in plugin_id:
+        return "payment"
+    if "shipping" in plugin_id:
+        return "shipping"
+    if plugin_id.startswith("ai"):
+        return "ai"
+    return "general"
+
+
+class _TenantConfigs:
+    """Cached configuration rows of one tenant: plugin_id -> (version, enabled, config)."""
+    
+    __slots__ = ("entries", "checked_at")
+    
+    def __init__(self, entries: Dict[str, tuple], checked_at: float):
+        self.entries = entries
+        self.checked_at = checked_at
+
+
+# Process-wide cache shared by all PluginConfigManager instances, keyed by tenant ID
+_config_cache: Dict[Optional[str], _TenantConfigs] = {}
+_config_cache_lock = threading.Lock()
+
 
 class PluginConfigManager:
     """
     Manages plugin configuration storage and retrieval.
     
-    This class provides methods to save and retrieve plugin configurations,
-    which can be tenant-specific or global.
+    Configurations are stored in the plugin_configs table and can be
+    tenant-specific or global. Reads go through a process-wide cache that
+    loads all configurations of a tenant in one query; after
+    CONFIG_REVALIDATE_SECONDS the cache compares row versions with the
+    database (a query that skips the config payloads) and reloads the
+    tenant only if something changed. Instances are cheap, so creating
+    one per request still hits the cache.
     """
     
-    def __init__(self, config_dir=None):
+    def __init__(self, config_dir=None, session_factory=None):
         """
         Initialize the plugin configuration manager.
         
         Args:
-            config_dir: Directory to store configuration files (optional)
+            config_dir: Unused, kept for backwards compatibility
+            session_factory: Callable returning a database session (defaults to SessionLocal)
         """
+        if config_dir:
+            logger.warning("File-based plugin configuration is not supported, using the database")
         self.config_dir = config_dir
-        if not self.config_dir:
-            # Use a memory-based configuration store for now
-            self._config_store = {}
+        self._session_factory = session_factory
+    
+    def _session(self):
+        if self._session_factory is None:
+            from pycommerce.core.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+    
+    @staticmethod
+    def _tenant_key(tenant_id) -> Optional[str]:
+        return str(tenant_id) if tenant_id else None
+    
+    @staticmethod
+    def _tenant_filter(query, tenant_key: Optional[str]):
+        from pycommerce.models.db_registry import PluginConfig
+        if tenant_key is None:
+            return query.filter(PluginConfig.tenant_id.is_(None))
+        return query.filter(PluginConfig.tenant_id == tenant_key)
     
-    def save_config(self, plugin_id: str, tenant_id: str, config: Dict[str, Any]) -> None:
+    def _load_tenant(self, tenant_key: Optional[str]) -> _TenantConfigs:
+        """Get a tenant's cached configurations, loading or revalidating as needed."""
+        from pycommerce.models.db_registry import PluginConfig
+        
+        cached = _config_cache.get(tenant_key)
+        now = time.monotonic()
+        if cached is not None and now - cached.checked_at < CONFIG_REVALIDATE_SECONDS:
+            return cached
+        
+        with self._session() as session:
+            if cached is not None:
+                versions = self._tenant_filter(
+                    session.query(PluginConfig.plugin_id, PluginConfig.version), tenant_key
+                ).all()
+                if {plugin_id: version for plugin_id, version in versions} == {
+                    plugin_id: entry[0] for plugin_id, entry in cached.entries.items()
+                }:
+                    cached.checked_at = now
+                    return cached
+            
+            rows = self._tenant_filter(
+                session.query(PluginConfig.plugin_id, PluginConfig.version, PluginConfig.enabled, PluginConfig.config),
+                tenant_key
+            ).all()
+        
+        loaded = _TenantConfigs(
+            {row.plugin_id: (row.version, row.enabled, row.config or {}) for row in rows},
+            now
+        )
+        with _config_cache_lock:
+            _config_cache[tenant_key] = loaded
+        return loaded
+    
+    def get_configs(self, tenant_id: str = None) -> Dict[str, Dict[str, Any]]:
         """
-        Save plugin configuration.
+        Get all plugin configurations of a tenant.
         
         Args:
-            plugin_id: ID of the plugin
             tenant_id: ID of the tenant (or None for global config)
-            config: Configuration dictionary to save
-        """
-        key = f"{plugin_id}:{tenant_id}" if tenant_id else plugin_id
-        
-        if self.config_dir:
-            # File-based storage (not implemented yet)
-            logger.warning("File-based configuration storage not implemented yet")
             
-        # Memory-based storage
-        self._config_store[key] = config
-        logger.debug(f"Saved configuration for plugin {plugin_id}, tenant {tenant_id}")
+        Returns:
+            Dictionary mapping plugin IDs to configuration dictionaries
+        """
+        entries = self._load_tenant(self._tenant_key(tenant_id)).entries
+        return {plugin_id: copy.deepcopy(entry[2]) for plugin_id, entry in entries.items()}
     
     def get_config(self, plugin_id: str, tenant_id: str = None) -> Dict[str, Any]:
         """
@@ -260,36 +371,170 @@ class PluginConfigManager:
         Returns:
             Configuration dictionary, or empty dict if not found
         """
-        key = f"{plugin_id}:{tenant_id}" if tenant_id else plugin_id
+        entry = self._load_tenant(self._tenant_key(tenant_id)).entries.get(plugin_id)
+        return copy.deepcopy(entry[2]) if entry else {}
+    
+    def is_enabled(self, plugin_id: str, tenant_id: str = None) -> bool:
+        """
+        Check whether a plugin is enabled.
         
-        if self.config_dir:
-            # File-based storage (not implemented yet)
-            logger.warning("File-based configuration storage not implemented yet")
-            return {}
+        Args:
+            plugin_id: ID of the plugin
+            tenant_id: ID of the tenant (or None for global config)
             
-        # Memory-based storage
-        return self._config_store.get(key, {})
+        Returns:
+            The stored flag, or True if the plugin has no configuration
+        """
+        entry = self._load_tenant(self._tenant_key(tenant_id)).entries.get(plugin_id)
+        return entry[1] if entry else True
     
-    def delete_config(self, plugin_id: str, tenant_id: str = None) -> None:
+    def get_version(self, plugin_id: str, tenant_id: str = None) -> int:
         """
-        Delete plugin configuration.
+        Get the version of a plugin's configuration row.
+        
+        Data compiled from a configuration can be keyed on this version, so
+        saves made by other workers are seen within CONFIG_REVALIDATE_SECONDS.
         
         Args:
             plugin_id: ID of the plugin
             tenant_id: ID of the tenant (or None for global config)
+            
+        Returns:
+            The row version, or 0 if the plugin has no configuration
         """
-        key = f"{plugin_id}:{tenant_id}" if tenant_id else plugin_id
+        entry = self._load_tenant(self._tenant_key(tenant_id)).entries.get(plugin_id)
+        return entry[0] if entry else 0
+    
+    def save_config(self, plugin_id: str, tenant_id: str, config: Dict[str, Any], plugin_type: str = None) -> None:
+        """
+        Save plugin configuration.
+        
+        Args:
+            plugin_id: ID of the plugin
+            tenant_id: ID of the tenant (or None for global config)
+            config: Configuration dictionary to save
+            plugin_type: Plugin type, e.g. ``payment`` (guessed from the ID if omitted)
+        """
+        self._write(plugin_id, tenant_id, {"config": config}, plugin_type)
+        logger.debug(f"Saved configuration for plugin {plugin_id}, tenant {tenant_id}")
+    
+    def set_enabled(self, plugin_id: str, tenant_id: str, enabled: bool, plugin_type: str = None) -> None:
+        """
+        Enable or disable a plugin.
         
-        if self.config_dir:
-            # File-based storage (not implemented yet)
-            logger.warning("File-based configuration storage not implemented yet")
+        Args:
+            plugin_id: ID of the plugin
+            tenant_id: ID of the tenant (or None for global config)
+            enabled: Whether the plugin should be enabled
+            plugin_type: Plugin type, e.g. ``payment`` (guessed from the ID if omitted)
+        """
+        self._write(plugin_id, tenant_id, {"enabled": enabled}, plugin_type)
+    
+    def _write(self, plugin_id: str, tenant_id, values: Dict[str, Any], plugin_type: Optional[str]) -> None:
+        """Insert or update a configuration row and bump its version."""
+        from pycommerce.models.db_registry import PluginConfig
+        
+        tenant_key = self._tenant_key(tenant_id)
+        with self._session() as session:
+            row = self._tenant_filter(
+                session.query(PluginConfig).filter(PluginConfig.plugin_id == plugin_id), tenant_key
+            ).with_for_update().first()
             
-        # Memory-based storage
-        if key in self._config_store:
-            del self._config_store[key]
+            if row:
+                for key, value in values.items():
+                    setattr(row, key, value)
+                row.version = PluginConfig.version + 1
+            else:
+                row = PluginConfig(
+                    tenant_id=tenant_key,
+                    plugin_id=plugin_id,
+                    plugin_type=plugin_type or _plugin_type_for(plugin_id),
+                    config=values.get("config", {}),
+                    enabled=values.get("enabled", True),
+                    version=1,
+                )
+                session.add(row)
+            session.commit()
+        
+        self.invalidate(tenant_id)
+        _notify_config_changed(plugin_id, tenant_key)
+    
+    def delete_config(self, plugin_id: str, tenant_id: str = None) -> bool:
+        """
+        Delete plugin configuration.
+        
+        Args:
+            plugin_id: ID of the plugin
+            tenant_id: ID of the tenant (or None for global config)
+            
+        Returns:
+            True if a configuration was deleted
+        """
+        from pycommerce.models.db_registry import PluginConfig
+        
+        tenant_key = self._tenant_key(tenant_id)
+        with self._session() as session:
+            count = self._tenant_filter(
+                session.query(PluginConfig).filter(PluginConfig.plugin_id == plugin_id), tenant_key
+            ).delete(synchronize_session=False)
+            session.commit()
+        
+        self.invalidate(tenant_id)
+        _notify_config_changed(plugin_id, tenant_key)
+        if count:
             logger.debug(f"Deleted configuration for plugin {plugin_id}, tenant {tenant_id}")
+        return count > 0
+    
+    def list_configs(self, plugin_id: str = None, tenant_id: str = None) -> List[Dict[str, Any]]:
+        """
+        List stored configurations, optionally filtered by plugin or tenant.
+        
+        This reads the database directly and is meant for admin screens.
+        
+        Args:
+            plugin_id: Optional plugin ID to filter by
+            tenant_id: Optional tenant ID to filter by
+            
+        Returns:
+            List of dictionaries with plugin_id, tenant_id, enabled, version and config
+        """
+        from pycommerce.models.db_registry import PluginConfig
+        
+        with self._session() as session:
+            query = session.query(PluginConfig)
+            if plugin_id:
+                query = query.filter(PluginConfig.plugin_id == plugin_id)
+            if tenant_id:
+                query = query.filter(PluginConfig.tenant_id == str(tenant_id))
+            return [
+                {
+                    "plugin_id": row.plugin_id,
+                    "tenant_id": row.tenant_id,
+                    "enabled": row.enabled,
+                    "version": row.version,
+                    "config": row.config or {},
+                }
+                for row in query.all()
+            ]
+    
+    @staticmethod
+    def invalidate(tenant_id: str = None, all_tenants: bool = False) -> None:
+        """
+        Drop cached configurations in this process.
+        
+        Args:
+            tenant_id: ID of the tenant to drop (None for the global config)
+            all_tenants: Drop every tenant's configurations
+        """
+        with _config_cache_lock:
+            if all_tenants:
+                _config_cache.clear()
+            else:
+                _config_cache.pop(str(tenant_id) if tenant_id else None, None)
 
 
+# ----- Plugin Discovery Functions -----
+
 def get_available_plugins() -> List[Dict[str, Any]]:
     """
     Get a list of all available plugins in the system.
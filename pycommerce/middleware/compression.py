@@ -0,0 +1,328 @@
+"""
+Response compression middleware for PyCommerce.
+
+This module provides a streaming ASGI middleware that compresses HTML and
+JSON responses with brotli, zstd or gzip depending on what the client accepts
+and which optional codecs are installed. Compression levels are chosen per
+route class so large admin/API payloads and storefront pages can be tuned
+separately. Streaming responses are compressed chunk by chunk and never
+buffered in full.
+"""
+
+import logging
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional codecs
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MINIMUM_SIZE = 1024
+
+DEFAULT_CONTENT_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Compression levels per route class: (gzip, brotli, zstd)
+ROUTE_CLASS_LEVELS: Dict[str, Tuple[int, int, int]] = {
+    # Large JSON payloads; favour CPU over ratio
+    "api": (5, 4, 3),
+    # Admin pages and exports; few users, big tables
+    "admin": (6, 5, 6),
+    # Storefront HTML; many small pages served repeatedly
+    "storefront": (6, 5, 3),
+}
+
+DEFAULT_ROUTE_CLASSES: Sequence[Tuple[str, str]] = (
+    ("/api/", "api"),
+    ("/admin/api/", "api"),
+    ("/admin/", "admin"),
+    ("/", "storefront"),
+)
+
+
+class _GzipCompressor:
+    """Streaming gzip compressor."""
+
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    """Streaming brotli compressor."""
+
+    encoding = "br"
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    """Streaming zstd compressor."""
+
+    encoding = "zstd"
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """
+    Get the encodings this process can produce, in order of preference.
+
+    Returns:
+        List of content-coding names
+    """
+    encodings = []
+    if BROTLI_AVAILABLE:
+        encodings.append("br")
+    if ZSTD_AVAILABLE:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, supported: Optional[Sequence[str]] = None) -> Optional[str]:
+    """
+    Pick a content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: The Accept-Encoding request header
+        supported: Encodings to choose from, in order of server preference
+
+    Returns:
+        The chosen encoding, or None to send the response uncompressed
+    """
+    supported = list(supported or available_encodings())
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best = None
+    best_q = 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def create_compressor(encoding: str, route_class: str):
+    """
+    Create a streaming compressor for an encoding and route class.
+
+    Args:
+        encoding: One of ``br``, ``zstd`` or ``gzip``
+        route_class: A key of ROUTE_CLASS_LEVELS
+
+    Returns:
+        A compressor with ``compress()`` and ``finish()`` methods
+    """
+    gzip_level, brotli_level, zstd_level = ROUTE_CLASS_LEVELS.get(
+        route_class, ROUTE_CLASS_LEVELS["storefront"]
+    )
+    if encoding == "br":
+        return _BrotliCompressor(brotli_level)
+    if encoding == "zstd":
+        return _ZstdCompressor(zstd_level)
+    return _GzipCompressor(gzip_level)
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses HTML/JSON responses, including streaming ones."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        content_types: Sequence[str] = DEFAULT_CONTENT_TYPES,
+        route_classes: Sequence[Tuple[str, str]] = DEFAULT_ROUTE_CLASSES,
+        excluded_paths: Sequence[str] = ("/static/",),
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            minimum_size: Responses smaller than this many bytes are sent as-is
+            content_types: Content types eligible for compression
+            route_classes: (path prefix, route class) pairs, first match wins
+            excluded_paths: Path prefixes never compressed (e.g. precompressed static files)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.route_classes = list(route_classes)
+        self.excluded_paths = tuple(excluded_paths)
+
+    def route_class_for(self, path: str) -> str:
+        """
+        Get the route class for a request path.
+
+        Args:
+            path: The request path
+
+        Returns:
+            The route class name
+        """
+        for prefix, route_class in self.route_classes:
+            if path.startswith(prefix):
+                return route_class
+        return "storefront"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        if path.startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, self.route_class_for(path), send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state for CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, route_class: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.route_class = route_class
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _eligible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(self.middleware.content_types)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the start message until we know whether to compress
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            if status < 200 or status in (204, 304) or not self._eligible(headers):
+                self.passthrough = True
+            return
+
+        if message_type != "http.response.body":
+            # e.g. http.response.pathsend: the server sends the file itself
+            if self.start_message is not None:
+                start_message, self.start_message = self.start_message, None
+                self.passthrough = True
+                await self._send(start_message)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+
+            if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self._send(start_message)
+                await self._send(message)
+                return
+
+            self.compressor = create_compressor(self.encoding, self.route_class)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # The representation changes, so a strong validator would be wrong
+                headers["ETag"] = f"W/{headers['etag']}"
+
+            if more_body:
+                del headers["Content-Length"]
+                await self._send(start_message)
+                chunk = self.compressor.compress(body)
+                if chunk:
+                    await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+                return
+
+            compressed = self.compressor.compress(body) + self.compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(start_message)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+            await self._send({"type": "http.response.body", "body": chunk})
+        elif chunk:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
@@ -0,0 +1,330 @@
+"""
+HTTP caching middleware for PyCommerce.
+
+This module adds HTTP validators (ETag, Last-Modified) and cache headers
+(Cache-Control, Vary, Surrogate-Key) to catalog and storefront responses,
+and answers conditional requests with 304 Not Modified.
+
+Routes opt in by declaring a policy with the ``cache_policy`` decorator and,
+optionally, reporting the version of the entities they rendered with
+``set_cache_validators``. When a public response's validators are already
+known, a matching conditional request is answered by the middleware without
+calling the route handler (and therefore without touching the database).
+"""
+
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Content types whose bodies may be hashed when a route reports no version
+_HASHABLE_CONTENT_TYPES = ("application/json", "text/html")
+
+# Process-local validator cache: request key -> (entry, expiry timestamp)
+_validator_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+# Surrogate key -> request keys tagged with it
+_surrogate_index: Dict[str, Set[str]] = {}
+_MAX_VALIDATOR_ENTRIES = 10000
+
+
+class CachePolicy:
+    """Caching policy declared by a route."""
+
+    def __init__(
+        self,
+        max_age: int = 0,
+        s_maxage: Optional[int] = None,
+        private: bool = False,
+        stale_while_revalidate: Optional[int] = None,
+        vary: Optional[Iterable[str]] = None,
+        no_store: bool = False,
+    ):
+        """
+        Initialize a cache policy.
+
+        Args:
+            max_age: Browser cache lifetime in seconds
+            s_maxage: Shared (CDN) cache lifetime in seconds
+            private: Whether the response is user-specific
+            stale_while_revalidate: Seconds a stale response may be served while revalidating
+            vary: Request headers the response varies on (tenant headers are always added)
+            no_store: Whether the response must not be stored at all
+        """
+        self.max_age = max_age
+        self.s_maxage = s_maxage
+        self.private = private
+        self.stale_while_revalidate = stale_while_revalidate
+        self.no_store = no_store
+
+        vary_headers = ["Accept-Encoding", "Host", "X-Tenant-ID"]
+        for header in vary or []:
+            if header not in vary_headers:
+                vary_headers.append(header)
+        self.vary = vary_headers
+
+    @property
+    def shared(self) -> bool:
+        """Whether responses under this policy may be answered from the validator cache."""
+        return not self.private and not self.no_store
+
+    def cache_control(self) -> str:
+        """
+        Build the Cache-Control header value for this policy.
+
+        Returns:
+            The Cache-Control header value
+        """
+        if self.no_store:
+            return "no-store"
+
+        directives = ["private" if self.private else "public", f"max-age={self.max_age}"]
+        if self.s_maxage is not None and not self.private:
+            directives.append(f"s-maxage={self.s_maxage}")
+        if self.stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        if self.max_age == 0:
+            directives.append("must-revalidate")
+        return ", ".join(directives)
+
+    def validator_ttl(self) -> int:
+        """
+        Get how long validators may be reused without asking the route.
+
+        Returns:
+            The time-to-live in seconds
+        """
+        return max(self.s_maxage or 0, self.max_age, 1)
+
+
+def cache_policy(**policy_kwargs) -> Callable:
+    """
+    Declare the HTTP cache policy for a route handler.
+
+    The handler is returned unchanged so FastAPI still sees its signature;
+    the policy is attached as an attribute and read by the middleware.
+
+    Args:
+        **policy_kwargs: Keyword arguments for CachePolicy
+
+    Returns:
+        Decorator attaching the policy to the handler
+    """
+    policy = CachePolicy(**policy_kwargs)
+
+    def decorator(func: Callable) -> Callable:
+        func.__cache_policy__ = policy
+        return func
+
+    return decorator
+
+
+def set_cache_validators(
+    request: Request,
+    last_modified: Optional[Any] = None,
+    version: Optional[Any] = None,
+    surrogate_keys: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Report the version of the entities a route rendered.
+
+    Args:
+        request: The current request
+        last_modified: The newest ``updated_at`` of the rendered entities (datetime or ISO string)
+        version: Any additional value that changes when the response changes (e.g. a count)
+        surrogate_keys: Keys used to purge the response from caches
+    """
+    if isinstance(last_modified, str):
+        try:
+            last_modified = datetime.fromisoformat(last_modified)
+        except ValueError:
+            last_modified = None
+    request.state.cache_last_modified = last_modified
+    request.state.cache_version = version
+    request.state.cache_surrogate_keys = list(surrogate_keys or [])
+
+
+def purge_surrogate_key(key: str) -> int:
+    """
+    Drop every cached validator tagged with a surrogate key.
+
+    Args:
+        key: The surrogate key, e.g. ``product:<id>`` or ``tenant:<id>:products``
+
+    Returns:
+        The number of cached validators removed
+    """
+    request_keys = _surrogate_index.pop(key, set())
+    for request_key in request_keys:
+        _validator_cache.pop(request_key, None)
+    if request_keys:
+        logger.debug(f"Purged {len(request_keys)} cached validators for surrogate key {key}")
+    return len(request_keys)
+
+
+def clear_validator_cache() -> None:
+    """Clear all cached validators."""
+    _validator_cache.clear()
+    _surrogate_index.clear()
+
+
+def _tenant_for_request(request: Request) -> str:
+    """Resolve the tenant a request is scoped to for cache keys."""
+    tenant_id = getattr(request.state, "tenant_id", None)
+    if tenant_id:
+        return str(tenant_id)
+    return request.headers.get("X-Tenant-ID") or request.headers.get("host", "default")
+
+
+def _request_key(request: Request) -> str:
+    """Build the validator cache key for a request."""
+    query = request.url.query
+    path = f"{request.url.path}?{query}" if query else request.url.path
+    return f"{_tenant_for_request(request)}:{path}"
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Normalize a datetime to an aware UTC datetime with second precision."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate the conditional headers of a request against validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _to_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return last_modified <= since
+    return False
+
+
+def _not_modified_response(entry: Dict[str, Any]) -> Response:
+    """Build a 304 response carrying the cached validator headers."""
+    return Response(status_code=304, headers=entry["headers"])
+
+
+def _store_validators(request_key: str, entry: Dict[str, Any], ttl: int) -> None:
+    """Remember validators for a public response."""
+    if len(_validator_cache) >= _MAX_VALIDATOR_ENTRIES:
+        # Drop expired entries first, then the oldest insertions
+        now = time.monotonic()
+        for key in [k for k, (_, expiry) in _validator_cache.items() if expiry <= now]:
+            _validator_cache.pop(key, None)
+        while len(_validator_cache) >= _MAX_VALIDATOR_ENTRIES:
+            _validator_cache.pop(next(iter(_validator_cache)))
+
+    _validator_cache[request_key] = (entry, time.monotonic() + ttl)
+    for surrogate_key in entry["surrogate_keys"]:
+        _surrogate_index.setdefault(surrogate_key, set()).add(request_key)
+
+
+class HTTPCacheMiddleware(BaseHTTPMiddleware):
+    """Middleware that adds validators and cache headers to opted-in routes."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+
+        request_key = _request_key(request)
+        has_conditional = (
+            "if-none-match" in request.headers or "if-modified-since" in request.headers
+        )
+
+        # Answer conditional requests from known validators without calling the route
+        if has_conditional:
+            cached = _validator_cache.get(request_key)
+            if cached is not None:
+                entry, expiry = cached
+                if expiry > time.monotonic():
+                    if _is_not_modified(request, entry["etag"], entry["last_modified"]):
+                        return _not_modified_response(entry)
+                else:
+                    _validator_cache.pop(request_key, None)
+
+        response = await call_next(request)
+
+        endpoint = request.scope.get("endpoint")
+        policy: Optional[CachePolicy] = getattr(endpoint, "__cache_policy__", None)
+        if policy is None or response.status_code != 200:
+            return response
+
+        response.headers["Cache-Control"] = policy.cache_control()
+        response.headers["Vary"] = ", ".join(policy.vary)
+        if policy.no_store:
+            return response
+
+        last_modified = getattr(request.state, "cache_last_modified", None)
+        version = getattr(request.state, "cache_version", None)
+        surrogate_keys: List[str] = getattr(request.state, "cache_surrogate_keys", None) or []
+        if last_modified is not None:
+            last_modified = _to_utc(last_modified)
+
+        if last_modified is not None or version is not None:
+            # Weak ETag derived from entity versions; the body is never read
+            seed = f"{request_key}|{last_modified.isoformat() if last_modified else ''}|{version}"
+            etag = f'W/"{hashlib.sha1(seed.encode()).hexdigest()[:20]}"'
+        else:
+            content_type = response.headers.get("content-type", "")
+            if not content_type.startswith(_HASHABLE_CONTENT_TYPES):
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+            # Copy the raw header list; a dict would keep one of several Set-Cookie headers
+            raw_headers = list(response.headers.raw)
+            response = Response(content=body, status_code=response.status_code)
+            response.raw_headers = raw_headers
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": response.headers["Cache-Control"],
+            "Vary": response.headers["Vary"],
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        if surrogate_keys:
+            headers["Surrogate-Key"] = " ".join(surrogate_keys)
+        for name, value in headers.items():
+            response.headers[name] = value
+
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "surrogate_keys": surrogate_keys,
+            "headers": headers,
+        }
+        if policy.shared:
+            _store_validators(request_key, entry, policy.validator_ttl())
+
+        if has_conditional and _is_not_modified(request, etag, last_modified):
+            return _not_modified_response(entry)
+        return response
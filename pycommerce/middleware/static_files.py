@@ -0,0 +1,94 @@
+"""
+Static file serving for PyCommerce.
+
+This module extends Starlette's StaticFiles to serve the precompressed
+variants produced by ``scripts/setup/build_static.py`` and to mark
+fingerprinted build output as immutable.
+"""
+
+import logging
+import os
+from mimetypes import guess_type
+from typing import List, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from pycommerce.utils.static_assets import is_fingerprinted
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# Preferred order when the client accepts several encodings
+_ENCODING_SUFFIXES: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Parse an Accept-Encoding header, ignoring encodings with q=0."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves ``.br``/``.gz`` siblings by Accept-Encoding.
+
+    Files are still sent with FileResponse, which uses the ASGI
+    ``http.response.pathsend`` extension for zero-copy sends when the
+    server supports it.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        relative_path = os.path.relpath(str(full_path), str(self.directory)).replace(os.sep, "/")
+
+        response = None
+        for encoding, suffix in _ENCODING_SUFFIXES:
+            if encoding not in accepted and "*" not in accepted:
+                continue
+            candidate = f"{full_path}{suffix}"
+            try:
+                candidate_stat = os.stat(candidate)
+            except OSError:
+                continue
+            # Keep the media type of the original file, not of the .gz/.br sibling
+            response = FileResponse(
+                candidate,
+                status_code=status_code,
+                stat_result=candidate_stat,
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+            )
+            response.headers["content-encoding"] = encoding
+            break
+
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["vary"] = "Accept-Encoding"
+        if is_fingerprinted(relative_path):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
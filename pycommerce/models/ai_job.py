@@ -0,0 +1,106 @@
+"""
+AI job module for PyCommerce.
+
+This module defines the models behind batched AI content generation: jobs,
+their items (one prompt each) and the prompt-hash result cache.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+
+from pycommerce.core.db import Base
+
+# Job lifecycle
+AI_JOB_QUEUED = "queued"
+AI_JOB_RUNNING = "running"
+AI_JOB_COMPLETED = "completed"
+AI_JOB_CANCELLED = "cancelled"
+
+# Item lifecycle: pending items (also while a retry is scheduled) are claimed
+# as running and end as done, failed or cancelled
+AI_ITEM_PENDING = "pending"
+AI_ITEM_RUNNING = "running"
+AI_ITEM_DONE = "done"
+AI_ITEM_FAILED = "failed"
+AI_ITEM_CANCELLED = "cancelled"
+
+AI_ITEM_STATUSES = (AI_ITEM_PENDING, AI_ITEM_RUNNING, AI_ITEM_DONE, AI_ITEM_FAILED, AI_ITEM_CANCELLED)
+
+# Job kinds
+AI_JOB_GENERATE = "generate"
+AI_JOB_ENHANCE = "enhance"
+AI_JOB_PRODUCT_DESCRIPTIONS = "product_descriptions"
+
+AI_JOB_KINDS = (AI_JOB_GENERATE, AI_JOB_ENHANCE, AI_JOB_PRODUCT_DESCRIPTIONS)
+
+
+class AIJob(Base):
+    """A batch of AI generation requests submitted together."""
+    __tablename__ = "ai_jobs"
+    __table_args__ = (
+        Index("ix_ai_jobs_tenant_created", "tenant_id", "created_at"),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id = Column(String(36), nullable=True)
+    kind = Column(String(30), nullable=False)
+    status = Column(String(20), nullable=False, default=AI_JOB_QUEUED)
+    total = Column(Integer, nullable=False, default=0)
+    # JSON: provider, style/instructions, whether results are applied to products
+    options = Column(Text, nullable=True)
+    created_by = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<AIJob {self.id} {self.kind} {self.status}>"
+
+
+class AIJobItem(Base):
+    """One prompt of an AI job and its result."""
+    __tablename__ = "ai_job_items"
+    __table_args__ = (
+        Index("ix_ai_job_items_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_ai_job_items_job_position", "job_id", "position"),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String(36), ForeignKey("ai_jobs.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = Column(String(36), nullable=True)
+    position = Column(Integer, nullable=False, default=0)
+    # What the result is for, e.g. a product ID
+    target_id = Column(String(64), nullable=True)
+    prompt = Column(Text, nullable=False)
+    prompt_hash = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False, default=AI_ITEM_PENDING)
+    result = Column(Text, nullable=True)
+    cached = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<AIJobItem {self.job_id}#{self.position} {self.status}>"
+
+
+class AIResultCache(Base):
+    """Generated text keyed by a hash of the provider, model and prompt."""
+    __tablename__ = "ai_result_cache"
+    __table_args__ = {'extend_existing': True}
+
+    prompt_hash = Column(String(64), primary_key=True)
+    provider = Column(String(50), nullable=False)
+    result = Column(Text, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_hit_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<AIResultCache {self.prompt_hash[:12]} {self.provider}>"
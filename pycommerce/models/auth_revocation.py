@@ -0,0 +1,43 @@
+"""
+Authentication revocation module for PyCommerce.
+
+This module defines the RevokedToken and UserClaimsVersion models, which
+hold token revocations and per-user claims versions shared by every worker.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from pycommerce.core.db import Base
+
+
+class RevokedToken(Base):
+    """A token revoked before its expiry, e.g. on logout."""
+    __tablename__ = "auth_revoked_tokens"
+    __table_args__ = {'extend_existing': True}
+
+    # 64-bit digest of the token's jti claim
+    token_digest = Column(BigInteger, primary_key=True, autoincrement=False)
+    # The token's exp claim (epoch seconds); the row is pruned after it
+    expires_at = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.token_digest} until {self.expires_at}>"
+
+
+class UserClaimsVersion(Base):
+    """The current claims version of a user and when their tokens were last revoked."""
+    __tablename__ = "auth_user_versions"
+    __table_args__ = {'extend_existing': True}
+
+    user_id = Column(String(36), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Tokens issued before this time (epoch seconds) are revoked
+    not_before = Column(Integer, nullable=True)
+    # Tokens embedding an older claims version are revoked
+    not_before_version = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserClaimsVersion {self.user_id} v{self.version}>"
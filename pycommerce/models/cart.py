@@ -2,7 +2,8 @@
 Cart-related models and management.
 
 This module defines the Cart model and CartManager class for
-managing shopping carts in the PyCommerce SDK.
+managing shopping carts in the PyCommerce SDK. Carts are kept in a shared
+cart repository (see pycommerce.services.cart_store).
 """
 
 import logging
@@ -48,10 +49,18 @@ class CartManager:
     Manages cart operations.
     """
     
-    def __init__(self):
-        """Initialize a new CartManager."""
-        self._carts: Dict[UUID, Cart] = {}
-        self._user_carts: Dict[UUID, UUID] = {}  # Maps user_id to cart_id
+    def __init__(self, repository=None):
+        """
+        Initialize a new CartManager.
+        
+        Args:
+            repository: CartRepository to keep carts in (defaults to the
+                process-wide repository, shared by all CartManagers)
+        """
+        if repository is None:
+            from pycommerce.services.cart_store import get_cart_repository
+            repository = get_cart_repository()
+        self._repository = repository
     
     def create(self, user_id: Optional[UUID] = None) -> Cart:
         """
@@ -64,11 +73,7 @@ class CartManager:
             The created cart
         """
         cart = Cart(user_id=user_id)
-        self._carts[cart.id] = cart
-        
-        # Associate cart with user if provided
-        if user_id:
-            self._user_carts[user_id] = cart.id
+        self._repository.add(cart)
         
         logger.debug(f"Created cart: {cart.id}")
         return cart
@@ -95,10 +100,11 @@ class CartManager:
             except ValueError:
                 raise CartError(f"Invalid cart ID: {cart_id}")
         
-        if cart_id not in self._carts:
+        cart = self._repository.get(cart_id)
+        if cart is None:
             raise CartError(f"Cart not found: {cart_id}")
         
-        return self._carts[cart_id]
+        return cart
     
     def get_user_cart(self, user_id: Union[UUID, str]) -> Cart:
         """
@@ -122,11 +128,12 @@ class CartManager:
             except ValueError:
                 raise CartError(f"Invalid user ID: {user_id}")
         
-        if user_id not in self._user_carts:
+        cart = self._repository.get_for_user(user_id)
+        if cart is None:
             # Create a new cart for this user
             return self.create(user_id)
         
-        return self.get(self._user_carts[user_id])
+        return cart
     
     def add_item(self, cart_id: Union[UUID, str], 
                 product_id: Union[UUID, str], 
@@ -164,6 +171,7 @@ class CartManager:
                 # Update quantity
                 item.quantity += quantity
                 cart.updated_at = datetime.now()
+                self._repository.increment(cart, product_id, quantity)
                 logger.debug(f"Updated item quantity in cart {cart.id}: product {product_id}, new quantity {item.quantity}")
                 return cart
         
@@ -171,6 +179,7 @@ class CartManager:
         try:
             cart.items.append(CartItem(product_id=product_id, quantity=quantity))
             cart.updated_at = datetime.now()
+            self._repository.increment(cart, product_id, quantity)
             logger.debug(f"Added item to cart {cart.id}: product {product_id}, quantity {quantity}")
             return cart
         except ValueError as e:
@@ -218,6 +227,7 @@ class CartManager:
                     logger.debug(f"Updated item in cart {cart.id}: product {product_id}, quantity {quantity}")
                 
                 cart.updated_at = datetime.now()
+                self._repository.save(cart, [product_id])
                 return cart
         
         raise CartError(f"Item not found in cart: product {product_id}")
@@ -256,8 +266,10 @@ class CartManager:
         cart = self.get(cart_id)
         
         # Clear items
+        removed = [item.product_id for item in cart.items]
         cart.items = []
         cart.updated_at = datetime.now()
+        self._repository.save(cart, removed)
         
         logger.debug(f"Cleared cart: {cart.id}")
         return cart
@@ -275,12 +287,8 @@ class CartManager:
         # Get the cart first (this will validate the ID)
         cart = self.get(cart_id)
         
-        # Remove from user index if associated with a user
-        if cart.user_id and cart.user_id in self._user_carts:
-            del self._user_carts[cart.user_id]
-        
         # Remove the cart
-        del self._carts[cart.id]
+        self._repository.delete(cart.id)
         
         logger.debug(f"Deleted cart: {cart.id}")
     
@@ -3,13 +3,24 @@ Category management module for PyCommerce.
 
 This module provides the CategoryManager class for managing product categories.
 Following the same pattern as other managers in the system for consistency.
+
+Categories store a materialized path of their ancestors' ids, so a subtree is
+a single indexed prefix match rather than a walk over parent_id one level at
+a time. Paths are set on insert and rewritten when a category is moved.
 """
+import copy
 import logging
+import os
+import threading
+import time
 import uuid
-from typing import List, Optional, Dict, Any, Union, TypeVar, cast
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Union, TypeVar, cast
 import sys
 import importlib
 
+from sqlalchemy import event, func, literal, select, update
+from sqlalchemy.orm import aliased
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -50,6 +61,123 @@ try:
 except Exception as e:
     logger.warning(f"Error finding Flask app: {e}")
 
+# Seconds a cached category tree is served before it is rebuilt. Writes through
+# CategoryManager invalidate the tenant's trees immediately; the TTL bounds how
+# long other processes can serve a stale tree.
+CATEGORY_TREE_CACHE_TTL = float(os.environ.get("CATEGORY_TREE_CACHE_TTL", "300"))
+
+# (tenant_id, include_inactive) -> (built_at, tree)
+_tree_cache: Dict[Tuple[str, bool], Tuple[float, List[Dict[str, Any]]]] = {}
+_tree_cache_lock = threading.Lock()
+
+
+def category_path(parent_path: Optional[str], category_id: str) -> str:
+    """
+    Build the materialized path of a category.
+
+    Paths list the ids from the root down to the category itself, each
+    followed by a slash, so every descendant's path starts with its
+    ancestor's path.
+    """
+    return f"{parent_path or '/'}{category_id}/"
+
+
+def compute_category_paths(rows: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Tuple[str, int]]:
+    """
+    Compute paths and depths for (id, parent_id) pairs.
+
+    Categories whose parent is missing, or which are part of a parent cycle,
+    are treated as roots.
+
+    Returns:
+        Dictionary mapping category id to (path, depth)
+    """
+    parents = dict(rows)
+    paths: Dict[str, Tuple[str, int]] = {}
+    for category_id in parents:
+        # Walk up to the nearest category with a known path (or a root)
+        chain = []
+        current = category_id
+        seen = set()
+        while current is not None and current not in paths and current not in seen:
+            seen.add(current)
+            chain.append(current)
+            parent_id = parents.get(current)
+            current = parent_id if parent_id in parents else None
+        if current is not None and current in paths:
+            base_path, base_depth = paths[current]
+        else:
+            base_path, base_depth = "/", -1
+        for offset, node in enumerate(reversed(chain), start=1):
+            paths[node] = (category_path(base_path, node), base_depth + offset)
+            base_path = paths[node][0]
+    return paths
+
+
+def build_category_tree(categories: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Nest category dictionaries under their parents.
+
+    Categories whose parent is not in the list are dropped, so a tree of
+    active categories does not show children of inactive ones.
+
+    Args:
+        categories: Category dictionaries with 'id' and 'parent_id' keys
+
+    Returns:
+        List of root category dictionaries with nested 'children' lists
+    """
+    category_dict = {cat['id']: dict(cat, children=[]) for cat in categories}
+
+    roots = []
+    for cat_data in category_dict.values():
+        if cat_data['parent_id'] is None:
+            roots.append(cat_data)
+        elif cat_data['parent_id'] in category_dict:
+            category_dict[cat_data['parent_id']]['children'].append(cat_data)
+    return roots
+
+
+def invalidate_category_tree(tenant_id: Optional[str] = None) -> None:
+    """
+    Drop cached category trees.
+
+    Args:
+        tenant_id: Tenant whose trees to drop, or None for all tenants
+    """
+    with _tree_cache_lock:
+        if tenant_id is None:
+            _tree_cache.clear()
+        else:
+            for key in [key for key in _tree_cache if key[0] == tenant_id]:
+                del _tree_cache[key]
+
+
+def _assign_category_path(mapper, connection, target) -> None:
+    """
+    Set the path of a new category from its parent's path.
+
+    Runs for every insert, including categories created outside
+    CategoryManager. If the parent has no path yet, the path is left empty
+    and filled in by CategoryManager.rebuild_category_paths.
+    """
+    if target.path:
+        return
+    if target.id is None:
+        target.id = str(uuid.uuid4())
+    if not target.parent_id:
+        target.path, target.depth = category_path(None, target.id), 0
+        return
+    parent = connection.execute(
+        select(Category.path, Category.depth).where(Category.id == target.parent_id)
+    ).first()
+    if parent is not None and parent.path:
+        target.path, target.depth = category_path(parent.path, target.id), (parent.depth or 0) + 1
+
+
+if Category is not None:
+    event.listen(Category, "before_insert", _assign_category_path)
+
 
 class CategoryManager:
     """Manager class for category operations."""
@@ -102,6 +230,53 @@ class CategoryManager:
             logger.error(f"Error in get_all_categories: {e}")
             return []
 
+    def get_categories_for_all_tenants(self, include_inactive: bool = False) -> List[Any]:
+        """
+        Get categories across all tenants in a single query.
+        
+        Args:
+            include_inactive: Whether to include inactive categories
+            
+        Returns:
+            List of Category objects with a tenant_name attribute
+        """
+        # Use Flask's app_context if available
+        if flask_app is not None and hasattr(flask_app, 'app_context'):
+            with flask_app.app_context():
+                return self._get_categories_for_all_tenants(include_inactive)
+        else:
+            # Fallback if we can't find a Flask app
+            return self._get_categories_for_all_tenants(include_inactive)
+
+    def _get_categories_for_all_tenants(self, include_inactive: bool = False) -> List[Any]:
+        """Internal implementation of get_categories_for_all_tenants."""
+        try:
+            subcategory = aliased(Category)
+            product_count = select(func.count(ProductCategory.product_id)).where(
+                ProductCategory.category_id == Category.id
+            ).correlate(Category).scalar_subquery()
+            subcategory_count = select(func.count(subcategory.id)).where(
+                subcategory.parent_id == Category.id
+            ).correlate(Category).scalar_subquery()
+
+            query = db.session.query(
+                Category, Tenant.name, product_count, subcategory_count
+            ).outerjoin(Tenant, Tenant.id == Category.tenant_id)
+            if not include_inactive:
+                query = query.filter(Category.active == True)  # noqa: E712
+            query = query.order_by(Tenant.name, Category.path)
+
+            categories = []
+            for category, tenant_name, products, subcategories in query.all():
+                category.tenant_name = tenant_name or ""
+                category.product_count = products
+                category.subcategory_count = subcategories
+                categories.append(category)
+            return categories
+        except Exception as e:
+            logger.error(f"Error in get_categories_for_all_tenants: {e}")
+            return []
+
     def get_category(self, category_id: str) -> Optional[T]:
         """
         Get a category by ID.
@@ -199,7 +374,10 @@ class CategoryManager:
                         active: bool = True) -> Optional[T]:
         """Internal implementation of create_category."""
         try:
-            # Create new category
+            if parent_id:
+                self._get_parent(tenant_id, parent_id)
+
+            # Create new category; its path is set on insert
             category = Category(
                 id=str(uuid.uuid4()),
                 tenant_id=tenant_id,
@@ -213,6 +391,7 @@ class CategoryManager:
             # Add to database
             db.session.add(category)
             db.session.commit()
+            invalidate_category_tree(tenant_id)
             
             return category
         except Exception as e:
@@ -232,12 +411,26 @@ class CategoryManager:
         Returns:
             The updated Category object or None if not found
         """
-        category = self.get_category(category_id)
+        # Use Flask's app_context if available
+        if flask_app is not None and hasattr(flask_app, 'app_context'):
+            with flask_app.app_context():
+                return self._update_category(category_id, **kwargs)
+        else:
+            # Fallback if we can't find a Flask app
+            return self._update_category(category_id, **kwargs)
+
+    def _update_category(self, category_id: str, **kwargs) -> Optional[T]:
+        """Internal implementation of update_category."""
+        category = self._get_category(category_id)
         if not category:
             logger.warning(f"Category with ID {category_id} not found")
             return None
         
         try:
+            # Moving a category rewrites the paths of its whole subtree
+            if "parent_id" in kwargs and kwargs["parent_id"] != category.parent_id:
+                self._move_category(category, kwargs["parent_id"])
+
             # Update allowed fields
             allowed_fields = ["name", "slug", "description", "parent_id", "active"]
             for field, value in kwargs.items():
@@ -255,6 +448,7 @@ class CategoryManager:
                     raise ValueError(f"Category with slug '{kwargs['slug']}' already exists for this tenant")
             
             db.session.commit()
+            invalidate_category_tree(category.tenant_id)
             return category
         except Exception as e:
             logger.error(f"Error in update_category: {e}")
@@ -290,8 +484,10 @@ class CategoryManager:
                 db.session.delete(assoc)
             
             # Delete the category
+            tenant_id = category.tenant_id
             db.session.delete(category)
             db.session.commit()
+            invalidate_category_tree(tenant_id)
             
             return True
         except Exception as e:
@@ -304,6 +500,9 @@ class CategoryManager:
         """
         Get a hierarchical category tree for a tenant.
         
+        Trees are cached per tenant and rebuilt after category writes or
+        once CATEGORY_TREE_CACHE_TTL has passed.
+        
         Args:
             tenant_id: The tenant ID
             include_inactive: Whether to include inactive categories
@@ -311,30 +510,54 @@ class CategoryManager:
         Returns:
             List of category dictionaries with nested 'children' lists
         """
-        categories = self.get_all_categories(tenant_id, include_inactive)
-        
-        # Create lookup dictionaries
-        category_dict = {cat.id: {
-            'id': cat.id,
-            'name': cat.name,
-            'slug': cat.slug,
-            'description': cat.description,
-            'parent_id': cat.parent_id,
-            'active': cat.active,
-            'children': []
-        } for cat in categories}
-        
-        # Build hierarchy
-        roots = []
-        for cat_id, cat_data in category_dict.items():
-            if cat_data['parent_id'] is None:
-                # This is a root category
-                roots.append(cat_data)
-            elif cat_data['parent_id'] in category_dict:
-                # This is a child category
-                category_dict[cat_data['parent_id']]['children'].append(cat_data)
-        
-        return roots
+        key = (tenant_id, include_inactive)
+        with _tree_cache_lock:
+            cached = _tree_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < CATEGORY_TREE_CACHE_TTL:
+            return copy.deepcopy(cached[1])
+
+        built_at = time.monotonic()
+        # Use Flask's app_context if available
+        if flask_app is not None and hasattr(flask_app, 'app_context'):
+            with flask_app.app_context():
+                tree = self._load_category_tree(tenant_id, include_inactive)
+        else:
+            # Fallback if we can't find a Flask app
+            tree = self._load_category_tree(tenant_id, include_inactive)
+
+        if tree is not None:
+            with _tree_cache_lock:
+                # Skip the store if a write invalidated the tree while it was loading
+                current = _tree_cache.get(key)
+                if current is None or current[0] <= built_at:
+                    _tree_cache[key] = (built_at, tree)
+            return copy.deepcopy(tree)
+        return []
+
+    def _load_category_tree(self, tenant_id: str, include_inactive: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """Internal implementation of get_category_tree; returns None on errors."""
+        try:
+            query = db.session.query(
+                Category.id, Category.name, Category.slug, Category.description,
+                Category.parent_id, Category.active
+            ).filter(Category.tenant_id == tenant_id)
+            if not include_inactive:
+                query = query.filter(Category.active == True)  # noqa: E712
+
+            return build_category_tree(
+                {
+                    'id': row.id,
+                    'name': row.name,
+                    'slug': row.slug,
+                    'description': row.description,
+                    'parent_id': row.parent_id,
+                    'active': row.active,
+                }
+                for row in query.all()
+            )
+        except Exception as e:
+            logger.error(f"Error in get_category_tree: {e}")
+            return None
 
     def get_product_categories(self, product_id: str) -> List[Any]:
         """
@@ -403,29 +626,111 @@ class CategoryManager:
             except (ImportError, AttributeError):
                 query = Product.query
             
-            # Get direct product-category associations
-            associations = ProductCategory.query.filter_by(category_id=category_id).all()
-            product_ids = [assoc.product_id for assoc in associations]
-            
-            # Get subcategory products if requested
             if include_subcategories:
-                subcategories = Category.query.filter_by(parent_id=category_id).all()
-                for subcat in subcategories:
-                    # Recursive call - note this will use the public method which has app_context
-                    sub_products = self.get_products_in_category(subcat.id, include_subcategories=True)
-                    product_ids.extend([p.id for p in sub_products if p.id not in product_ids])
-            
-            # Get product objects
-            if product_ids:
-                products = query.filter(Product.id.in_(product_ids)).all()
+                category = Category.query.get(category_id)
+                if category is None:
+                    return []
+                if not category.path:
+                    self.rebuild_category_paths(category.tenant_id)
+
+                # Every category in the subtree shares the category's path prefix
+                subtree_products = (
+                    db.session.query(ProductCategory.product_id)
+                    .join(Category, Category.id == ProductCategory.category_id)
+                    .filter(
+                        Category.tenant_id == category.tenant_id,
+                        Category.path.startswith(category.path, autoescape=True),
+                    )
+                )
             else:
-                products = []
+                subtree_products = db.session.query(ProductCategory.product_id).filter(
+                    ProductCategory.category_id == category_id
+                )
             
-            return products
+            return query.filter(Product.id.in_(subtree_products)).all()
         except Exception as e:
             logger.error(f"Error in get_products_in_category: {e}")
             return []
 
+    def _get_parent(self, tenant_id: str, parent_id: str) -> Any:
+        """Load a parent category, making sure it belongs to the tenant and has a path."""
+        parent = Category.query.get(parent_id)
+        if parent is None or parent.tenant_id != tenant_id:
+            raise ValueError(f"Parent category {parent_id} not found for this tenant")
+        if not parent.path:
+            self.rebuild_category_paths(tenant_id)
+            db.session.refresh(parent)
+        return parent
+
+    def _move_category(self, category: Any, parent_id: Optional[str]) -> None:
+        """
+        Re-parent a category and rewrite the paths of its subtree.
+        
+        Changes are flushed but not committed; the caller commits.
+        
+        Raises:
+            ValueError: If the new parent is the category itself or one of its descendants
+        """
+        if not category.path:
+            self.rebuild_category_paths(category.tenant_id)
+            db.session.refresh(category)
+
+        parent_path, depth = None, 0
+        if parent_id:
+            parent = self._get_parent(category.tenant_id, parent_id)
+            if parent.path.startswith(category.path):
+                raise ValueError("A category cannot be moved under itself or one of its subcategories")
+            parent_path, depth = parent.path, (parent.depth or 0) + 1
+
+        old_path = category.path
+        new_path = category_path(parent_path, category.id)
+        depth_change = depth - (category.depth or 0)
+
+        # Rewrite every descendant's path prefix in one statement
+        Category.query.filter(
+            Category.tenant_id == category.tenant_id,
+            Category.path.startswith(old_path, autoescape=True),
+            Category.id != category.id,
+        ).update(
+            {
+                Category.path: literal(new_path) + func.substr(Category.path, len(old_path) + 1),
+                Category.depth: Category.depth + depth_change,
+            },
+            synchronize_session=False,
+        )
+        category.path = new_path
+        category.depth = depth
+
+    def rebuild_category_paths(self, tenant_id: str) -> int:
+        """
+        Recompute the materialized paths of a tenant's categories.
+        
+        Used to backfill categories created before paths were maintained or
+        created outside CategoryManager.
+        
+        Args:
+            tenant_id: The tenant ID
+            
+        Returns:
+            Number of categories whose path changed
+        """
+        rows = db.session.query(Category.id, Category.parent_id, Category.path, Category.depth).filter(
+            Category.tenant_id == tenant_id
+        ).all()
+        paths = compute_category_paths((row.id, row.parent_id) for row in rows)
+
+        changes = [
+            {"id": row.id, "path": paths[row.id][0], "depth": paths[row.id][1]}
+            for row in rows
+            if (row.path, row.depth) != paths[row.id]
+        ]
+        if changes:
+            db.session.execute(update(Category), changes)
+            db.session.commit()
+            invalidate_category_tree(tenant_id)
+            logger.info(f"Rebuilt paths for {len(changes)} categories of tenant {tenant_id}")
+        return len(changes)
+
     def assign_product_to_category(self, product_id: str, category_id: str) -> bool:
         """
         Assign a product to a category.
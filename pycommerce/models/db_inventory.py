@@ -26,6 +26,8 @@ class InventoryTransaction(Base):
     inventory_record_id = Column(String(36), ForeignKey("inventory_records.id"), nullable=False)
     transaction_type = Column(String(50), nullable=False)
     quantity = Column(Integer, nullable=False)  # Positive for additions, negative for reductions
+    on_hand_change = Column(Integer, nullable=False, default=0)   # Change to the record's quantity
+    reserved_change = Column(Integer, nullable=False, default=0)  # Change to the record's reserved_quantity
     reference_id = Column(String(100), nullable=True)  # Optional reference (order ID, etc.)
     reference_type = Column(String(50), nullable=True)  # Type of reference (order, shipment, etc.)
     notes = Column(Text, nullable=True)
@@ -6,7 +6,7 @@ and model declaration conflicts.
 """
 
 import logging
-from sqlalchemy import MetaData, Column, String, DateTime, ForeignKey, Integer, Text, Boolean, JSON
+from sqlalchemy import MetaData, Column, String, DateTime, ForeignKey, Integer, Text, Boolean, JSON, Index, text
 from sqlalchemy.orm import relationship
 from pycommerce.core.db import Base
 from datetime import datetime
@@ -74,7 +74,12 @@ from sqlalchemy.orm import relationship
 class InventoryRecord(Base):
     """SQLAlchemy InventoryRecord model."""
     __tablename__ = "inventory_records"
-    __table_args__ = {'extend_existing': True}  # This is crucial to allow table redefinition
+    __table_args__ = (
+        # Only low-stock records are indexed, so listing them stays cheap as inventory grows
+        Index("ix_inventory_records_low_stock", "tenant_id",
+              postgresql_where=text("is_low_stock"), sqlite_where=text("is_low_stock")),
+        {'extend_existing': True},  # This is crucial to allow table redefinition
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
@@ -86,6 +91,8 @@ class InventoryRecord(Base):
     reserved_quantity = Column(Integer, default=0)
     reorder_point = Column(Integer, default=0)
     reorder_quantity = Column(Integer, default=0)
+    # available_quantity <= reorder_point, maintained by pycommerce.services.low_stock_index
+    is_low_stock = Column(Boolean, nullable=False, default=False)
     inventory_metadata = Column(JSON, nullable=True)  # Using inventory_metadata instead of metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -99,16 +106,34 @@ class InventoryRecord(Base):
         return f"<InventoryRecord {self.id} for product {self.product_id}>"
 
 
+class LowStockCount(Base):
+    """Number of low-stock inventory records per tenant, kept in step with InventoryRecord.is_low_stock."""
+    __tablename__ = "inventory_low_stock_counts"
+    __table_args__ = {'extend_existing': True}
+
+    tenant_id = Column(String(36), primary_key=True)
+    low_stock_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<LowStockCount {self.tenant_id}: {self.low_stock_count}>"
+
+
 class PluginConfig(Base):
     """SQLAlchemy PluginConfig model for storing plugin configuration data."""
     __tablename__ = "plugin_configs"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_plugin_configs_tenant_plugin", "tenant_id", "plugin_id"),
+        {'extend_existing': True},
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False)
+    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=True)  # NULL for global configuration
     plugin_type = Column(String(50), nullable=False)  # 'payment', 'shipping', etc.
     plugin_id = Column(String(100), nullable=False)   # 'stripe', 'paypal', 'standard', etc.
     config = Column(JSON, nullable=True)
+    enabled = Column(Boolean, nullable=False, default=True, server_default="true")
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every change
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
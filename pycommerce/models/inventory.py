@@ -1,8 +1,13 @@
 """
 Inventory-related models and management.
 
-This module defines the InventoryTransaction model and InventoryManager class
-for managing product inventory in the PyCommerce SDK.
+This module defines the InventoryTransaction and InventorySnapshot models and
+the InventoryManager class for managing product inventory in the PyCommerce SDK.
+
+Transactions form an append-only ledger: besides the movement shown in the
+history, each row records its change to the record's on-hand and reserved
+quantities, so balances can be rebuilt from the latest snapshot plus the
+transactions after it (see pycommerce.services.inventory_ledger).
 """
 
 import logging
@@ -12,7 +17,10 @@ from datetime import datetime
 from enum import Enum
 
 from pycommerce.core.db import Base, engine, get_session
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON, Boolean, Integer, Text
+from pycommerce.services.event_bus import ORDER_INVENTORY_COMPLETED, record_event
+from pycommerce.services.low_stock_index import get_low_stock_count, sync_low_stock
+from pycommerce.services.product_cache import invalidate_product_caches
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, JSON, Boolean, Integer, Text, Index, insert
 from sqlalchemy.orm import relationship, Session
 
 logger = logging.getLogger("pycommerce.models.inventory")
@@ -31,8 +39,8 @@ class InventoryTransactionType(str, Enum):
     TRANSFER = "transfer"        # Inventory transferred between locations
 
 
-# Import InventoryRecord from the registry
-from pycommerce.models.db_registry import InventoryRecord
+# Import InventoryRecord and Product from the registry
+from pycommerce.models.db_registry import InventoryRecord, Product
 
 
 class InventoryTransaction(Base):
@@ -40,12 +48,18 @@ class InventoryTransaction(Base):
     Represents a transaction affecting inventory.
     """
     __tablename__ = "inventory_transactions"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Keyset pagination of a record's history, newest first
+        Index("ix_inventory_transactions_record_created", "inventory_record_id", "created_at", "id"),
+        {'extend_existing': True},
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     inventory_record_id = Column(String(36), ForeignKey("inventory_records.id"), nullable=False)
     transaction_type = Column(String(50), nullable=False)
     quantity = Column(Integer, nullable=False)  # Positive for additions, negative for reductions
+    on_hand_change = Column(Integer, nullable=False, default=0)   # Change to the record's quantity
+    reserved_change = Column(Integer, nullable=False, default=0)  # Change to the record's reserved_quantity
     reference_id = Column(String(100), nullable=True)  # Optional reference (order ID, etc.)
     reference_type = Column(String(50), nullable=True)  # Type of reference (order, shipment, etc.)
     notes = Column(Text, nullable=True)
@@ -62,6 +76,29 @@ class InventoryTransaction(Base):
         return f"<InventoryTransaction {self.id} of type {self.transaction_type}>"
 
 
+class InventorySnapshot(Base):
+    """
+    On-hand and reserved quantities of an inventory record, folding in every
+    transaction created at or before taken_at.
+    """
+    __tablename__ = "inventory_snapshots"
+    __table_args__ = (
+        Index("ix_inventory_snapshots_record_taken", "inventory_record_id", "taken_at", unique=True),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    inventory_record_id = Column(String(36), ForeignKey("inventory_records.id"), nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+    reserved_quantity = Column(Integer, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)  # Transactions folded in since the previous snapshot
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<InventorySnapshot {self.inventory_record_id} at {self.taken_at}>"
+
+
 class InventoryManager:
     """
     Manager for inventory operations.
@@ -140,7 +177,6 @@ class InventoryManager:
         """
         with self.session_factory() as session:
             # Check if the product exists
-            from pycommerce.models.product import Product
             product = session.query(Product).filter_by(id=product_id).first()
             if not product:
                 raise ValueError(f"Product not found: {product_id}")
@@ -178,6 +214,7 @@ class InventoryManager:
                         inventory_record_id=inventory.id,
                         transaction_type=InventoryTransactionType.ADJUSTMENT.value,
                         quantity=quantity - old_quantity,
+                        on_hand_change=quantity - old_quantity,
                         notes=f"Inventory adjustment from {old_quantity} to {quantity}"
                     )
                     session.add(transaction)
@@ -185,6 +222,7 @@ class InventoryManager:
             else:
                 # Create new record
                 inventory = InventoryRecord(
+                    id=str(uuid.uuid4()),  # Needed by the initial transaction before the flush
                     product_id=product_id,
                     tenant_id=tenant_id,
                     location=location,
@@ -203,12 +241,15 @@ class InventoryManager:
                     inventory_record_id=inventory.id,
                     transaction_type=InventoryTransactionType.INITIAL.value,
                     quantity=quantity,
+                    on_hand_change=quantity,
                     notes=f"Initial inventory setup with quantity {quantity}"
                 )
                 session.add(transaction)
 
+            sync_low_stock(session, inventory)
             session.commit()
             session.refresh(inventory)
+            invalidate_product_caches(tenant_id, product_id)
 
             logger.info(f"Created/updated inventory for product {product_id} with quantity {quantity}")
 
@@ -260,13 +301,17 @@ class InventoryManager:
                 inventory_record_id=inventory.id,
                 transaction_type=InventoryTransactionType.SALE.value,
                 quantity=-quantity,  # Negative because it's a reduction
+                reserved_change=quantity,
                 reference_id=reference_id,
                 reference_type=reference_type,
                 notes=f"Reserved {quantity} units for {reference_type} {reference_id}"
             )
             session.add(transaction)
 
+            sync_low_stock(session, inventory)
+            tenant_id = inventory.tenant_id
             session.commit()
+            invalidate_product_caches(tenant_id, product_id)
             logger.info(f"Reserved {quantity} units of product {product_id} for {reference_type} {reference_id}")
 
             return True
@@ -303,7 +348,8 @@ class InventoryManager:
                 return False
 
             # Update inventory quantities
-            inventory.reserved_quantity = max(0, inventory.reserved_quantity - quantity)
+            released = min(quantity, inventory.reserved_quantity)
+            inventory.reserved_quantity -= released
             inventory.available_quantity = inventory.quantity - inventory.reserved_quantity
 
             # Create a transaction
@@ -311,13 +357,17 @@ class InventoryManager:
                 inventory_record_id=inventory.id,
                 transaction_type=InventoryTransactionType.ADJUSTMENT.value,
                 quantity=quantity,  # Positive because we're releasing (adding back)
+                reserved_change=-released,
                 reference_id=reference_id,
                 reference_type=reference_type,
                 notes=f"Released {quantity} units from {reference_type} {reference_id}"
             )
             session.add(transaction)
 
+            sync_low_stock(session, inventory)
+            tenant_id = inventory.tenant_id
             session.commit()
+            invalidate_product_caches(tenant_id, product_id)
             logger.info(f"Released {quantity} units of product {product_id} from {reference_type} {reference_id}")
 
             return True
@@ -342,13 +392,22 @@ class InventoryManager:
             ValueError: If there is an issue with any item
         """
         results = []
+        reorder = []
+        transactions = []
+        now = datetime.utcnow()
 
         with self.session_factory() as session:
+            # One query for the order's records instead of one per item
+            records = {}
+            product_ids = {item["product_id"] for item in items}
+            for record in session.query(InventoryRecord).filter(InventoryRecord.product_id.in_(product_ids)):
+                records.setdefault(record.product_id, record)
+
             for item in items:
                 product_id = item["product_id"]
                 quantity = item["quantity"]
 
-                inventory = session.query(InventoryRecord).filter_by(product_id=product_id).first()
+                inventory = records.get(product_id)
                 if not inventory:
                     error_msg = f"No inventory record found for product {product_id}"
                     logger.warning(error_msg)
@@ -359,19 +418,24 @@ class InventoryManager:
                     })
                     continue
 
-                # Reduce the reserved quantity (it's already taken from available)
-                inventory.reserved_quantity = max(0, inventory.reserved_quantity - quantity)
-
-                # Create a transaction to track the completed order
-                transaction = InventoryTransaction(
-                    inventory_record_id=inventory.id,
-                    transaction_type=InventoryTransactionType.SALE.value,
-                    quantity=-quantity,  # Negative because it's a final reduction
-                    reference_id=order_id,
-                    reference_type="order_completion",
-                    notes=f"Completed order {order_id} with {quantity} units"
-                )
-                session.add(transaction)
+                # The reserved units leave stock (they are already taken from available)
+                consumed = min(quantity, inventory.reserved_quantity)
+                inventory.reserved_quantity -= consumed
+                inventory.quantity -= consumed
+
+                # Track the completed order; the order's rows are inserted together below
+                transactions.append({
+                    "id": str(uuid.uuid4()),
+                    "inventory_record_id": inventory.id,
+                    "transaction_type": InventoryTransactionType.SALE.value,
+                    "quantity": -quantity,  # Negative because it's a final reduction
+                    "on_hand_change": -consumed,
+                    "reserved_change": -consumed,
+                    "reference_id": order_id,
+                    "reference_type": "order_completion",
+                    "notes": f"Completed order {order_id} with {quantity} units",
+                    "created_at": now,
+                })
 
                 results.append({
                     "product_id": product_id,
@@ -380,11 +444,23 @@ class InventoryManager:
                 })
 
                 # Check if we need to reorder
-                if inventory.quantity <= inventory.reorder_point:
-                    logger.info(f"Product {product_id} has reached reorder point: {inventory.quantity} <= {inventory.reorder_point}")
-                    # TODO: Trigger reorder notification or process
-
+                sync_low_stock(session, inventory)
+                if inventory.is_low_stock:
+                    reorder.append(product_id)
+
+            if transactions:
+                session.execute(insert(InventoryTransaction), transactions)
+
+            # Reorder notifications and analytics subscribe to this event
+            record_event(session, ORDER_INVENTORY_COMPLETED, {
+                "order_id": order_id,
+                "items": [r for r in results if r["success"]],
+                "reorder": reorder,
+            }, aggregate_id=order_id)
+            changed = [(record.tenant_id, record.product_id) for record in records.values()]
             session.commit()
+            for tenant_id, product_id in changed:
+                invalidate_product_caches(tenant_id, product_id)
             logger.info(f"Completed inventory processing for order {order_id}")
 
         return results
@@ -431,6 +507,7 @@ class InventoryManager:
                 inventory_record_id=inventory.id,
                 transaction_type=InventoryTransactionType.RETURN.value,
                 quantity=quantity,  # Positive because it's an addition
+                on_hand_change=quantity,
                 reference_id=reference_id,
                 reference_type=reference_type,
                 notes=notes or f"Returned {quantity} units via {reference_type} {reference_id}",
@@ -438,7 +515,10 @@ class InventoryManager:
             )
             session.add(transaction)
 
+            sync_low_stock(session, inventory)
+            tenant_id = inventory.tenant_id
             session.commit()
+            invalidate_product_caches(tenant_id, product_id)
             logger.info(f"Processed return of {quantity} units of product {product_id}")
 
             return True
@@ -454,29 +534,39 @@ class InventoryManager:
             List of products with low stock
         """
         with self.session_factory() as session:
-            records = session.query(InventoryRecord).filter(
+            # Reads the partial low-stock index rather than every record of the tenant
+            rows = session.query(InventoryRecord, Product).join(
+                Product, Product.id == InventoryRecord.product_id
+            ).filter(
                 InventoryRecord.tenant_id == tenant_id,
-                InventoryRecord.quantity <= InventoryRecord.reorder_point,
-                InventoryRecord.reorder_point > 0  # Only include items with a reorder point set
-            ).all()
-
-            result = []
-            for record in records:
-                # Get the product details
-                from pycommerce.models.product import Product
-                product = session.query(Product).filter_by(id=record.product_id).first()
-                if product:
-                    result.append({
-                        "product_id": record.product_id,
-                        "product_name": product.name if hasattr(product, 'name') else "Unknown",
-                        "sku": record.sku or (product.sku if hasattr(product, 'sku') else "Unknown"),
-                        "quantity": record.quantity,
-                        "reorder_point": record.reorder_point,
-                        "reorder_quantity": record.reorder_quantity,
-                        "location": record.location
-                    })
+                InventoryRecord.is_low_stock.is_(True)
+            ).order_by(InventoryRecord.available_quantity).all()
+
+            return [
+                {
+                    "product_id": record.product_id,
+                    "product_name": product.name if hasattr(product, 'name') else "Unknown",
+                    "sku": record.sku or (product.sku if hasattr(product, 'sku') else "Unknown"),
+                    "quantity": record.quantity,
+                    "available_quantity": record.available_quantity,
+                    "reorder_point": record.reorder_point,
+                    "reorder_quantity": record.reorder_quantity,
+                    "location": record.location
+                }
+                for record, product in rows
+            ]
+
+    def get_low_stock_count(self, tenant_id: str) -> int:
+        """
+        Get the number of inventory records at or below their reorder point.
 
-            return result
+        Args:
+            tenant_id: The tenant ID
+
+        Returns:
+            The tenant's low-stock count
+        """
+        return get_low_stock_count(tenant_id, self.session_factory)
 
     def get_inventory_transactions(
         self,
@@ -515,6 +605,68 @@ class InventoryManager:
 
             return query.order_by(InventoryTransaction.created_at.desc()).all()
 
+    def get_inventory_transaction_page(
+        self,
+        product_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        transaction_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of inventory transactions for a product, newest first.
+
+        Args:
+            product_id: The ID of the product
+            limit: Transactions per page
+            cursor: The next_cursor of the previous page, or None for the first page
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            transaction_type: Optional transaction type to filter by
+
+        Returns:
+            Dictionary with the transactions and the next page's cursor (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        from pycommerce.services.inventory_ledger import transaction_page
+
+        with self.session_factory() as session:
+            inventory = session.query(InventoryRecord).filter_by(product_id=product_id).first()
+            if not inventory:
+                return {"transactions": [], "next_cursor": None}
+
+            return transaction_page(
+                session, inventory.id, limit=limit, cursor=cursor, start_date=start_date,
+                end_date=end_date, transaction_type=transaction_type
+            )
+
+    def get_inventory_balance(self, product_id: str, as_of: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Compute a product's inventory quantities from its transaction ledger.
+
+        Args:
+            product_id: The ID of the product
+            as_of: Optional time of the balance (defaults to now)
+
+        Returns:
+            Dictionary with quantity, reserved_quantity and available_quantity,
+            or None if the product has no inventory record
+
+        Raises:
+            ValueError: If as_of is older than the ledger keeps transactions
+        """
+        from pycommerce.services.inventory_ledger import inventory_balance
+
+        with self.session_factory() as session:
+            inventory = session.query(InventoryRecord).filter_by(product_id=product_id).first()
+            if not inventory:
+                return None
+
+            return inventory_balance(session, inventory.id, as_of=as_of)
+
 
 # Create the tables
 Base.metadata.create_all(engine)
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Number sequence module for PyCommerce.
+
+This module defines the NumberSequence model, which holds the next value of
+each per-tenant document number sequence (orders, returns, estimates).
+"""
+
+from sqlalchemy import BigInteger, Column, Integer, String, UniqueConstraint
+
+from pycommerce.core.db import Base
+
+
+class NumberSequence(Base):
+    """The next unreserved value of one tenant's sequence of document numbers."""
+    __tablename__ = "number_sequences"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "kind", name="uq_number_sequences_tenant_kind"),
+        {'extend_existing': True},
+    )
+
+    # The id is part of every number, which keeps numbers unique across tenants
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Empty for numbers issued outside a tenant
+    tenant_id = Column(String(36), nullable=False, default="")
+    kind = Column(String(20), nullable=False)
+    next_value = Column(BigInteger, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<NumberSequence {self.kind} {self.tenant_id or '-'} next={self.next_value}>"
@@ -6,13 +6,11 @@ This module defines the Order model and related models.
 
 import uuid
 import logging
-import random
-import string
 from datetime import datetime
 from enum import Enum, auto
 from typing import List, Optional, Dict, Any, Union
 
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Enum as SQLAlchemyEnum, and_, or_
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Enum as SQLAlchemyEnum, Index, and_, or_
 from sqlalchemy.orm import relationship
 import sqlalchemy.orm
 
@@ -20,6 +18,8 @@ from pycommerce.core.db import Base, get_session
 from pycommerce.models.order_note import OrderNote
 from pycommerce.models.order_item import OrderItem
 from pycommerce.models.shipment import Shipment
+from pycommerce.services.number_allocator import ORDER_NUMBERS, get_number_allocator
+from pycommerce.services.event_bus import ORDER_STATUS_CHANGED, ORDER_UPDATED, record_event
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +52,11 @@ class OrderType(Enum):
 class Order(Base):
     """Order model."""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Admin order list: newest first, per tenant or across all tenants
+        Index("ix_orders_tenant_created", "tenant_id", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String(36), nullable=False, index=True)
@@ -119,19 +124,45 @@ class Order(Base):
     returns = relationship("ReturnRequest", back_populates="order", cascade="all, delete-orphan")
 
 
+def _status_name(status: Any) -> Optional[str]:
+    return getattr(status, "name", status) if status is not None else None
+
+
+def record_order_status_changed(
+    session: sqlalchemy.orm.Session,
+    order: Order,
+    previous_status: Any,
+    source: str,
+    store_url: Optional[str] = None,
+):
+    """
+    Record an ORDER_STATUS_CHANGED event in the session's transaction.
+
+    Args:
+        session: The session changing the order
+        order: The order, with its new status set
+        previous_status: The status before the change
+        source: What changed the status, for subscribers and debugging
+        store_url: Base URL of the request that changed the status, used
+            for store links in emails when the tenant has no domain
+    """
+    payload = {
+        "order_id": order.id,
+        "status": _status_name(order.status),
+        "previous_status": _status_name(previous_status),
+        "source": source,
+    }
+    if store_url:
+        payload["store_url"] = store_url
+    record_event(session, ORDER_STATUS_CHANGED, payload, aggregate_id=order.id, tenant_id=order.tenant_id)
+
+
 class OrderManager:
     """Manager class for orders."""
 
-    def generate_order_number(self) -> str:
-        """Generate a unique order number."""
-        # Generate a random string of 8 characters
-        chars = string.ascii_uppercase + string.digits
-        random_part = ''.join(random.choice(chars) for _ in range(8))
-        
-        # Add a timestamp prefix to ensure uniqueness
-        timestamp_part = datetime.now().strftime("%y%m%d")
-        
-        return f"ORD-{timestamp_part}-{random_part}"
+    def generate_order_number(self, tenant_id: Optional[str] = None) -> str:
+        """Generate a unique order number from the tenant's order sequence."""
+        return get_number_allocator().next_number(ORDER_NUMBERS, tenant_id)
 
     def get_by_id(self, order_id: str) -> Optional[Order]:
         """
@@ -201,6 +232,26 @@ class OrderManager:
             logger.error(f"Error getting orders: {str(e)}")
             return []
 
+
+    def get_for_all_tenants(self, filters: Optional[Dict[str, Any]] = None, page: int = 1, per_page: int = 50):
+        """
+        Get one page of orders across all tenants in a single query.
+        
+        Args:
+            filters: Optional dictionary of filters to apply
+            page: 1-based page number
+            per_page: Orders per page
+            
+        Returns:
+            CrossTenantPage of orders with tenant_name and tenant_slug attributes
+        """
+        from pycommerce.services.cross_tenant_query import CrossTenantPage, orders_query, paginate
+        try:
+            return paginate(orders_query(filters), page, per_page)
+        except Exception as e:
+            logger.error(f"Error getting orders for all tenants: {str(e)}")
+            return CrossTenantPage(page=page, per_page=per_page)
+
     def create_order(self, data: Dict[str, Any]) -> Optional[Order]:
         """
         Create a new order.
@@ -215,7 +266,7 @@ class OrderManager:
             with get_session() as session:
                 # Generate order number if not provided
                 if 'order_number' not in data or not data['order_number']:
-                    data['order_number'] = self.generate_order_number()
+                    data['order_number'] = self.generate_order_number(data.get('tenant_id'))
                 
                 order = Order(**data)
                 session.add(order)
@@ -255,23 +306,31 @@ class OrderManager:
             logger.error(f"Error updating order: {str(e)}")
             return None
 
-    def update_status(self, order_id: str, status: str) -> bool:
+    def update_status(self, order_id: str, status: str, store_url: Optional[str] = None) -> bool:
         """
         Update an order's status.
         
+        Setting the status an order already has changes nothing, so a
+        repeated payment notification records no second PAID event.
+        
         Args:
             order_id: The ID of the order
             status: The new status as string ("PENDING", "PROCESSING", "PAID", etc.)
+            store_url: Optional base URL of the originating request, for
+                store links in notification emails
             
         Returns:
-            True if the status was updated successfully, False otherwise
+            True if the order has the status, False otherwise
         """
         try:
             with get_session() as session:
-                order = session.query(Order).filter(Order.id == order_id).first()
+                order = session.query(Order).filter(Order.id == order_id).with_for_update().first()
                 if not order:
                     return False
                 
+                previous_status = order.status
+                if _status_name(previous_status) == _status_name(status):
+                    return True
                 order.status = status
                 
                 # Update timestamps based on status
@@ -283,13 +342,22 @@ class OrderManager:
                 elif status == "DELIVERED":
                     order.delivered_at = datetime.utcnow()
                 
+                # Side effects (mail, cache invalidation) are delivered by the event bus
+                record_order_status_changed(session, order, previous_status, "update_status", store_url)
                 session.commit()
                 return True
         except Exception as e:
             logger.error(f"Error updating order status: {str(e)}")
             return False
 
-    def update_shipping(self, order_id: str, status: str, tracking_number: Optional[str] = None, carrier: Optional[str] = None) -> bool:
+    def update_shipping(
+        self,
+        order_id: str,
+        status: str,
+        tracking_number: Optional[str] = None,
+        carrier: Optional[str] = None,
+        store_url: Optional[str] = None,
+    ) -> bool:
         """
         Update shipping information for an order.
         
@@ -298,6 +366,8 @@ class OrderManager:
             status: The shipping status (pending, ready, shipped, delivered, returned)
             tracking_number: Optional tracking number
             carrier: Optional shipping carrier
+            store_url: Optional base URL of the originating request, for
+                store links in notification emails
             
         Returns:
             True if the shipping info was updated successfully, False otherwise
@@ -308,6 +378,8 @@ class OrderManager:
                 if not order:
                     return False
                 
+                previous_status = order.status
+
                 # Update shipping fields
                 if tracking_number:
                     order.tracking_number = tracking_number
@@ -326,6 +398,14 @@ class OrderManager:
                     # We could add a RETURNED status if needed
                     order.status = "RETURNED"
                 
+                if order.status != previous_status:
+                    record_order_status_changed(session, order, previous_status, "update_shipping", store_url)
+                else:
+                    record_event(session, ORDER_UPDATED, {
+                        "order_id": order.id,
+                        "tracking_number": order.tracking_number,
+                        "carrier": order.shipping_carrier,
+                    }, aggregate_id=order.id, tenant_id=order.tenant_id)
                 session.commit()
                 return True
         except Exception as e:
@@ -22,7 +22,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, default=1)
     price = Column(Float, nullable=False)  # Price at the time of order
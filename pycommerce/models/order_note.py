@@ -20,7 +20,7 @@ class OrderNote(Base):
     __tablename__ = "order_notes"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False, index=True)
     content = Column(Text, nullable=False)
     is_customer_note = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
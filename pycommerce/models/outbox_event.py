@@ -0,0 +1,53 @@
+"""
+Outbox event module for PyCommerce.
+
+This module defines the OutboxEvent model, which records domain events
+(order status changes, refunds, inventory completion) in the same
+transaction as the change itself, for delivery to subscribers afterwards.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index
+
+from pycommerce.core.db import Base
+
+# Event lifecycle: recorded events wait as pending (also while a retry is
+# scheduled), are claimed as processing, and end as processed or dead
+OUTBOX_PENDING = "pending"
+OUTBOX_PROCESSING = "processing"
+OUTBOX_PROCESSED = "processed"
+OUTBOX_DEAD = "dead"
+
+OUTBOX_STATUSES = (OUTBOX_PENDING, OUTBOX_PROCESSING, OUTBOX_PROCESSED, OUTBOX_DEAD)
+
+
+class OutboxEvent(Base):
+    """A domain event waiting to be delivered to subscribers."""
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_outbox_events_claim_token", "claim_token"),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_type = Column(String(100), nullable=False)
+    # The order (or other entity) the event is about
+    aggregate_id = Column(String(64), nullable=True)
+    tenant_id = Column(String(36), nullable=True)
+    payload = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default=OUTBOX_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # JSON list of subscribers that already handled the event, skipped on retries
+    delivered_to = Column(Text, nullable=True)
+    claim_token = Column(String(36), nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxEvent {self.event_type} {self.aggregate_id} {self.status}>"
@@ -11,11 +11,13 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 
 from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, JSON, Integer
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, Session
 from sqlalchemy.orm.attributes import QueryableAttribute
 
 from pycommerce.core.db import Base, SessionLocal
+from pycommerce.core.exceptions import PageError, PageNotFoundError, PageVersionConflictError
 from pycommerce.models.tenant import Tenant
 
 logger = logging.getLogger(__name__)
@@ -34,6 +36,7 @@ class Page(Base):
     meta_description = Column(Text, nullable=True)
     is_published = Column(Boolean, default=False)
     layout_data = Column(JSON, nullable=True)  # Stores the page layout structure
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every section/block change
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -160,7 +163,7 @@ class PageManager:
         """
         session = self._get_session()
         try:
-            return session.query(Page).filter(Page.id == page_id).first()
+            return session.query(Page).filter(Page.id == _to_uuid(page_id)).first()
         except Exception as e:
             logger.error(f"Error getting page: {str(e)}")
             return None
@@ -274,6 +277,309 @@ class PageManager:
             if not self.session:
                 session.close()
 
+    # Page fields a tree save may update alongside the sections
+    TREE_PAGE_FIELDS = ("title", "slug", "meta_title", "meta_description", "is_published", "layout_data")
+
+    def get_tree(self, page_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a page's section/block tree and its current version.
+
+        The editor sends the version back with save_tree() so concurrent
+        edits are detected.
+
+        Args:
+            page_id: The ID of the page
+
+        Returns:
+            Dictionary with ``page_id``, ``version`` and ``sections`` (each
+            with its ``blocks``) ordered by position, or None if not found
+        """
+        page_uuid = _to_uuid(page_id)
+        if page_uuid is None:
+            return None
+
+        session = self._get_session()
+        try:
+            version = session.execute(
+                select(Page.version).where(Page.id == page_uuid)
+            ).scalar_one_or_none()
+            if version is None:
+                return None
+
+            section_rows = session.execute(
+                select(PageSection.id, PageSection.section_type, PageSection.settings)
+                .where(PageSection.page_id == page_uuid)
+                .order_by(PageSection.position)
+            ).all()
+            block_rows = session.execute(
+                select(
+                    ContentBlock.id, ContentBlock.section_id, ContentBlock.block_type,
+                    ContentBlock.content, ContentBlock.settings,
+                )
+                .join(PageSection, ContentBlock.section_id == PageSection.id)
+                .where(PageSection.page_id == page_uuid)
+                .order_by(ContentBlock.section_id, ContentBlock.position)
+            ).all()
+
+            blocks_by_section: Dict[Any, List[Dict[str, Any]]] = {}
+            for row in block_rows:
+                blocks_by_section.setdefault(row.section_id, []).append({
+                    "id": str(row.id),
+                    "block_type": row.block_type,
+                    "content": row.content or {},
+                    "settings": row.settings or {},
+                })
+
+            return {
+                "page_id": str(page_uuid),
+                "version": version,
+                "sections": [
+                    {
+                        "id": str(row.id),
+                        "section_type": row.section_type,
+                        "settings": row.settings or {},
+                        "blocks": blocks_by_section.get(row.id, []),
+                    }
+                    for row in section_rows
+                ],
+            }
+        finally:
+            if not self.session:
+                session.close()
+
+    def save_tree(
+        self,
+        page_id: str,
+        expected_version: int,
+        sections: List[Dict[str, Any]],
+        page_data: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Save a page's whole section/block tree in one transaction.
+
+        The payload is diffed against the stored tree and applied with one
+        bulk statement per kind of change (delete, insert, update) instead
+        of a commit per section or block. Positions come from list order.
+        Sections and blocks whose ``id`` is unknown (e.g. temporary ids
+        assigned by the editor) are inserted with new ids.
+
+        The page version is bumped with a conditional UPDATE, which also
+        locks the page row until commit, so a save based on a stale version
+        fails instead of overwriting someone else's edits.
+
+        Args:
+            page_id: The ID of the page
+            expected_version: The version the editor loaded
+            sections: Ordered list of sections, each with ``section_type``,
+                ``settings`` and an ordered ``blocks`` list of dictionaries
+                with ``block_type``, ``content`` and ``settings``
+            page_data: Optional page fields to update (see TREE_PAGE_FIELDS)
+
+        Returns:
+            Dictionary with the new ``version``, ``id_map`` from submitted
+            ids to the ids of inserted rows, and per-kind change ``stats``
+
+        Raises:
+            PageNotFoundError: If the page does not exist
+            PageVersionConflictError: If the page version has moved on
+        """
+        page_uuid = _to_uuid(page_id)
+        if page_uuid is None:
+            raise PageNotFoundError(f"Page not found: {page_id}")
+
+        now = datetime.utcnow()
+        session = self._get_session()
+        try:
+            values = {"version": Page.version + 1, "updated_at": now}
+            for key, value in (page_data or {}).items():
+                if key in self.TREE_PAGE_FIELDS:
+                    values[key] = value
+
+            result = session.execute(
+                update(Page)
+                .where(Page.id == page_uuid, Page.version == expected_version)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                current_version = session.execute(
+                    select(Page.version).where(Page.id == page_uuid)
+                ).scalar_one_or_none()
+                session.rollback()
+                if current_version is None:
+                    raise PageNotFoundError(f"Page not found: {page_id}")
+                raise PageVersionConflictError(
+                    f"Page {page_id} is at version {current_version}, not {expected_version}",
+                    current_version=current_version,
+                )
+
+            existing_sections = {
+                row.id: row for row in session.execute(
+                    select(PageSection.id, PageSection.section_type, PageSection.position, PageSection.settings)
+                    .where(PageSection.page_id == page_uuid)
+                ).all()
+            }
+            existing_blocks = {
+                row.id: row for row in session.execute(
+                    select(
+                        ContentBlock.id, ContentBlock.section_id, ContentBlock.block_type,
+                        ContentBlock.position, ContentBlock.content, ContentBlock.settings,
+                    )
+                    .join(PageSection, ContentBlock.section_id == PageSection.id)
+                    .where(PageSection.page_id == page_uuid)
+                ).all()
+            }
+
+            id_map: Dict[str, str] = {}
+            section_inserts, section_updates = [], []
+            block_inserts, block_updates = [], []
+            kept_sections, kept_blocks = set(), set()
+
+            for section_position, section in enumerate(sections):
+                submitted_id = section.get("id")
+                section_id = _to_uuid(submitted_id)
+                row = {
+                    "section_type": section.get("section_type") or "text-block",
+                    "position": section_position,
+                    "settings": section.get("settings") or {},
+                }
+                if section_id in existing_sections and section_id not in kept_sections:
+                    kept_sections.add(section_id)
+                    stored = existing_sections[section_id]
+                    if (stored.section_type, stored.position, stored.settings or {}) != (
+                        row["section_type"], row["position"], row["settings"]
+                    ):
+                        section_updates.append({"id": section_id, "updated_at": now, **row})
+                else:
+                    section_id = uuid.uuid4()
+                    if submitted_id is not None:
+                        id_map[str(submitted_id)] = str(section_id)
+                    section_inserts.append({
+                        "id": section_id, "page_id": page_uuid, "created_at": now, "updated_at": now, **row
+                    })
+
+                for block_position, block in enumerate(section.get("blocks") or []):
+                    submitted_block_id = block.get("id")
+                    block_id = _to_uuid(submitted_block_id)
+                    block_row = {
+                        "section_id": section_id,
+                        "block_type": block.get("block_type") or "text",
+                        "position": block_position,
+                        "content": block.get("content") or {},
+                        "settings": block.get("settings") or {},
+                    }
+                    if block_id in existing_blocks and block_id not in kept_blocks:
+                        kept_blocks.add(block_id)
+                        stored = existing_blocks[block_id]
+                        if (
+                            stored.section_id, stored.block_type, stored.position,
+                            stored.content or {}, stored.settings or {},
+                        ) != (
+                            block_row["section_id"], block_row["block_type"], block_row["position"],
+                            block_row["content"], block_row["settings"],
+                        ):
+                            block_updates.append({"id": block_id, "updated_at": now, **block_row})
+                    else:
+                        block_id = uuid.uuid4()
+                        if submitted_block_id is not None:
+                            id_map[str(submitted_block_id)] = str(block_id)
+                        block_inserts.append({"id": block_id, "created_at": now, "updated_at": now, **block_row})
+
+            deleted_blocks = [block_id for block_id in existing_blocks if block_id not in kept_blocks]
+            deleted_sections = [section_id for section_id in existing_sections if section_id not in kept_sections]
+
+            # Inserts and re-parenting updates first, so blocks moved out of a
+            # removed section are already elsewhere when its delete cascades;
+            # sections are inserted before the blocks that reference them
+            if section_inserts:
+                session.execute(insert(PageSection), section_inserts)
+            if section_updates:
+                session.execute(update(PageSection), section_updates)
+            if block_inserts:
+                session.execute(insert(ContentBlock), block_inserts)
+            if block_updates:
+                session.execute(update(ContentBlock), block_updates)
+            if deleted_blocks:
+                session.execute(
+                    delete(ContentBlock)
+                    .where(ContentBlock.id.in_(deleted_blocks))
+                    .execution_options(synchronize_session=False)
+                )
+            if deleted_sections:
+                session.execute(
+                    delete(PageSection)
+                    .where(PageSection.id.in_(deleted_sections))
+                    .execution_options(synchronize_session=False)
+                )
+
+            new_version = session.execute(
+                select(Page.version).where(Page.id == page_uuid)
+            ).scalar_one()
+            session.commit()
+        except PageError:
+            raise
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving page tree: {str(e)}")
+            raise PageError(f"Error saving page tree: {str(e)}") from e
+        finally:
+            if not self.session:
+                session.close()
+
+        return {
+            "page_id": str(page_uuid),
+            "version": new_version,
+            "id_map": id_map,
+            "stats": {
+                "sections_inserted": len(section_inserts),
+                "sections_updated": len(section_updates),
+                "sections_deleted": len(deleted_sections),
+                "blocks_inserted": len(block_inserts),
+                "blocks_updated": len(block_updates),
+                "blocks_deleted": len(deleted_blocks),
+            },
+        }
+
+
+def _to_uuid(value: Any) -> Optional[uuid.UUID]:
+    """Parse an id into a UUID, returning None for missing or temporary ids."""
+    if value is None:
+        return None
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _bump_page_version(session, page_ids) -> None:
+    """
+    Bump the version of pages whose sections or blocks changed, in the caller's transaction.
+
+    Edits made through the per-section and per-block managers then make a
+    stale save_tree() fail with PageVersionConflictError instead of
+    overwriting them.
+    """
+    page_ids = {_to_uuid(page_id) for page_id in page_ids} - {None}
+    if page_ids:
+        session.execute(
+            update(Page)
+            .where(Page.id.in_(page_ids))
+            .values(version=Page.version + 1, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _section_page_ids(session, section_ids) -> List[Any]:
+    """Get the pages that own the given sections."""
+    section_ids = {_to_uuid(section_id) for section_id in section_ids} - {None}
+    if not section_ids:
+        return []
+    return session.execute(
+        select(PageSection.page_id).where(PageSection.id.in_(section_ids))
+    ).scalars().all()
+
 
 class PageSectionManager:
     """Manager for page section operations."""
@@ -302,6 +608,7 @@ class PageSectionManager:
         try:
             section = PageSection(**section_data)
             session.add(section)
+            _bump_page_version(session, [section.page_id])
             session.commit()
             return section
         except Exception as e:
@@ -371,10 +678,12 @@ class PageSectionManager:
             if not section:
                 return None
 
+            page_ids = [section.page_id]
             for key, value in section_data.items():
                 if hasattr(section, key):
                     setattr(section, key, value)
 
+            _bump_page_version(session, page_ids + [section.page_id])
             session.commit()
             return section
         except Exception as e:
@@ -401,6 +710,7 @@ class PageSectionManager:
             if not section:
                 return False
 
+            _bump_page_version(session, [section.page_id])
             session.delete(section)
             session.commit()
             return True
@@ -440,6 +750,7 @@ class ContentBlockManager:
         try:
             block = ContentBlock(**block_data)
             session.add(block)
+            _bump_page_version(session, _section_page_ids(session, [block.section_id]))
             session.commit()
             return block
         except Exception as e:
@@ -509,10 +820,12 @@ class ContentBlockManager:
             if not block:
                 return None
 
+            section_ids = [block.section_id]
             for key, value in block_data.items():
                 if hasattr(block, key):
                     setattr(block, key, value)
 
+            _bump_page_version(session, _section_page_ids(session, section_ids + [block.section_id]))
             session.commit()
             return block
         except Exception as e:
@@ -539,6 +852,7 @@ class ContentBlockManager:
             if not block:
                 return False
 
+            _bump_page_version(session, _section_page_ids(session, [block.section_id]))
             session.delete(block)
             session.commit()
             return True
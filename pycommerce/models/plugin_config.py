@@ -4,300 +4,216 @@ Plugin configuration model for PyCommerce.
 This module provides functionality for storing and retrieving
 plugin configuration data in the database, with support for
 tenant-specific configurations.
+
+Storage and caching live in pycommerce.core.plugin.PluginConfigManager;
+this module keeps the (plugin_id, config_data, tenant_id) call style used
+by routes and plugins and wraps failures in ConfigError.
 """
 
-import json
 import logging
-from typing import Dict, Any, Optional, List, Union
-from uuid import UUID
-
-from sqlalchemy import Column, String, Boolean, Text, ForeignKey, UniqueConstraint
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from typing import Dict, Any, Optional, List
 
-from pycommerce.core.db import SessionLocal
 from pycommerce.core.exceptions import ConfigError
-# Import from central registry to avoid circular imports
-from pycommerce.models.db_registry import PluginConfig
+from pycommerce.core.plugin import PluginConfigManager as PluginConfigStore
+from pycommerce.core.plugin import add_config_listener
 
 logger = logging.getLogger(__name__)
 
+__all__ = ["PluginConfigManager", "add_config_listener"]
+
 
 class PluginConfigManager:
     """
     Manager for plugin configurations.
-    
+
     This class provides methods for storing, retrieving, and
-    managing plugin configurations across all tenants.
+    managing plugin configurations across all tenants. Reads are served
+    from the process-wide configuration cache, so instantiating a manager
+    per request is cheap.
     """
-    
+
+    def __init__(self, store: Optional[PluginConfigStore] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            store: Configuration store to use (defaults to a database-backed store)
+        """
+        self._store = store or PluginConfigStore()
+
     def get_config(self, plugin_id: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get configuration for a plugin.
-        
+
         If tenant_id is specified, it returns the tenant-specific configuration.
         Otherwise, it returns the global configuration.
-        
+
         Args:
             plugin_id: The ID of the plugin
             tenant_id: Optional tenant ID for tenant-specific configurations
-            
+
         Returns:
             Dictionary containing configuration values
-            
+
         Raises:
             ConfigError: If the configuration could not be retrieved
         """
         try:
-            with SessionLocal() as session:
-                query = session.query(PluginConfig).filter(
-                    PluginConfig.plugin_id == plugin_id
-                )
-                
-                if tenant_id:
-                    # Get tenant-specific configuration
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                else:
-                    # Get global configuration
-                    query = query.filter(PluginConfig.tenant_id.is_(None))
-                
-                config = query.first()
-                
-                if config and config.config_data:
-                    return config.config_data
-                
-                # If no configuration is found, return an empty dict
-                return {}
-                
+            return self._store.get_config(plugin_id, tenant_id)
         except Exception as e:
             logger.error(f"Error retrieving configuration for plugin {plugin_id}: {str(e)}")
             raise ConfigError(f"Failed to retrieve plugin configuration: {str(e)}")
-    
+
+    def get_configs(self, tenant_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the configurations of all plugins for a tenant in one query.
+
+        Args:
+            tenant_id: Optional tenant ID for tenant-specific configurations
+
+        Returns:
+            Dictionary mapping plugin IDs to configuration values
+
+        Raises:
+            ConfigError: If the configurations could not be retrieved
+        """
+        try:
+            return self._store.get_configs(tenant_id)
+        except Exception as e:
+            logger.error(f"Error retrieving plugin configurations: {str(e)}")
+            raise ConfigError(f"Failed to retrieve plugin configurations: {str(e)}")
+
     def save_config(self, plugin_id: str, config_data: Dict[str, Any], tenant_id: Optional[str] = None) -> bool:
         """
         Save configuration for a plugin.
-        
+
         If tenant_id is specified, it saves as a tenant-specific configuration.
         Otherwise, it saves as the global configuration.
-        
+
         Args:
             plugin_id: The ID of the plugin
             config_data: Dictionary containing configuration values
             tenant_id: Optional tenant ID for tenant-specific configurations
-            
+
         Returns:
             True if the configuration was saved successfully, False otherwise
-            
+
         Raises:
             ConfigError: If the configuration could not be saved
         """
         try:
-            with SessionLocal() as session:
-                # Look for an existing configuration
-                query = session.query(PluginConfig).filter(
-                    PluginConfig.plugin_id == plugin_id
-                )
-                
-                if tenant_id:
-                    # Get tenant-specific configuration
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                else:
-                    # Get global configuration
-                    query = query.filter(PluginConfig.tenant_id.is_(None))
-                
-                config = query.first()
-                
-                if config:
-                    # Update existing configuration
-                    config.config_data = config_data
-                    config.updated_at = "now()"
-                else:
-                    # Create new configuration
-                    import uuid
-                    config = PluginConfig(
-                        id=str(uuid.uuid4()),
-                        plugin_id=plugin_id,
-                        tenant_id=str(tenant_id) if tenant_id else None,
-                        config_data=config_data,
-                        created_at="now()",
-                        updated_at="now()"
-                    )
-                    session.add(config)
-                
-                session.commit()
-                return True
-                
+            self._store.save_config(plugin_id, tenant_id, config_data)
+            return True
         except Exception as e:
             logger.error(f"Error saving configuration for plugin {plugin_id}: {str(e)}")
             raise ConfigError(f"Failed to save plugin configuration: {str(e)}")
-    
+
     def set_enabled(self, plugin_id: str, enabled: bool, tenant_id: Optional[str] = None) -> bool:
         """
         Enable or disable a plugin for a specific tenant or globally.
-        
+
         Args:
             plugin_id: The ID of the plugin
             enabled: Whether the plugin should be enabled
             tenant_id: Optional tenant ID for tenant-specific configuration
-            
+
         Returns:
             True if the operation was successful, False otherwise
-            
+
         Raises:
             ConfigError: If the operation failed
         """
         try:
-            with SessionLocal() as session:
-                # Look for an existing configuration
-                query = session.query(PluginConfig).filter(
-                    PluginConfig.plugin_id == plugin_id
-                )
-                
-                if tenant_id:
-                    # Get tenant-specific configuration
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                else:
-                    # Get global configuration
-                    query = query.filter(PluginConfig.tenant_id.is_(None))
-                
-                config = query.first()
-                
-                if config:
-                    # Update existing configuration
-                    config.enabled = enabled
-                    config.updated_at = "now()"
-                else:
-                    # Create new configuration with just the enabled flag
-                    import uuid
-                    config = PluginConfig(
-                        id=str(uuid.uuid4()),
-                        plugin_id=plugin_id,
-                        tenant_id=str(tenant_id) if tenant_id else None,
-                        enabled=enabled,
-                        created_at="now()",
-                        updated_at="now()"
-                    )
-                    session.add(config)
-                
-                session.commit()
-                return True
-                
+            self._store.set_enabled(plugin_id, tenant_id, enabled)
+            return True
         except Exception as e:
             logger.error(f"Error setting enabled status for plugin {plugin_id}: {str(e)}")
             raise ConfigError(f"Failed to update plugin status: {str(e)}")
-    
+
     def is_enabled(self, plugin_id: str, tenant_id: Optional[str] = None) -> bool:
         """
         Check if a plugin is enabled for a specific tenant or globally.
-        
+
         Args:
             plugin_id: The ID of the plugin
             tenant_id: Optional tenant ID for tenant-specific configuration
-            
+
         Returns:
             True if the plugin is enabled, False otherwise
-            
+
         Raises:
             ConfigError: If the check failed
         """
         try:
-            with SessionLocal() as session:
-                query = session.query(PluginConfig).filter(
-                    PluginConfig.plugin_id == plugin_id
-                )
-                
-                if tenant_id:
-                    # Get tenant-specific configuration
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                else:
-                    # Get global configuration
-                    query = query.filter(PluginConfig.tenant_id.is_(None))
-                
-                config = query.first()
-                
-                if config:
-                    return config.enabled
-                
-                # If no configuration is found, assume the plugin is enabled
-                return True
-                
+            return self._store.is_enabled(plugin_id, tenant_id)
         except Exception as e:
             logger.error(f"Error checking enabled status for plugin {plugin_id}: {str(e)}")
             raise ConfigError(f"Failed to check plugin status: {str(e)}")
-    
+
+    def get_version(self, plugin_id: str, tenant_id: Optional[str] = None) -> int:
+        """
+        Get the version of a plugin's configuration.
+
+        Args:
+            plugin_id: The ID of the plugin
+            tenant_id: Optional tenant ID for tenant-specific configuration
+
+        Returns:
+            The stored version, or 0 if the plugin has no configuration
+
+        Raises:
+            ConfigError: If the version could not be retrieved
+        """
+        try:
+            return self._store.get_version(plugin_id, tenant_id)
+        except Exception as e:
+            logger.error(f"Error retrieving configuration version for plugin {plugin_id}: {str(e)}")
+            raise ConfigError(f"Failed to retrieve plugin configuration version: {str(e)}")
+
     def list_configs(self, plugin_id: Optional[str] = None, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         List all configurations, optionally filtered by plugin_id or tenant_id.
-        
+
         Args:
             plugin_id: Optional plugin ID to filter by
             tenant_id: Optional tenant ID to filter by
-            
+
         Returns:
             List of dictionaries containing configuration information
-            
+
         Raises:
             ConfigError: If the operation failed
         """
         try:
-            with SessionLocal() as session:
-                query = session.query(PluginConfig)
-                
-                if plugin_id:
-                    query = query.filter(PluginConfig.plugin_id == plugin_id)
-                
-                if tenant_id:
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                
-                configs = query.all()
-                
-                result = []
-                for config in configs:
-                    result.append({
-                        "plugin_id": config.plugin_id,
-                        "tenant_id": config.tenant_id,
-                        "enabled": config.enabled,
-                        "config_data": config.config_data or {}
-                    })
-                
-                return result
-                
+            return [
+                {
+                    "plugin_id": entry["plugin_id"],
+                    "tenant_id": entry["tenant_id"],
+                    "enabled": entry["enabled"],
+                    "config_data": entry["config"]
+                }
+                for entry in self._store.list_configs(plugin_id, tenant_id)
+            ]
         except Exception as e:
             logger.error(f"Error listing plugin configurations: {str(e)}")
             raise ConfigError(f"Failed to list plugin configurations: {str(e)}")
-    
+
     def delete_config(self, plugin_id: str, tenant_id: Optional[str] = None) -> bool:
         """
         Delete configuration for a plugin.
-        
+
         Args:
             plugin_id: The ID of the plugin
             tenant_id: Optional tenant ID for tenant-specific configurations
-            
+
         Returns:
             True if the configuration was deleted successfully, False otherwise
-            
+
         Raises:
             ConfigError: If the configuration could not be deleted
         """
         try:
-            with SessionLocal() as session:
-                query = session.query(PluginConfig).filter(
-                    PluginConfig.plugin_id == plugin_id
-                )
-                
-                if tenant_id:
-                    # Delete tenant-specific configuration
-                    query = query.filter(PluginConfig.tenant_id == str(tenant_id))
-                else:
-                    # Delete global configuration
-                    query = query.filter(PluginConfig.tenant_id.is_(None))
-                
-                count = query.delete()
-                session.commit()
-                
-                return count > 0
-                
+            return self._store.delete_config(plugin_id, tenant_id)
         except Exception as e:
             logger.error(f"Error deleting configuration for plugin {plugin_id}: {str(e)}")
-            raise ConfigError(f"Failed to delete plugin configuration: {str(e)}")
\ No newline at end of file
+            raise ConfigError(f"Failed to delete plugin configuration: {str(e)}")
@@ -76,6 +76,11 @@ class ProductManager:
             if product_data.get('sku') and product_data['sku'] in self._sku_index:
                 raise ProductError(f"Product with SKU '{product_data['sku']}' already exists")
 
+            # Descriptions are rich text; store them sanitized so no render path has to
+            if product_data.get('description'):
+                from pycommerce.services.wysiwyg_service import sanitize_html
+                product_data = dict(product_data, description=sanitize_html(product_data['description']))
+
             # Create and store the product
             product = Product(**product_data)
             self._products[product.id] = product
@@ -146,6 +151,10 @@ class ProductManager:
                 del self._sku_index[product.sku]
                 self._sku_index[product_data['sku']] = product.id
 
+            if product_data.get('description'):
+                from pycommerce.services.wysiwyg_service import sanitize_html
+                product_data = dict(product_data, description=sanitize_html(product_data['description']))
+
             # Update the product
             for key, value in product_data.items():
                 setattr(product, key, value)
@@ -15,6 +15,8 @@ from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, Foreig
 from sqlalchemy.orm import relationship
 
 from pycommerce.core.db import Base, get_session
+from pycommerce.services.number_allocator import RETURN_NUMBERS, get_number_allocator
+from pycommerce.services.event_bus import RETURN_REFUNDED, record_event
 
 logger = logging.getLogger(__name__)
 
@@ -111,16 +113,9 @@ class ReturnItem(Base):
 class ReturnManager:
     """Manager class for return requests."""
     
-    def generate_return_number(self) -> str:
-        """Generate a unique return number."""
-        # Generate a random string of 8 characters
-        chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-        random_part = ''.join(uuid.uuid4().hex[:8].upper())
-        
-        # Add a timestamp prefix to ensure uniqueness
-        timestamp_part = datetime.now().strftime("%y%m%d")
-        
-        return f"RET-{timestamp_part}-{random_part}"
+    def generate_return_number(self, tenant_id: Optional[str] = None) -> str:
+        """Generate a unique return number from the tenant's return sequence."""
+        return get_number_allocator().next_number(RETURN_NUMBERS, tenant_id)
     
     def get_by_id(self, return_id: str) -> Optional[ReturnRequest]:
         """
@@ -193,6 +188,25 @@ class ReturnManager:
             logger.error(f"Error getting return requests: {str(e)}")
             return []
     
+    def get_for_all_tenants(self, filters: Optional[Dict[str, Any]] = None, page: int = 1, per_page: int = 50):
+        """
+        Get one page of return requests across all tenants in a single query.
+        
+        Args:
+            filters: Optional dictionary of filters to apply
+            page: 1-based page number
+            per_page: Return requests per page
+            
+        Returns:
+            CrossTenantPage of return requests with tenant_name and tenant_slug attributes
+        """
+        from pycommerce.services.cross_tenant_query import CrossTenantPage, paginate, returns_query
+        try:
+            return paginate(returns_query(filters), page, per_page)
+        except Exception as e:
+            logger.error(f"Error getting return requests for all tenants: {str(e)}")
+            return CrossTenantPage(page=page, per_page=per_page)
+    
     def create_return(self, data: Dict[str, Any]) -> Optional[ReturnRequest]:
         """
         Create a new return request.
@@ -207,7 +221,10 @@ class ReturnManager:
             with get_session() as session:
                 # Generate return number if not provided
                 if 'return_number' not in data or not data['return_number']:
-                    data['return_number'] = self.generate_return_number()
+                    # Returns are numbered per tenant of the returned order
+                    from pycommerce.models.order import Order
+                    tenant_id = session.query(Order.tenant_id).filter(Order.id == data.get('order_id')).scalar()
+                    data['return_number'] = self.generate_return_number(tenant_id)
                 
                 return_request = ReturnRequest(**data)
                 session.add(return_request)
@@ -327,6 +344,15 @@ class ReturnManager:
                     else:
                         return_request.admin_notes = f"{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} - Refund processed:\n{notes}"
                 
+                from pycommerce.models.order import Order
+                tenant_id = session.query(Order.tenant_id).filter(Order.id == return_request.order_id).scalar()
+                record_event(session, RETURN_REFUNDED, {
+                    "return_id": return_request.id,
+                    "order_id": return_request.order_id,
+                    "amount": return_request.refund_amount,
+                    "method": return_request.refund_method,
+                    "transaction_id": return_request.refund_transaction_id,
+                }, aggregate_id=return_request.order_id, tenant_id=tenant_id)
                 session.commit()
                 return True
         except Exception as e:
@@ -0,0 +1,69 @@
+"""
+Scheduled job module for PyCommerce.
+
+This module defines the ScheduledJob model, which holds the schedule and
+last outcome of each maintenance job, and the JobRun model, which keeps the
+history of its runs.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, Index
+
+from pycommerce.core.db import Base
+
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_STATUSES = (JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)
+
+
+class ScheduledJob(Base):
+    """A registered maintenance job and when it runs next."""
+    __tablename__ = "scheduled_jobs"
+    __table_args__ = (
+        Index("ix_scheduled_jobs_next_run", "enabled", "next_run_at"),
+        {'extend_existing': True},
+    )
+
+    name = Column(String(100), primary_key=True)
+    schedule = Column(String(100), nullable=False)
+    enabled = Column(Boolean, nullable=False, default=True)
+    next_run_at = Column(DateTime, nullable=True)
+    # Lease used instead of an advisory lock on databases without one
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_status = Column(String(20), nullable=True)
+    last_duration_ms = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<ScheduledJob {self.name} '{self.schedule}' next={self.next_run_at}>"
+
+
+class JobRun(Base):
+    """One run of a scheduled job."""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_job_started", "job_name", "started_at"),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_name = Column(String(100), nullable=False)
+    # host:pid of the process that ran the job
+    worker = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, default=JOB_RUNNING)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    # JSON summary returned by the job
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<JobRun {self.job_name} {self.status} {self.started_at}>"
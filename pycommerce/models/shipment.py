@@ -305,7 +305,7 @@ class ShipmentManager:
             session: The database session
             order_id: The order ID
         """
-        from pycommerce.models.order import Order, OrderStatus
+        from pycommerce.models.order import Order, OrderStatus, record_order_status_changed
         
         # Get the order
         order = session.query(Order).filter_by(id=order_id).first()
@@ -319,6 +319,8 @@ class ShipmentManager:
             logger.info(f"No shipments found for order {order_id}")
             return
             
+        previous_status = order.status
+
         # Determine the new order status based on shipment statuses
         shipment_statuses = [s.status for s in shipments]
         
@@ -332,6 +334,8 @@ class ShipmentManager:
             # All shipments are being processed
             order.status = OrderStatus.PROCESSING.value
             
+        if order.status != previous_status:
+            record_order_status_changed(session, order, previous_status, "shipments")
         session.commit()
         logger.info(f"Updated order {order_id} status to {order.status} based on shipments")
 
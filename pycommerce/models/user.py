@@ -6,20 +6,23 @@ managing users in the PyCommerce SDK.
 """
 
 import logging
+import os
 import secrets
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 from uuid import UUID, uuid4
 from pydantic import BaseModel, Field, validator, EmailStr
 from datetime import datetime, timedelta
-import hashlib
 import base64
 import jwt
 from enum import Enum
 
+from pycommerce.services.auth_cache import PrincipalCache, Principal, RevocationList, get_revocation_list
+from pycommerce.services import password_hashing
+
 logger = logging.getLogger("pycommerce.models.user")
 
-# JWT settings
-JWT_SECRET = secrets.token_hex(32)  # Generate a random secret key
+# JWT settings (set JWT_SECRET so tokens verify in every worker and across restarts)
+JWT_SECRET = os.environ.get("JWT_SECRET") or secrets.token_hex(32)
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -66,33 +69,33 @@ class UserManager:
     Manages user operations.
     """
     
-    def __init__(self):
-        """Initialize a new UserManager."""
+    def __init__(self, revocations: Optional[RevocationList] = None):
+        """
+        Initialize a new UserManager.
+        
+        Args:
+            revocations: Revocation list to use (defaults to the database-backed one)
+        """
         self._users: Dict[UUID, User] = {}
         self._email_index: Dict[str, UUID] = {}
+        self._principals = PrincipalCache()
+        self._revocations = revocations if revocations is not None else get_revocation_list()
     
     def _hash_password(self, password: str) -> str:
         """
-        Hash a password using SHA-256.
+        Hash a password using scrypt.
         
         Args:
             password: The password to hash
             
         Returns:
-            The hashed password
+            The versioned password hash
         """
-        # Generate a random salt
-        salt = secrets.token_hex(16)
-        
-        # Hash the password with the salt
-        pw_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        
-        # Return the salt and hash, separated by a colon
-        return f"{salt}:{pw_hash}"
+        return password_hashing.hash_password(password)
     
     def _verify_password(self, stored_hash: str, password: str) -> bool:
         """
-        Verify a password against a stored hash.
+        Verify a password against a stored hash (scrypt or legacy salted SHA-256).
         
         Args:
             stored_hash: The stored password hash
@@ -101,22 +104,23 @@ class UserManager:
         Returns:
             True if the password matches, False otherwise
         """
-        # Split the stored hash into salt and hash
-        salt, pw_hash = stored_hash.split(':', 1)
-        
-        # Hash the password with the same salt
-        new_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        
-        # Compare the hashes
-        return new_hash == pw_hash
+        return password_hashing.verify_password(stored_hash, password)
     
-    def _create_access_token(self, user_id: UUID, expires_delta: Optional[timedelta] = None) -> str:
+    def _upgrade_password_hash(self, user: User, new_hash: str) -> None:
+        """Replace a legacy or weaker password hash after a successful login."""
+        user.password_hash = new_hash
+        logger.info(f"Upgraded password hash for user {user.id}")
+    
+    def create_access_token(self, user_id: Union[UUID, str], expires_delta: Optional[timedelta] = None,
+                            embed_claims: bool = True) -> str:
         """
         Create a JWT access token for a user.
         
         Args:
             user_id: The ID of the user
             expires_delta: Optional expiration time delta
+            embed_claims: Whether to embed the user's role, tenant and active
+                flag, so the token can be verified without a user lookup
             
         Returns:
             The JWT access token
@@ -132,47 +136,155 @@ class UserManager:
             "sub": str(user_id),
             "exp": expire,
             "iat": datetime.utcnow(),
+            "jti": uuid4().hex,
             "type": "access"
         }
         
+        # Embed claims, valid while the user's claims version is unchanged
+        try:
+            user = self._users.get(UUID(str(user_id))) if embed_claims else None
+        except ValueError:
+            user = None
+        if user is not None:
+            principal = Principal.from_user(user, self._revocations.version(user_id))
+            payload.update({
+                "role": principal.role,
+                "tenant": principal.tenant_id,
+                "active": principal.is_active,
+                "ver": principal.version,
+            })
+        
         # Encode and return the token
         return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     
+    def decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Decode a JWT token and check it has not been revoked.
+        
+        Args:
+            token: The JWT token to decode
+            
+        Returns:
+            The token's claims, or None if the token is invalid or revoked
+        """
+        return self._decode(token)[0]
+    
+    def _decode(self, token: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """Decode a token, returning its claims (None if invalid or revoked) and the user's claims version."""
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except jwt.PyJWTError:
+            return None, 0
+        if payload.get("sub") is None:
+            return None, 0
+        version = self._revocations.check(payload)
+        if version is None:
+            return None, 0
+        return payload, version
+    
     def verify_token(self, token: str) -> Optional[User]:
         """
         Verify a JWT token and return the associated user.
         
+        Users are cached for a short time per (user, token issue time), so
+        repeated requests with the same token skip the user lookup.
+        
         Args:
             token: The JWT token to verify
             
         Returns:
             The user associated with the token, or None if the token is invalid
         """
-        try:
-            # Decode the token
-            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-            
-            # Get the user ID from the token
-            user_id = payload.get("sub")
-            if user_id is None:
-                return None
+        payload, version = self._decode(token)
+        if payload is None:
+            return None
+        return self._user_for_token(payload, version)
+    
+    def verify_principal(self, token: str) -> Optional[Principal]:
+        """
+        Verify a JWT token and return who it authenticates.
+        
+        Tokens with current embedded claims are verified without a user
+        lookup; other tokens are verified as in verify_token.
+        
+        Args:
+            token: The JWT token to verify
             
-            # Get the user
-            user = self.get(user_id)
-            if not user.is_active:
+        Returns:
+            The principal, or None if the token is invalid or the user is inactive
+        """
+        payload, version = self._decode(token)
+        if payload is None:
+            return None
+        
+        # The version comes from the shared store, so claims changed in
+        # another worker are never trusted
+        principal = Principal.from_claims(payload)
+        if principal is not None and principal.version == version:
+            return principal if principal.is_active else None
+        
+        user = self._user_for_token(payload, version)
+        if user is None:
+            return None
+        return Principal.from_user(user, version, int(payload.get("iat") or 0))
+    
+    def _user_for_token(self, payload: Dict[str, Any], version: int) -> Optional[User]:
+        user_id, issued_at = payload["sub"], int(payload.get("iat") or 0)
+        user = self._principals.get(user_id, issued_at, version)
+        if user is None:
+            try:
+                user = self.get(user_id)
+            except Exception:
                 return None
+            self._principals.put(user_id, issued_at, version, user)
+        return user if user.is_active else None
+    
+    def revoke_token(self, token: str) -> bool:
+        """
+        Revoke a token, e.g. on logout.
+        
+        Args:
+            token: The JWT token to revoke
             
-            return user
+        Returns:
+            True if the token was valid and is now revoked
+        """
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         except jwt.PyJWTError:
-            return None
+            return False
+        if payload.get("jti"):
+            self._revocations.revoke_token(payload["jti"], payload["exp"])
+        else:
+            # Tokens without an id can only be revoked with all of the user's tokens
+            self._revocations.revoke_user(payload["sub"])
+            self._principals.invalidate(payload["sub"])
+        return True
+    
+    def revoke_user_tokens(self, user_id: Union[UUID, str]) -> None:
+        """
+        Revoke every token issued to a user so far.
+        
+        Args:
+            user_id: The ID of the user
+        """
+        self._revocations.revoke_user(str(user_id))
+        self._principals.invalidate(str(user_id))
     
-    def create(self, user_data: dict, password: Optional[str] = None) -> User:
+    def create(
+        self,
+        user_data: dict,
+        password: Optional[str] = None,
+        password_hash: Optional[str] = None,
+    ) -> User:
         """
         Create a new user.
         
         Args:
             user_data: Dictionary containing user data
             password: Optional password for the user
+            password_hash: Optional hash already computed by the verifier pool;
+                async callers pass this instead of password
             
         Returns:
             The created user
@@ -188,7 +300,9 @@ class UserManager:
                 raise PyCommerceError(f"User with email '{user_data['email']}' already exists")
             
             # Hash the password if provided
-            if password:
+            if password_hash:
+                user_data['password_hash'] = password_hash
+            elif password:
                 user_data['password_hash'] = self._hash_password(password)
             
             # Create and store the user
@@ -250,7 +364,13 @@ class UserManager:
         
         return self.get(self._email_index[email])
     
-    def update(self, user_id: Union[UUID, str], user_data: dict, password: Optional[str] = None) -> User:
+    def update(
+        self,
+        user_id: Union[UUID, str],
+        user_data: dict,
+        password: Optional[str] = None,
+        password_hash: Optional[str] = None,
+    ) -> User:
         """
         Update a user.
         
@@ -258,6 +378,8 @@ class UserManager:
             user_id: The ID of the user to update
             user_data: Dictionary containing updated user data
             password: Optional new password for the user
+            password_hash: Optional hash of the new password already computed
+                by the verifier pool; async callers pass this instead of password
             
         Returns:
             The updated user
@@ -280,7 +402,9 @@ class UserManager:
                 self._email_index[user_data['email'].lower()] = user.id
             
             # Hash the password if provided
-            if password:
+            if password_hash:
+                user_data['password_hash'] = password_hash
+            elif password:
                 user_data['password_hash'] = self._hash_password(password)
             
             # Update the user
@@ -290,6 +414,14 @@ class UserManager:
             # Update timestamp
             user.updated_at = datetime.now()
             
+            # Cached users and embedded claims are stale; a new password or
+            # deactivation also ends existing sessions
+            if password or password_hash or user_data.get('is_active') is False:
+                self.revoke_user_tokens(user.id)
+            else:
+                self._revocations.bump_version(str(user.id))
+                self._principals.invalidate(str(user.id))
+            
             logger.debug(f"Updated user: {user.email} (ID: {user.id})")
             return user
             
@@ -313,6 +445,9 @@ class UserManager:
         del self._email_index[user.email.lower()]
         del self._users[user.id]
         
+        # End the user's sessions
+        self.revoke_user_tokens(user.id)
+        
         logger.debug(f"Deleted user: {user.email} (ID: {user.id})")
     
     def list(self) -> List[User]:
@@ -346,17 +481,58 @@ class UserManager:
         """
         try:
             # Get the user by email
-            user = self.get_by_email(email)
+            user = self._users.get(self._email_index.get(email.lower()))
             
-            # Verify the password
-            if not user.password_hash or not self._verify_password(user.password_hash, password):
+            # Verify the password; unknown emails take as long as wrong passwords
+            if user is None or not user.password_hash:
+                password_hashing.dummy_verify(password)
                 return None
+            if not self._verify_password(user.password_hash, password):
+                return None
+            
+            if password_hashing.needs_rehash(user.password_hash):
+                self._upgrade_password_hash(user, self._hash_password(password))
             
             # Create and return access token
-            access_token = self._create_access_token(user.id)
+            access_token = self.create_access_token(user.id)
             
             return (user, access_token)
             
         except Exception as e:
             logger.warning(f"Authentication failed: {str(e)}")
             return None
+    
+    async def authenticate_async(self, email: str, password: str) -> Optional[tuple]:
+        """
+        Authenticate a user without blocking the event loop.
+        
+        Password checks run on the process-wide verifier pool.
+        
+        Args:
+            email: The user's email
+            password: The user's password
+            
+        Returns:
+            A tuple of (user, access_token) if authentication is successful, None otherwise
+            
+        Raises:
+            PasswordVerifierBusy: If too many logins are already being checked
+        """
+        pool = password_hashing.get_password_verifier_pool()
+        user = self._users.get(self._email_index.get(email.lower()))
+        
+        # Verify the password; unknown emails take as long as wrong passwords
+        if user is None or not user.password_hash:
+            await pool.dummy_verify(password)
+            return None
+        stored_hash = user.password_hash
+        if not await pool.verify(stored_hash, password):
+            return None
+        
+        # Skip the upgrade if the password changed while verifying
+        if password_hashing.needs_rehash(stored_hash):
+            new_hash = await pool.hash(password)
+            if user.password_hash == stored_hash:
+                self._upgrade_password_hash(user, new_hash)
+        
+        return (user, self.create_access_token(user.id))
@@ -0,0 +1,52 @@
+"""
+Webhook event module for PyCommerce.
+
+This module defines the WebhookEvent model, which stores payment provider
+webhook deliveries before they are processed.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, Index, UniqueConstraint
+
+from pycommerce.core.db import Base
+
+# Event lifecycle: received events wait as pending (also while a retry is
+# scheduled), are claimed as processing, and end as processed or dead
+WEBHOOK_PENDING = "pending"
+WEBHOOK_PROCESSING = "processing"
+WEBHOOK_PROCESSED = "processed"
+WEBHOOK_DEAD = "dead"
+
+WEBHOOK_STATUSES = (WEBHOOK_PENDING, WEBHOOK_PROCESSING, WEBHOOK_PROCESSED, WEBHOOK_DEAD)
+
+
+class WebhookEvent(Base):
+    """A webhook delivery from a payment provider."""
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        # Providers redeliver on timeouts; the event ID makes ingestion idempotent
+        UniqueConstraint("provider", "event_id", name="uq_webhook_events_provider_event"),
+        Index("ix_webhook_events_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_webhook_events_order_received", "order_id", "received_at"),
+        {'extend_existing': True},
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    provider = Column(String(20), nullable=False)
+    event_id = Column(String(255), nullable=False)
+    event_type = Column(String(100), nullable=False)
+    order_id = Column(String(64), nullable=True)
+    payload = Column(Text, nullable=False)
+    signature_verified = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False, default=WEBHOOK_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookEvent {self.provider}:{self.event_id} {self.status}>"
@@ -6,7 +6,9 @@ as well as define available AI providers.
 """
 
 import os
+import json
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 
 from pycommerce.models.plugin_config import PluginConfigManager
@@ -16,6 +18,15 @@ logger = logging.getLogger(__name__)
 # Default OpenAI API key from environment (for development)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 
+# Provider used when none has been selected; "mock" runs fully offline
+DEFAULT_AI_PROVIDER = os.environ.get("AI_PROVIDER", "openai")
+
+# Provider instances keyed by their configuration, so API clients and their
+# connection pools are reused across requests until the configuration changes
+_provider_instances: Dict[str, Any] = {}
+_provider_instances_lock = threading.Lock()
+MAX_CACHED_PROVIDERS = 64
+
 # Define available AI providers
 def get_ai_providers() -> List[Dict[str, Any]]:
     """
@@ -168,7 +179,7 @@ def load_ai_config(tenant_id: Optional[str] = None) -> Dict[str, Any]:
         logger.warning(f"Error loading active AI provider config: {str(e)}")
 
     # Default to OpenAI if no active provider is set
-    active_provider = active_provider_config.get("provider", "openai") 
+    active_provider = active_provider_config.get("provider", DEFAULT_AI_PROVIDER)
 
     # Get provider configuration
     provider_config = {}
@@ -208,16 +219,27 @@ def get_ai_provider_instance(tenant_id: Optional[str] = None):
     provider_config = config["provider_config"]
 
     # Check if we have an API key
-    if not provider_config.get("api_key"):
+    if active_provider != "mock" and not provider_config.get("api_key"):
         raise ValueError(f"API key for {active_provider} is not configured")
 
+    key = json.dumps([active_provider, provider_config], sort_keys=True, default=str)
+    provider = _provider_instances.get(key)
+    if provider is not None:
+        return provider
+
     # Create provider instance
     try:
-        return get_ai_provider(active_provider, provider_config)
+        provider = get_ai_provider(active_provider, provider_config)
     except Exception as e:
         logger.error(f"Error creating AI provider: {str(e)}")
         raise ValueError(f"Failed to initialize AI provider: {str(e)}")
 
+    with _provider_instances_lock:
+        if len(_provider_instances) >= MAX_CACHED_PROVIDERS:
+            _provider_instances.clear()
+        _provider_instances[key] = provider
+    return provider
+
 def get_ai_settings() -> Dict[str, Any]:
     """
     Get the current AI settings.
@@ -7,6 +7,7 @@ This module provides adapters for different AI service providers.
 
 import logging
 import json
+import time
 from typing import Dict, Any, List, Optional, Callable
 
 logger = logging.getLogger(__name__)
@@ -39,15 +40,22 @@ def get_ai_provider(provider_name: str, config: Dict[str, Any] = None):
     """
     # Default to mock provider for testing and development
     if provider_name not in _providers:
-        return MockAIProvider(config or {})
+        provider = MockAIProvider(config or {})
+        provider.name = "mock"
+        return provider
     
     provider_class = _providers.get(provider_name)
-    return provider_class(config or {})
+    provider = provider_class(config or {})
+    provider.name = provider_name
+    return provider
 
 # Base class for AI providers
 class BaseAIProvider:
     """Base class for AI service providers."""
 
+    # Registered name, set by get_ai_provider
+    name = None
+
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the provider.
@@ -88,6 +96,12 @@ class BaseAIProvider:
 class MockAIProvider(BaseAIProvider):
     """Mock AI provider for testing without external API dependencies."""
 
+    def _simulate_latency(self):
+        # "latency_ms" in the config makes the mock behave like a slow API
+        latency_ms = float(self.config.get("latency_ms", 0) or 0)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+
     def generate_text(self, prompt: str, options: Dict[str, Any] = None) -> str:
         """
         Generate mock text based on a prompt.
@@ -100,6 +114,7 @@ class MockAIProvider(BaseAIProvider):
             Generated mock text
         """
         options = options or {}
+        self._simulate_latency()
         
         # Return different responses based on the prompt
         if "product" in prompt.lower():
@@ -146,6 +161,7 @@ class MockAIProvider(BaseAIProvider):
             Enhanced text
         """
         options = options or {}
+        self._simulate_latency()
         
         # Simple enhancement: add some formatting and a conclusion
         enhanced_text = f"<h2>Enhanced Content</h2>\n\n{text}\n\n"
@@ -195,6 +211,9 @@ try:
                 
             except Exception as e:
                 logger.error(f"OpenAI API error: {str(e)}")
+                # Batch jobs need the failure to retry it instead of storing the message
+                if options.get("raise_errors"):
+                    raise
                 return f"Error generating content: {str(e)}"
         
         def enhance_text(self, text: str, instructions: str = None, options: Dict[str, Any] = None) -> str:
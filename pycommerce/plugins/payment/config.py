@@ -24,10 +24,14 @@ PAYPAL_CLIENT_ID = ""
 PAYPAL_CLIENT_SECRET = ""
 PAYPAL_ENABLED = False
 PAYPAL_SANDBOX = True
+PAYPAL_WEBHOOK_ID = ""
 
 # Environment we're running in (development, production, etc.)
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
 
+# Accept webhooks for providers without a webhook secret (local testing only; never in production)
+ALLOW_UNSIGNED_WEBHOOKS = os.getenv("PAYMENT_ALLOW_UNSIGNED_WEBHOOKS", "false").lower() in ("true", "1", "yes")
+
 # Try to import settings service and credentials manager
 try:
     from pycommerce.services.settings_service import SettingsService, db_session
@@ -41,7 +45,7 @@ except ImportError as e:
 def _load_settings_from_services():
     """Load settings from credentials manager and database services."""
     global STRIPE_API_KEY, STRIPE_PUBLIC_KEY, STRIPE_WEBHOOK_SECRET, STRIPE_ENABLED
-    global PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET, PAYPAL_ENABLED, PAYPAL_SANDBOX
+    global PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET, PAYPAL_ENABLED, PAYPAL_SANDBOX, PAYPAL_WEBHOOK_ID
 
     if not has_services:
         logger.warning("Services not available, using environment variables")
@@ -67,6 +71,7 @@ def _load_settings_from_services():
                 PAYPAL_CLIENT_SECRET = paypal_credentials.get("client_secret", "")
                 PAYPAL_ENABLED = paypal_credentials.get("enabled", False)
                 PAYPAL_SANDBOX = paypal_credentials.get("sandbox", True)
+                PAYPAL_WEBHOOK_ID = paypal_credentials.get("webhook_id", "")
         except Exception as e:
             logger.error(f"Error getting credentials from credentials manager: {str(e)}")
 
@@ -151,6 +156,9 @@ if not PAYPAL_CLIENT_ID:
     PAYPAL_ENABLED = os.getenv("PAYPAL_ENABLED", "true").lower() in ("true", "1", "yes")
     PAYPAL_SANDBOX = os.getenv("PAYPAL_SANDBOX", "true").lower() in ("true", "1", "yes")
 
+if not PAYPAL_WEBHOOK_ID:
+    PAYPAL_WEBHOOK_ID = os.getenv("PAYPAL_WEBHOOK_ID", "")
+
 # Default configurations for testing/development
 if not STRIPE_API_KEY and ENVIRONMENT == "development":
     logger.info("Using development Stripe credentials")
@@ -232,11 +240,12 @@ async def save_paypal_config(config: Dict[str, Any]) -> bool:
             - client_secret: PayPal client secret
             - sandbox: Whether to use PayPal sandbox
             - enabled: Whether PayPal is enabled
+            - webhook_id: ID of the PayPal webhook, used to verify deliveries
 
     Returns:
         bool: True if successful, False otherwise
     """
-    global PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET, PAYPAL_ENABLED, PAYPAL_SANDBOX
+    global PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET, PAYPAL_ENABLED, PAYPAL_SANDBOX, PAYPAL_WEBHOOK_ID
 
     if not has_services:
         logger.error("Cannot save PayPal config - services not available")
@@ -248,13 +257,15 @@ async def save_paypal_config(config: Dict[str, Any]) -> bool:
         PAYPAL_CLIENT_SECRET = config.get("client_secret", PAYPAL_CLIENT_SECRET)
         PAYPAL_SANDBOX = config.get("sandbox", PAYPAL_SANDBOX)
         PAYPAL_ENABLED = config.get("enabled", PAYPAL_ENABLED)
+        PAYPAL_WEBHOOK_ID = config.get("webhook_id", PAYPAL_WEBHOOK_ID)
 
         # Save to credentials manager (more secure)
         saved = credentials_manager.store_credentials("paypal", {
             "client_id": PAYPAL_CLIENT_ID,
             "client_secret": PAYPAL_CLIENT_SECRET,
             "sandbox": PAYPAL_SANDBOX,
-            "enabled": PAYPAL_ENABLED
+            "enabled": PAYPAL_ENABLED,
+            "webhook_id": PAYPAL_WEBHOOK_ID
         })
 
         if not saved:
@@ -6,19 +6,28 @@ using the PayPal payment gateway.
 """
 
 import logging
+import time
 import httpx
 import json
 from typing import Dict, Any, Optional
-from uuid import UUID
-from fastapi import APIRouter, HTTPException
+from uuid import UUID, uuid4
+from fastapi import APIRouter, Request
 
 from pycommerce.plugins.payment.base import PaymentPlugin, PaymentMethod, PaymentStatus
 from pycommerce.plugins.payment.config import PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET, PAYPAL_ENABLED, PAYPAL_SANDBOX
-from pycommerce.core.exceptions import PaymentError
+from pycommerce.plugins.payment.transport import get_transport
+from pycommerce.plugins.payment.webhooks import receive_webhook
+from pycommerce.core.exceptions import PaymentError, PaymentProviderUnavailableError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Seconds before expiry at which a cached access token is renewed
+TOKEN_EXPIRY_MARGIN = 60
+
+# Cached access tokens by (API base URL, client ID): (token, monotonic expiry)
+_access_tokens = {}
+
 class PayPalPaymentPlugin(PaymentPlugin):
     """
     Payment plugin for processing payments using PayPal.
@@ -42,12 +51,15 @@ class PayPalPaymentPlugin(PaymentPlugin):
         self.client_secret = client_secret or PAYPAL_CLIENT_SECRET
         self.sandbox = PAYPAL_SANDBOX if sandbox is None else sandbox
 
+        self.api_base_url = "https://api-m.sandbox.paypal.com" if self.sandbox else "https://api-m.paypal.com"
         if not (self.client_id and self.client_secret):
             logger.warning("PayPal client credentials not properly configured")
             self.enabled = False
         else:
             self.enabled = PAYPAL_ENABLED
-            self.api_base_url = "https://api-m.sandbox.paypal.com" if self.sandbox else "https://api-m.paypal.com"
+
+        # Shared connection pool, timeouts and circuit breaker for PayPal calls
+        self.transport = get_transport("paypal", self.api_base_url)
 
         logger.info("Initializing PayPal payment plugin")
 
@@ -65,18 +77,29 @@ class PayPalPaymentPlugin(PaymentPlugin):
         return self.client_id
 
     async def _get_auth_token(self) -> str:
-        """Get an OAuth 2.0 access token from PayPal."""
+        """
+        Get an OAuth 2.0 access token from PayPal.
+
+        Tokens are cached per client until shortly before they expire, so
+        API calls don't each pay for a token request.
+        """
         try:
             if not self.client_id or not self.client_secret:
                 raise PaymentError("PayPal credentials not configured")
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/v1/oauth2/token",
-                    auth=(self.client_id, self.client_secret),
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                    data={"grant_type": "client_credentials"}
-                )
+            cache_key = (self.api_base_url, self.client_id)
+            cached = _access_tokens.get(cache_key)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            # Token requests are idempotent, so the transport may retry them
+            response = await self.transport.request(
+                "POST", "/v1/oauth2/token", "auth_token",
+                idempotent=True,
+                auth=(self.client_id, self.client_secret),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                data={"grant_type": "client_credentials"}
+            )
 
             if response.status_code >= 400:
                 error_data = response.json()
@@ -84,8 +107,14 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 raise PaymentError(f"PayPal authentication failed: {error_data.get('error_description', 'Unknown error')}")
 
             token_data = response.json()
-            return token_data.get("access_token")
-
+            access_token = token_data.get("access_token")
+            expires_in = float(token_data.get("expires_in", 0))
+            if access_token and expires_in > TOKEN_EXPIRY_MARGIN:
+                _access_tokens[cache_key] = (access_token, time.monotonic() + expires_in - TOKEN_EXPIRY_MARGIN)
+            return access_token
+
+        except PaymentProviderUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Error obtaining PayPal auth token: {str(e)}")
             raise PaymentError(f"PayPal authentication failed: {str(e)}")
@@ -95,24 +124,14 @@ class PayPalPaymentPlugin(PaymentPlugin):
         router = APIRouter()
 
         @router.post("/webhook", tags=["paypal"])
-        async def paypal_webhook(payload: Dict[str, Any]):
-            """Handle PayPal webhook events."""
-            try:
-                event_type = payload.get("event_type")
-                logger.info(f"Received PayPal webhook event: {event_type}")
-
-                # Process different event types
-                if event_type == "PAYMENT.CAPTURE.COMPLETED":
-                    # Handle successful payment
-                    return {"status": "success"}
-                elif event_type == "PAYMENT.CAPTURE.DENIED":
-                    # Handle denied payment
-                    return {"status": "failed"}
-
-                return {"status": "ignored"}
-            except Exception as e:
-                logger.error(f"Error processing PayPal webhook: {str(e)}")
-                raise HTTPException(status_code=500, detail="Error processing webhook")
+        async def paypal_webhook(request: Request):
+            """
+            Receive PayPal webhook events.
+
+            Events are verified against the configured webhook ID, stored
+            and acknowledged; processing happens in the webhook processor.
+            """
+            return await receive_webhook("paypal", request)
 
         return router
 
@@ -151,33 +170,36 @@ class PayPalPaymentPlugin(PaymentPlugin):
             amount = f"{float(payment_data['amount']):.2f}"
 
             # Create payment order
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/v2/checkout/orders",
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {access_token}"
-                    },
-                    json={
-                        "intent": "CAPTURE",
-                        "purchase_units": [
-                            {
-                                "reference_id": str(order_id),
-                                "amount": {
-                                    "currency_code": payment_data["currency"].upper(),
-                                    "value": amount
-                                }
+            response = await self.transport.request(
+                "POST", "/v2/checkout/orders", "create_payment",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                    # Lets the transport retry the call without creating two orders
+                    "PayPal-Request-Id": payment_data.get("idempotency_key") or str(uuid4())
+                },
+                json={
+                    "intent": "CAPTURE",
+                    "purchase_units": [
+                        {
+                            "reference_id": str(order_id),
+                            # Copied onto captures, so webhooks can find the order
+                            "custom_id": str(order_id),
+                            "amount": {
+                                "currency_code": payment_data["currency"].upper(),
+                                "value": amount
                             }
-                        ],
-                        "application_context": {
-                            "return_url": payment_data["return_url"],
-                            "cancel_url": payment_data["cancel_url"],
-                            "brand_name": "PyCommerce Store",
-                            "user_action": "PAY_NOW",
-                            "shipping_preference": "SET_PROVIDED_ADDRESS"
                         }
+                    ],
+                    "application_context": {
+                        "return_url": payment_data["return_url"],
+                        "cancel_url": payment_data["cancel_url"],
+                        "brand_name": "PyCommerce Store",
+                        "user_action": "PAY_NOW",
+                        "shipping_preference": "SET_PROVIDED_ADDRESS"
                     }
-                )
+                }
+            )
 
             if response.status_code >= 400:
                 error_data = response.json()
@@ -202,6 +224,9 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 "approval_url": approval_url
             }
 
+        except PaymentProviderUnavailableError:
+            raise
+
         except httpx.HTTPError as e:
             logger.error(f"HTTP error during payment processing: {str(e)}")
             raise PaymentError(f"Payment failed due to network error: {str(e)}")
@@ -232,14 +257,14 @@ class PayPalPaymentPlugin(PaymentPlugin):
             access_token = await self._get_auth_token()
 
             # Capture the payment
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/v2/checkout/orders/{payment_id}/capture",
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {access_token}"
-                    }
-                )
+            response = await self.transport.request(
+                "POST", f"/v2/checkout/orders/{payment_id}/capture", "capture_payment",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                    "PayPal-Request-Id": str(uuid4())
+                }
+            )
 
             if response.status_code >= 400:
                 error_data = response.json()
@@ -262,6 +287,9 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 "currency": amount_data.get("currency_code")
             }
 
+        except PaymentProviderUnavailableError:
+            raise
+
         except httpx.HTTPError as e:
             logger.error(f"HTTP error during payment capture: {str(e)}")
             raise PaymentError(f"Capture failed due to network error: {str(e)}")
@@ -297,11 +325,10 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 # Format amount to two decimal places
                 amount_str = f"{float(amount):.2f}"
                 # Get currency from captured payment
-                async with httpx.AsyncClient() as client:
-                    capture_response = await client.get(
-                        f"{self.api_base_url}/v2/payments/captures/{payment_id}",
-                        headers={"Authorization": f"Bearer {access_token}"}
-                    )
+                capture_response = await self.transport.request(
+                    "GET", f"/v2/payments/captures/{payment_id}", "get_capture",
+                    headers={"Authorization": f"Bearer {access_token}"}
+                )
 
                 if capture_response.status_code >= 400:
                     error_data = capture_response.json()
@@ -319,15 +346,15 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 }
 
             # Process refund
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/v2/payments/captures/{payment_id}/refund",
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {access_token}"
-                    },
-                    json=refund_data
-                )
+            response = await self.transport.request(
+                "POST", f"/v2/payments/captures/{payment_id}/refund", "refund_payment",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                    "PayPal-Request-Id": str(uuid4())
+                },
+                json=refund_data
+            )
 
             if response.status_code >= 400:
                 error_data = response.json()
@@ -343,6 +370,9 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 "amount": amount_data.get("value")
             }
 
+        except PaymentProviderUnavailableError:
+            raise
+
         except httpx.HTTPError as e:
             logger.error(f"HTTP error during refund processing: {str(e)}")
             raise PaymentError(f"Refund failed due to network error: {str(e)}")
@@ -373,11 +403,10 @@ class PayPalPaymentPlugin(PaymentPlugin):
             access_token = await self._get_auth_token()
 
             # Retrieve order details
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.api_base_url}/v2/checkout/orders/{payment_id}",
-                    headers={"Authorization": f"Bearer {access_token}"}
-                )
+            response = await self.transport.request(
+                "GET", f"/v2/checkout/orders/{payment_id}", "get_payment_status",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
 
             if response.status_code >= 400:
                 error_data = response.json()
@@ -395,6 +424,9 @@ class PayPalPaymentPlugin(PaymentPlugin):
                 "currency": amount_data.get("currency_code")
             }
 
+        except PaymentProviderUnavailableError:
+            raise
+
         except httpx.HTTPError as e:
             logger.error(f"HTTP error during payment status check: {str(e)}")
             raise PaymentError(f"Status check failed due to network error: {str(e)}")
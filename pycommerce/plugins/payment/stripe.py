@@ -8,16 +8,19 @@ using the Stripe payment gateway.
 import logging
 import stripe
 from typing import Dict, Any, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 import json
 import httpx
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Request
 from pycommerce.plugins.payment.base import PaymentPlugin, PaymentMethod, PaymentStatus
 from pycommerce.plugins.payment.config import STRIPE_API_KEY, STRIPE_WEBHOOK_SECRET, STRIPE_ENABLED, STRIPE_PUBLIC_KEY
+from pycommerce.plugins.payment.transport import get_transport
+from pycommerce.plugins.payment.webhooks import receive_webhook
 from pycommerce.core.exceptions import (
     PaymentError, PaymentConfigError, PaymentAuthenticationError,
-    PaymentProcessingError, PaymentValidationError, PaymentRefundError
+    PaymentProcessingError, PaymentValidationError, PaymentRefundError,
+    PaymentProviderUnavailableError
 )
 
 logger = logging.getLogger(__name__)
@@ -57,6 +60,8 @@ class StripePaymentPlugin(PaymentPlugin):
 
         self.webhook_secret = STRIPE_WEBHOOK_SECRET
         self.api_base_url = "https://api.stripe.com/v1"
+        # Shared connection pool, timeouts and circuit breaker for Stripe calls
+        self.transport = get_transport("stripe", self.api_base_url)
         logger.info("Initializing Stripe payment plugin")
 
     def initialize(self) -> None:
@@ -77,24 +82,14 @@ class StripePaymentPlugin(PaymentPlugin):
         router = APIRouter()
 
         @router.post("/webhook", tags=["stripe"])
-        async def stripe_webhook(payload: Dict[str, Any]):
-            """Handle Stripe webhook events."""
-            try:
-                event_type = payload.get("type")
-                logger.info(f"Received Stripe webhook event: {event_type}")
-
-                # Process different event types
-                if event_type == "payment_intent.succeeded":
-                    # Handle successful payment
-                    return {"status": "success"}
-                elif event_type == "payment_intent.payment_failed":
-                    # Handle failed payment
-                    return {"status": "failed"}
-
-                return {"status": "ignored"}
-            except Exception as e:
-                logger.error(f"Error processing Stripe webhook: {str(e)}")
-                raise HTTPException(status_code=500, detail="Error processing webhook")
+        async def stripe_webhook(request: Request):
+            """
+            Receive Stripe webhook events.
+
+            Events are verified against the webhook signing secret, stored
+            and acknowledged; processing happens in the webhook processor.
+            """
+            return await receive_webhook("stripe", request)
 
         return router
 
@@ -171,7 +166,9 @@ class StripePaymentPlugin(PaymentPlugin):
             # Create payment intent
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/x-www-form-urlencoded"
+                "Content-Type": "application/x-www-form-urlencoded",
+                # Lets the transport retry the call without charging twice
+                "Idempotency-Key": payment_data.get("idempotency_key") or str(uuid4())
             }
 
             request_data = {
@@ -189,12 +186,11 @@ class StripePaymentPlugin(PaymentPlugin):
 
             # Process payment with Stripe API
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{self.api_base_url}/payment_intents",
-                        headers=headers,
-                        data=request_data
-                    )
+                response = await self.transport.request(
+                    "POST", "/payment_intents", "create_payment",
+                    headers=headers,
+                    data=request_data
+                )
             except httpx.RequestError as e:
                 logger.error(f"HTTP request error during payment processing: {str(e)}")
                 raise PaymentProcessingError(f"Failed to connect to Stripe API: {str(e)}")
@@ -313,7 +309,8 @@ class StripePaymentPlugin(PaymentPlugin):
             # Prepare refund data
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/x-www-form-urlencoded"
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Idempotency-Key": str(uuid4())
             }
 
             request_data = {
@@ -328,12 +325,11 @@ class StripePaymentPlugin(PaymentPlugin):
 
             # Process refund
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{self.api_base_url}/refunds",
-                        headers=headers,
-                        data=request_data
-                    )
+                response = await self.transport.request(
+                    "POST", "/refunds", "refund_payment",
+                    headers=headers,
+                    data=request_data
+                )
             except httpx.RequestError as e:
                 logger.error(f"HTTP request error during refund processing: {str(e)}")
                 raise PaymentRefundError(f"Failed to connect to Stripe API for refund: {str(e)}")
@@ -385,8 +381,8 @@ class StripePaymentPlugin(PaymentPlugin):
                 "amount": refund_amount
             }
 
-        except (PaymentValidationError, PaymentConfigError, 
-                PaymentRefundError, PaymentAuthenticationError):
+        except (PaymentValidationError, PaymentConfigError, PaymentRefundError,
+                PaymentAuthenticationError, PaymentProviderUnavailableError):
             # Re-raise specific payment errors unchanged
             raise
 
@@ -434,11 +430,10 @@ class StripePaymentPlugin(PaymentPlugin):
             }
 
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        f"{self.api_base_url}/payment_intents/{payment_id}",
-                        headers=headers
-                    )
+                response = await self.transport.request(
+                    "GET", f"/payment_intents/{payment_id}", "get_payment_status",
+                    headers=headers
+                )
             except httpx.RequestError as e:
                 logger.error(f"HTTP request error during payment status check: {str(e)}")
                 raise PaymentError(f"Failed to connect to Stripe API for status check: {str(e)}")
@@ -490,7 +485,8 @@ class StripePaymentPlugin(PaymentPlugin):
                 "currency": payment_intent.get("currency", "").upper()
             }
 
-        except (PaymentValidationError, PaymentConfigError, PaymentAuthenticationError):
+        except (PaymentValidationError, PaymentConfigError, PaymentAuthenticationError,
+                PaymentProviderUnavailableError):
             # Re-raise specific payment errors unchanged
             raise
 
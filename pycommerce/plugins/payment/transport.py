@@ -0,0 +1,431 @@
+"""
+Shared HTTP transport for payment provider APIs.
+
+Each provider gets one ProviderTransport per process, holding a keep-alive
+connection pool (HTTP/2 when the ``h2`` package is installed) that is
+reused across requests. Requests are bounded by per-provider timeouts and a
+concurrency limit: callers that cannot get a slot within the queue timeout
+fail fast instead of piling up behind a slow provider. Idempotent calls
+(reads, and writes carrying an idempotency key) are retried with jittered
+exponential backoff on connection errors, 429 and 5xx responses, and a
+per-provider circuit breaker rejects calls outright while the provider is
+failing.
+
+Settings are read from the environment, per provider first and then
+globally, e.g. ``PAYMENT_STRIPE_TIMEOUT`` then ``PAYMENT_TIMEOUT``:
+
+- ``TIMEOUT`` / ``CONNECT_TIMEOUT``: seconds (default 20 / 5)
+- ``MAX_CONNECTIONS``: pool size (default 50)
+- ``MAX_CONCURRENCY``: concurrent requests (default 50)
+- ``QUEUE_TIMEOUT``: seconds to wait for a request slot (default 2)
+- ``MAX_RETRIES``: retries for idempotent calls (default 2)
+- ``BREAKER_FAILURES`` / ``BREAKER_RESET``: consecutive failures that open
+  the breaker, and seconds before a trial request (default 5 / 30)
+- ``BASE_URL``: override the provider URL, e.g. to point at
+  ``scripts/debug/mock_payment_server.py``
+
+Latency histograms per provider operation are available from
+get_transport_metrics().
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+
+from pycommerce.core.exceptions import PaymentProviderUnavailableError
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Statuses worth retrying for idempotent calls
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods that are safe to retry without an idempotency key
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Headers that make a provider deduplicate a write
+IDEMPOTENCY_HEADERS = ("idempotency-key", "paypal-request-id")
+
+RETRY_BASE_SECONDS = 0.25
+RETRY_MAX_SECONDS = 5.0
+
+
+def _setting(provider: str, name: str, default: float) -> float:
+    value = os.environ.get(f"PAYMENT_{provider.upper()}_{name}", os.environ.get(f"PAYMENT_{name}"))
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid value for PAYMENT_{name}: {value}")
+        return default
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_timeout`` seconds, then lets one trial call through
+    (half-open). The trial's success closes the breaker, its failure opens
+    it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            False while open; True when closed or for the half-open trial
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            # One trial per reset period; a trial that never reports back
+            # just lets another one through after the next period
+            self._state = self.HALF_OPEN
+            self._opened_at = self._clock()
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self._state, "consecutive_failures": self._failures, "times_opened": self.times_opened}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    # Bucket upper bounds in milliseconds
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, outcome: str = "ok") -> None:
+        ms = seconds * 1000
+        index = len(self.BUCKETS_MS)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def percentile(self, p: float) -> Optional[Union[float, str]]:
+        """Upper bound in ms of the bucket holding the p-th percentile ("+Inf" past the last bucket)."""
+        if not self.count:
+            return None
+        target = p * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                break
+        return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else "+Inf"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(self.BUCKETS_MS) + ["+Inf"], self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "count": self.count,
+                "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+                "p50_ms": self.percentile(0.5),
+                "p95_ms": self.percentile(0.95),
+                "p99_ms": self.percentile(0.99),
+                "buckets_ms": buckets,
+                "outcomes": dict(self.outcomes),
+            }
+
+
+class ProviderTransport:
+    """Pooled, rate-limited HTTP client for one payment provider."""
+
+    def __init__(
+        self,
+        provider: str,
+        base_url: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            provider: Provider name, used for settings and metrics
+            base_url: Provider API base URL (PAYMENT_<PROVIDER>_BASE_URL overrides it)
+            transport: httpx transport to use instead of the network, for tests
+            breaker: Circuit breaker to use (defaults to one built from settings)
+        """
+        self.provider = provider
+        self.base_url = os.environ.get(f"PAYMENT_{provider.upper()}_BASE_URL", base_url)
+        self.timeout = httpx.Timeout(
+            _setting(provider, "TIMEOUT", 20.0),
+            connect=_setting(provider, "CONNECT_TIMEOUT", 5.0),
+        )
+        self.max_connections = int(_setting(provider, "MAX_CONNECTIONS", 50))
+        self.max_concurrency = int(_setting(provider, "MAX_CONCURRENCY", 50))
+        self.queue_timeout = _setting(provider, "QUEUE_TIMEOUT", 2.0)
+        self.max_retries = int(_setting(provider, "MAX_RETRIES", 2))
+        self.breaker = breaker or CircuitBreaker(
+            int(_setting(provider, "BREAKER_FAILURES", 5)),
+            _setting(provider, "BREAKER_RESET", 30.0),
+        )
+        self._transport = transport
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._histograms_lock = threading.Lock()
+        # Pools and semaphores belong to an event loop; rebuilt if the loop changes
+        self._loop = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    def _bind(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60,
+                ),
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                transport=self._transport,
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client, self._slots
+
+    def histogram(self, operation: str) -> LatencyHistogram:
+        """Get the latency histogram of an operation, creating it if needed."""
+        histogram = self._histograms.get(operation)
+        if histogram is None:
+            with self._histograms_lock:
+                histogram = self._histograms.setdefault(operation, LatencyHistogram())
+        return histogram
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        operation: str,
+        idempotent: Optional[bool] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request to the provider.
+
+        Args:
+            method: HTTP method
+            url: Path relative to the base URL, or an absolute URL
+            operation: Operation name for metrics, e.g. ``create_payment``
+            idempotent: Whether the call may be retried; by default reads
+                and requests with an idempotency key header are
+            **kwargs: Passed to httpx (headers, data, json, params, auth)
+
+        Returns:
+            The provider's response, including error responses once
+            retries are exhausted
+
+        Raises:
+            PaymentProviderUnavailableError: If the circuit breaker is open
+                or no request slot frees up within the queue timeout
+            httpx.RequestError: If the request fails after retries
+        """
+        method = method.upper()
+        if idempotent is None:
+            headers = {k.lower() for k in (kwargs.get("headers") or {})}
+            idempotent = method in IDEMPOTENT_METHODS or any(h in headers for h in IDEMPOTENCY_HEADERS)
+
+        histogram = self.histogram(operation)
+        if not self.breaker.allow():
+            histogram.observe(0.0, "rejected")
+            raise PaymentProviderUnavailableError(
+                f"{self.provider} is unavailable after repeated failures, try again shortly"
+            )
+
+        client, slots = self._bind()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            histogram.observe(0.0, "throttled")
+            raise PaymentProviderUnavailableError(f"Too many concurrent {self.provider} requests")
+
+        self.in_flight += 1
+        try:
+            attempt = 0
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.RequestError as e:
+                    histogram.observe(time.perf_counter() - start, "error")
+                    self.breaker.record_failure()
+                    # A failed connect never reached the provider, so any call may retry it
+                    retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    if not retryable or attempt >= self.max_retries or not self.breaker.allow():
+                        raise
+                    await asyncio.sleep(self._backoff(attempt, None))
+                    attempt += 1
+                    continue
+
+                elapsed = time.perf_counter() - start
+                # Rate limiting means the provider is overloaded too
+                if response.status_code >= 500 or response.status_code == 429:
+                    self.breaker.record_failure()
+                    histogram.observe(elapsed, f"{response.status_code // 100}xx")
+                else:
+                    self.breaker.record_success()
+                    histogram.observe(elapsed, "ok" if response.status_code < 400 else f"{response.status_code // 100}xx")
+
+                if (
+                    response.status_code in RETRY_STATUSES
+                    and idempotent
+                    and attempt < self.max_retries
+                    and self.breaker.allow()
+                ):
+                    await response.aclose()
+                    await asyncio.sleep(self._backoff(attempt, response.headers.get("retry-after")))
+                    attempt += 1
+                    continue
+                return response
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(RETRY_MAX_SECONDS, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter spreads retries from many workers apart
+        return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get the transport's metrics.
+
+        Returns:
+            Dictionary with breaker state, in-flight requests and a latency
+            histogram per operation
+        """
+        return {
+            "base_url": self.base_url,
+            "http2": HTTP2_AVAILABLE and self._transport is None,
+            "breaker": self.breaker.snapshot(),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "operations": {name: h.snapshot() for name, h in sorted(self._histograms.items())},
+        }
+
+
+_transports: Dict[str, ProviderTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(provider: str, base_url: str) -> ProviderTransport:
+    """
+    Get the process-wide transport of a provider.
+
+    Args:
+        provider: Provider name, e.g. ``stripe``
+        base_url: API base URL; a different URL (e.g. PayPal sandbox vs
+            live) gets its own transport
+
+    Returns:
+        The ProviderTransport
+    """
+    key = f"{provider}:{base_url}"
+    transport = _transports.get(key)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                transport = ProviderTransport(provider, base_url)
+                _transports[key] = transport
+    return transport
+
+
+def get_transport_metrics() -> Dict[str, Any]:
+    """
+    Get the metrics of all provider transports.
+
+    Returns:
+        Dictionary mapping provider names to transport metrics
+    """
+    metrics = {}
+    for transport in list(_transports.values()):
+        # PayPal sandbox and live transports can coexist in one process
+        name = transport.provider if transport.provider not in metrics else f"{transport.provider} ({transport.base_url})"
+        metrics[name] = transport.metrics()
+    return metrics
+
+
+async def close_transports() -> None:
+    """Close all provider connection pools (application shutdown handler)."""
+    for transport in list(_transports.values()):
+        await transport.aclose()
@@ -0,0 +1,779 @@
+"""
+Payment webhook ingestion for PyCommerce.
+
+Stripe and PayPal deliver webhooks at least once and redeliver when a
+response is slow, so webhook routes do as little as possible: they verify
+the signature, store the raw event keyed by the provider's event ID and
+acknowledge it. Storing is idempotent, so redeliveries are acknowledged
+without being processed twice.
+
+Stored events are processed by a WebhookProcessor, a bounded pool of
+asyncio workers in each application process. Events are sharded across
+workers by order ID, and an event is only claimed once every earlier event
+for the same order has finished, so one order's events are applied in the
+order they arrived, even across processes. Failed events are retried with
+exponential backoff and marked dead after WEBHOOK_MAX_ATTEMPTS; dead events
+can be replayed with ``scripts/debug/replay_webhooks.py``.
+
+Handlers are registered per provider and event type::
+
+    @register_webhook_handler("stripe", "charge.dispute.created")
+    def handle_dispute(event, order_id):
+        ...
+
+Handlers run in a thread, must be idempotent, and signal a retryable
+failure by raising.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import HTTPException, Request
+from sqlalchemy import and_, exists, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.core.exceptions import PaymentWebhookError
+from pycommerce.models.webhook_event import (
+    WebhookEvent, WEBHOOK_PENDING, WEBHOOK_PROCESSING, WEBHOOK_PROCESSED, WEBHOOK_DEAD
+)
+from pycommerce.plugins.payment import config as payment_config
+
+logger = logging.getLogger(__name__)
+
+# Worker pool size per process (0 leaves processing to another process)
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "4"))
+# Events held in memory across all workers; overflow waits for the poller
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "1000"))
+# Seconds between scans for retries and events other processes left behind
+WEBHOOK_POLL_SECONDS = float(os.environ.get("WEBHOOK_POLL_SECONDS", "5"))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.environ.get("WEBHOOK_RETRY_BASE_SECONDS", "30"))
+WEBHOOK_RETRY_MAX_SECONDS = float(os.environ.get("WEBHOOK_RETRY_MAX_SECONDS", "3600"))
+# Claims older than this are assumed to belong to a crashed worker
+WEBHOOK_LOCK_SECONDS = float(os.environ.get("WEBHOOK_LOCK_SECONDS", "300"))
+
+# Stripe rejects signatures older than five minutes to prevent replays
+STRIPE_SIGNATURE_TOLERANCE = 300
+
+WEBHOOK_PROVIDERS = ("stripe", "paypal")
+
+
+# ----- Signature verification -----
+
+def sign_stripe_payload(body: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """
+    Build a Stripe-Signature header for a payload.
+
+    Used by tests and the stub event generator.
+
+    Args:
+        body: Raw request body
+        secret: Webhook signing secret
+        timestamp: Unix timestamp, defaults to now
+
+    Returns:
+        Header value such as ``t=1700000000,v1=5257a8...``
+    """
+    timestamp = int(time.time()) if timestamp is None else int(timestamp)
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + body, hashlib.sha256)
+    return f"t={timestamp},v1={signature.hexdigest()}"
+
+
+def verify_stripe_signature(
+    body: bytes,
+    header: Optional[str],
+    secret: str,
+    tolerance: int = STRIPE_SIGNATURE_TOLERANCE,
+    now: Optional[float] = None,
+) -> None:
+    """
+    Verify a Stripe-Signature header.
+
+    Args:
+        body: Raw request body
+        header: The Stripe-Signature header
+        secret: Webhook signing secret
+        tolerance: Maximum age of the signature in seconds (0 disables the check)
+        now: Current Unix time, for tests
+
+    Raises:
+        PaymentWebhookError: If the signature is missing, stale or invalid
+    """
+    if not header:
+        raise PaymentWebhookError("Missing Stripe-Signature header")
+
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+
+    try:
+        signed_at = int(timestamp)
+    except (TypeError, ValueError):
+        raise PaymentWebhookError("Malformed Stripe-Signature header")
+    if not signatures:
+        raise PaymentWebhookError("Malformed Stripe-Signature header")
+
+    now = time.time() if now is None else now
+    if tolerance and abs(now - signed_at) > tolerance:
+        raise PaymentWebhookError("Stripe webhook timestamp is outside the tolerance window")
+
+    expected = sign_stripe_payload(body, secret, signed_at).split("v1=", 1)[1]
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise PaymentWebhookError("Stripe webhook signature does not match")
+
+
+_paypal_keys: Dict[str, Any] = {}
+_paypal_keys_lock = threading.Lock()
+
+
+def _paypal_public_key(cert_url: str):
+    """Fetch and cache the public key of a PayPal signing certificate."""
+    parsed = urlparse(cert_url)
+    host = parsed.hostname or ""
+    if parsed.scheme != "https" or not (host == "paypal.com" or host.endswith(".paypal.com")):
+        raise PaymentWebhookError(f"Untrusted PayPal certificate URL: {cert_url}")
+
+    with _paypal_keys_lock:
+        key = _paypal_keys.get(cert_url)
+    if key is not None:
+        return key
+
+    from cryptography import x509
+
+    try:
+        response = httpx.get(cert_url, timeout=10)
+        response.raise_for_status()
+        key = x509.load_pem_x509_certificate(response.content).public_key()
+    except (httpx.HTTPError, ValueError) as e:
+        raise PaymentWebhookError(f"Could not load PayPal certificate: {str(e)}")
+
+    with _paypal_keys_lock:
+        _paypal_keys[cert_url] = key
+    return key
+
+
+def verify_paypal_signature(body: bytes, headers: Mapping[str, str], webhook_id: str, public_key=None) -> None:
+    """
+    Verify the transmission signature of a PayPal webhook.
+
+    PayPal signs ``<transmission id>|<time>|<webhook id>|<crc32 of body>``
+    with SHA256withRSA; the certificate is fetched from PAYPAL-CERT-URL
+    once and cached, so verification needs no API call per event.
+
+    Args:
+        body: Raw request body
+        headers: Request headers with lower-case names
+        webhook_id: ID of the webhook configured in PayPal
+        public_key: Public key to verify with, instead of fetching the certificate
+
+    Raises:
+        PaymentWebhookError: If the signature is missing or invalid
+    """
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    transmission_id = headers.get("paypal-transmission-id")
+    transmission_time = headers.get("paypal-transmission-time")
+    signature = headers.get("paypal-transmission-sig")
+    cert_url = headers.get("paypal-cert-url")
+    if not (transmission_id and transmission_time and signature and (cert_url or public_key)):
+        raise PaymentWebhookError("Missing PayPal transmission headers")
+
+    algorithm = headers.get("paypal-auth-algo", "SHA256withRSA")
+    if algorithm.upper() != "SHA256WITHRSA":
+        raise PaymentWebhookError(f"Unsupported PayPal signature algorithm: {algorithm}")
+
+    message = f"{transmission_id}|{transmission_time}|{webhook_id}|{zlib.crc32(body)}".encode("utf-8")
+    key = public_key or _paypal_public_key(cert_url)
+    try:
+        key.verify(base64.b64decode(signature), message, padding.PKCS1v15(), hashes.SHA256())
+    except (InvalidSignature, ValueError):
+        raise PaymentWebhookError("PayPal webhook signature does not match")
+
+
+def _verify(provider: str, body: bytes, headers: Mapping[str, str]) -> bool:
+    """Verify a delivery; returns False for unsigned events accepted by explicit opt-in."""
+    if provider == "stripe":
+        if payment_config.STRIPE_WEBHOOK_SECRET:
+            verify_stripe_signature(body, headers.get("stripe-signature"), payment_config.STRIPE_WEBHOOK_SECRET)
+            return True
+    elif provider == "paypal":
+        if payment_config.PAYPAL_WEBHOOK_ID:
+            verify_paypal_signature(body, headers, payment_config.PAYPAL_WEBHOOK_ID)
+            return True
+    else:
+        raise PaymentWebhookError(f"Unknown webhook provider: {provider}")
+
+    # Unsigned events could mark any order paid, so they are refused unless the
+    # operator opted in for local testing (e.g. with the stub generator)
+    if not payment_config.ALLOW_UNSIGNED_WEBHOOKS or payment_config.ENVIRONMENT == "production":
+        raise PaymentWebhookError(f"Webhook verification is not configured for {provider}")
+    logger.warning(f"Accepting unsigned {provider} webhook (PAYMENT_ALLOW_UNSIGNED_WEBHOOKS is set)")
+    return False
+
+
+# ----- Ingestion -----
+
+def _stripe_order_id(event: Dict[str, Any]) -> Optional[str]:
+    obj = (event.get("data") or {}).get("object") or {}
+    return (obj.get("metadata") or {}).get("order_id") or obj.get("client_reference_id")
+
+
+def _paypal_order_id(event: Dict[str, Any]) -> Optional[str]:
+    resource = event.get("resource") or {}
+    order_id = resource.get("custom_id") or resource.get("invoice_id")
+    if not order_id:
+        for unit in resource.get("purchase_units") or []:
+            order_id = unit.get("custom_id") or unit.get("reference_id")
+            if order_id:
+                break
+    return order_id
+
+
+# Event type field and order ID extractor per provider
+_EVENT_FIELDS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Optional[str]]]] = {
+    "stripe": ("type", _stripe_order_id),
+    "paypal": ("event_type", _paypal_order_id),
+}
+
+
+def _summary(record: WebhookEvent) -> Dict[str, Any]:
+    return {
+        "id": record.id,
+        "provider": record.provider,
+        "event_id": record.event_id,
+        "event_type": record.event_type,
+        "order_id": record.order_id,
+        "status": record.status,
+    }
+
+
+def ingest_webhook(
+    provider: str,
+    body: bytes,
+    headers: Mapping[str, str],
+    session_factory: Optional[Callable] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Verify and store a webhook delivery.
+
+    Args:
+        provider: ``stripe`` or ``paypal``
+        body: Raw request body
+        headers: Request headers
+        session_factory: Session factory to use (defaults to SessionLocal)
+
+    Returns:
+        Tuple of the stored event (id, provider, event_id, event_type,
+        order_id, status) and whether it was new; redeliveries return the
+        event stored first
+
+    Raises:
+        PaymentWebhookError: If the provider is unknown, the signature is
+            invalid or missing, or the payload is not a JSON object
+    """
+    headers = {key.lower(): value for key, value in headers.items()}
+    verified = _verify(provider, body, headers)
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise PaymentWebhookError("Webhook payload is not valid JSON")
+    if not isinstance(event, dict):
+        raise PaymentWebhookError("Webhook payload is not a JSON object")
+
+    type_field, order_id_for = _EVENT_FIELDS[provider]
+    # Providers always send an ID; hash the body for hand-made events
+    event_id = str(event.get("id") or "") or "sha256:" + hashlib.sha256(body).hexdigest()
+    order_id = order_id_for(event)
+
+    record = WebhookEvent(
+        provider=provider,
+        event_id=event_id[:255],
+        event_type=str(event.get(type_field) or "unknown")[:100],
+        order_id=str(order_id)[:64] if order_id else None,
+        payload=body.decode("utf-8"),
+        signature_verified=verified,
+        status=WEBHOOK_PENDING,
+        attempts=0,
+        received_at=datetime.utcnow(),
+    )
+
+    session = (session_factory or SessionLocal)()
+    try:
+        session.add(record)
+        try:
+            session.commit()
+            return _summary(record), True
+        except IntegrityError:
+            session.rollback()
+            existing = session.query(WebhookEvent).filter(
+                WebhookEvent.provider == provider,
+                WebhookEvent.event_id == record.event_id
+            ).first()
+            if existing is None:
+                raise
+            return _summary(existing), False
+    finally:
+        session.close()
+
+
+async def receive_webhook(provider: str, request: Request) -> Dict[str, Any]:
+    """
+    Store a webhook delivery and hand it to the processor.
+
+    Shared by the payment plugins' ``/webhook`` routes. Responds as soon as
+    the event is stored; processing happens in the background.
+
+    Args:
+        provider: ``stripe`` or ``paypal``
+        request: The webhook request
+
+    Returns:
+        Response body for the provider
+
+    Raises:
+        HTTPException: 400 for rejected deliveries, 500 if the event could
+            not be stored (the provider will redeliver)
+    """
+    body = await request.body()
+    try:
+        event, created = await asyncio.to_thread(ingest_webhook, provider, body, request.headers)
+    except PaymentWebhookError as e:
+        logger.warning(f"Rejected {provider} webhook: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error storing {provider} webhook: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error storing webhook")
+
+    if event["status"] == WEBHOOK_PENDING:
+        processor = get_webhook_processor()
+        await processor.start()
+        processor.submit(event["id"], event["order_id"])
+
+    return {"status": "received", "event_id": event["event_id"], "duplicate": not created}
+
+
+# ----- Handlers -----
+
+WebhookHandler = Callable[[Dict[str, Any], Optional[str]], None]
+
+_handlers: Dict[Tuple[str, str], WebhookHandler] = {}
+
+
+def register_webhook_handler(provider: str, event_type: str) -> Callable[[WebhookHandler], WebhookHandler]:
+    """
+    Register a handler for a webhook event type.
+
+    The handler is called as ``handler(event, order_id)`` with the parsed
+    payload; registering a type again replaces the previous handler. Events
+    without a handler are marked processed.
+
+    Args:
+        provider: ``stripe`` or ``paypal``
+        event_type: Provider event type, e.g. ``payment_intent.succeeded``
+
+    Returns:
+        Decorator registering the handler
+    """
+    def decorator(handler: WebhookHandler) -> WebhookHandler:
+        _handlers[(provider, event_type)] = handler
+        return handler
+    return decorator
+
+
+def _set_order_status(order_id: Optional[str], status: str) -> None:
+    if not order_id:
+        logger.warning(f"Payment webhook without an order ID, cannot mark order {status}")
+        return
+
+    from pycommerce.models.order import OrderManager
+
+    if not OrderManager().update_status(order_id, status):
+        raise PaymentWebhookError(f"Could not update order {order_id} to {status}")
+
+
+@register_webhook_handler("stripe", "payment_intent.succeeded")
+@register_webhook_handler("stripe", "checkout.session.completed")
+@register_webhook_handler("paypal", "PAYMENT.CAPTURE.COMPLETED")
+def _handle_payment_succeeded(event: Dict[str, Any], order_id: Optional[str]) -> None:
+    _set_order_status(order_id, "PAID")
+
+
+@register_webhook_handler("stripe", "payment_intent.payment_failed")
+@register_webhook_handler("paypal", "PAYMENT.CAPTURE.DENIED")
+def _handle_payment_failed(event: Dict[str, Any], order_id: Optional[str]) -> None:
+    logger.info(f"Payment failed for order {order_id}")
+
+
+# ----- Processing -----
+
+def retry_delay(attempts: int) -> float:
+    """
+    Seconds to wait before retrying an event.
+
+    Args:
+        attempts: Number of attempts made so far
+
+    Returns:
+        Exponential backoff with +/-20% jitter, capped at WEBHOOK_RETRY_MAX_SECONDS
+    """
+    delay = min(WEBHOOK_RETRY_MAX_SECONDS, WEBHOOK_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class WebhookProcessor:
+    """Bounded pool of asyncio workers that processes stored webhook events."""
+
+    def __init__(
+        self,
+        workers: int = WEBHOOK_WORKERS,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        poll_interval: float = WEBHOOK_POLL_SECONDS,
+        max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+        session_factory: Optional[Callable] = None,
+    ):
+        """
+        Initialize the processor.
+
+        Args:
+            workers: Number of workers (0 disables processing in this process)
+            queue_size: Events held in memory across all workers
+            poll_interval: Seconds between database scans (0 disables the poller)
+            max_attempts: Attempts before an event is marked dead
+            session_factory: Session factory to use (defaults to SessionLocal)
+        """
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory or SessionLocal
+        self._queues: List[asyncio.Queue] = []
+        self._queued = set()
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+        self.stats = {WEBHOOK_PROCESSED: 0, WEBHOOK_DEAD: 0, "retried": 0, "skipped": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        """Start the workers and the poller; a no-op if already running."""
+        if self._running or self.workers == 0:
+            return
+        self._running = True
+        per_worker = max(1, self.queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+        if self.poll_interval > 0:
+            self._tasks.append(asyncio.create_task(self._poll()))
+        logger.info(f"Started webhook processor with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; events claimed but unfinished are released after WEBHOOK_LOCK_SECONDS."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+        self._queued.clear()
+
+    def submit(self, event_id: str, order_id: Optional[str] = None) -> bool:
+        """
+        Queue a stored event for processing.
+
+        Args:
+            event_id: ID of the WebhookEvent row
+            order_id: Order the event belongs to, which picks the worker
+
+        Returns:
+            True if queued; False if not running, already queued or the
+            queue is full (the poller picks the event up later)
+        """
+        if not self._running or event_id in self._queued:
+            return False
+        key = order_id or event_id
+        queue = self._queues[zlib.crc32(key.encode("utf-8")) % len(self._queues)]
+        try:
+            queue.put_nowait((event_id, order_id))
+        except asyncio.QueueFull:
+            return False
+        self._queued.add(event_id)
+        return True
+
+    async def drain(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Process due events until a pass makes no progress.
+
+        Used by the replay CLI and for load testing; the processor must be
+        started.
+
+        Args:
+            timeout: Maximum seconds to run
+
+        Returns:
+            The processor's counters
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running:
+            before = (self.stats[WEBHOOK_PROCESSED], self.stats[WEBHOOK_DEAD], self.stats["retried"])
+            for event_id, order_id in await asyncio.to_thread(self.due_events, self.queue_size):
+                self.submit(event_id, order_id)
+            await asyncio.gather(*(queue.join() for queue in self._queues))
+            after = (self.stats[WEBHOOK_PROCESSED], self.stats[WEBHOOK_DEAD], self.stats["retried"])
+            if after == before or (deadline is not None and time.monotonic() > deadline):
+                break
+        return dict(self.stats)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            event_id, order_id = await queue.get()
+            self._queued.discard(event_id)
+            try:
+                status = await asyncio.to_thread(self.process_event, event_id)
+                # Keep an order's events on this worker instead of waiting for the poller
+                if status == WEBHOOK_PROCESSED and order_id:
+                    next_id = await asyncio.to_thread(self.next_event_for_order, order_id)
+                    if next_id and next_id not in self._queued:
+                        try:
+                            queue.put_nowait((next_id, order_id))
+                            self._queued.add(next_id)
+                        except asyncio.QueueFull:
+                            pass
+            except Exception as e:
+                logger.error(f"Error processing webhook event {event_id}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.release_stale)
+                for event_id, order_id in await asyncio.to_thread(self.due_events, self.queue_size):
+                    self.submit(event_id, order_id)
+            except Exception as e:
+                logger.error(f"Error polling webhook events: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def process_event(self, event_id: str) -> Optional[str]:
+        """
+        Claim, handle and finish one event.
+
+        Args:
+            event_id: ID of the WebhookEvent row
+
+        Returns:
+            The event's new status, or None if it could not be claimed
+            (already handled, not due, or waiting on an earlier event for
+            the same order)
+        """
+        event = self._claim(event_id)
+        if event is None:
+            self.stats["skipped"] += 1
+            return None
+
+        handler = _handlers.get((event["provider"], event["event_type"]))
+        try:
+            if handler is not None:
+                handler(json.loads(event["payload"]), event["order_id"])
+        except Exception as e:
+            return self._fail(event, str(e) or type(e).__name__)
+
+        self._update(event_id, status=WEBHOOK_PROCESSED, processed_at=datetime.utcnow(), locked_at=None, last_error=None)
+        self.stats[WEBHOOK_PROCESSED] += 1
+        return WEBHOOK_PROCESSED
+
+    def _claim(self, event_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        earlier = aliased(WebhookEvent)
+        blocked = exists().where(
+            earlier.order_id == WebhookEvent.order_id,
+            earlier.id != WebhookEvent.id,
+            earlier.status.in_((WEBHOOK_PENDING, WEBHOOK_PROCESSING)),
+            or_(
+                earlier.received_at < WebhookEvent.received_at,
+                and_(earlier.received_at == WebhookEvent.received_at, earlier.id < WebhookEvent.id),
+            ),
+        )
+
+        session = self._session_factory()
+        try:
+            # Conditional update so only one worker in any process gets the event
+            result = session.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.id == event_id,
+                    WebhookEvent.status == WEBHOOK_PENDING,
+                    or_(WebhookEvent.next_attempt_at.is_(None), WebhookEvent.next_attempt_at <= now),
+                    or_(WebhookEvent.order_id.is_(None), ~blocked),
+                )
+                .values(status=WEBHOOK_PROCESSING, locked_at=now, attempts=WebhookEvent.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount != 1:
+                return None
+
+            record = session.query(WebhookEvent).filter(WebhookEvent.id == event_id).first()
+            return {
+                "id": record.id,
+                "provider": record.provider,
+                "event_id": record.event_id,
+                "event_type": record.event_type,
+                "order_id": record.order_id,
+                "payload": record.payload,
+                "attempts": record.attempts,
+            }
+        finally:
+            session.close()
+
+    def _fail(self, event: Dict[str, Any], error: str) -> str:
+        label = f"{event['provider']}:{event['event_id']}"
+        if event["attempts"] >= self.max_attempts:
+            logger.error(f"Webhook event {label} failed {event['attempts']} times, giving up: {error}")
+            self._update(event["id"], status=WEBHOOK_DEAD, locked_at=None, last_error=error[:2000])
+            self.stats[WEBHOOK_DEAD] += 1
+            return WEBHOOK_DEAD
+
+        delay = retry_delay(event["attempts"])
+        logger.warning(f"Webhook event {label} failed, retrying in {delay:.0f}s: {error}")
+        self._update(
+            event["id"],
+            status=WEBHOOK_PENDING,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+            locked_at=None,
+            last_error=error[:2000],
+        )
+        self.stats["retried"] += 1
+        return WEBHOOK_PENDING
+
+    def _update(self, event_id: str, **values) -> None:
+        session = self._session_factory()
+        try:
+            session.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id == event_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def due_events(self, limit: int = 100) -> List[Tuple[str, Optional[str]]]:
+        """
+        Get pending events that are due, oldest first.
+
+        Args:
+            limit: Maximum number of events
+
+        Returns:
+            List of (event ID, order ID)
+        """
+        session = self._session_factory()
+        try:
+            rows = session.query(WebhookEvent.id, WebhookEvent.order_id).filter(
+                WebhookEvent.status == WEBHOOK_PENDING,
+                or_(WebhookEvent.next_attempt_at.is_(None), WebhookEvent.next_attempt_at <= datetime.utcnow())
+            ).order_by(WebhookEvent.received_at, WebhookEvent.id).limit(limit).all()
+            return [(row.id, row.order_id) for row in rows]
+        finally:
+            session.close()
+
+    def next_event_for_order(self, order_id: str) -> Optional[str]:
+        """
+        Get the oldest due pending event of an order.
+
+        Args:
+            order_id: The order ID
+
+        Returns:
+            The event ID, or None
+        """
+        session = self._session_factory()
+        try:
+            row = session.query(WebhookEvent.id).filter(
+                WebhookEvent.order_id == order_id,
+                WebhookEvent.status == WEBHOOK_PENDING,
+                or_(WebhookEvent.next_attempt_at.is_(None), WebhookEvent.next_attempt_at <= datetime.utcnow())
+            ).order_by(WebhookEvent.received_at, WebhookEvent.id).first()
+            return row.id if row else None
+        finally:
+            session.close()
+
+    def release_stale(self) -> int:
+        """
+        Return events claimed by crashed workers to pending.
+
+        Returns:
+            The number of events released
+        """
+        session = self._session_factory()
+        try:
+            result = session.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.status == WEBHOOK_PROCESSING,
+                    WebhookEvent.locked_at < datetime.utcnow() - timedelta(seconds=WEBHOOK_LOCK_SECONDS)
+                )
+                .values(status=WEBHOOK_PENDING, locked_at=None, next_attempt_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount:
+                logger.warning(f"Released {result.rowcount} stale webhook event claims")
+            return result.rowcount
+        finally:
+            session.close()
+
+
+_processor: Optional[WebhookProcessor] = None
+
+
+def get_webhook_processor() -> WebhookProcessor:
+    """
+    Get the process-wide webhook processor.
+
+    Returns:
+        The WebhookProcessor, configured from the WEBHOOK_* environment variables
+    """
+    global _processor
+    if _processor is None:
+        _processor = WebhookProcessor()
+    return _processor
+
+
+async def start_webhook_processor() -> None:
+    """Start the process-wide webhook processor (application startup handler)."""
+    await get_webhook_processor().start()
+
+
+async def stop_webhook_processor() -> None:
+    """Stop the process-wide webhook processor (application shutdown handler)."""
+    if _processor is not None:
+        await _processor.stop()
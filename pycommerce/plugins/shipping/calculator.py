@@ -10,6 +10,8 @@ import math
 from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
+from pycommerce.plugins.shipping.geo import distances_from, get_centroid_table
+
 logger = logging.getLogger("pycommerce.plugins.shipping.calculator")
 
 
@@ -95,7 +97,8 @@ class ShippingRateCalculator:
         dimensional_weight_factor: Optional[float] = None,
         express_multiplier: Optional[float] = None,
         premium_multiplier: Optional[float] = None,
-        free_shipping_threshold: Optional[float] = None
+        free_shipping_threshold: Optional[float] = None,
+        distance_bands: Optional[List[Dict[str, Any]]] = None
     ):
         """
         Initialize the shipping rate calculator.
@@ -107,6 +110,8 @@ class ShippingRateCalculator:
             express_multiplier: Multiplier for express shipping rates
             premium_multiplier: Multiplier for premium shipping rates
             free_shipping_threshold: Minimum order total for free shipping
+            distance_bands: Surcharges by postal code distance, e.g.
+                ``[{"max_km": 150, "surcharge": 0}, {"max_km": None, "surcharge": 4.0}]``
         """
         self.zones_mapping = zones_mapping or self.DEFAULT_ZONES
         self.weight_rates = weight_rates or self.DEFAULT_WEIGHT_RATES
@@ -114,6 +119,32 @@ class ShippingRateCalculator:
         self.express_multiplier = express_multiplier or self.DEFAULT_EXPRESS_MULTIPLIER
         self.premium_multiplier = premium_multiplier or self.DEFAULT_PREMIUM_MULTIPLIER
         self.free_shipping_threshold = free_shipping_threshold or 0.0
+        # Sorted (max_km, surcharge); None as max_km means no upper bound
+        self.distance_bands = sorted(
+            (
+                (float(band["max_km"]) if band.get("max_km") is not None else math.inf, float(band.get("surcharge", 0)))
+                for band in (distance_bands or [])
+            ),
+            key=lambda band: band[0]
+        )
+    
+    def distance_surcharge(self, distance_km: Optional[float]) -> float:
+        """
+        Get the surcharge for a shipping distance.
+        
+        Args:
+            distance_km: Distance between origin and destination postal codes
+            
+        Returns:
+            The surcharge of the first band covering the distance, or 0.0
+            if the distance is unknown or no band covers it
+        """
+        if not distance_km or not self.distance_bands:
+            return 0.0
+        for max_km, surcharge in self.distance_bands:
+            if distance_km <= max_km:
+                return surcharge
+        return 0.0
     
     def determine_shipping_zone(self, origin_country: str, destination_country: str) -> ShippingZone:
         """
@@ -185,7 +216,8 @@ class ShippingRateCalculator:
         self,
         zone: ShippingZone,
         weight_kg: float,
-        shipping_method: str = "standard"
+        shipping_method: str = "standard",
+        distance_km: Optional[float] = None
     ) -> float:
         """
         Calculate shipping price based on zone and weight.
@@ -194,6 +226,7 @@ class ShippingRateCalculator:
             zone: The shipping zone
             weight_kg: The weight in kg
             shipping_method: The shipping method (standard, express, or premium)
+            distance_km: Postal code distance for distance-band surcharges (optional)
             
         Returns:
             The shipping price
@@ -211,6 +244,8 @@ class ShippingRateCalculator:
         
         # Calculate price
         price = base_rate + (weight_kg * per_kg)
+        if distance_km:
+            price += self.distance_surcharge(distance_km)
         
         # Apply method multiplier if needed
         if shipping_method == "express":
@@ -225,7 +260,8 @@ class ShippingRateCalculator:
         items: List[Dict[str, Any]],
         origin_country: str,
         destination_country: str,
-        order_total: float = 0.0
+        order_total: float = 0.0,
+        distance_km: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Calculate shipping rates for a list of items.
@@ -235,6 +271,7 @@ class ShippingRateCalculator:
             origin_country: Country code of origin
             destination_country: Country code of destination
             order_total: Total order amount for free shipping calculation
+            distance_km: Postal code distance for distance-band surcharges (optional)
             
         Returns:
             List of shipping options with rates
@@ -249,9 +286,9 @@ class ShippingRateCalculator:
         billable_weight = max(actual_weight, dimensional_weight)
         
         # Calculate standard, express, and premium rates
-        standard_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="standard")
-        express_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="express")
-        premium_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="premium")
+        standard_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="standard", distance_km=distance_km)
+        express_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="express", distance_km=distance_km)
+        premium_rate = self.calculate_shipping_price(zone, billable_weight, shipping_method="premium", distance_km=distance_km)
         
         # Check for free shipping
         free_shipping = self.free_shipping_threshold > 0 and order_total >= self.free_shipping_threshold
@@ -355,6 +392,186 @@ class ShippingRateCalculator:
             return f"Delivery in {days-1}-{days} business days"
 
 
+class ShippingRateTable:
+    """
+    Immutable, precompiled shipping rates for one store configuration.
+    
+    Built once from a tenant's shipping configuration: zone lookups are
+    flattened into an origin x destination matrix, and per zone the base
+    rate, per-kg rate, minimum weight, method multipliers, delivery days and
+    descriptions are resolved up front, so quoting a cart is a dictionary
+    lookup plus a weight sum. Quotes match ShippingRateCalculator.calculate_rates().
+    """
+    
+    METHODS = ("standard", "express", "premium")
+    
+    def __init__(self, calculator: ShippingRateCalculator, store_country: str = "US", config: Optional[Dict[str, Any]] = None):
+        """
+        Compile a rate table.
+        
+        Args:
+            calculator: Calculator holding the zone mapping and rates to compile
+            store_country: Country code shipments originate from
+            config: The configuration the table was compiled from (kept for reference)
+        """
+        self.store_country = store_country
+        self.config = config or {}
+        self.dimensional_weight_factor = calculator.dimensional_weight_factor
+        self.free_shipping_threshold = calculator.free_shipping_threshold
+        self.distance_surcharge = calculator.distance_surcharge
+        
+        # origin x destination -> zone, with per-origin defaults for unlisted destinations
+        self._zone_matrix: Dict[Tuple[str, str], ShippingZone] = {}
+        self._origin_defaults: Dict[str, ShippingZone] = {}
+        destinations = {dest for mapping in calculator.zones_mapping.values() for dest in mapping if dest != "DEFAULT"}
+        for origin in set(calculator.zones_mapping) | {store_country}:
+            self._origin_defaults[origin] = calculator.determine_shipping_zone(origin, "DEFAULT")
+            for dest in destinations:
+                self._zone_matrix[(origin, dest)] = calculator.determine_shipping_zone(origin, dest)
+        
+        multipliers = {
+            "standard": None,
+            "express": calculator.express_multiplier,
+            "premium": calculator.premium_multiplier,
+        }
+        fallback_rates = calculator.weight_rates[ShippingZone.INTERNATIONAL_FAR]
+        
+        # zone -> (base_rate, per_kg, min_weight_kg, [(method, multiplier or None, days, description)])
+        self._zone_rates: Dict[ShippingZone, Tuple[float, float, float, List[Tuple[str, Optional[float], int, str]]]] = {}
+        for zone in ShippingZone:
+            zone_rates = calculator.weight_rates.get(zone, fallback_rates)
+            self._zone_rates[zone] = (
+                zone_rates["base_rate"],
+                zone_rates["per_kg"],
+                zone_rates["min_weight_kg"],
+                [
+                    (
+                        method,
+                        multipliers[method],
+                        calculator._get_delivery_days(zone, shipping_method=method),
+                        calculator._get_delivery_description(zone, shipping_method=method),
+                    )
+                    for method in self.METHODS
+                ],
+            )
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ShippingRateTable":
+        """
+        Compile a rate table from a shipping configuration dictionary.
+        
+        Args:
+            config: Configuration as returned by StandardShippingPlugin.get_shipping_config()
+            
+        Returns:
+            The compiled rate table
+        """
+        weight_rates = {
+            ShippingZone(zone_key): dict(zone_rates)
+            for zone_key, zone_rates in config.get("weight_rates", {}).items()
+        }
+        calculator = ShippingRateCalculator(
+            weight_rates=weight_rates or None,
+            dimensional_weight_factor=config.get("dimensional_weight_factor", 200),
+            express_multiplier=config.get("express_multiplier", 1.75),
+            premium_multiplier=config.get("premium_multiplier", 2.5),
+            free_shipping_threshold=config.get("free_shipping_threshold", 0),
+            distance_bands=config.get("distance_bands")
+        )
+        return cls(calculator, store_country=config.get("store_country", "US"), config=config)
+    
+    def zone_for(self, destination_country: str, origin_country: Optional[str] = None) -> ShippingZone:
+        """
+        Look up the shipping zone for a destination.
+        
+        Args:
+            destination_country: Country code of destination
+            origin_country: Country code of origin, defaults to the store country
+            
+        Returns:
+            The shipping zone
+        """
+        origin = origin_country or self.store_country
+        zone = self._zone_matrix.get((origin, destination_country))
+        if zone is not None:
+            return zone
+        if origin in self._origin_defaults:
+            return self._origin_defaults[origin]
+        return self._origin_defaults.get("DEFAULT", ShippingZone.INTERNATIONAL_FAR)
+    
+    def billable_weight(self, items: List[Dict[str, Any]]) -> float:
+        """
+        Get the billable weight of a list of items.
+        
+        Args:
+            items: List of items with weights and dimensions
+            
+        Returns:
+            The higher of actual and dimensional weight in kg
+        """
+        actual_weight = 0.0
+        dimensional_weight = 0.0
+        factor = self.dimensional_weight_factor
+        for item in items:
+            quantity = item.get("quantity", 1)
+            actual_weight += item.get("weight", 0) * quantity
+            dimensions = item.get("dimensions")
+            if dimensions:
+                volume_m3 = (
+                    (dimensions.get("width", 0) / 100)
+                    * (dimensions.get("height", 0) / 100)
+                    * (dimensions.get("length", 0) / 100)
+                )
+                dimensional_weight += volume_m3 * factor * quantity
+        return max(actual_weight, dimensional_weight)
+    
+    def quote(
+        self,
+        items: List[Dict[str, Any]],
+        destination_country: str,
+        order_total: float = 0.0,
+        origin_country: Optional[str] = None,
+        distance_km: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Quote shipping options for a list of items.
+        
+        Args:
+            items: List of items with weight and dimensions
+            destination_country: Country code of destination
+            order_total: Total order amount for free shipping calculation
+            origin_country: Country code of origin, defaults to the store country
+            distance_km: Postal code distance for distance-band surcharges (optional)
+            
+        Returns:
+            List of shipping options with rates
+        """
+        zone = self.zone_for(destination_country, origin_country)
+        billable_weight = self.billable_weight(items)
+        free_shipping = self.free_shipping_threshold > 0 and order_total >= self.free_shipping_threshold
+        
+        base_rate, per_kg, min_weight, methods = self._zone_rates[zone]
+        base_price = base_rate + (max(billable_weight, min_weight) * per_kg)
+        if distance_km:
+            base_price += self.distance_surcharge(distance_km)
+        rounded_weight = round(billable_weight, 2)
+        
+        rates = []
+        for method, multiplier, days, description in methods:
+            price = base_price if multiplier is None else base_price * multiplier
+            rates.append({
+                "id": method,
+                "name": f"{method.capitalize()} Shipping",
+                "description": description,
+                "price": 0.0 if free_shipping else round(price, 2),
+                "estimated_days": days,
+                "free_shipping": free_shipping,
+                "billable_weight": rounded_weight,
+                "zone": zone.value
+            })
+        return rates
+
+
 class PostalCodeCalculator:
     """Calculates distances and zones based on postal codes."""
     
@@ -433,6 +650,10 @@ class PostalCodeCalculator:
         """
         Calculate approximate distance between two postal codes.
         
+        Uses great-circle distance between postal code centroids when a
+        centroid database is installed (see pycommerce.plugins.shipping.geo)
+        and falls back to region estimates otherwise.
+        
         Args:
             origin_country: Country code of origin
             origin_postal: Postal code of origin
@@ -446,8 +667,58 @@ class PostalCodeCalculator:
         if origin_country != dest_country:
             return 0
         
+        # Use real centroids when a centroid database is installed
+        table = get_centroid_table()
+        if table is not None:
+            origin = table.lookup(origin_country, origin_postal)
+            destination = table.lookup(dest_country, dest_postal)
+            if origin is not None and destination is not None:
+                return round(distances_from(origin, [destination])[0], 1)
+        
+        return cls._estimate_distance(origin_country, origin_postal, dest_postal)
+    
+    @classmethod
+    def calculate_distances(
+        cls,
+        origin_country: str,
+        origin_postal: str,
+        dest_country: str,
+        dest_postals: List[str]
+    ) -> List[float]:
+        """
+        Calculate approximate distances from one postal code to many.
+        
+        The origin is resolved once and all centroid distances are computed
+        in one pass, for quoting many destinations at a time.
+        
+        Args:
+            origin_country: Country code of origin
+            origin_postal: Postal code of origin
+            dest_country: Country code of the destinations
+            dest_postals: Postal codes of the destinations
+            
+        Returns:
+            Approximate distances in km (0 where they can't be calculated)
+        """
+        if origin_country != dest_country:
+            return [0 for _ in dest_postals]
+        
+        table = get_centroid_table()
+        origin = table.lookup(origin_country, origin_postal) if table is not None else None
+        if origin is None:
+            return [cls._estimate_distance(origin_country, origin_postal, postal) for postal in dest_postals]
+        
+        points = table.lookup_many(dest_country, dest_postals)
+        return [
+            round(distance, 1) if distance is not None else cls._estimate_distance(origin_country, origin_postal, postal)
+            for distance, postal in zip(distances_from(origin, points), dest_postals)
+        ]
+    
+    @classmethod
+    def _estimate_distance(cls, country: str, origin_postal: str, dest_postal: str) -> float:
+        """Estimate a domestic distance from postal code regions."""
         # Get the appropriate distance calculator method
-        calculator_method = cls.DISTANCE_CALCULATORS.get(origin_country)
+        calculator_method = cls.DISTANCE_CALCULATORS.get(country)
         
         if calculator_method and hasattr(cls, calculator_method):
             return getattr(cls, calculator_method)(origin_postal, dest_postal)
@@ -0,0 +1,313 @@
+"""
+Postal code centroid database for PyCommerce shipping.
+
+This module stores postal code centroids (latitude/longitude) in a compact
+binary file of fixed-width records sorted by key, and reads it through a
+read-only memory map. Lookups are a binary search over the mapped records,
+so the table costs no Python heap per entry and forked workers share the
+same pages through the OS page cache.
+
+Centroid files are built offline from a CSV with ``country``,
+``postal_code``, ``latitude`` and ``longitude`` columns, or from a GeoNames
+postal code dump (tab-separated, no header)::
+
+    python scripts/setup/build_postal_centroids.py allCountries.txt
+
+The file is looked up at ``POSTAL_CENTROIDS_PATH`` (default
+``data/postal_centroids.bin``). Without it, shipping falls back to the
+region heuristics in PostalCodeCalculator.
+"""
+
+import bisect
+import csv
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("pycommerce.plugins.shipping.geo")
+
+EARTH_RADIUS_KM = 6371.0088
+
+DEFAULT_CENTROIDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+    "postal_centroids.bin",
+)
+
+# File layout: header, then `count` records of key (KEY_WIDTH bytes, NUL padded)
+# followed by latitude and longitude as little-endian float32
+_MAGIC = b"PCGEO1\0\0"
+_HEADER = struct.Struct("<8sII")  # magic, record count, key width
+_COORDS = struct.Struct("<ff")
+KEY_WIDTH = 16
+
+
+def normalize_postal_code(country: str, postal_code: str) -> bytes:
+    """
+    Build the lookup key for a postal code.
+
+    Args:
+        country: ISO country code
+        postal_code: Postal code in any common formatting
+
+    Returns:
+        Key bytes such as ``b"GB:SW1A1AA"``
+    """
+    code = "".join(postal_code.split()).replace("-", "").upper()
+    return f"{country.strip().upper()}:{code}".encode("ascii", "ignore")[:KEY_WIDTH]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1: Latitude of the first point in degrees
+        lon1: Longitude of the first point in degrees
+        lat2: Latitude of the second point in degrees
+        lon2: Longitude of the second point in degrees
+
+    Returns:
+        Distance in km
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distances_from(origin: Tuple[float, float], points: Sequence[Optional[Tuple[float, float]]]) -> List[Optional[float]]:
+    """
+    Great-circle distances from one origin to many points.
+
+    The origin's trigonometry is computed once for the whole batch.
+
+    Args:
+        origin: (latitude, longitude) of the origin
+        points: (latitude, longitude) pairs, None entries are passed through
+
+    Returns:
+        Distances in km in the same order as ``points``
+    """
+    phi1 = math.radians(origin[0])
+    cos_phi1 = math.cos(phi1)
+    lon1 = origin[1]
+    sin, cos, radians, asin, sqrt = math.sin, math.cos, math.radians, math.asin, math.sqrt
+
+    result: List[Optional[float]] = []
+    for point in points:
+        if point is None:
+            result.append(None)
+            continue
+        phi2 = radians(point[0])
+        a = sin((phi2 - phi1) / 2) ** 2 + cos_phi1 * cos(phi2) * sin(radians(point[1] - lon1) / 2) ** 2
+        result.append(2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a))))
+    return result
+
+
+class _KeyView:
+    """Sequence view over the record keys of a mapped centroid file, for bisect."""
+
+    def __init__(self, buffer: mmap.mmap, count: int, key_width: int):
+        self._buffer = buffer
+        self._count = count
+        self._key_width = key_width
+        self._record_size = key_width + _COORDS.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        offset = _HEADER.size + index * self._record_size
+        return self._buffer[offset:offset + self._key_width].rstrip(b"\0")
+
+
+class PostalCentroidTable:
+    """Read-only, memory-mapped postal code centroid table."""
+
+    def __init__(self, path: str):
+        """
+        Open a centroid file.
+
+        Args:
+            path: Path to a file written by build_centroid_file()
+
+        Raises:
+            ValueError: If the file is not a centroid file
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, key_width = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC:
+            self._buffer.close()
+            raise ValueError(f"Not a postal centroid file: {path}")
+
+        self._count = count
+        self._key_width = key_width
+        self._record_size = key_width + _COORDS.size
+        self._keys = _KeyView(self._buffer, count, key_width)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._buffer.close()
+
+    def _coords_at(self, index: int) -> Tuple[float, float]:
+        offset = _HEADER.size + index * self._record_size + self._key_width
+        return _COORDS.unpack_from(self._buffer, offset)
+
+    def lookup(self, country: str, postal_code: str) -> Optional[Tuple[float, float]]:
+        """
+        Find the centroid of a postal code.
+
+        Exact matches win. Otherwise the first stored code sharing the
+        longest prefix (at least two characters) is used, so e.g. a full UK
+        postcode resolves to its district when only districts are loaded.
+
+        Args:
+            country: ISO country code
+            postal_code: The postal code
+
+        Returns:
+            (latitude, longitude) or None if not found
+        """
+        if not postal_code:
+            return None
+
+        key = normalize_postal_code(country, postal_code)
+        index = bisect.bisect_left(self._keys, key)
+        if index < self._count and self._keys[index] == key:
+            return self._coords_at(index)
+
+        country_prefix_len = len(country.strip()) + 1
+        # Shorten the code until some stored key starts with it
+        for length in range(len(key) - 1, country_prefix_len + 1, -1):
+            prefix = key[:length]
+            index = bisect.bisect_left(self._keys, prefix)
+            if index < self._count and self._keys[index].startswith(prefix):
+                return self._coords_at(index)
+        return None
+
+    def lookup_many(self, country: str, postal_codes: Iterable[str]) -> List[Optional[Tuple[float, float]]]:
+        """
+        Find the centroids of many postal codes in one country.
+
+        Args:
+            country: ISO country code
+            postal_codes: Postal codes to look up
+
+        Returns:
+            (latitude, longitude) or None per postal code
+        """
+        return [self.lookup(country, code) for code in postal_codes]
+
+
+def build_centroid_file(rows: Iterable[Tuple[str, str, float, float]], path: str) -> int:
+    """
+    Write a centroid file.
+
+    Duplicate keys keep their first occurrence.
+
+    Args:
+        rows: (country, postal_code, latitude, longitude) tuples
+        path: Output path
+
+    Returns:
+        The number of records written
+    """
+    records = {}
+    for country, postal_code, latitude, longitude in rows:
+        key = normalize_postal_code(country, postal_code)
+        if len(key) > len(country) + 1 and key not in records:
+            records[key] = (float(latitude), float(longitude))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(records), KEY_WIDTH))
+        for key in sorted(records):
+            f.write(key.ljust(KEY_WIDTH, b"\0"))
+            f.write(_COORDS.pack(*records[key]))
+    # Replace atomically so running workers keep their old mapping
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def read_centroid_csv(path: str) -> Iterable[Tuple[str, str, float, float]]:
+    """
+    Read centroid rows from a CSV or a GeoNames postal code dump.
+
+    CSV files need a header with ``country``, ``postal_code``, ``latitude``
+    and ``longitude`` columns. Files ending in ``.txt`` are read as GeoNames
+    dumps (country code, postal code, ..., latitude, longitude, accuracy).
+
+    Args:
+        path: Input file path
+
+    Yields:
+        (country, postal_code, latitude, longitude) tuples
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".txt"):
+            for fields in csv.reader(f, delimiter="\t"):
+                if len(fields) < 11 or not fields[9] or not fields[10]:
+                    continue
+                yield fields[0], fields[1], float(fields[9]), float(fields[10])
+            return
+
+        for row in csv.DictReader(f):
+            try:
+                yield row["country"], row["postal_code"], float(row["latitude"]), float(row["longitude"])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+
+_table: Optional[PostalCentroidTable] = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+
+def get_centroid_table() -> Optional[PostalCentroidTable]:
+    """
+    Get the process-wide centroid table, opening it on first use.
+
+    Returns:
+        The table, or None if no centroid file is installed
+    """
+    global _table, _table_loaded
+    if _table_loaded:
+        return _table
+
+    with _table_lock:
+        if not _table_loaded:
+            path = os.environ.get("POSTAL_CENTROIDS_PATH", DEFAULT_CENTROIDS_PATH)
+            if os.path.exists(path):
+                try:
+                    _table = PostalCentroidTable(path)
+                    logger.info(f"Loaded {len(_table)} postal code centroids from {path}")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error loading postal code centroids: {str(e)}")
+            _table_loaded = True
+    return _table
+
+
+def reset_centroid_table() -> None:
+    """Close the process-wide centroid table so the next use reopens it."""
+    global _table, _table_loaded
+    with _table_lock:
+        if _table is not None:
+            _table.close()
+        _table = None
+        _table_loaded = False
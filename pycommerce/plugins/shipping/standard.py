@@ -6,21 +6,64 @@ based on weight, dimensions, and shipping zones.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from uuid import UUID
 import time
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Request, Depends, Query, Form, Body
 
 from pycommerce.plugins.shipping.base import ShippingPlugin
-from pycommerce.plugins.shipping.calculator import ShippingRateCalculator, PostalCodeCalculator, ShippingZone
+from pycommerce.plugins.shipping.calculator import (
+    ShippingRateCalculator, ShippingRateTable, PostalCodeCalculator, ShippingZone
+)
 from pycommerce.models.shipment import ShipmentManager
-from pycommerce.core.exceptions import ShippingError
-from pycommerce.models.plugin_config import PluginConfigManager
+from pycommerce.core.exceptions import ConfigError, ShippingError
+from pycommerce.models.plugin_config import PluginConfigManager, add_config_listener
 from pycommerce.models.tenant import TenantManager
 
 logger = logging.getLogger("pycommerce.plugins.shipping.standard")
 
+# Plugin ID the shipping configuration is stored under
+SHIPPING_CONFIG_ID = "standard-shipping"
+
+# Compiled rate tables are keyed on the version of the tenant's shipping
+# configuration row, so saves made by other worker processes are picked up
+# when the plugin configuration cache revalidates
+TENANT_HOST_TTL = 60
+
+# Domains resolved to a tenant that are kept; unknown hosts are not cached,
+# so arbitrary Host headers cannot grow the cache
+TENANT_HOST_CACHE_SIZE = 1024
+
+_rate_tables: Dict[Optional[str], Tuple[int, ShippingRateTable]] = {}
+_tenant_by_host: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_default_tenant: Optional[Tuple[float, Optional[str]]] = None
+_cache_lock = threading.Lock()
+
+
+def invalidate_rate_table(tenant_id: Optional[str] = None) -> None:
+    """
+    Drop compiled shipping rate tables.
+    
+    Args:
+        tenant_id: The tenant whose table to drop, or None to drop all
+    """
+    with _cache_lock:
+        if tenant_id is None:
+            _rate_tables.clear()
+        else:
+            _rate_tables.pop(str(tenant_id), None)
+
+
+def _on_plugin_config_changed(plugin_id: str, tenant_id: Optional[str]) -> None:
+    if plugin_id == SHIPPING_CONFIG_ID:
+        invalidate_rate_table(tenant_id)
+
+
+add_config_listener(_on_plugin_config_changed)
+
 
 class StandardShippingPlugin(ShippingPlugin):
     """
@@ -127,6 +170,27 @@ class StandardShippingPlugin(ShippingPlugin):
                 logger.error(f"Error calculating shipping rates: {str(e)}")
                 raise HTTPException(status_code=500, detail="Error calculating shipping rates")
         
+        @router.post("/calculate-batch", tags=["shipping"])
+        async def calculate_shipping_rates_batch(
+            request: Request,
+            quotes: List[Dict[str, Any]] = Body(..., embed=True, description="Carts to quote, each with destination and items")
+        ):
+            """
+            Calculate shipping rates for several carts or destinations at once.
+            
+            Args:
+                request: The request object
+                quotes: List of {"destination": {...}, "items": [...]} entries
+            """
+            try:
+                return {"results": self.calculate_rates_batch(quotes, request=request)}
+            except ShippingError as e:
+                logger.error(f"Shipping error: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                logger.error(f"Error calculating shipping rates: {str(e)}")
+                raise HTTPException(status_code=500, detail="Error calculating shipping rates")
+        
         @router.get("/shipments/{shipment_id}", tags=["shipping"])
         def get_shipment(shipment_id: str):
             """
@@ -176,39 +240,60 @@ class StandardShippingPlugin(ShippingPlugin):
         """
         Get the current tenant based on the host header.
         
+        Domains that resolve to a tenant are cached for TENANT_HOST_TTL
+        seconds, keeping the TENANT_HOST_CACHE_SIZE most recently used.
+        Other hosts get the default tenant, which is cached on its own.
+        
         Args:
             request: The request object (optional)
             
         Returns:
             Tenant ID or None
         """
-        tenant_id = None
+        global _default_tenant
+        
+        host = ""
+        if request and hasattr(request, 'headers'):
+            host = request.headers.get('host', '')
+        
+        # Extract domain from host (remove port)
+        domain = host.split(':')[0]
+        now = time.monotonic()
+        with _cache_lock:
+            cached = _tenant_by_host.get(domain)
+            if cached and now - cached[0] < TENANT_HOST_TTL:
+                _tenant_by_host.move_to_end(domain)
+                return cached[1]
+        
         try:
-            if request and hasattr(request, 'headers'):
-                host = request.headers.get('host', '')
-                if host:
-                    # Extract domain from host (remove port)
-                    domain = host.split(':')[0]
-                    
-                    # Find tenant by domain
-                    tenant_manager = TenantManager()
-                    tenant = tenant_manager.get_by_domain(domain)
-                    
-                    if tenant:
-                        tenant_id = str(tenant.id)
+            tenant_manager = TenantManager()
+            if domain:
+                # Find tenant by domain
+                tenant = tenant_manager.get_by_domain(domain)
+                if tenant:
+                    tenant_id = str(tenant.id)
+                    with _cache_lock:
+                        _tenant_by_host[domain] = (now, tenant_id)
+                        _tenant_by_host.move_to_end(domain)
+                        while len(_tenant_by_host) > TENANT_HOST_CACHE_SIZE:
+                            _tenant_by_host.popitem(last=False)
+                    return tenant_id
             
             # If we couldn't get tenant by domain, use the default tenant
-            if not tenant_id:
-                # Get the first tenant as default
-                tenant_manager = TenantManager()
-                tenants = tenant_manager.list()
-                if tenants:
-                    tenant_id = str(tenants[0].id)
+            cached = _default_tenant
+            if cached and now - cached[0] < TENANT_HOST_TTL:
+                return cached[1]
+            
+            # Get the first tenant as default
+            tenants = tenant_manager.list()
+            tenant_id = str(tenants[0].id) if tenants else None
+            _default_tenant = (now, tenant_id)
+            return tenant_id
         
         except Exception as e:
             logger.error(f"Error getting tenant from host: {str(e)}")
         
-        return tenant_id
+        return None
     
     def get_shipping_config(self, tenant_id=None):
         """
@@ -233,6 +318,9 @@ class StandardShippingPlugin(ShippingPlugin):
             "express_multiplier": 1.75,        # Express costs 75% more
             "premium_multiplier": 2.5,         # Premium costs 150% more
             
+            # Surcharges by postal code distance, e.g. [{"max_km": 300, "surcharge": 0}, {"max_km": None, "surcharge": 3.5}]
+            "distance_bands": [],
+            
             # Weight-based rates for each zone
             "weight_rates": {
                 ShippingZone.DOMESTIC.value: {
@@ -262,7 +350,7 @@ class StandardShippingPlugin(ShippingPlugin):
             if tenant_id:
                 # Get configuration from database
                 config_manager = PluginConfigManager()
-                stored_config = config_manager.get_config("standard-shipping", tenant_id) or {}
+                stored_config = config_manager.get_config(SHIPPING_CONFIG_ID, tenant_id) or {}
                 
                 # Update basic config with stored values (backwards compatibility)
                 if stored_config:
@@ -283,6 +371,12 @@ class StandardShippingPlugin(ShippingPlugin):
                     if "premium_multiplier" in stored_config:
                         config["premium_multiplier"] = stored_config["premium_multiplier"]
                     
+                    if "store_postal_code" in stored_config:
+                        config["store_postal_code"] = stored_config["store_postal_code"]
+                    
+                    if "distance_bands" in stored_config:
+                        config["distance_bands"] = stored_config["distance_bands"] or []
+                    
                     # Update weight-based rates
                     if "weight_rates" in stored_config:
                         for zone, rates in stored_config["weight_rates"].items():
@@ -298,6 +392,35 @@ class StandardShippingPlugin(ShippingPlugin):
         
         return config
     
+    def get_rate_table(self, tenant_id=None) -> ShippingRateTable:
+        """
+        Get the compiled rate table for a tenant.
+        
+        The tenant's configuration is loaded and compiled on first use and
+        cached until the version of its configuration row changes.
+        
+        Args:
+            tenant_id: The tenant ID (optional)
+            
+        Returns:
+            The compiled rate table
+        """
+        key = str(tenant_id) if tenant_id else None
+        cached = _rate_tables.get(key)
+        try:
+            version = PluginConfigManager().get_version(SHIPPING_CONFIG_ID, key) if key else 0
+        except ConfigError as e:
+            # Keep serving the last table while the configuration store is unreachable
+            logger.error(f"Error checking shipping configuration version: {str(e)}")
+            return cached[1] if cached else ShippingRateTable.from_config(self.get_shipping_config(tenant_id))
+        if cached and cached[0] == version:
+            return cached[1]
+        
+        table = ShippingRateTable.from_config(self.get_shipping_config(tenant_id))
+        with _cache_lock:
+            _rate_tables[key] = (version, table)
+        return table
+    
     def calculate_rates(self, items: List[Dict[str, Any]], destination: Dict[str, Any], request=None) -> List[Dict[str, Any]]:
         """
         Calculate shipping rates for an order.
@@ -314,96 +437,137 @@ class StandardShippingPlugin(ShippingPlugin):
             ShippingError: If rate calculation fails
         """
         try:
-            # Ensure destination has required fields
-            if not destination:
-                raise ShippingError("Destination is required for shipping calculation")
-                
-            country = destination.get("country", "").upper()
-            postal_code = destination.get("postal_code", "")
+            # Get tenant-specific rate table
+            tenant_id = self.get_tenant_from_host(request)
+            table = self.get_rate_table(tenant_id)
+            return self._quote(table, items, destination, {})
+        
+        except ShippingError as e:
+            # Re-raise shipping errors
+            raise
+        except Exception as e:
+            logger.error(f"Error calculating shipping rates: {str(e)}")
+            raise ShippingError(f"Failed to calculate shipping rates: {str(e)}")
+    
+    def calculate_rates_batch(self, quotes: List[Dict[str, Any]], request=None) -> List[Dict[str, Any]]:
+        """
+        Calculate shipping rates for many carts or destinations in one call.
+        
+        The tenant and its rate table are resolved once for the whole batch
+        and postal distances are computed once per distinct destination,
+        which makes this suitable for checkout and cart estimate widgets
+        that quote several destinations at a time.
+        
+        Args:
+            quotes: List of dictionaries with ``items`` and ``destination``
+            request: The request object (optional)
             
-            if not country:
-                raise ShippingError("Destination country is required for shipping calculation")
+        Returns:
+            List in the same order as ``quotes``, each either
+            ``{"rates": [...]}`` or ``{"error": "..."}``
             
-            # Get tenant-specific configuration
+        Raises:
+            ShippingError: If the rate table could not be loaded
+        """
+        try:
             tenant_id = self.get_tenant_from_host(request)
-            config = self.get_shipping_config(tenant_id)
-            
-            # Calculate total order value for free shipping
-            order_total = sum(item.get("price", 0) * item.get("quantity", 1) for item in items)
-            
-            # Set up shipping calculator with tenant-specific config
-            weight_rates = {}
-            for zone_key, zone_rates in config["weight_rates"].items():
-                # Convert string keys back to enum
-                zone = ShippingZone(zone_key)
-                weight_rates[zone] = zone_rates
-            
-            calculator = ShippingRateCalculator(
-                weight_rates=weight_rates,
-                dimensional_weight_factor=config.get("dimensional_weight_factor", 200),
-                express_multiplier=config.get("express_multiplier", 1.75),
-                premium_multiplier=config.get("premium_multiplier", 2.5),
-                free_shipping_threshold=config.get("free_shipping_threshold", 0)
-            )
+            table = self.get_rate_table(tenant_id)
+        except Exception as e:
+            logger.error(f"Error loading shipping rate table: {str(e)}")
+            raise ShippingError(f"Failed to calculate shipping rates: {str(e)}")
+        
+        # Resolve postal distances per destination country in one pass
+        postal_codes: Dict[str, List[str]] = {}
+        for quote in quotes:
+            destination = quote.get("destination") or {}
+            country = (destination.get("country") or "").upper()
+            postal_code = destination.get("postal_code") or ""
+            if country and postal_code and postal_code not in postal_codes.setdefault(country, []):
+                postal_codes[country].append(postal_code)
+        
+        distances: Dict[Tuple[str, str], float] = {}
+        for country, codes in postal_codes.items():
+            distances.update(self._postal_distances(table, country, codes))
+        
+        results = []
+        for quote in quotes:
+            try:
+                rates = self._quote(table, quote.get("items") or [], quote.get("destination"), distances)
+                results.append({"rates": rates})
+            except ShippingError as e:
+                results.append({"error": str(e)})
+            except Exception as e:
+                logger.error(f"Error calculating shipping rates: {str(e)}")
+                results.append({"error": "Error calculating shipping rates"})
+        return results
+    
+    def _postal_distances(
+        self,
+        table: ShippingRateTable,
+        country: str,
+        postal_codes: List[str]
+    ) -> Dict[Tuple[str, str], float]:
+        """Calculate distances from the store to postal codes in one country."""
+        try:
+            # Get store's postal code from tenant config if available
+            origin_postal = table.config.get("store_postal_code", "00000")
             
-            # Calculate distance-based rates if we have postal codes
-            distance = 0
-            if postal_code:
-                origin_postal = "00000"  # Default placeholder
-                try:
-                    # Get store's postal code from tenant config if available
-                    # This would be a more sophisticated approach in a real implementation
-                    origin_postal = config.get("store_postal_code", origin_postal)
-                    
-                    # Calculate approximate distance
-                    distance = PostalCodeCalculator.calculate_distance(
-                        self._store_country, origin_postal, 
-                        country, postal_code
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not calculate postal distance: {str(e)}")
-            
-            # Calculate shipping rates using the calculator
-            rates = calculator.calculate_rates(
-                items=items,
-                origin_country=self._store_country,
-                destination_country=country,
-                order_total=order_total
+            # Calculate approximate distances
+            distances = PostalCodeCalculator.calculate_distances(
+                table.store_country, origin_postal,
+                country, postal_codes
             )
-            
+        except Exception as e:
+            logger.warning(f"Could not calculate postal distance: {str(e)}")
+            distances = [0 for _ in postal_codes]
+        return {(country, postal_code): distance for postal_code, distance in zip(postal_codes, distances)}
+    
+    def _quote(
+        self,
+        table: ShippingRateTable,
+        items: List[Dict[str, Any]],
+        destination: Dict[str, Any],
+        distances: Dict[Tuple[str, str], float]
+    ) -> List[Dict[str, Any]]:
+        """Quote one cart against a compiled rate table."""
+        # Ensure destination has required fields
+        if not destination:
+            raise ShippingError("Destination is required for shipping calculation")
+            
+        country = destination.get("country", "").upper()
+        postal_code = destination.get("postal_code", "")
+        
+        if not country:
+            raise ShippingError("Destination country is required for shipping calculation")
+        
+        # Calculate total order value for free shipping
+        order_total = sum(item.get("price", 0) * item.get("quantity", 1) for item in items)
+        
+        # Calculate distance-based rates if we have postal codes
+        distance = 0
+        if postal_code:
+            key = (country, postal_code)
+            if key not in distances:
+                distances.update(self._postal_distances(table, country, [postal_code]))
+            distance = distances[key]
+        
+        rates = table.quote(items, country, order_total, distance_km=distance)
+        
+        for rate in rates:
             # Add distance information if available
             if distance > 0:
-                for rate in rates:
-                    rate["distance_km"] = distance
+                rate["distance_km"] = distance
             
             # Add postal codes for reference
-            for rate in rates:
-                rate["destination_postal"] = postal_code
+            rate["destination_postal"] = postal_code
             
             # For legacy compatibility (temporary)
-            if len(rates) > 0:
-                for rate in rates:
-                    if rate["id"] == "standard" and country == "US":
-                        rate["name"] = "Standard Shipping"
-                    elif rate["id"] == "express" and country == "US":
-                        rate["name"] = "Express Shipping"
-                    elif rate["id"] == "premium" and country == "US":
-                        rate["name"] = "Premium Shipping"
-                    elif rate["id"] == "standard":
-                        rate["name"] = "Standard International"
-                    elif rate["id"] == "express":
-                        rate["name"] = "Express International"
-                    elif rate["id"] == "premium":
-                        rate["name"] = "Premium International"
-            
-            return rates
+            if country == "US":
+                rate["name"] = f"{rate['id'].capitalize()} Shipping"
+            else:
+                rate["name"] = f"{rate['id'].capitalize()} International"
         
-        except ShippingError as e:
-            # Re-raise shipping errors
-            raise
-        except Exception as e:
-            logger.error(f"Error calculating shipping rates: {str(e)}")
-            raise ShippingError(f"Failed to calculate shipping rates: {str(e)}")
+        return rates
     
     def create_shipment(self, order_id: UUID, shipping_option_id: str, shipping_address: Dict[str, Any]) -> Dict[str, Any]:
         """
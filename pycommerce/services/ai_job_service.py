@@ -0,0 +1,1100 @@
+"""
+Batched AI content generation for PyCommerce.
+
+Generating content one request at a time inside admin handlers does not
+scale past a handful of products, so bulk generation runs as jobs. A job is
+stored with one item per prompt and processed by an AIJobRunner, a bounded
+pool of asyncio workers that call the provider in threads. Admin pages
+poll the job for progress and fetch results when it finishes.
+
+Results are cached by a hash of the provider, model, job kind and prompt,
+so identical prompts (within a job, across jobs and from the interactive
+endpoints) are generated once. Provider calls are rate limited per tenant
+with a token bucket; cache hits do not count. Items that fail are retried
+with backoff and marked failed after AI_JOB_MAX_ATTEMPTS.
+
+Setting AI_PROVIDER=mock, or submitting a job with provider "mock", uses
+MockAIProvider so the whole pipeline runs offline; AI_MOCK_LATENCY_MS makes
+the mock behave like a slow API for load testing.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import exists, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.core.exceptions import AIError, AIRateLimitError
+from pycommerce.models.ai_job import (
+    AIJob, AIJobItem, AIResultCache,
+    AI_JOB_QUEUED, AI_JOB_RUNNING, AI_JOB_COMPLETED, AI_JOB_CANCELLED,
+    AI_ITEM_PENDING, AI_ITEM_RUNNING, AI_ITEM_DONE, AI_ITEM_FAILED, AI_ITEM_CANCELLED,
+    AI_JOB_KINDS, AI_JOB_ENHANCE, AI_JOB_PRODUCT_DESCRIPTIONS,
+)
+from pycommerce.models.db_registry import Product
+from pycommerce.plugins.ai.config import get_ai_provider_instance
+from pycommerce.plugins.ai.providers import get_ai_provider
+from pycommerce.services.product_cache import invalidate_product_caches
+from pycommerce.services.wysiwyg_service import sanitize_html
+
+logger = logging.getLogger(__name__)
+
+# Worker pool size per process (0 leaves processing to another process)
+AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", "4"))
+# Items held in memory; the rest wait in the database
+AI_JOB_QUEUE_SIZE = int(os.environ.get("AI_JOB_QUEUE_SIZE", "200"))
+AI_JOB_POLL_SECONDS = float(os.environ.get("AI_JOB_POLL_SECONDS", "2"))
+AI_JOB_MAX_ATTEMPTS = int(os.environ.get("AI_JOB_MAX_ATTEMPTS", "3"))
+AI_JOB_RETRY_SECONDS = float(os.environ.get("AI_JOB_RETRY_SECONDS", "30"))
+# Claims older than this are assumed to belong to a crashed worker
+AI_JOB_LOCK_SECONDS = float(os.environ.get("AI_JOB_LOCK_SECONDS", "600"))
+AI_JOB_MAX_ITEMS = int(os.environ.get("AI_JOB_MAX_ITEMS", "10000"))
+# Provider calls per tenant and process (0 disables the limit)
+AI_TENANT_RATE_PER_MINUTE = float(os.environ.get("AI_TENANT_RATE_PER_MINUTE", "60"))
+AI_TENANT_BURST = int(os.environ.get("AI_TENANT_BURST", "10"))
+# Cached results older than this are regenerated (0 keeps them forever)
+AI_CACHE_TTL_DAYS = float(os.environ.get("AI_CACHE_TTL_DAYS", "30"))
+AI_MOCK_LATENCY_MS = float(os.environ.get("AI_MOCK_LATENCY_MS", "0"))
+
+# Length of products.description; longer results are kept on the item only
+PRODUCT_DESCRIPTION_MAX_LENGTH = 1000
+
+# Bound parameters per IN (...) query
+_CHUNK_SIZE = 500
+
+PRODUCT_DESCRIPTION_LENGTHS = {
+    "short": "50-80 words",
+    "medium": "80-150 words",
+}
+
+
+def prompt_hash(provider: str, kind: str, prompt: str, instructions: Optional[str] = None) -> str:
+    """
+    Hash a prompt for the result cache.
+
+    Args:
+        provider: Provider identity from provider_identity()
+        kind: Job kind; enhancing and generating the same text differ
+        prompt: The prompt (or text to enhance)
+        instructions: Enhancement instructions
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    key = json.dumps([provider, kind, prompt, instructions or ""], ensure_ascii=False)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def provider_identity(provider: Any) -> str:
+    """Name and model of a provider instance, e.g. "openai:gpt-4"."""
+    name = getattr(provider, "name", None) or type(provider).__name__
+    model = getattr(provider, "model", None) or (getattr(provider, "config", None) or {}).get("model", "")
+    return f"{name}:{model}"
+
+
+def resolve_provider(tenant_id: Optional[str] = None, provider_name: Optional[str] = None) -> Any:
+    """
+    Get the provider to generate with.
+
+    Args:
+        tenant_id: Tenant whose AI configuration to use
+        provider_name: "mock" to force the offline provider
+
+    Returns:
+        A provider instance
+
+    Raises:
+        ValueError: If the tenant's provider is not configured
+    """
+    if provider_name == "mock":
+        return get_ai_provider("mock", {"latency_ms": AI_MOCK_LATENCY_MS})
+    return get_ai_provider_instance(tenant_id)
+
+
+def build_product_prompt(product: Dict[str, Any], tone: str = "professional", length: str = "short") -> str:
+    """
+    Build the prompt for a product description.
+
+    Args:
+        product: Dictionary with name, sku, categories and description
+        tone: Desired tone
+        length: "short" or "medium"
+
+    Returns:
+        The prompt
+    """
+    prompt = (
+        "Write a product description that highlights features and benefits "
+        f"in a {tone} tone. Length should be {PRODUCT_DESCRIPTION_LENGTHS.get(length, PRODUCT_DESCRIPTION_LENGTHS['short'])}. "
+        "Return HTML paragraphs only."
+        f"\n\nProduct: {product['name']}"
+    )
+    if product.get("sku"):
+        prompt += f"\nSKU: {product['sku']}"
+    if product.get("categories"):
+        prompt += f"\nCategories: {', '.join(str(c) for c in product['categories'])}"
+    if product.get("description"):
+        prompt += f"\nCurrent description: {product['description']}"
+    return prompt
+
+
+def _chunks(values: List[Any], size: int = _CHUNK_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class TenantRateLimiter:
+    """
+    Token bucket per tenant.
+
+    Each tenant may make ``burst`` calls at once and ``rate_per_minute``
+    calls per minute on average. Limits are per process.
+    """
+
+    def __init__(self, rate_per_minute: float = AI_TENANT_RATE_PER_MINUTE, burst: int = AI_TENANT_BURST, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        return min(float(self.burst), tokens + (now - updated) * self.rate)
+
+    def try_acquire(self, tenant_id: Optional[str]) -> float:
+        """
+        Take a token for a tenant if one is available.
+
+        Args:
+            tenant_id: The tenant (None for global calls)
+
+        Returns:
+            0 if the call may proceed, otherwise seconds until it may
+        """
+        if self.rate <= 0:
+            return 0.0
+        key = tenant_id or ""
+        with self._lock:
+            now = self._clock()
+            tokens = self._tokens(key, now)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def limited_tenants(self) -> List[Optional[str]]:
+        """Tenants that currently have no tokens left."""
+        if self.rate <= 0:
+            return []
+        with self._lock:
+            now = self._clock()
+            return [key or None for key in self._buckets if self._tokens(key, now) < 1]
+
+
+class AIJobService:
+    """Service for creating AI jobs, polling their progress and the result cache."""
+
+    def __init__(self, session_factory=None, limiter: Optional[TenantRateLimiter] = None):
+        """
+        Initialize the service.
+
+        Args:
+            session_factory: Session factory to use (defaults to SessionLocal)
+            limiter: Rate limiter for interactive generation
+        """
+        self._session_factory = session_factory or SessionLocal
+        self.limiter = limiter or get_tenant_rate_limiter()
+
+    # ----- Jobs -----
+
+    def create_job(
+        self,
+        kind: str,
+        items: List[Dict[str, Any]],
+        tenant_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a job.
+
+        Items whose prompt is already cached are completed immediately.
+
+        Args:
+            kind: One of AI_JOB_KINDS
+            items: Dictionaries with "prompt" and optionally "target_id"
+            tenant_id: Tenant the job belongs to
+            options: "provider" ("mock" to run offline), "instructions" for
+                enhance jobs, "apply" to write product descriptions back
+            created_by: User who submitted the job
+
+        Returns:
+            The job, as returned by get_job()
+
+        Raises:
+            AIError: If the job is invalid
+            ValueError: If the tenant's AI provider is not configured
+        """
+        if kind not in AI_JOB_KINDS:
+            raise AIError(f"Unknown AI job kind: {kind}")
+        items = [item for item in items if str(item.get("prompt") or "").strip()]
+        if not items:
+            raise AIError("An AI job needs at least one prompt")
+        if len(items) > AI_JOB_MAX_ITEMS:
+            raise AIError(f"An AI job can have at most {AI_JOB_MAX_ITEMS} prompts")
+
+        options = dict(options or {})
+        identity = provider_identity(resolve_provider(tenant_id, options.get("provider")))
+        hashes = [prompt_hash(identity, kind, item["prompt"], options.get("instructions")) for item in items]
+        cached = self.lookup_cache(hashes)
+        now = datetime.utcnow()
+
+        session = self._session_factory()
+        try:
+            job = AIJob(
+                tenant_id=tenant_id,
+                kind=kind,
+                status=AI_JOB_COMPLETED if len(cached) == len(set(hashes)) else AI_JOB_QUEUED,
+                total=len(items),
+                options=json.dumps(options),
+                created_by=created_by,
+                created_at=now,
+            )
+            if job.status == AI_JOB_COMPLETED:
+                job.started_at = job.finished_at = now
+            session.add(job)
+            session.flush()
+            job_id = job.id
+
+            rows = []
+            for position, (item, digest) in enumerate(zip(items, hashes)):
+                result = cached.get(digest)
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "job_id": job_id,
+                    "tenant_id": tenant_id,
+                    "position": position,
+                    "target_id": str(item["target_id"]) if item.get("target_id") is not None else None,
+                    "prompt": item["prompt"],
+                    "prompt_hash": digest,
+                    "status": AI_ITEM_DONE if result is not None else AI_ITEM_PENDING,
+                    "result": result,
+                    "cached": 1 if result is not None else 0,
+                    "attempts": 0,
+                    "finished_at": now if result is not None else None,
+                })
+            for chunk in _chunks(rows):
+                session.execute(insert(AIJobItem), chunk)
+            if cached:
+                for chunk in _chunks(list(cached)):
+                    session.execute(
+                        update(AIResultCache)
+                        .where(AIResultCache.prompt_hash.in_(chunk))
+                        .values(hits=AIResultCache.hits + 1, last_hit_at=now)
+                        .execution_options(synchronize_session=False)
+                    )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        logger.info(f"Created AI job {job_id} ({kind}, {len(items)} prompts, {len(cached)} cached)")
+        return self.get_job(job_id)
+
+    def create_product_description_job(
+        self,
+        tenant_id: str,
+        product_ids: Optional[List[str]] = None,
+        missing_only: bool = False,
+        tone: str = "professional",
+        length: str = "short",
+        apply: bool = False,
+        provider: Optional[str] = None,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a job generating descriptions for a tenant's products.
+
+        Args:
+            tenant_id: The tenant
+            product_ids: Products to describe (default: all of the tenant's products)
+            missing_only: Only products without a description
+            tone: Desired tone
+            length: "short" or "medium"
+            apply: Write results to the products' descriptions
+            provider: "mock" to run offline
+            created_by: User who submitted the job
+
+        Returns:
+            The job, as returned by get_job()
+        """
+        session = self._session_factory()
+        try:
+            query = session.query(
+                Product.id, Product.name, Product.sku, Product.categories, Product.description
+            ).filter(Product.tenant_id == tenant_id)
+            if product_ids:
+                query = query.filter(Product.id.in_([str(p) for p in product_ids]))
+            if missing_only:
+                query = query.filter(or_(Product.description.is_(None), Product.description == ""))
+            products = [row._asdict() for row in query.order_by(Product.name, Product.id).all()]
+        finally:
+            session.close()
+
+        if not products:
+            raise AIError("No products match the job")
+
+        items = [{"prompt": build_product_prompt(p, tone, length), "target_id": p["id"]} for p in products]
+        options = {"tone": tone, "length": length, "apply": bool(apply)}
+        if provider:
+            options["provider"] = provider
+        return self.create_job(AI_JOB_PRODUCT_DESCRIPTIONS, items, tenant_id, options, created_by)
+
+    def get_job(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a job with its progress.
+
+        Args:
+            job_id: The job ID
+            tenant_id: Only return the job if it belongs to this tenant
+
+        Returns:
+            Dictionary with status, item counts per status and progress in
+            percent, or None if not found
+        """
+        session = self._session_factory()
+        try:
+            job = session.query(AIJob).filter(AIJob.id == job_id).first()
+            if job is None or (tenant_id is not None and job.tenant_id != tenant_id):
+                return None
+            rows = session.query(
+                AIJobItem.status, func.count(AIJobItem.id), func.sum(AIJobItem.cached)
+            ).filter(AIJobItem.job_id == job_id).group_by(AIJobItem.status).all()
+            return self._job_dict(job, {row[0]: (row[1], row[2] or 0) for row in rows})
+        finally:
+            session.close()
+
+    def list_jobs(self, tenant_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        List recent jobs with their progress.
+
+        Args:
+            tenant_id: Only jobs of this tenant
+            limit: Maximum number of jobs
+
+        Returns:
+            Jobs, newest first
+        """
+        session = self._session_factory()
+        try:
+            query = session.query(AIJob)
+            if tenant_id is not None:
+                query = query.filter(AIJob.tenant_id == tenant_id)
+            jobs = query.order_by(AIJob.created_at.desc()).limit(limit).all()
+            if not jobs:
+                return []
+            rows = session.query(
+                AIJobItem.job_id, AIJobItem.status, func.count(AIJobItem.id), func.sum(AIJobItem.cached)
+            ).filter(AIJobItem.job_id.in_([job.id for job in jobs])).group_by(AIJobItem.job_id, AIJobItem.status).all()
+            counts: Dict[str, Dict[str, tuple]] = {}
+            for job_id, status, count, cached in rows:
+                counts.setdefault(job_id, {})[status] = (count, cached or 0)
+            return [self._job_dict(job, counts.get(job.id, {})) for job in jobs]
+        finally:
+            session.close()
+
+    def _job_dict(self, job: AIJob, counts: Dict[str, tuple]) -> Dict[str, Any]:
+        by_status = {status: counts.get(status, (0, 0))[0] for status in (
+            AI_ITEM_PENDING, AI_ITEM_RUNNING, AI_ITEM_DONE, AI_ITEM_FAILED, AI_ITEM_CANCELLED
+        )}
+        finished = by_status[AI_ITEM_DONE] + by_status[AI_ITEM_FAILED] + by_status[AI_ITEM_CANCELLED]
+        return {
+            "id": job.id,
+            "tenant_id": job.tenant_id,
+            "kind": job.kind,
+            "status": job.status,
+            "total": job.total,
+            "counts": by_status,
+            "cached": sum(cached for _, cached in counts.values()),
+            "progress": round(100.0 * finished / job.total, 1) if job.total else 100.0,
+            "options": json.loads(job.options) if job.options else {},
+            "created_by": job.created_by,
+            "created_at": _isoformat(job.created_at),
+            "started_at": _isoformat(job.started_at),
+            "finished_at": _isoformat(job.finished_at),
+        }
+
+    def get_results(
+        self,
+        job_id: str,
+        tenant_id: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a page of a job's items.
+
+        Args:
+            job_id: The job ID
+            tenant_id: Only if the job belongs to this tenant
+            offset: Items to skip
+            limit: Maximum number of items
+            status: Only items with this status
+
+        Returns:
+            Items in submission order, or None if the job was not found
+        """
+        session = self._session_factory()
+        try:
+            job = session.query(AIJob.tenant_id).filter(AIJob.id == job_id).first()
+            if job is None or (tenant_id is not None and job.tenant_id != tenant_id):
+                return None
+            query = session.query(AIJobItem).filter(AIJobItem.job_id == job_id)
+            if status:
+                query = query.filter(AIJobItem.status == status)
+            items = query.order_by(AIJobItem.position).offset(offset).limit(limit).all()
+            return [{
+                "position": item.position,
+                "target_id": item.target_id,
+                "status": item.status,
+                "result": item.result,
+                "cached": bool(item.cached),
+                "attempts": item.attempts,
+                "error": item.last_error,
+            } for item in items]
+        finally:
+            session.close()
+
+    def cancel_job(self, job_id: str, tenant_id: Optional[str] = None) -> bool:
+        """
+        Cancel a job's pending items; items already running finish.
+
+        Args:
+            job_id: The job ID
+            tenant_id: Only if the job belongs to this tenant
+
+        Returns:
+            True if the job was cancelled, False if not found or already finished
+        """
+        session = self._session_factory()
+        try:
+            query = update(AIJob).where(AIJob.id == job_id, AIJob.status.in_((AI_JOB_QUEUED, AI_JOB_RUNNING)))
+            if tenant_id is not None:
+                query = query.where(AIJob.tenant_id == tenant_id)
+            result = session.execute(
+                query.values(status=AI_JOB_CANCELLED, finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                session.rollback()
+                return False
+            session.execute(
+                update(AIJobItem)
+                .where(AIJobItem.job_id == job_id, AIJobItem.status == AI_ITEM_PENDING)
+                .values(status=AI_ITEM_CANCELLED, finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return True
+        finally:
+            session.close()
+
+    # ----- Result cache -----
+
+    def lookup_cache(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """
+        Get cached results.
+
+        Args:
+            hashes: Prompt hashes
+
+        Returns:
+            Results of the hashes that are cached and not expired
+        """
+        hashes = list(set(hashes))
+        if not hashes:
+            return {}
+        session = self._session_factory()
+        try:
+            found = {}
+            for chunk in _chunks(hashes):
+                query = session.query(AIResultCache.prompt_hash, AIResultCache.result).filter(
+                    AIResultCache.prompt_hash.in_(chunk)
+                )
+                if AI_CACHE_TTL_DAYS > 0:
+                    query = query.filter(AIResultCache.created_at >= datetime.utcnow() - timedelta(days=AI_CACHE_TTL_DAYS))
+                found.update({row.prompt_hash: row.result for row in query.all()})
+            return found
+        finally:
+            session.close()
+
+    def store_cache(self, digest: str, provider: str, result: str) -> None:
+        """
+        Store a generated result.
+
+        Args:
+            digest: Prompt hash
+            provider: Provider identity
+            result: Generated text
+        """
+        session = self._session_factory()
+        try:
+            existing = session.query(AIResultCache).filter(AIResultCache.prompt_hash == digest).first()
+            if existing is not None:
+                # Expired entry being regenerated
+                existing.result = result
+                existing.provider = provider
+                existing.created_at = datetime.utcnow()
+            else:
+                session.add(AIResultCache(prompt_hash=digest, provider=provider, result=result, created_at=datetime.utcnow()))
+            session.commit()
+        except IntegrityError:
+            # Another worker stored the same prompt first
+            session.rollback()
+        finally:
+            session.close()
+
+    def generate_now(
+        self,
+        prompt: str,
+        kind: str = "generate",
+        tenant_id: Optional[str] = None,
+        instructions: Optional[str] = None,
+        provider_name: Optional[str] = None,
+        provider: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate a single result synchronously, through the cache and rate limit.
+
+        Used by the interactive endpoints; call it in a thread from async code.
+
+        Args:
+            prompt: The prompt, or the text to enhance
+            kind: "generate" or "enhance"
+            tenant_id: Tenant whose configuration and rate limit to use
+            instructions: Enhancement instructions
+            provider_name: "mock" to force the offline provider
+            provider: Provider instance to use instead of the tenant's
+
+        Returns:
+            Dictionary with content and whether it came from the cache
+
+        Raises:
+            AIRateLimitError: If the tenant is over its rate limit
+            ValueError: If the tenant's AI provider is not configured
+        """
+        provider = provider or resolve_provider(tenant_id, provider_name)
+        identity = provider_identity(provider)
+        digest = prompt_hash(identity, kind, prompt, instructions)
+        cached = self.lookup_cache([digest]).get(digest)
+        if cached is not None:
+            return {"content": cached, "cached": True}
+
+        wait = self.limiter.try_acquire(tenant_id)
+        if wait:
+            raise AIRateLimitError(f"AI generation rate limit exceeded, retry in {wait:.0f}s", retry_after=wait)
+
+        content = _call_provider(provider, kind, prompt, instructions)
+        self.store_cache(digest, identity, content)
+        return {"content": content, "cached": False}
+
+
+def _call_provider(provider: Any, kind: str, prompt: str, instructions: Optional[str]) -> str:
+    options = {"raise_errors": True}
+    if kind == AI_JOB_ENHANCE:
+        content = provider.enhance_text(prompt, instructions, options)
+    else:
+        content = provider.generate_text(prompt, options)
+    if not isinstance(content, str) or not content.strip():
+        raise AIError("AI provider returned no content")
+    return content
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Seconds to wait before retrying an item.
+
+    Args:
+        attempts: Number of attempts made so far
+
+    Returns:
+        Exponential backoff with +/-20% jitter
+    """
+    return AI_JOB_RETRY_SECONDS * 2 ** max(0, attempts - 1) * random.uniform(0.8, 1.2)
+
+
+class AIJobRunner:
+    """Bounded pool of asyncio workers that processes pending AI job items."""
+
+    def __init__(
+        self,
+        workers: int = AI_JOB_WORKERS,
+        queue_size: int = AI_JOB_QUEUE_SIZE,
+        poll_interval: float = AI_JOB_POLL_SECONDS,
+        max_attempts: int = AI_JOB_MAX_ATTEMPTS,
+        service: Optional[AIJobService] = None,
+        limiter: Optional[TenantRateLimiter] = None,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            workers: Number of concurrent provider calls (0 disables processing in this process)
+            queue_size: Items held in memory
+            poll_interval: Seconds between database scans
+            max_attempts: Attempts before an item is marked failed
+            service: AIJobService to use (its session factory is shared)
+            limiter: Per-tenant rate limiter (defaults to the process-wide one)
+        """
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.service = service or get_ai_job_service()
+        self.limiter = limiter or self.service.limiter
+        self._session_factory = self.service._session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        # Items queued or being processed
+        self._queued: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+        # Prompt hashes being generated in this process, so duplicates wait
+        # for the first result instead of calling the provider again
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = {AI_ITEM_DONE: 0, AI_ITEM_FAILED: 0, "cached": 0, "retried": 0, "throttled": 0, "skipped": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        """Start the workers and the poller; a no-op if already running."""
+        if self._running or self.workers == 0:
+            return
+        self._running = True
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll()))
+        logger.info(f"Started AI job runner with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; items claimed but unfinished are released after AI_JOB_LOCK_SECONDS."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued.clear()
+
+    def wake(self) -> None:
+        """Look for new items now instead of at the next poll (call after creating a job)."""
+        if self._running:
+            self._wake.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        Process due items until none are left.
+
+        Used by the CLI and for load testing; the runner must be started.
+        Items waiting on a rate limit are waited for.
+
+        Args:
+            timeout: Maximum seconds to run
+
+        Returns:
+            The runner's counters
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running:
+            await self._fill()
+            await self._queue.join()
+            if not await asyncio.to_thread(self.has_pending):
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            if not self._queued:
+                # Everything left is throttled or scheduled for a retry
+                await asyncio.sleep(min(1.0, self.poll_interval))
+        return dict(self.stats)
+
+    async def _work(self) -> None:
+        while True:
+            item_id = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.process_item, item_id)
+            except Exception as e:
+                logger.error(f"Error processing AI job item {item_id}: {str(e)}")
+            finally:
+                # Only forget the item once done, so the poller cannot queue it twice
+                self._queued.discard(item_id)
+                self._queue.task_done()
+                if self._queue.qsize() < self.workers:
+                    self._wake.set()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.release_stale)
+                await self._fill()
+            except Exception as e:
+                logger.error(f"Error polling AI job items: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _fill(self) -> None:
+        free = self.queue_size - self._queue.qsize()
+        if free <= 0:
+            return
+        item_ids = await asyncio.to_thread(self.due_items, free, self.limiter.limited_tenants())
+        for item_id in item_ids:
+            if item_id in self._queued:
+                continue
+            try:
+                self._queue.put_nowait(item_id)
+            except asyncio.QueueFull:
+                break
+            self._queued.add(item_id)
+
+    def process_item(self, item_id: str) -> Optional[str]:
+        """
+        Claim, generate and store one item.
+
+        Args:
+            item_id: ID of the AIJobItem row
+
+        Returns:
+            The item's new status, or None if it could not be claimed
+        """
+        item = self._claim(item_id)
+        if item is None:
+            self.stats["skipped"] += 1
+            return None
+
+        digest = item["prompt_hash"]
+        with self._inflight_lock:
+            pending = self._inflight.get(digest)
+            if pending is None:
+                self._inflight[digest] = threading.Event()
+
+        if pending is not None:
+            # The same prompt is being generated by another worker; wait briefly
+            # rather than holding this thread, and retry from the poller otherwise
+            pending.wait(self.poll_interval)
+            result = self.service.lookup_cache([digest]).get(digest)
+            if result is None:
+                return self._release(item, delay=self.poll_interval)
+            return self._complete(item, result, cached=True)
+
+        try:
+            result = self.service.lookup_cache([digest]).get(digest)
+            if result is not None:
+                return self._complete(item, result, cached=True)
+
+            wait = self.limiter.try_acquire(item["tenant_id"])
+            if wait:
+                self.stats["throttled"] += 1
+                return self._release(item, delay=wait)
+
+            try:
+                provider = resolve_provider(item["tenant_id"], item["options"].get("provider"))
+                result = _call_provider(provider, item["kind"], item["prompt"], item["options"].get("instructions"))
+            except Exception as e:
+                return self._fail(item, str(e) or type(e).__name__)
+
+            self.service.store_cache(digest, provider_identity(provider), result)
+            return self._complete(item, result, cached=False)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(digest).set()
+
+    def _claim(self, item_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        session = self._session_factory()
+        try:
+            # Conditional update so only one worker in any process gets the item
+            result = session.execute(
+                update(AIJobItem)
+                .where(
+                    AIJobItem.id == item_id,
+                    AIJobItem.status == AI_ITEM_PENDING,
+                    or_(AIJobItem.next_attempt_at.is_(None), AIJobItem.next_attempt_at <= now),
+                )
+                .values(status=AI_ITEM_RUNNING, locked_at=now, attempts=AIJobItem.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                session.commit()
+                return None
+
+            row = session.query(AIJobItem, AIJob.kind, AIJob.options).join(
+                AIJob, AIJob.id == AIJobItem.job_id
+            ).filter(AIJobItem.id == item_id).first()
+            session.execute(
+                update(AIJob)
+                .where(AIJob.id == row.AIJobItem.job_id, AIJob.status == AI_JOB_QUEUED)
+                .values(status=AI_JOB_RUNNING, started_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            record = row.AIJobItem
+            return {
+                "id": record.id,
+                "job_id": record.job_id,
+                "tenant_id": record.tenant_id,
+                "target_id": record.target_id,
+                "prompt": record.prompt,
+                "prompt_hash": record.prompt_hash,
+                "attempts": record.attempts,
+                "kind": row.kind,
+                "options": json.loads(row.options) if row.options else {},
+            }
+        finally:
+            session.close()
+
+    def _complete(self, item: Dict[str, Any], result: str, cached: bool) -> str:
+        note = None
+        if item["options"].get("apply") and item["kind"] == AI_JOB_PRODUCT_DESCRIPTIONS and item["target_id"]:
+            note = self._apply_product_description(item, result)
+        self._update(
+            item["id"],
+            status=AI_ITEM_DONE,
+            result=result,
+            cached=1 if cached else 0,
+            finished_at=datetime.utcnow(),
+            locked_at=None,
+            last_error=note,
+        )
+        self.stats[AI_ITEM_DONE] += 1
+        if cached:
+            self.stats["cached"] += 1
+        self._finish_job(item["job_id"])
+        return AI_ITEM_DONE
+
+    def _apply_product_description(self, item: Dict[str, Any], result: str) -> Optional[str]:
+        # Model output is HTML like any editor content; store it sanitized
+        description = sanitize_html(result)
+        if len(description) > PRODUCT_DESCRIPTION_MAX_LENGTH:
+            logger.warning(f"Generated description for product {item['target_id']} is too long to apply")
+            return f"Result is longer than {PRODUCT_DESCRIPTION_MAX_LENGTH} characters and was not applied"
+        tenant_id = item["tenant_id"]
+        session = self._session_factory()
+        try:
+            query = update(Product).where(Product.id == item["target_id"])
+            if tenant_id is not None:
+                query = query.where(Product.tenant_id == tenant_id)
+            updated = session.execute(
+                query.values(description=description, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated and tenant_id is None:
+                tenant_id = session.query(Product.tenant_id).filter(Product.id == item["target_id"]).scalar()
+            session.commit()
+        finally:
+            session.close()
+        if updated:
+            invalidate_product_caches(tenant_id, item["target_id"])
+        return None
+
+    def _release(self, item: Dict[str, Any], delay: float) -> str:
+        # Not the item's fault; the attempt does not count
+        self._update(
+            item["id"],
+            status=AI_ITEM_PENDING,
+            attempts=max(0, item["attempts"] - 1),
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay) if delay else None,
+            locked_at=None,
+        )
+        return AI_ITEM_PENDING
+
+    def _fail(self, item: Dict[str, Any], error: str) -> str:
+        if item["attempts"] >= self.max_attempts:
+            logger.error(f"AI job item {item['job_id']}#{item['id']} failed {item['attempts']} times, giving up: {error}")
+            self._update(
+                item["id"],
+                status=AI_ITEM_FAILED,
+                finished_at=datetime.utcnow(),
+                locked_at=None,
+                last_error=error[:2000],
+            )
+            self.stats[AI_ITEM_FAILED] += 1
+            self._finish_job(item["job_id"])
+            return AI_ITEM_FAILED
+
+        delay = retry_delay(item["attempts"])
+        logger.warning(f"AI job item {item['job_id']}#{item['id']} failed, retrying in {delay:.0f}s: {error}")
+        self._update(
+            item["id"],
+            status=AI_ITEM_PENDING,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+            locked_at=None,
+            last_error=error[:2000],
+        )
+        self.stats["retried"] += 1
+        return AI_ITEM_PENDING
+
+    def _update(self, item_id: str, **values) -> None:
+        session = self._session_factory()
+        try:
+            session.execute(
+                update(AIJobItem)
+                .where(AIJobItem.id == item_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def _finish_job(self, job_id: str) -> None:
+        unfinished = exists().where(
+            AIJobItem.job_id == job_id,
+            AIJobItem.status.in_((AI_ITEM_PENDING, AI_ITEM_RUNNING)),
+        )
+        session = self._session_factory()
+        try:
+            result = session.execute(
+                update(AIJob)
+                .where(AIJob.id == job_id, AIJob.status.in_((AI_JOB_QUEUED, AI_JOB_RUNNING)), ~unfinished)
+                .values(status=AI_JOB_COMPLETED, finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount:
+                logger.info(f"AI job {job_id} completed")
+        finally:
+            session.close()
+
+    def due_items(self, limit: int = 100, exclude_tenants: Optional[List[Optional[str]]] = None) -> List[str]:
+        """
+        Get pending items that are due, oldest job first.
+
+        Args:
+            limit: Maximum number of items
+            exclude_tenants: Tenants to skip, e.g. those over their rate limit
+
+        Returns:
+            Item IDs
+        """
+        session = self._session_factory()
+        try:
+            query = session.query(AIJobItem.id).join(AIJob, AIJob.id == AIJobItem.job_id).filter(
+                AIJobItem.status == AI_ITEM_PENDING,
+                or_(AIJobItem.next_attempt_at.is_(None), AIJobItem.next_attempt_at <= datetime.utcnow())
+            )
+            if exclude_tenants:
+                named = [t for t in exclude_tenants if t is not None]
+                if named:
+                    query = query.filter(or_(AIJobItem.tenant_id.is_(None), ~AIJobItem.tenant_id.in_(named)))
+                if None in exclude_tenants:
+                    query = query.filter(AIJobItem.tenant_id.isnot(None))
+            rows = query.order_by(AIJob.created_at, AIJobItem.job_id, AIJobItem.position).limit(limit).all()
+            return [row.id for row in rows]
+        finally:
+            session.close()
+
+    def has_pending(self) -> bool:
+        """Whether any item is pending or running."""
+        session = self._session_factory()
+        try:
+            return session.query(
+                exists().where(AIJobItem.status.in_((AI_ITEM_PENDING, AI_ITEM_RUNNING)))
+            ).scalar()
+        finally:
+            session.close()
+
+    def release_stale(self) -> int:
+        """
+        Return items claimed by crashed workers to pending.
+
+        Returns:
+            The number of items released
+        """
+        session = self._session_factory()
+        try:
+            result = session.execute(
+                update(AIJobItem)
+                .where(
+                    AIJobItem.status == AI_ITEM_RUNNING,
+                    AIJobItem.locked_at < datetime.utcnow() - timedelta(seconds=AI_JOB_LOCK_SECONDS)
+                )
+                .values(status=AI_ITEM_PENDING, locked_at=None, next_attempt_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount:
+                logger.warning(f"Released {result.rowcount} stale AI job item claims")
+            return result.rowcount
+        finally:
+            session.close()
+
+
+_limiter: Optional[TenantRateLimiter] = None
+_service: Optional[AIJobService] = None
+_runner: Optional[AIJobRunner] = None
+
+
+def get_tenant_rate_limiter() -> TenantRateLimiter:
+    """Get the process-wide AI rate limiter."""
+    global _limiter
+    if _limiter is None:
+        _limiter = TenantRateLimiter()
+    return _limiter
+
+
+def get_ai_job_service() -> AIJobService:
+    """Get the process-wide AI job service."""
+    global _service
+    if _service is None:
+        _service = AIJobService()
+    return _service
+
+
+def get_ai_job_runner() -> AIJobRunner:
+    """
+    Get the process-wide AI job runner.
+
+    Returns:
+        The AIJobRunner, configured from the AI_JOB_* environment variables
+    """
+    global _runner
+    if _runner is None:
+        _runner = AIJobRunner()
+    return _runner
+
+
+async def start_ai_job_runner() -> None:
+    """Start the process-wide AI job runner (application startup handler)."""
+    await get_ai_job_runner().start()
+
+
+async def stop_ai_job_runner() -> None:
+    """Stop the process-wide AI job runner (application shutdown handler)."""
+    if _runner is not None:
+        await _runner.stop()
@@ -0,0 +1,355 @@
+"""
+Authenticated principal caching and token revocation for PyCommerce.
+
+Verifying an access token used to mean decoding the JWT and then looking
+the user up on every request. This module provides:
+
+- Principal: the identity a request runs as, built either from claims
+  embedded in the token (role, tenant, active flag and a claims version) or
+  from the user record
+- PrincipalCache: a short-TTL LRU of verified users keyed by
+  (user_id, token iat), invalidated when a user changes
+- RevocationList: revoked token ids and per-user "not before" times, plus
+  the per-user claims version. They are stored in the database, so a
+  logout, deactivation or role change in one worker applies in all of them.
+  Token ids are kept as 64-bit digests, so each revocation costs a few
+  dozen bytes whatever the token size.
+
+Claims in a token are trusted only while the user's claims version is the
+one embedded in the token. Any change to the user bumps the version, so
+the next request falls back to a user lookup. Deleting or deactivating a
+user, or changing their password, also revokes the tokens issued before it.
+
+Each process checks tokens against an in-memory copy of the revocation
+state, so the common path makes no database query. Changes made in the
+same process apply at once. The copy reloads unexpired revocations and the
+user versions changed since the last load every REVOCATION_REFRESH_SECONDS,
+so a change made in another worker applies there within that time.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, exists, false, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from pycommerce.core.db import get_session
+from pycommerce.models.auth_revocation import RevokedToken, UserClaimsVersion
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Seconds a verified user is served from the principal cache
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+# Verified users held per UserManager
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", "10000"))
+
+# Seconds before another worker's revocations apply in this process
+# (0 checks the database on every request)
+REVOCATION_REFRESH_SECONDS = float(os.environ.get("REVOCATION_REFRESH_SECONDS", "5"))
+
+# User versions changed this long before the last one seen are read again,
+# so rows committed late or stamped by a skewed clock are not missed
+_REVOCATION_REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated identity of a request."""
+    user_id: str
+    role: str
+    tenant_id: Optional[str] = None
+    is_active: bool = True
+    version: int = 0
+    issued_at: int = 0
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["Principal"]:
+        """Build a principal from embedded token claims, or None if the token has none."""
+        if "role" not in payload or "ver" not in payload:
+            return None
+        return cls(
+            user_id=str(payload["sub"]),
+            role=str(payload["role"]),
+            tenant_id=payload.get("tenant"),
+            is_active=bool(payload.get("active", True)),
+            version=int(payload["ver"]),
+            issued_at=int(payload.get("iat") or 0),
+        )
+
+    @classmethod
+    def from_user(cls, user: Any, version: int = 0, issued_at: int = 0) -> "Principal":
+        """Build a principal from a user record."""
+        tenant_id = (getattr(user, "metadata", None) or {}).get("tenant_id")
+        return cls(
+            user_id=str(user.id),
+            role=getattr(user.role, "value", user.role),
+            tenant_id=str(tenant_id) if tenant_id else None,
+            is_active=bool(user.is_active),
+            version=version,
+            issued_at=issued_at,
+        )
+
+
+def token_digest(token_id: str) -> int:
+    """Get the signed 64-bit digest a token id is stored as."""
+    return int.from_bytes(hashlib.blake2b(token_id.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class RevocationList:
+    """Revoked tokens, per-user revocation times and claims versions, shared through the database."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        clock=time.time,
+        ttl: float = REVOCATION_REFRESH_SECONDS,
+        monotonic=time.monotonic,
+    ):
+        self._session_factory = session_factory or get_session
+        self._clock = clock
+        self.ttl = ttl
+        self._monotonic = monotonic
+        # In-process copy of the shared state: revoked token digests and each
+        # changed user's (version, not_before, not_before_version)
+        self._revoked: Dict[int, int] = {}
+        self._users: Dict[str, Tuple[int, Optional[int], Optional[int]]] = {}
+        self._users_since: Optional[datetime] = None
+        # None until the first load
+        self._refresh_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def revoke_token(self, token_id: str, expires_at: int) -> None:
+        """
+        Revoke one token.
+
+        Args:
+            token_id: The token's jti claim
+            expires_at: The token's exp claim; the entry is dropped after it
+        """
+        digest = token_digest(token_id)
+        with self._session_factory() as session:
+            # Expired revocations can go; their tokens no longer verify anyway
+            session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(self._clock())))
+            try:
+                with session.begin_nested():
+                    session.execute(insert(RevokedToken).values(token_digest=digest, expires_at=int(expires_at)))
+            except IntegrityError:
+                # Already revoked
+                pass
+            session.commit()
+        with self._lock:
+            self._revoked[digest] = int(expires_at)
+
+    def revoke_user(self, user_id: str) -> int:
+        """Revoke every token issued to a user so far, returning the new claims version."""
+        table = UserClaimsVersion.__table__
+        return self._bump(str(user_id), {
+            "not_before": int(self._clock()),
+            "not_before_version": table.c.version + 1,
+        })
+
+    def bump_version(self, user_id: str) -> int:
+        """Mark the claims in a user's existing tokens as stale, returning the new version."""
+        return self._bump(str(user_id), {})
+
+    def _bump(self, user_id: str, values: Dict[str, Any]) -> int:
+        table = UserClaimsVersion.__table__
+        bump = update(table).where(table.c.user_id == user_id).values(
+            version=table.c.version + 1, updated_at=datetime.utcnow(), **values
+        )
+        with self._session_factory() as session:
+            if not session.execute(bump).rowcount:
+                first = {key: (1 if key == "not_before_version" else value) for key, value in values.items()}
+                try:
+                    with session.begin_nested():
+                        session.execute(insert(table).values(
+                            user_id=user_id, version=1, updated_at=datetime.utcnow(), **first
+                        ))
+                except IntegrityError:
+                    # Another worker created the user's row first
+                    session.execute(bump)
+            row = session.execute(
+                select(table.c.version, table.c.not_before, table.c.not_before_version)
+                .where(table.c.user_id == user_id)
+            ).one()
+            session.commit()
+        with self._lock:
+            self._users[user_id] = tuple(row)
+        return row.version
+
+    def check(self, payload: Dict[str, Any]) -> Optional[int]:
+        """
+        Check a decoded token against the shared revocation state.
+
+        Args:
+            payload: The token's claims
+
+        Returns:
+            The user's current claims version, or None if the token is revoked
+
+        Raises:
+            SQLAlchemyError: If the state has never been loaded and the database is unreachable
+        """
+        user_id = str(payload.get("sub"))
+        token_id = payload.get("jti")
+
+        if self.ttl <= 0:
+            version, not_before, not_before_version, is_revoked = self._query(user_id, token_id)
+        else:
+            self._refresh_if_due()
+            version, not_before, not_before_version = self._users.get(user_id, (0, None, None))
+            is_revoked = (
+                token_id is not None
+                and self._revoked.get(token_digest(str(token_id)), 0) > int(self._clock())
+            )
+
+        if is_revoked:
+            return None
+        if not_before is not None:
+            # The claims version orders tokens issued within the same second
+            if "ver" in payload:
+                if int(payload["ver"]) < (not_before_version or 0):
+                    return None
+            elif int(payload.get("iat") or 0) < not_before:
+                return None
+        return version or 0
+
+    def _query(self, user_id: str, token_id: Optional[str]) -> Tuple[Any, Any, Any, bool]:
+        """Read one token's and its user's revocation state from the database."""
+        users = UserClaimsVersion.__table__
+
+        def user_column(column):
+            return select(column).where(users.c.user_id == user_id).scalar_subquery()
+
+        # One round trip for both the token and its user
+        query = select(
+            user_column(users.c.version),
+            user_column(users.c.not_before),
+            user_column(users.c.not_before_version),
+            exists().where(RevokedToken.token_digest == token_digest(str(token_id))) if token_id else false(),
+        )
+        with self._session_factory() as session:
+            return tuple(session.execute(query).one())
+
+    def _refresh_if_due(self) -> None:
+        if self._refresh_at is not None and self._monotonic() < self._refresh_at:
+            return
+        with self._lock:
+            if self._refresh_at is not None and self._monotonic() < self._refresh_at:
+                return
+            try:
+                self._load()
+            except Exception as e:
+                if self._refresh_at is None:
+                    raise
+                logger.warning(f"Could not refresh token revocations, keeping the last copy: {str(e)}")
+            # After a failure too, so an unreachable database is retried once per interval
+            self._refresh_at = self._monotonic() + self.ttl
+
+    def _load(self) -> None:
+        """Reload unexpired revocations and the user versions changed since the last load."""
+        users = UserClaimsVersion.__table__
+        query = select(
+            users.c.user_id, users.c.version, users.c.not_before, users.c.not_before_version, users.c.updated_at
+        )
+        if self._users_since is not None:
+            query = query.where(users.c.updated_at >= self._users_since - _REVOCATION_REFRESH_OVERLAP)
+        with self._session_factory() as session:
+            rows = session.execute(query).all()
+            revoked = dict(session.execute(
+                select(RevokedToken.token_digest, RevokedToken.expires_at)
+                .where(RevokedToken.expires_at > int(self._clock()))
+            ).all())
+
+        for row in rows:
+            self._users[row.user_id] = (row.version, row.not_before, row.not_before_version)
+            if row.updated_at is not None and (self._users_since is None or row.updated_at > self._users_since):
+                self._users_since = row.updated_at
+        self._revoked = revoked
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Check whether a decoded token has been revoked."""
+        return self.check(payload) is None
+
+    def version(self, user_id: str) -> int:
+        """Get a user's current claims version."""
+        with self._session_factory() as session:
+            version = session.execute(
+                select(UserClaimsVersion.version).where(UserClaimsVersion.user_id == str(user_id))
+            ).scalar()
+        return version or 0
+
+    def __len__(self) -> int:
+        with self._session_factory() as session:
+            return session.execute(
+                select(func.count()).select_from(RevokedToken).where(RevokedToken.expires_at > int(self._clock()))
+            ).scalar()
+
+
+class PrincipalCache:
+    """Short-TTL LRU of verified users keyed by (user_id, token iat)."""
+
+    def __init__(self, size: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.size = max(1, size)
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, issued_at: int, version: int) -> Optional[Any]:
+        """Get the cached user for a token, if cached at the given claims version."""
+        if self.ttl <= 0:
+            return None
+        key = (str(user_id), int(issued_at))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != version or entry[2] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_id: str, issued_at: int, version: int, user: Any) -> None:
+        """Cache the user a token verified as."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[(str(user_id), int(issued_at))] = (user, version, self._clock() + self.ttl)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop cached entries for a user, or all entries."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == str(user_id)]:
+                del self._entries[key]
+
+
+_revocations: Optional[RevocationList] = None
+_revocations_lock = threading.Lock()
+
+
+def get_revocation_list() -> RevocationList:
+    """Get the revocation list backed by the application database."""
+    global _revocations
+    if _revocations is None:
+        with _revocations_lock:
+            if _revocations is None:
+                _revocations = RevocationList()
+    return _revocations
@@ -0,0 +1,752 @@
+"""
+Shared cart storage for PyCommerce.
+
+CartManager keeps carts in a CartRepository instead of a per-process dict,
+so a shopper's cart is visible to every worker process and survives
+restarts and deploys.
+
+Repositories:
+- MemoryCartRepository: carts in this process only (CART_STORE=memory)
+- SQLCartRepository: carts in the carts/cart_items tables; a cart and its
+  lines are read with one joined query
+- CachedCartRepository: an LRU tier in front of another repository. Reads
+  are served from the tier for CART_CACHE_TTL_SECONDS; writes update the
+  tier and are written behind in batches, coalesced per cart line, by a
+  background thread every CART_FLUSH_SECONDS. Changes that fail to write
+  stay pending and are retried with backoff, up to CART_FLUSH_MAX_ATTEMPTS.
+
+Carts expire CART_TTL_SECONDS after their last change. Expired carts are
+never returned and are deleted by the purge-abandoned-carts scheduled job
+(see job_runner), or by the same background thread every
+CART_SWEEP_SECONDS when that is set.
+
+Because writes are deferred and other workers cache reads briefly, a change
+made in one worker is visible in another after at most CART_FLUSH_SECONDS
+plus CART_CACHE_TTL_SECONDS. Within that window two workers can change the
+same cart from the same starting state. Quantities added to a line are
+written as increments, so adds made in both workers are all kept. Setting a
+line's quantity, removing a line, clearing the cart and the cart's metadata
+are written as absolute values, and the last write wins.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    and_,
+    bindparam,
+    delete,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.engine import Engine
+
+from pycommerce.core.db import engine
+from pycommerce.core.exceptions import CartError
+from pycommerce.models.cart import Cart, CartItem
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Cart storage backend: "sql" (shared) or "memory" (this process only)
+CART_STORE = os.environ.get("CART_STORE", "sql").lower()
+
+# Seconds after its last change that a cart expires
+CART_TTL_SECONDS = int(os.environ.get("CART_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Carts held in the in-process tier
+CART_CACHE_SIZE = int(os.environ.get("CART_CACHE_SIZE", "10000"))
+
+# Seconds a cart read from the database is served from the in-process tier
+CART_CACHE_TTL_SECONDS = float(os.environ.get("CART_CACHE_TTL_SECONDS", "2"))
+
+# Seconds between write-behind flushes (0 writes each change through)
+CART_FLUSH_SECONDS = float(os.environ.get("CART_FLUSH_SECONDS", "0.5"))
+
+# Changed carts written per transaction; reaching it triggers an early flush
+CART_FLUSH_BATCH_SIZE = int(os.environ.get("CART_FLUSH_BATCH_SIZE", "500"))
+
+# Attempts to write a cart's changes before they are given up
+CART_FLUSH_MAX_ATTEMPTS = int(os.environ.get("CART_FLUSH_MAX_ATTEMPTS", "8"))
+
+# Seconds before the first retry of a failed cart write; doubles per attempt up to the maximum
+CART_FLUSH_RETRY_SECONDS = float(os.environ.get("CART_FLUSH_RETRY_SECONDS", "1"))
+CART_FLUSH_RETRY_MAX_SECONDS = float(os.environ.get("CART_FLUSH_RETRY_MAX_SECONDS", "60"))
+
+# Seconds between sweeps of expired carts in every process (0 leaves it to the scheduled job)
+CART_SWEEP_SECONDS = float(os.environ.get("CART_SWEEP_SECONDS", "0"))
+
+# The carts/cart_items tables are defined by the Flask models in models.py;
+# these mirrors cover the columns the store uses and stay out of Base.metadata.
+cart_metadata = MetaData()
+
+carts_table = Table(
+    "carts",
+    cart_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("tenant_id", String(36)),
+    Column("user_id", String(36), index=True),
+    Column("session_id", String(100)),
+    Column("cart_metadata", JSON),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("expires_at", DateTime, index=True),
+)
+
+cart_items_table = Table(
+    "cart_items",
+    cart_metadata,
+    Column("id", String(36), primary_key=True),
+    Column("cart_id", String(36), nullable=False, index=True),
+    Column("product_id", String(36), nullable=False),
+    Column("quantity", Integer),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+
+def cart_expires_at(cart: Cart, ttl: Optional[float] = None) -> datetime:
+    """Get the time a cart expires if it is not changed again."""
+    return cart.updated_at + timedelta(seconds=CART_TTL_SECONDS if ttl is None else ttl)
+
+
+@dataclass
+class CartChange:
+    """
+    Pending changes to one cart.
+
+    cart is the cart's current state, or None if the cart was deleted.
+    lines holds the product ids whose line was set to its quantity in cart;
+    a product that is no longer in cart.items was removed. increments holds
+    quantities added to other lines, which are added to the stored quantity.
+    """
+    cart_id: UUID
+    cart: Optional[Cart] = None
+    created: bool = False
+    lines: Set[UUID] = field(default_factory=set)
+    increments: Dict[UUID, int] = field(default_factory=dict)
+
+    def merge(self, later: "CartChange") -> None:
+        """Fold a later change to the same cart into this one."""
+        self.cart = later.cart
+        for product_id in later.lines:
+            self.increments.pop(product_id, None)
+        for product_id, quantity in later.increments.items():
+            # A line already being set absolutely is written from cart
+            if product_id not in self.lines:
+                self.increments[product_id] = self.increments.get(product_id, 0) + quantity
+        self.lines |= later.lines
+        if self.cart is None and self.created:
+            # Created and deleted before being written: nothing to do
+            self.lines.clear()
+            self.increments.clear()
+
+
+class CartRepository:
+    """Storage for carts used by CartManager."""
+
+    def get(self, cart_id: UUID) -> Optional[Cart]:
+        """Get an unexpired cart, or None."""
+        raise NotImplementedError
+
+    def get_for_user(self, user_id: UUID) -> Optional[Cart]:
+        """Get a user's most recently changed unexpired cart, or None."""
+        raise NotImplementedError
+
+    def apply(self, changes: List[CartChange]) -> None:
+        """Store created, changed and deleted carts."""
+        raise NotImplementedError
+
+    def add(self, cart: Cart) -> None:
+        """Store a new cart."""
+        self.apply([CartChange(cart.id, cart, created=True)])
+
+    def save(self, cart: Cart, lines: Iterable[UUID] = ()) -> None:
+        """Store a changed cart and the lines that changed."""
+        self.apply([CartChange(cart.id, cart, lines=set(lines))])
+
+    def increment(self, cart: Cart, product_id: UUID, quantity: int) -> None:
+        """Store a changed cart whose line for product_id grew by quantity."""
+        self.apply([CartChange(cart.id, cart, increments={product_id: quantity})])
+
+    def delete(self, cart_id: UUID) -> None:
+        """Delete a cart."""
+        self.apply([CartChange(cart_id)])
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete expired carts and return how many were deleted."""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Write pending changes (a no-op for repositories that write directly)."""
+
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
+
+
+class MemoryCartRepository(CartRepository):
+    """Carts held in this process."""
+
+    def __init__(self, ttl: float = CART_TTL_SECONDS):
+        self.ttl = ttl
+        self._carts: Dict[UUID, Cart] = {}
+        self._user_carts: Dict[UUID, UUID] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, cart: Optional[Cart]) -> Optional[Cart]:
+        if cart is None or cart_expires_at(cart, self.ttl) <= datetime.now():
+            return None
+        return cart.model_copy(deep=True)
+
+    def get(self, cart_id: UUID) -> Optional[Cart]:
+        with self._lock:
+            return self._live(self._carts.get(cart_id))
+
+    def get_for_user(self, user_id: UUID) -> Optional[Cart]:
+        with self._lock:
+            cart_id = self._user_carts.get(user_id)
+            return self._live(self._carts.get(cart_id)) if cart_id else None
+
+    def apply(self, changes: List[CartChange]) -> None:
+        with self._lock:
+            for change in changes:
+                previous = self._carts.pop(change.cart_id, None)
+                if previous and previous.user_id and self._user_carts.get(previous.user_id) == change.cart_id:
+                    del self._user_carts[previous.user_id]
+                if change.cart is not None:
+                    self._carts[change.cart_id] = change.cart.model_copy(deep=True)
+                    if change.cart.user_id:
+                        self._user_carts[change.cart.user_id] = change.cart_id
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        with self._lock:
+            expired = [cart_id for cart_id, cart in self._carts.items() if cart_expires_at(cart, self.ttl) <= now]
+        self.apply([CartChange(cart_id) for cart_id in expired])
+        return len(expired)
+
+
+def _to_uuid(value: Optional[str]) -> Optional[UUID]:
+    try:
+        return UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+class SQLCartRepository(CartRepository):
+    """Carts in the carts/cart_items tables."""
+
+    def __init__(self, bind: Optional[Engine] = None, ttl: float = CART_TTL_SECONDS):
+        self.bind = bind or engine
+        self.ttl = ttl
+
+    def _live_clause(self, now: datetime):
+        # Rows written before expires_at existed expire from updated_at
+        return or_(
+            carts_table.c.expires_at > now,
+            and_(
+                carts_table.c.expires_at.is_(None),
+                or_(carts_table.c.updated_at.is_(None), carts_table.c.updated_at > now - timedelta(seconds=self.ttl)),
+            ),
+        )
+
+    def _load(self, where) -> Optional[Cart]:
+        """Load one cart and its lines with a single joined query."""
+        statement = (
+            select(
+                carts_table,
+                cart_items_table.c.product_id.label("item_product_id"),
+                cart_items_table.c.quantity.label("item_quantity"),
+                cart_items_table.c.created_at.label("item_created_at"),
+            )
+            .outerjoin(cart_items_table, cart_items_table.c.cart_id == carts_table.c.id)
+            .where(where, self._live_clause(datetime.now()))
+            .order_by(cart_items_table.c.created_at, cart_items_table.c.id)
+        )
+        with self.bind.connect() as conn:
+            rows = conn.execute(statement).all()
+        if not rows:
+            return None
+
+        first = rows[0]
+        items: Dict[UUID, CartItem] = {}
+        for row in rows:
+            product_id = _to_uuid(row.item_product_id)
+            if not product_id or (row.item_quantity or 0) <= 0:
+                continue
+            if product_id in items:
+                # Two workers adding a new line at once can store it twice
+                items[product_id].quantity += row.item_quantity
+            else:
+                items[product_id] = CartItem(
+                    product_id=product_id,
+                    quantity=row.item_quantity,
+                    added_at=row.item_created_at or datetime.now(),
+                )
+        return Cart(
+            id=UUID(first.id),
+            user_id=_to_uuid(first.user_id),
+            items=list(items.values()),
+            metadata=first.cart_metadata or {},
+            created_at=first.created_at or datetime.now(),
+            updated_at=first.updated_at or datetime.now(),
+        )
+
+    def get(self, cart_id: UUID) -> Optional[Cart]:
+        return self._load(carts_table.c.id == str(cart_id))
+
+    def get_for_user(self, user_id: UUID) -> Optional[Cart]:
+        latest = (
+            select(carts_table.c.id)
+            .where(carts_table.c.user_id == str(user_id), self._live_clause(datetime.now()))
+            .order_by(carts_table.c.updated_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        return self._load(carts_table.c.id == latest)
+
+    def _header(self, cart: Cart) -> Dict:
+        tenant_id = cart.metadata.get("tenant_id")
+        return {
+            "tenant_id": str(tenant_id) if tenant_id else None,
+            "user_id": str(cart.user_id) if cart.user_id else None,
+            "cart_metadata": cart.metadata,
+            "updated_at": cart.updated_at,
+            "expires_at": cart_expires_at(cart, self.ttl),
+        }
+
+    def apply(self, changes: List[CartChange]) -> None:
+        """Write changes in one transaction, with a few statements per batch."""
+        deleted = [str(c.cart_id) for c in changes if c.cart is None and not c.created]
+        created = [c for c in changes if c.cart is not None and c.created]
+        changed = [c for c in changes if c.cart is not None and not c.created]
+
+        # Lines to replace: (cart id, product id) -> quantity (0 removes the line)
+        lines: Dict[Tuple[str, str], Tuple[int, datetime]] = {}
+        # Lines to add to: (cart id, product id) -> (quantity added, time first added)
+        increments: Dict[Tuple[str, str], Tuple[int, datetime]] = {}
+        for change in created + changed:
+            quantities = {item.product_id: item for item in change.cart.items}
+            touched = set(quantities) if change.created else change.lines
+            for product_id in touched:
+                item = quantities.get(product_id)
+                lines[(str(change.cart_id), str(product_id))] = (
+                    (item.quantity, item.added_at) if item else (0, change.cart.updated_at)
+                )
+            if not change.created:
+                for product_id, quantity in change.increments.items():
+                    if product_id not in change.lines:
+                        item = quantities.get(product_id)
+                        increments[(str(change.cart_id), str(product_id))] = (
+                            quantity, item.added_at if item else change.cart.updated_at
+                        )
+
+        with self.bind.begin() as conn:
+            if deleted:
+                conn.execute(delete(cart_items_table).where(cart_items_table.c.cart_id.in_(deleted)))
+                conn.execute(delete(carts_table).where(carts_table.c.id.in_(deleted)))
+            if created:
+                conn.execute(insert(carts_table), [
+                    {"id": str(c.cart_id), "created_at": c.cart.created_at, **self._header(c.cart)} for c in created
+                ])
+            if changed:
+                conn.execute(
+                    update(carts_table).where(carts_table.c.id == bindparam("cart_id")),
+                    [{"cart_id": str(c.cart_id), **self._header(c.cart)} for c in changed],
+                )
+            if lines:
+                new_carts = {str(c.cart_id) for c in created}
+                existing = [key for key in lines if key[0] not in new_carts]
+                if existing:
+                    conn.execute(delete(cart_items_table).where(
+                        tuple_(cart_items_table.c.cart_id, cart_items_table.c.product_id).in_(existing)
+                    ))
+                now = datetime.now()
+                rows = [
+                    {"id": str(uuid4()), "cart_id": cart_id, "product_id": product_id,
+                     "quantity": quantity, "created_at": added_at, "updated_at": now}
+                    for (cart_id, product_id), (quantity, added_at) in lines.items() if quantity > 0
+                ]
+                if rows:
+                    conn.execute(insert(cart_items_table), rows)
+            if increments:
+                self._add_to_lines(conn, increments)
+
+    def _add_to_lines(self, conn, increments: Dict[Tuple[str, str], Tuple[int, datetime]]) -> None:
+        """Add quantities to stored lines, so adds made by other workers are kept."""
+        stored = {
+            tuple(row) for row in conn.execute(
+                select(cart_items_table.c.cart_id, cart_items_table.c.product_id)
+                .where(tuple_(cart_items_table.c.cart_id, cart_items_table.c.product_id).in_(list(increments)))
+            )
+        }
+        now = datetime.now()
+        if stored:
+            conn.execute(
+                update(cart_items_table)
+                .where(
+                    cart_items_table.c.cart_id == bindparam("line_cart_id"),
+                    cart_items_table.c.product_id == bindparam("line_product_id"),
+                )
+                .values(quantity=cart_items_table.c.quantity + bindparam("added"), updated_at=now),
+                [
+                    {"line_cart_id": cart_id, "line_product_id": product_id, "added": quantity}
+                    for (cart_id, product_id), (quantity, _) in increments.items() if (cart_id, product_id) in stored
+                ],
+            )
+        rows = [
+            {"id": str(uuid4()), "cart_id": cart_id, "product_id": product_id,
+             "quantity": quantity, "created_at": added_at, "updated_at": now}
+            for (cart_id, product_id), (quantity, added_at) in increments.items()
+            if (cart_id, product_id) not in stored and quantity > 0
+        ]
+        if rows:
+            conn.execute(insert(cart_items_table), rows)
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        expired = select(carts_table.c.id).where(~self._live_clause(now))
+        with self.bind.begin() as conn:
+            conn.execute(delete(cart_items_table).where(cart_items_table.c.cart_id.in_(expired)))
+            result = conn.execute(delete(carts_table).where(carts_table.c.id.in_(expired)))
+        return result.rowcount or 0
+
+
+class CachedCartRepository(CartRepository):
+    """
+    In-process LRU tier with write-behind in front of another repository.
+
+    Carts with unwritten changes are never evicted and are always served
+    from the tier; other carts are re-read after cache_ttl seconds.
+    """
+
+    def __init__(
+        self,
+        backend: CartRepository,
+        size: int = CART_CACHE_SIZE,
+        cache_ttl: float = CART_CACHE_TTL_SECONDS,
+        flush_interval: float = CART_FLUSH_SECONDS,
+        batch_size: int = CART_FLUSH_BATCH_SIZE,
+        sweep_interval: float = CART_SWEEP_SECONDS,
+        ttl: float = CART_TTL_SECONDS,
+        max_attempts: int = CART_FLUSH_MAX_ATTEMPTS,
+        retry_delay: float = CART_FLUSH_RETRY_SECONDS,
+        max_retry_delay: float = CART_FLUSH_RETRY_MAX_SECONDS,
+    ):
+        """
+        Initialize the tier.
+
+        Args:
+            backend: Repository changes are written to
+            size: Carts held in the tier
+            cache_ttl: Seconds a cart read from the backend is served from the tier
+            flush_interval: Seconds between flushes (0 writes through)
+            batch_size: Carts written per backend call
+            sweep_interval: Seconds between sweeps of expired carts (0 disables sweeping)
+            ttl: Seconds after its last change that a cart expires
+            max_attempts: Attempts to write a cart's changes before giving up
+            retry_delay: Seconds before the first retry of a failed write
+            max_retry_delay: Longest wait between retries
+        """
+        self.backend = backend
+        self.size = max(1, size)
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.sweep_interval = sweep_interval
+        self.ttl = ttl
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._cache: "OrderedDict[UUID, Tuple[Cart, float]]" = OrderedDict()
+        self._user_carts: Dict[UUID, UUID] = {}
+        self._pending: "OrderedDict[UUID, CartChange]" = OrderedDict()
+        self._failures: Dict[UUID, Tuple[int, float]] = {}  # cart id -> (failed attempts, retry time)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_sweep = time.monotonic()
+        self.stats = {"hits": 0, "misses": 0, "flushes": 0, "written": 0, "swept": 0, "retries": 0, "errors": 0}
+
+    def _cached(self, cart_id: Optional[UUID]) -> Optional[Cart]:
+        entry = self._cache.get(cart_id) if cart_id else None
+        if entry is None:
+            return None
+        cart, loaded_at = entry
+        if cart_expires_at(cart, self.ttl) <= datetime.now():
+            self._evict(cart_id)
+            return None
+        if cart_id not in self._pending and time.monotonic() - loaded_at > self.cache_ttl:
+            return None
+        self._cache.move_to_end(cart_id)
+        return cart.model_copy(deep=True)
+
+    def _remember(self, cart: Cart) -> None:
+        self._cache[cart.id] = (cart.model_copy(deep=True), time.monotonic())
+        self._cache.move_to_end(cart.id)
+        if cart.user_id:
+            self._user_carts[cart.user_id] = cart.id
+        # Evict least recently used carts without unwritten changes
+        if len(self._cache) > self.size:
+            for cart_id in list(self._cache):
+                if len(self._cache) <= self.size:
+                    break
+                if cart_id not in self._pending:
+                    self._evict(cart_id)
+
+    def _evict(self, cart_id: UUID) -> None:
+        entry = self._cache.pop(cart_id, None)
+        if entry and entry[0].user_id and self._user_carts.get(entry[0].user_id) == cart_id:
+            del self._user_carts[entry[0].user_id]
+
+    def get(self, cart_id: UUID) -> Optional[Cart]:
+        with self._lock:
+            cart = self._cached(cart_id)
+            if cart is not None or (cart_id in self._pending and self._pending[cart_id].cart is None):
+                self.stats["hits"] += 1
+                return cart
+        self.stats["misses"] += 1
+        cart = self.backend.get(cart_id)
+        with self._lock:
+            if cart_id in self._pending:
+                # Changed while loading; the tier has the newer state
+                return self._cached(cart_id)
+            if cart is not None:
+                self._remember(cart)
+        return cart
+
+    def get_for_user(self, user_id: UUID) -> Optional[Cart]:
+        with self._lock:
+            cart = self._cached(self._user_carts.get(user_id))
+            if cart is not None:
+                self.stats["hits"] += 1
+                return cart
+        self.stats["misses"] += 1
+        cart = self.backend.get_for_user(user_id)
+        if cart is None:
+            return None
+        with self._lock:
+            if cart.id in self._pending:
+                return self._cached(cart.id)
+            self._remember(cart)
+        return cart
+
+    def apply(self, changes: List[CartChange]) -> None:
+        with self._lock:
+            for change in changes:
+                if change.cart is None:
+                    self._evict(change.cart_id)
+                else:
+                    self._remember(change.cart)
+                pending = self._pending.get(change.cart_id)
+                if pending is None:
+                    self._pending[change.cart_id] = CartChange(
+                        change.cart_id, change.cart, change.created, set(change.lines), dict(change.increments)
+                    )
+                else:
+                    pending.merge(change)
+                    if pending.cart is None and pending.created:
+                        del self._pending[change.cart_id]
+            backlog = len(self._pending)
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self.start()
+            if backlog >= self.batch_size:
+                self._wake.set()
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Write pending changes to the backend.
+
+        Changes are written in batches of batch_size carts. If a batch fails,
+        its carts are retried one at a time so one bad cart does not hold
+        back the others. Carts that still fail stay pending and are retried
+        by later flushes, waiting retry_delay seconds and doubling the wait
+        after each failure. After max_attempts failures a cart's changes are
+        given up.
+
+        Args:
+            force: Also write carts that are waiting to be retried
+
+        Returns:
+            Number of carts written
+
+        Raises:
+            CartError: If changes to some carts were given up
+        """
+        written = 0
+        given_up: List[UUID] = []
+        attempted: Set[UUID] = set()
+        with self._flush_lock:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    batch = []
+                    for cart_id in list(self._pending):
+                        if len(batch) >= self.batch_size:
+                            break
+                        if cart_id in attempted or (not force and self._failures.get(cart_id, (0, 0))[1] > now):
+                            continue
+                        batch.append(self._pending.pop(cart_id))
+                        attempted.add(cart_id)
+                if not batch:
+                    break
+                try:
+                    self.backend.apply(batch)
+                    written += len(batch)
+                    with self._lock:
+                        for change in batch:
+                            self._failures.pop(change.cart_id, None)
+                except Exception as e:
+                    logger.warning(f"Cart batch write failed, retrying carts one at a time: {str(e)}")
+                    for change in batch:
+                        try:
+                            self.backend.apply([change])
+                            written += 1
+                            with self._lock:
+                                self._failures.pop(change.cart_id, None)
+                        except Exception as e:
+                            if not self._retry_later(change, e):
+                                given_up.append(change.cart_id)
+                self.stats["flushes"] += 1
+        self.stats["written"] += written
+        if given_up:
+            raise CartError(
+                f"Gave up writing changes to {len(given_up)} carts after {self.max_attempts} attempts: "
+                + ", ".join(str(cart_id) for cart_id in given_up)
+            )
+        return written
+
+    def _retry_later(self, change: CartChange, error: Exception) -> bool:
+        """Keep a failed change pending with backoff; False if it was given up."""
+        with self._lock:
+            attempts = self._failures.get(change.cart_id, (0, 0))[0] + 1
+            newer = self._pending.pop(change.cart_id, None)
+            if attempts >= self.max_attempts:
+                self._failures.pop(change.cart_id, None)
+                self._evict(change.cart_id)
+                self.stats["errors"] += 1
+                logger.error(f"Dropping changes to cart {change.cart_id} after {attempts} attempts: {str(error)}")
+                return False
+
+            # Changes made since the write started apply on top of the failed ones
+            if newer is not None:
+                change.merge(newer)
+            if change.cart is None and change.created:
+                self._failures.pop(change.cart_id, None)
+                return True
+            self._pending[change.cart_id] = change
+            delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+            self._failures[change.cart_id] = (attempts, time.monotonic() + delay)
+            self.stats["retries"] += 1
+        logger.warning(f"Writing cart {change.cart_id} failed (attempt {attempts}), retrying in {delay:.1f}s: {str(error)}")
+        return True
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        with self._lock:
+            for cart_id, (cart, _) in list(self._cache.items()):
+                if cart_expires_at(cart, self.ttl) <= now and cart_id not in self._pending:
+                    self._evict(cart_id)
+        swept = self.backend.purge_expired(now)
+        self.stats["swept"] += swept
+        return swept
+
+    def start(self) -> None:
+        """Start the background flush/sweep thread; a no-op if it is running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="cart-store", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = self.flush_interval if self.flush_interval > 0 else self.sweep_interval
+        while not self._stopping.is_set():
+            self._wake.wait(interval if interval > 0 else None)
+            self._wake.clear()
+            try:
+                self.flush()
+                if self.sweep_interval > 0 and time.monotonic() - self._last_sweep >= self.sweep_interval:
+                    self._last_sweep = time.monotonic()
+                    swept = self.purge_expired()
+                    if swept:
+                        logger.info(f"Deleted {swept} expired carts")
+            except Exception as e:
+                logger.error(f"Error in cart store background thread: {str(e)}")
+
+    def close(self) -> None:
+        """Stop the background thread and write pending changes."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        try:
+            self.flush(force=True)
+        except CartError as e:
+            logger.error(str(e))
+        if self._pending:
+            logger.error(f"Unwritten changes to {len(self._pending)} carts are lost on shutdown")
+        self.backend.close()
+
+
+_repository: Optional[CartRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_cart_repository() -> CartRepository:
+    """
+    Get the process-wide cart repository.
+
+    Returns:
+        The repository configured by the CART_* environment variables
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                if CART_STORE == "memory":
+                    _repository = MemoryCartRepository()
+                else:
+                    _repository = CachedCartRepository(SQLCartRepository())
+    return _repository
+
+
+async def start_cart_store() -> None:
+    """Start writing cart changes behind and sweeping expired carts (application startup handler)."""
+    repository = get_cart_repository()
+    if isinstance(repository, CachedCartRepository):
+        repository.start()
+
+
+async def stop_cart_store() -> None:
+    """Write pending cart changes (application shutdown handler)."""
+    if _repository is not None:
+        # Joining the background thread and the final flush block
+        await asyncio.to_thread(_repository.close)
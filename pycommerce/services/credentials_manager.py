@@ -9,7 +9,9 @@ import os
 import json
 import logging
 import base64
-from typing import Dict, Any, Optional, Union
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -19,18 +21,54 @@ from pycommerce.services.settings_service import SettingsService, SystemSetting,
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Seconds decrypted credentials stay cached; saves in this process invalidate
+# immediately, the TTL bounds staleness for saves made by other workers
+CREDENTIALS_CACHE_TTL = float(os.environ.get("CREDENTIALS_CACHE_TTL", "300"))
+
+# Providers preloaded at startup
+DEFAULT_PRELOAD_PROVIDERS = ("stripe", "paypal")
+
+
+class _CachedCredentials:
+    """Decrypted credentials held by the cache; repr never shows the values."""
+    
+    __slots__ = ("values", "expires_at")
+    
+    def __init__(self, values: Dict[str, Any], expires_at: float):
+        self.values = values
+        self.expires_at = expires_at
+    
+    def __repr__(self) -> str:
+        return f"<_CachedCredentials fields={sorted(self.values)}>"
+
+
 class CredentialsManager:
     """
     Manages secure storage and retrieval of credentials.
     
     This class handles encryption, decryption, and storage of sensitive credentials
     such as API keys for payment providers, using Fernet symmetric encryption.
+    
+    Decrypted credentials are cached in memory per (provider, tenant) for
+    CREDENTIALS_CACHE_TTL seconds so the payment path does no database reads
+    or decryption; store_credentials() invalidates the affected entries.
+    Only provider names and counts are ever logged or reported.
     """
     
-    def __init__(self):
-        """Initialize the credentials manager."""
+    def __init__(self, cache_ttl: Optional[float] = None):
+        """
+        Initialize the credentials manager.
+        
+        Args:
+            cache_ttl: Seconds to cache decrypted credentials (0 disables the cache)
+        """
         self._encryption_key = self._get_or_create_encryption_key()
         self._fernet = Fernet(self._encryption_key)
+        self._cache_ttl = CREDENTIALS_CACHE_TTL if cache_ttl is None else cache_ttl
+        self._cache: Dict[Tuple[str, Optional[str]], _CachedCredentials] = {}
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
     
     def _get_or_create_encryption_key(self) -> bytes:
         """
@@ -178,6 +216,9 @@ class CredentialsManager:
                 session.commit()
                 session.close()
                 
+                # Tenant lookups fall back to global credentials, so a global
+                # change invalidates every tenant's entry for the provider
+                self.invalidate(provider, tenant_id, all_tenants=not tenant_id)
                 return True
             except Exception as e:
                 logger.error(f"Error storing credentials in database: {str(e)}")
@@ -186,7 +227,40 @@ class CredentialsManager:
         except Exception as e:
             logger.error(f"Error storing credentials for {provider}: {str(e)}")
             return False
-    
+
+    def delete_credentials(self, provider: str, tenant_id: Optional[str] = None) -> bool:
+        """
+        Delete stored credentials for a provider.
+
+        Tenant lookups fall back to the global credentials afterwards.
+
+        Args:
+            provider: The provider identifier (e.g., 'stripe', 'paypal')
+            tenant_id: Optional tenant ID for tenant-specific credentials
+
+        Returns:
+            True if credentials were deleted, False otherwise
+        """
+        settings_key = f"credentials.{provider}"
+        if tenant_id:
+            settings_key = f"tenant.{tenant_id}.{settings_key}"
+
+        try:
+            session = db_session()
+            try:
+                count = session.query(SystemSetting).filter(
+                    SystemSetting.key == settings_key
+                ).delete(synchronize_session=False)
+                session.commit()
+            finally:
+                session.close()
+        except Exception as e:
+            logger.error(f"Error deleting credentials for {provider}: {str(e)}")
+            return False
+
+        self.invalidate(provider, tenant_id, all_tenants=not tenant_id)
+        return count > 0
+
     def get_credentials(self, provider: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Retrieve and decrypt credentials for a provider.
@@ -198,6 +272,27 @@ class CredentialsManager:
         Returns:
             The decrypted credentials
         """
+        cache_key = (provider, str(tenant_id) if tenant_id else None)
+        cached = self._cache.get(cache_key)
+        if cached is not None and cached.expires_at > time.monotonic():
+            self._cache_hits += 1
+            return dict(cached.values)
+        self._cache_misses += 1
+        
+        credentials = self._load_credentials(provider, tenant_id)
+        if credentials is not None:
+            self._cache_put(cache_key, credentials)
+            return dict(credentials)
+        return {}
+    
+    def _load_credentials(self, provider: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read and decrypt credentials from the database.
+        
+        Returns:
+            The decrypted credentials (empty if none are stored), or None if
+            the lookup failed and the result should not be cached
+        """
         try:
             # Create key for the settings
             settings_key = f"credentials.{provider}"
@@ -228,24 +323,122 @@ class CredentialsManager:
                 session.close()
             except Exception as e:
                 logger.error(f"Error retrieving credentials from database: {str(e)}")
-                return {}
+                return None
             
             if not encrypted_credentials:
                 return {}
             
-            # Decrypt sensitive fields
-            decrypted_credentials = {}
-            for key, value in encrypted_credentials.items():
-                if self._is_sensitive_field(key) and value:
-                    decrypted_credentials[key] = self.decrypt(str(value))
-                else:
-                    decrypted_credentials[key] = value
-            
-            return decrypted_credentials
+            return self._decrypt_credentials(encrypted_credentials)
         
         except Exception as e:
             logger.error(f"Error retrieving credentials for {provider}: {str(e)}")
-            return {}
+            return None
+    
+    def _decrypt_credentials(self, encrypted_credentials: Dict[str, Any]) -> Dict[str, Any]:
+        """Decrypt the sensitive fields of stored credentials."""
+        decrypted_credentials = {}
+        for key, value in encrypted_credentials.items():
+            if self._is_sensitive_field(key) and value:
+                decrypted_credentials[key] = self.decrypt(str(value))
+            else:
+                decrypted_credentials[key] = value
+        return decrypted_credentials
+    
+    def _cache_put(self, cache_key: Tuple[str, Optional[str]], credentials: Dict[str, Any]) -> None:
+        if self._cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            self._cache[cache_key] = _CachedCredentials(
+                dict(credentials), time.monotonic() + self._cache_ttl
+            )
+    
+    def invalidate(self, provider: Optional[str] = None, tenant_id: Optional[str] = None, all_tenants: bool = False) -> None:
+        """
+        Drop cached credentials.
+        
+        Args:
+            provider: Provider to drop, or None for every provider
+            tenant_id: Tenant to drop (None for the global entry)
+            all_tenants: Drop the provider's entries for every tenant
+        """
+        tenant_key = str(tenant_id) if tenant_id else None
+        with self._cache_lock:
+            for key in list(self._cache):
+                if provider is not None and key[0] != provider:
+                    continue
+                if provider is not None and not all_tenants and key[1] != tenant_key:
+                    continue
+                del self._cache[key]
+    
+    def preload(self, tenant_ids: Iterable[Optional[str]], providers: Iterable[str] = DEFAULT_PRELOAD_PROVIDERS) -> int:
+        """
+        Load and decrypt credentials for many tenants with one query.
+        
+        Meant for startup, so the first payment requests find their
+        credentials cached. Tenant entries without their own credentials
+        cache the global ones, matching get_credentials().
+        
+        Args:
+            tenant_ids: Tenants to preload (None for global credentials)
+            providers: Providers to preload
+            
+        Returns:
+            The number of cache entries written
+        """
+        providers = list(providers)
+        tenant_keys: List[Optional[str]] = [None] + [str(t) for t in tenant_ids if t]
+        setting_keys = {}
+        for tenant_key in tenant_keys:
+            for provider in providers:
+                settings_key = f"credentials.{provider}"
+                if tenant_key:
+                    settings_key = f"tenant.{tenant_key}.{settings_key}"
+                setting_keys[settings_key] = (provider, tenant_key)
+        
+        try:
+            session = db_session()
+            try:
+                rows = session.query(SystemSetting.key, SystemSetting.value).filter(
+                    SystemSetting.key.in_(list(setting_keys))
+                ).all()
+            finally:
+                session.close()
+        except Exception as e:
+            logger.error(f"Error preloading credentials: {str(e)}")
+            return 0
+        
+        stored = {}
+        for key, value in rows:
+            if value:
+                try:
+                    stored[setting_keys[key]] = self._decrypt_credentials(json.loads(value))
+                except ValueError:
+                    logger.error(f"Invalid stored credentials for {setting_keys[key][0]}")
+        
+        count = 0
+        for tenant_key in tenant_keys:
+            for provider in providers:
+                credentials = stored.get((provider, tenant_key))
+                if credentials is None:
+                    credentials = stored.get((provider, None), {})
+                self._cache_put((provider, tenant_key), credentials)
+                count += 1
+        
+        logger.info(f"Preloaded credentials for {len(tenant_keys)} tenants and providers {', '.join(providers)}")
+        return count
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics, safe to expose in metrics.
+        
+        Returns:
+            Dictionary with entries, hits and misses
+        """
+        return {
+            "entries": len(self._cache),
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+        }
     
     def validate_credentials(self, provider: str, credentials: Dict[str, Any]) -> bool:
         """
@@ -312,4 +505,22 @@ class CredentialsManager:
 
 
 # Global instance
-credentials_manager = CredentialsManager()
\ No newline at end of file
+credentials_manager = CredentialsManager()
+
+
+def preload_credentials() -> int:
+    """
+    Preload payment credentials for all active tenants into the cache.
+    
+    Registered as an application startup handler.
+    
+    Returns:
+        The number of cache entries written
+    """
+    try:
+        from pycommerce.models.tenant import TenantManager
+        tenant_ids = [tenant.id for tenant in TenantManager().list() if tenant.active]
+    except Exception as e:
+        logger.error(f"Error listing tenants for credential preload: {str(e)}")
+        tenant_ids = []
+    return credentials_manager.preload(tenant_ids)
\ No newline at end of file
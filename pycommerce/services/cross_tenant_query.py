@@ -0,0 +1,270 @@
+"""
+Cross-tenant query service for PyCommerce.
+
+The admin "All Stores" views list products, orders, returns and categories
+across every tenant. Rather than looping over tenants and running the
+per-tenant query for each, this module builds one filtered statement joined
+to the tenants table (for the store name and slug) and runs it paginated or
+streamed in batches.
+
+If CROSS_TENANT_SHARD_URLS lists database URLs (tenant shards), the same
+statement runs on every shard in parallel and the results are merged in
+sort order. Without it, queries run on the primary database.
+"""
+import heapq
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import String, cast, create_engine, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import Select
+
+from pycommerce.core.db import engine
+from pycommerce.models.db_registry import Product, Tenant
+from pycommerce.models.order import Order
+from pycommerce.models.return_request import ReturnRequest
+from pycommerce.services.query_optimizer import order_filter_clauses
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Comma-separated database URLs to fan cross-tenant queries out to
+CROSS_TENANT_SHARD_URLS = [
+    url.strip() for url in os.environ.get("CROSS_TENANT_SHARD_URLS", "").split(",") if url.strip()
+]
+
+# Rows fetched per round trip when streaming
+CROSS_TENANT_BATCH_SIZE = int(os.environ.get("CROSS_TENANT_BATCH_SIZE", "500"))
+
+# Shards queried at once
+CROSS_TENANT_MAX_WORKERS = int(os.environ.get("CROSS_TENANT_MAX_WORKERS", "8"))
+
+_shard_engines: Optional[List[Engine]] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+@dataclass
+class CrossTenantQuery:
+    """
+    An ordered statement over all tenants.
+
+    The statement selects the entity first, followed by 'tenant_name' and
+    'tenant_slug' columns. sort_key must order rows the same way as the
+    statement's ORDER BY; it is used to merge rows from several shards.
+    """
+    statement: Select
+    sort_key: Callable[[Any], Any]
+    descending: bool = False
+
+
+@dataclass
+class CrossTenantPage:
+    """One page of cross-tenant results."""
+    items: List[Any] = field(default_factory=list)
+    total: int = 0
+    page: int = 1
+    per_page: int = 50
+
+    @property
+    def pages(self) -> int:
+        """Number of pages."""
+        return math.ceil(self.total / self.per_page) if self.per_page else 0
+
+
+def get_shard_engines() -> List[Engine]:
+    """Get the engines cross-tenant queries run on."""
+    global _shard_engines
+    if _shard_engines is None:
+        with _lock:
+            if _shard_engines is None:
+                _shard_engines = [
+                    create_engine(url, pool_pre_ping=True) for url in CROSS_TENANT_SHARD_URLS
+                ] or [engine]
+    return _shard_engines
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool used to query shards in parallel."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=CROSS_TENANT_MAX_WORKERS, thread_name_prefix="cross-tenant"
+                )
+    return _executor
+
+
+def _fan_out(fn: Callable[[Session], Any]) -> List[Any]:
+    """Run fn with a session on every shard, in parallel when there are several."""
+    def run(bind: Engine) -> Any:
+        with Session(bind=bind, expire_on_commit=False) as session:
+            return fn(session)
+
+    engines = get_shard_engines()
+    if len(engines) == 1:
+        return [run(engines[0])]
+    return list(_get_executor().map(run, engines))
+
+
+def with_tenant(row: Any) -> Any:
+    """Return the row's entity with tenant_name and tenant_slug attributes set."""
+    entity = row[0]
+    entity.tenant_name = row.tenant_name or ""
+    entity.tenant_slug = row.tenant_slug or ""
+    return entity
+
+
+def paginate(query: CrossTenantQuery, page: int = 1, per_page: int = 50) -> CrossTenantPage:
+    """
+    Get one page of a cross-tenant query.
+
+    Each shard runs a count and the page query. With several shards, each
+    returns its first page * per_page rows and the merged rows are sliced.
+
+    Args:
+        query: The cross-tenant query
+        page: 1-based page number
+        per_page: Rows per page
+
+    Returns:
+        CrossTenantPage whose items are entities with tenant_name/tenant_slug set
+    """
+    page = max(1, int(page or 1))
+    per_page = max(1, int(per_page or 50))
+    offset = (page - 1) * per_page
+    sharded = len(get_shard_engines()) > 1
+    count_statement = select(func.count()).select_from(query.statement.order_by(None).subquery())
+
+    def run(session: Session):
+        total = session.execute(count_statement).scalar() or 0
+        if offset >= total and not sharded:
+            return total, []
+        statement = query.statement.limit(offset + per_page) if sharded else query.statement.offset(offset).limit(per_page)
+        return total, session.execute(statement).all()
+
+    results = _fan_out(run)
+    total = sum(shard_total for shard_total, _ in results)
+    if sharded:
+        merged = heapq.merge(*(rows for _, rows in results), key=query.sort_key, reverse=query.descending)
+        rows = list(islice(merged, offset, offset + per_page))
+    else:
+        rows = results[0][1]
+    return CrossTenantPage(items=[with_tenant(row) for row in rows], total=total, page=page, per_page=per_page)
+
+
+def stream(query: CrossTenantQuery, batch_size: Optional[int] = None) -> Iterator[Any]:
+    """
+    Stream every row of a cross-tenant query.
+
+    Rows are fetched in batches, so memory stays bounded by the batch size.
+    Rows from several shards are merged in sort order.
+
+    Args:
+        query: The cross-tenant query
+        batch_size: Rows per round trip (defaults to CROSS_TENANT_BATCH_SIZE)
+
+    Yields:
+        Entities with tenant_name/tenant_slug set
+    """
+    batch_size = batch_size or CROSS_TENANT_BATCH_SIZE
+
+    def shard_rows(bind: Engine) -> Iterator[Any]:
+        with Session(bind=bind, expire_on_commit=False) as session:
+            result = session.execute(query.statement.execution_options(yield_per=batch_size))
+            for row in result:
+                yield row
+
+    engines = get_shard_engines()
+    if len(engines) == 1:
+        rows = shard_rows(engines[0])
+    else:
+        rows = heapq.merge(*(shard_rows(bind) for bind in engines), key=query.sort_key, reverse=query.descending)
+    for row in rows:
+        yield with_tenant(row)
+
+
+def _tenant_columns(statement: Select, tenant_id_column) -> Select:
+    """Add the tenant name and slug to a statement."""
+    return statement.add_columns(
+        Tenant.name.label("tenant_name"), Tenant.slug.label("tenant_slug")
+    ).outerjoin(Tenant, Tenant.id == tenant_id_column)
+
+
+def products_query(filters: Optional[Dict[str, Any]] = None) -> CrossTenantQuery:
+    """
+    Products across all tenants, ordered by store and product name.
+
+    Args:
+        filters: Optional category, min_price, max_price and in_stock filters
+    """
+    statement = _tenant_columns(select(Product), Product.tenant_id)
+    filters = filters or {}
+    if filters.get("category"):
+        # Categories are a JSON list of names
+        statement = statement.where(
+            cast(Product.categories, String).contains(f'"{filters["category"]}"', autoescape=True)
+        )
+    if filters.get("min_price") is not None:
+        statement = statement.where(Product.price >= filters["min_price"])
+    if filters.get("max_price") is not None:
+        statement = statement.where(Product.price <= filters["max_price"])
+    if filters.get("in_stock") is not None:
+        statement = statement.where(Product.stock > 0 if filters["in_stock"] else Product.stock <= 0)
+
+    statement = statement.order_by(func.coalesce(Tenant.name, ""), Product.name, Product.id)
+    return CrossTenantQuery(
+        statement=statement,
+        sort_key=lambda row: (row.tenant_name or "", row[0].name or "", row[0].id),
+    )
+
+
+def orders_query(filters: Optional[Dict[str, Any]] = None) -> CrossTenantQuery:
+    """
+    Orders across all tenants, newest first.
+
+    Args:
+        filters: Optional status, date range, customer email and total filters
+    """
+    statement = _tenant_columns(select(Order), Order.tenant_id).where(
+        *order_filter_clauses(None, filters)
+    ).order_by(Order.created_at.desc(), Order.id.desc())
+    return CrossTenantQuery(
+        statement=statement,
+        sort_key=lambda row: (row[0].created_at or datetime.min, row[0].id),
+        descending=True,
+    )
+
+
+def returns_query(filters: Optional[Dict[str, Any]] = None) -> CrossTenantQuery:
+    """
+    Return requests across all tenants, newest first.
+
+    Args:
+        filters: Optional status, date_from and date_to filters
+    """
+    statement = select(ReturnRequest).join(Order, Order.id == ReturnRequest.order_id)
+    statement = _tenant_columns(statement, Order.tenant_id).options(selectinload(ReturnRequest.items))
+    filters = filters or {}
+    if filters.get("status"):
+        statement = statement.where(ReturnRequest.status == filters["status"])
+    if filters.get("date_from"):
+        statement = statement.where(ReturnRequest.requested_at >= filters["date_from"])
+    if filters.get("date_to"):
+        statement = statement.where(ReturnRequest.requested_at <= filters["date_to"])
+
+    statement = statement.order_by(ReturnRequest.requested_at.desc(), ReturnRequest.id.desc())
+    return CrossTenantQuery(
+        statement=statement,
+        sort_key=lambda row: (row[0].requested_at or datetime.min, row[0].id),
+        descending=True,
+    )
@@ -66,35 +66,7 @@ def cached_query(
         Decorated function with enhanced caching capability
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            # Create a more detailed cache key
-            key_parts = [func.__name__]
-            
-            # Add serialized arguments
-            for arg in args[1:]:  # Skip self argument
-                if hasattr(arg, 'id'):
-                    # For model instances, use their ID
-                    key_parts.append(f"{arg.__class__.__name__}#{arg.id}")
-                else:
-                    key_parts.append(str(arg))
-            
-            # Add sorted keyword arguments
-            for k, v in sorted(kwargs.items()):
-                if hasattr(v, 'id'):
-                    key_parts.append(f"{k}={v.__class__.__name__}#{v.id}")
-                else:
-                    key_parts.append(f"{k}={v}")
-            
-            cache_key = ":".join(key_parts)
-            
-            # Check if result is in cache and not expired
-            now = datetime.now()
-            if cache_key in _cache:
-                result, expiry = _cache[cache_key]
-                if expiry > now:
-                    return result
-            
+        def run(cache_key, args, kwargs):
             # Execute function and measure time
             start_time = time.time()
             result = func(*args, **kwargs)
@@ -107,7 +79,7 @@ def cached_query(
                     logger.warning(f"Slow query detected: {func.__name__} took {execution_time:.4f}s")
             
             # Cache the result with expiry time
-            _cache[cache_key] = (result, now + timedelta(seconds=timeout))
+            _cache[cache_key] = (result, datetime.now() + timedelta(seconds=timeout))
             
             # Store relationship with invalidation keys
             if auto_invalidate_keys:
@@ -117,10 +89,51 @@ def cached_query(
                     pass
                 
             return result
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = _query_cache_key(func, args, kwargs)
+            
+            # Check if result is in cache and not expired
+            if cache_key in _cache:
+                result, expiry = _cache[cache_key]
+                if expiry > datetime.now():
+                    return result
+            
+            return run(cache_key, args, kwargs)
+
+        def refresh(*args, **kwargs):
+            """Re-run the query and replace its cached result (used by cache warmup jobs)."""
+            return run(_query_cache_key(func, args, kwargs), args, kwargs)
+
+        wrapper.refresh = refresh
         return wrapper
     return decorator
 
 
+def _query_cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Build the cache key of a cached_query call."""
+    # Create a more detailed cache key
+    key_parts = [func.__name__]
+    
+    # Add serialized arguments
+    for arg in args[1:]:  # Skip self argument
+        if hasattr(arg, 'id'):
+            # For model instances, use their ID
+            key_parts.append(f"{arg.__class__.__name__}#{arg.id}")
+        else:
+            key_parts.append(str(arg))
+    
+    # Add sorted keyword arguments
+    for k, v in sorted(kwargs.items()):
+        if hasattr(v, 'id'):
+            key_parts.append(f"{k}={v.__class__.__name__}#{v.id}")
+        else:
+            key_parts.append(f"{k}={v}")
+    
+    return ":".join(key_parts)
+
+
 # ----- Page Builder Optimized Queries -----
 
 @cached_query(timeout=300)  # 5 minutes cache
@@ -7,8 +7,6 @@ retrieving, updating, and converting estimates to orders.
 
 import logging
 import uuid
-import random
-import string
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -16,6 +14,7 @@ from pycommerce.core.db import get_session
 from pycommerce.models.estimate import Estimate, EstimateMaterial, EstimateLabor
 from pycommerce.models.order import Order
 from pycommerce.models.order_item import OrderItem
+from pycommerce.services.number_allocator import ESTIMATE_NUMBERS, get_number_allocator
 
 logger = logging.getLogger(__name__)
 
@@ -28,16 +27,9 @@ class EstimateService:
         from pycommerce.models.order import OrderManager
         self.order_manager = OrderManager()
     
-    def generate_estimate_number(self) -> str:
-        """Generate a unique estimate number."""
-        # Generate a random string of 8 characters
-        chars = string.ascii_uppercase + string.digits
-        random_part = ''.join(random.choice(chars) for _ in range(8))
-        
-        # Add a timestamp prefix to ensure uniqueness
-        timestamp_part = datetime.now().strftime("%y%m%d")
-        
-        return f"EST-{timestamp_part}-{random_part}"
+    def generate_estimate_number(self, tenant_id: Optional[str] = None) -> str:
+        """Generate a unique estimate number from the tenant's estimate sequence."""
+        return get_number_allocator().next_number(ESTIMATE_NUMBERS, tenant_id)
     
     def get_by_id(self, estimate_id: str) -> Optional[Estimate]:
         """
@@ -90,7 +82,7 @@ class EstimateService:
             with get_session() as session:
                 # Generate estimate number if not provided
                 if 'estimate_number' not in data or not data['estimate_number']:
-                    data['estimate_number'] = self.generate_estimate_number()
+                    data['estimate_number'] = self.generate_estimate_number(data.get('tenant_id'))
                 
                 # Extract materials and labor items if present
                 materials_data = data.pop('materials', [])
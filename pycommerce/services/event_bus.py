@@ -0,0 +1,626 @@
+"""
+Order lifecycle event bus for PyCommerce.
+
+State changes record an event in the outbox_events table with
+``record_event``, in the same session and transaction as the change, so an
+event exists if and only if its change was committed. Request handlers only
+pay for one extra INSERT; mail, cache invalidation and any other side
+effects run afterwards on an EventDispatcher.
+
+The dispatcher is a bounded pool of asyncio workers in each application
+process. It claims due events in batches (a claim token makes claims
+exclusive across processes) and hands each subscriber the events of the
+batch it subscribed to in one call, oldest first. Delivery is at least
+once: an event is marked processed only after every subscriber handled it,
+events a subscriber failed on are retried with exponential backoff, and
+events are marked dead after OUTBOX_MAX_ATTEMPTS. Subscribers that
+already handled an event are not called again on retries, but a crash
+between handling and recording it can still repeat a delivery, so
+subscribers must be idempotent.
+
+Committing a session that recorded events wakes the dispatcher in the same
+process; events committed by other processes are picked up by polling.
+
+Subscribers are registered per event type::
+
+    @subscribe("search-index", ORDER_STATUS_CHANGED, ORDER_UPDATED)
+    def reindex_orders(events):
+        ...
+
+Handlers run in a thread, receive a list of Event and may return the
+events that failed; everything else counts as handled.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event as sa_event, update
+from sqlalchemy.orm import Session
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.models.outbox_event import (
+    OutboxEvent, OUTBOX_PENDING, OUTBOX_PROCESSING, OUTBOX_PROCESSED, OUTBOX_DEAD
+)
+
+logger = logging.getLogger(__name__)
+
+# Worker pool size per process (0 leaves dispatching to another process)
+OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", "2"))
+# Events claimed and delivered together
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+# Seconds between scans for retries and events committed by other processes
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.environ.get("OUTBOX_RETRY_BASE_SECONDS", "10"))
+OUTBOX_RETRY_MAX_SECONDS = float(os.environ.get("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+# Claims older than this are assumed to belong to a crashed worker
+OUTBOX_LOCK_SECONDS = float(os.environ.get("OUTBOX_LOCK_SECONDS", "300"))
+# Processed events are deleted after this many days
+OUTBOX_RETENTION_DAYS = float(os.environ.get("OUTBOX_RETENTION_DAYS", "7"))
+
+# Event types
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_UPDATED = "order.updated"
+RETURN_REFUNDED = "return.refunded"
+ORDER_INVENTORY_COMPLETED = "order.inventory_completed"
+INVENTORY_LOW_STOCK = "inventory.low_stock"
+INVENTORY_RESTOCKED = "inventory.restocked"
+
+# Key in Session.info counting events recorded in the current transaction
+_SESSION_KEY = "outbox_events"
+
+
+@dataclass
+class Event:
+    """A claimed outbox event, as passed to subscribers."""
+    id: str
+    type: str
+    aggregate_id: Optional[str]
+    tenant_id: Optional[str]
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: datetime
+    delivered_to: Set[str] = field(default_factory=set)
+
+
+# Called with a batch of events; returns the events it failed on, if any
+EventHandler = Callable[[List[Event]], Optional[Iterable[Event]]]
+
+
+@dataclass
+class Subscriber:
+    """A named handler for a set of event types."""
+    name: str
+    event_types: Set[str]
+    handler: EventHandler
+
+
+_subscribers: Dict[str, Subscriber] = {}
+
+
+def subscribe(name: str, *event_types: str) -> Callable:
+    """
+    Register a subscriber for event types.
+
+    The handler is called as ``handler(events)`` with the events of a batch
+    it subscribed to. It signals retryable failures by returning the events
+    it could not handle, or by raising to fail them all.
+    Registering a name again replaces the previous subscriber.
+
+    Args:
+        name: Subscriber name, recorded on events it has handled
+        event_types: Event types to receive
+
+    Returns:
+        Decorator registering the handler
+    """
+    def decorator(handler: EventHandler) -> EventHandler:
+        _subscribers[name] = Subscriber(name, set(event_types), handler)
+        return handler
+    return decorator
+
+
+def unsubscribe(name: str) -> None:
+    """Remove a subscriber."""
+    _subscribers.pop(name, None)
+
+
+def record_event(
+    session: Session,
+    event_type: str,
+    payload: Dict[str, Any],
+    aggregate_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+) -> OutboxEvent:
+    """
+    Record an event in the session's transaction.
+
+    The event is only stored, and only delivered, if the session commits.
+
+    Args:
+        session: The session making the state change
+        event_type: Event type, e.g. ORDER_STATUS_CHANGED
+        payload: JSON-serialisable event data
+        aggregate_id: The order (or other entity) the event is about
+        tenant_id: The tenant the entity belongs to
+
+    Returns:
+        The pending OutboxEvent
+    """
+    record = OutboxEvent(
+        id=str(uuid.uuid4()),
+        event_type=event_type,
+        aggregate_id=str(aggregate_id) if aggregate_id is not None else None,
+        tenant_id=str(tenant_id) if tenant_id else None,
+        payload=json.dumps(payload, default=str),
+        status=OUTBOX_PENDING,
+        attempts=0,
+        created_at=datetime.utcnow(),
+    )
+    session.add(record)
+    session.info[_SESSION_KEY] = session.info.get(_SESSION_KEY, 0) + 1
+    return record
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop(_SESSION_KEY, 0) and _dispatcher is not None:
+        _dispatcher.notify()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Seconds to wait before retrying an event.
+
+    Args:
+        attempts: Number of attempts made so far
+
+    Returns:
+        Exponential backoff with +/-20% jitter, capped at OUTBOX_RETRY_MAX_SECONDS
+    """
+    delay = min(OUTBOX_RETRY_MAX_SECONDS, OUTBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class EventDispatcher:
+    """Bounded pool of asyncio workers that delivers outbox events to subscribers."""
+
+    def __init__(
+        self,
+        workers: int = OUTBOX_WORKERS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        session_factory: Optional[Callable] = None,
+        subscribers: Optional[Dict[str, Subscriber]] = None,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            workers: Number of workers (0 disables dispatching in this process)
+            batch_size: Events claimed and delivered together
+            poll_interval: Seconds between database scans when not woken
+            max_attempts: Attempts before an event is marked dead
+            session_factory: Session factory to use (defaults to SessionLocal)
+            subscribers: Subscribers to deliver to (defaults to the registered ones)
+        """
+        self.workers = max(0, workers)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory or SessionLocal
+        self._subscribers = _subscribers if subscribers is None else subscribers
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+        self._last_purge = 0.0
+        self.stats = {OUTBOX_PROCESSED: 0, OUTBOX_DEAD: 0, "retried": 0, "batches": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        """Start the workers and the claimer; a no-op if already running."""
+        if self._running or self.workers == 0:
+            return
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._queue = asyncio.Queue(maxsize=self.workers)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._claim_loop()))
+        logger.info(f"Started event dispatcher with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; events claimed but unfinished are released after OUTBOX_LOCK_SECONDS."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._wake = None
+        self._loop = None
+
+    def notify(self) -> None:
+        """Wake the claimer; safe to call from any thread."""
+        loop, wake = self._loop, self._wake
+        if not self._running or loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            # The loop closed while stopping
+            pass
+
+    async def _claim_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._housekeeping)
+                batch = await asyncio.to_thread(self.claim_batch)
+                if batch:
+                    await self._queue.put(batch)
+                    continue
+            except Exception as e:
+                logger.error(f"Error claiming outbox events: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _work(self) -> None:
+        while True:
+            batch = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.deliver, batch)
+            except Exception as e:
+                logger.error(f"Error delivering {len(batch)} outbox events: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _housekeeping(self) -> None:
+        now = time.monotonic()
+        if now - self._last_purge < max(self.poll_interval, 60):
+            return
+        self._last_purge = now
+        self.release_stale()
+        self.purge_processed()
+
+    def dispatch_pending(self, limit: Optional[int] = None) -> int:
+        """
+        Claim and deliver due events in this thread until none are left.
+
+        Used by scripts and tests; does not need the dispatcher to be started.
+
+        Args:
+            limit: Maximum number of events to deliver
+
+        Returns:
+            The number of events delivered (including failed deliveries)
+        """
+        delivered = 0
+        while limit is None or delivered < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - delivered)
+            batch = self.claim_batch(size)
+            if not batch:
+                break
+            self.deliver(batch)
+            delivered += len(batch)
+        return delivered
+
+    def claim_batch(self, limit: Optional[int] = None) -> List[Event]:
+        """
+        Claim due pending events, oldest first.
+
+        Args:
+            limit: Maximum number of events (defaults to the batch size)
+
+        Returns:
+            The claimed events
+        """
+        now = datetime.utcnow()
+        token = str(uuid.uuid4())
+        session = self._session_factory()
+        try:
+            ids = [row.id for row in session.query(OutboxEvent.id).filter(
+                OutboxEvent.status == OUTBOX_PENDING,
+                (OutboxEvent.next_attempt_at.is_(None)) | (OutboxEvent.next_attempt_at <= now)
+            ).order_by(OutboxEvent.created_at, OutboxEvent.id).limit(limit or self.batch_size)]
+            if not ids:
+                return []
+
+            # Conditional update so only one claimer in any process gets each event
+            session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids), OutboxEvent.status == OUTBOX_PENDING)
+                .values(status=OUTBOX_PROCESSING, claim_token=token, locked_at=now,
+                        attempts=OutboxEvent.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+            records = session.query(OutboxEvent).filter(
+                OutboxEvent.claim_token == token
+            ).order_by(OutboxEvent.created_at, OutboxEvent.id).all()
+            return [
+                Event(
+                    id=record.id,
+                    type=record.event_type,
+                    aggregate_id=record.aggregate_id,
+                    tenant_id=record.tenant_id,
+                    payload=json.loads(record.payload),
+                    attempts=record.attempts,
+                    created_at=record.created_at,
+                    delivered_to=set(json.loads(record.delivered_to or "[]")),
+                )
+                for record in records
+            ]
+        finally:
+            session.close()
+
+    def deliver(self, events: List[Event]) -> None:
+        """
+        Deliver claimed events to their subscribers and record the outcome.
+
+        Args:
+            events: Events claimed with claim_batch
+        """
+        errors: Dict[str, str] = {}
+        for subscriber in list(self._subscribers.values()):
+            due = [
+                e for e in events
+                if e.type in subscriber.event_types and subscriber.name not in e.delivered_to
+            ]
+            if not due:
+                continue
+            try:
+                failed = {e.id for e in subscriber.handler(due) or ()}
+                error = f"{subscriber.name}: not handled"
+            except Exception as e:
+                failed = {e.id for e in due}
+                error = f"{subscriber.name}: {str(e) or type(e).__name__}"
+            if failed:
+                logger.warning(f"Subscriber {subscriber.name} failed on {len(failed)} of {len(due)} events: {error}")
+            for event in due:
+                if event.id in failed:
+                    errors[event.id] = f"{errors[event.id]}; {error}" if event.id in errors else error
+                else:
+                    event.delivered_to.add(subscriber.name)
+
+        self.stats["batches"] += 1
+        done = [e.id for e in events if e.id not in errors]
+        if done:
+            self._update(done, status=OUTBOX_PROCESSED, processed_at=datetime.utcnow(),
+                         locked_at=None, claim_token=None, last_error=None)
+            self.stats[OUTBOX_PROCESSED] += len(done)
+        for event in events:
+            if event.id in errors:
+                self._fail(event, errors[event.id])
+
+    def _fail(self, event: Event, error: str) -> None:
+        delivered_to = json.dumps(sorted(event.delivered_to))
+        if event.attempts >= self.max_attempts:
+            logger.error(f"Outbox event {event.type} {event.id} failed {event.attempts} times, giving up: {error}")
+            self._update([event.id], status=OUTBOX_DEAD, locked_at=None, claim_token=None,
+                         delivered_to=delivered_to, last_error=error[:2000])
+            self.stats[OUTBOX_DEAD] += 1
+            return
+
+        delay = retry_delay(event.attempts)
+        self._update(
+            [event.id],
+            status=OUTBOX_PENDING,
+            next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+            locked_at=None,
+            claim_token=None,
+            delivered_to=delivered_to,
+            last_error=error[:2000],
+        )
+        self.stats["retried"] += 1
+
+    def _update(self, event_ids: List[str], **values) -> None:
+        session = self._session_factory()
+        try:
+            session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(event_ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def release_stale(self) -> int:
+        """
+        Return events claimed by crashed workers to pending.
+
+        Returns:
+            The number of events released
+        """
+        session = self._session_factory()
+        try:
+            result = session.execute(
+                update(OutboxEvent)
+                .where(
+                    OutboxEvent.status == OUTBOX_PROCESSING,
+                    OutboxEvent.locked_at < datetime.utcnow() - timedelta(seconds=OUTBOX_LOCK_SECONDS)
+                )
+                .values(status=OUTBOX_PENDING, locked_at=None, claim_token=None, next_attempt_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if result.rowcount:
+                logger.warning(f"Released {result.rowcount} stale outbox event claims")
+            return result.rowcount
+        finally:
+            session.close()
+
+    def purge_processed(self, older_than_days: float = OUTBOX_RETENTION_DAYS) -> int:
+        """
+        Delete processed events.
+
+        Args:
+            older_than_days: Keep events processed more recently than this
+
+        Returns:
+            The number of events deleted
+        """
+        session = self._session_factory()
+        try:
+            deleted = session.query(OutboxEvent).filter(
+                OutboxEvent.status == OUTBOX_PROCESSED,
+                OutboxEvent.processed_at < datetime.utcnow() - timedelta(days=older_than_days)
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        finally:
+            session.close()
+
+
+_dispatcher: Optional[EventDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_event_dispatcher() -> EventDispatcher:
+    """
+    Get the process-wide event dispatcher.
+
+    Returns:
+        The EventDispatcher, configured from the OUTBOX_* environment variables
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = EventDispatcher()
+    return _dispatcher
+
+
+async def start_event_dispatcher() -> None:
+    """Start the process-wide event dispatcher (application startup handler)."""
+    await get_event_dispatcher().start()
+
+
+async def stop_event_dispatcher() -> None:
+    """Stop the process-wide event dispatcher (application shutdown handler)."""
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+
+
+# ----- Subscribers -----
+
+@subscribe("order-cache", ORDER_STATUS_CHANGED, ORDER_UPDATED, RETURN_REFUNDED, ORDER_INVENTORY_COMPLETED)
+def _invalidate_order_caches(events: List[Event]) -> None:
+    from pycommerce.services.query_optimizer import invalidate_order_cache, invalidate_tenant_orders_cache
+
+    for order_id in {e.payload.get("order_id") for e in events} - {None}:
+        invalidate_order_cache(order_id)
+    for tenant_id in {e.tenant_id for e in events} - {None}:
+        invalidate_tenant_orders_cache(tenant_id)
+
+
+def _create_shipment_for_order(shipment_manager, order):
+    """Create a shipment holding all of an order's items."""
+    from pycommerce.services.query_optimizer import get_order_with_items_and_notes
+
+    shipment = shipment_manager.create_shipment(
+        order_id=order.id,
+        shipping_method=getattr(order, "shipping_method", None) or "Standard Shipping",
+        tracking_number=getattr(order, "tracking_number", None),
+        carrier=getattr(order, "shipping_carrier", None) or "Default Carrier",
+    )
+    items = get_order_with_items_and_notes(str(order.id)).get("items", [])
+    if items:
+        shipment_manager.add_items_to_shipment(shipment_id=shipment.id, items=[
+            {
+                "order_item_id": str(item.get("id", item.get("order_item_id"))),
+                "product_id": str(item.get("product_id")),
+                "quantity": item.get("quantity", 1),
+            }
+            for item in items
+        ])
+    return shipment
+
+
+@subscribe("shipping-mail", ORDER_STATUS_CHANGED)
+def _send_shipping_notifications(events: List[Event]) -> List[Event]:
+    shipped = [
+        e for e in events
+        if e.payload.get("status") == "SHIPPED" and e.payload.get("previous_status") != "SHIPPED"
+    ]
+    if not shipped:
+        return []
+
+    from pycommerce.models.order import OrderManager
+    from pycommerce.models.shipment import Shipment, ShipmentManager
+    from pycommerce.models.tenant import TenantManager
+    from pycommerce.services.mail_service import get_email_service, init_email_service
+
+    email_service = get_email_service() or init_email_service()
+    if not email_service.config.enabled:
+        email_service.enable_test_mode()
+
+    order_manager = OrderManager()
+    shipment_manager = ShipmentManager()
+    tenant_manager = TenantManager()
+    failed = []
+    for event in shipped:
+        order_id = event.payload["order_id"]
+        order = order_manager.get_by_id(order_id)
+        customer_email = getattr(order, "customer_email", None) if order else None
+        if not customer_email:
+            logger.warning(f"No customer email available for order {order_id}, skipping shipping notification")
+            continue
+
+        shipments = shipment_manager.get_shipments_for_order(order_id)
+        if shipments:
+            shipment = shipments[0]
+        else:
+            try:
+                shipment = _create_shipment_for_order(shipment_manager, order)
+            except Exception as e:
+                logger.error(f"Error creating shipment for order {order_id}: {str(e)}")
+                # Still send the email, with the order's own shipping details
+                shipment = Shipment(
+                    id="default",
+                    order_id=order_id,
+                    shipping_method=getattr(order, "shipping_method", None) or "Standard Shipping",
+                    carrier=getattr(order, "shipping_carrier", None) or "Default Carrier",
+                    tracking_number=getattr(order, "tracking_number", None) or "Not available",
+                )
+
+        tenant = tenant_manager.get(event.tenant_id) if event.tenant_id else None
+        sent = email_service.send_shipping_notification(
+            order=order,
+            shipment=shipment,
+            to_email=customer_email,
+            store_name=tenant.name if tenant else "Our Store",
+            store_url=tenant.domain if tenant and tenant.domain else event.payload.get("store_url", ""),
+        )
+        if sent:
+            logger.info(f"Shipping notification email sent to {customer_email}")
+        else:
+            failed.append(event)
+    return failed
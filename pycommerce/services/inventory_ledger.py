@@ -0,0 +1,366 @@
+"""
+Inventory transaction ledger for PyCommerce.
+
+inventory_transactions is append-only: rows are inserted by the inventory
+managers and never updated. Each row carries its change to the record's
+on-hand and reserved quantities, so a record's balance at any time is its
+latest inventory_snapshots row before that time plus the transactions after
+the snapshot. Snapshots are taken by the compact-inventory-ledger job once a
+record has INVENTORY_SNAPSHOT_EVERY transactions after its last snapshot, so
+balances never read more than that many rows.
+
+On PostgreSQL the table is range-partitioned by month on created_at (see
+migrations/add_inventory_ledger_partitions.py). The job creates partitions
+INVENTORY_PARTITION_MONTHS_AHEAD months ahead and, once a month is older than
+INVENTORY_LEDGER_RETENTION_MONTHS, snapshots the records it touched and
+moves its partition out of the hot table into the inventory_archive schema.
+History pages use keyset pagination on (created_at, id), so every page is an
+index range scan of the partitions it covers regardless of its depth.
+"""
+import base64
+import logging
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+
+from pycommerce.core.db import get_session
+from pycommerce.models.inventory import InventorySnapshot, InventoryTransaction
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Transactions after a record's last snapshot that trigger a new one
+INVENTORY_SNAPSHOT_EVERY = int(os.environ.get("INVENTORY_SNAPSHOT_EVERY", "500"))
+# Snapshots only fold in transactions older than this, so rows still being committed are not skipped
+INVENTORY_SNAPSHOT_LAG_SECONDS = int(os.environ.get("INVENTORY_SNAPSHOT_LAG_SECONDS", "300"))
+# Monthly partitions created ahead of time
+INVENTORY_PARTITION_MONTHS_AHEAD = int(os.environ.get("INVENTORY_PARTITION_MONTHS_AHEAD", "3"))
+# Months of transactions kept in the hot table; older partitions are archived
+INVENTORY_LEDGER_RETENTION_MONTHS = int(os.environ.get("INVENTORY_LEDGER_RETENTION_MONTHS", "13"))
+
+LEDGER_TABLE = "inventory_transactions"
+ARCHIVE_SCHEMA = "inventory_archive"
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """The first instant of the month `months` months after the one containing moment."""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def archive_horizon(now: Optional[datetime] = None) -> datetime:
+    """Transactions before this time may have been archived."""
+    return month_start(now or datetime.utcnow(), -INVENTORY_LEDGER_RETENTION_MONTHS)
+
+
+# ----- Reading -----
+
+def encode_cursor(transaction) -> str:
+    """Opaque page cursor pointing after the given transaction."""
+    raw = f"{transaction.created_at.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a page cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, transaction_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), transaction_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def transaction_page(
+    session: Session,
+    inventory_record_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    transaction_type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Get one page of a record's transactions, newest first.
+
+    Args:
+        session: Session to query with
+        inventory_record_id: The inventory record
+        limit: Transactions per page
+        cursor: next_cursor of the previous page, or None for the first page
+        start_date: Optional start date for filtering
+        end_date: Optional end date for filtering
+        transaction_type: Optional transaction type to filter by
+
+    Returns:
+        Dictionary with the page's transactions and the cursor of the next
+        page (None on the last page)
+    """
+    query = session.query(InventoryTransaction).filter(
+        InventoryTransaction.inventory_record_id == inventory_record_id
+    )
+    if start_date:
+        query = query.filter(InventoryTransaction.created_at >= start_date)
+    if end_date:
+        query = query.filter(InventoryTransaction.created_at <= end_date)
+    if transaction_type:
+        query = query.filter(InventoryTransaction.transaction_type == transaction_type)
+    if cursor:
+        created_at, transaction_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            InventoryTransaction.created_at < created_at,
+            and_(InventoryTransaction.created_at == created_at, InventoryTransaction.id < transaction_id),
+        ))
+
+    rows = query.order_by(
+        InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc()
+    ).limit(limit + 1).all()
+    transactions = rows[:limit]
+    return {
+        "transactions": transactions,
+        "next_cursor": encode_cursor(transactions[-1]) if len(rows) > limit else None,
+    }
+
+
+def inventory_balance(
+    session: Session,
+    inventory_record_id: str,
+    as_of: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Compute a record's quantities from the ledger.
+
+    Args:
+        session: Session to query with
+        inventory_record_id: The inventory record
+        as_of: Time of the balance (defaults to now)
+
+    Returns:
+        Dictionary with quantity, reserved_quantity, available_quantity,
+        the snapshot it started from and the transactions read after it
+
+    Raises:
+        ValueError: If as_of is before the archive horizon
+    """
+    if as_of is not None and as_of < archive_horizon():
+        raise ValueError(f"Transactions before {archive_horizon()} may be archived")
+
+    snapshot_query = session.query(InventorySnapshot).filter(
+        InventorySnapshot.inventory_record_id == inventory_record_id
+    )
+    if as_of is not None:
+        snapshot_query = snapshot_query.filter(InventorySnapshot.taken_at <= as_of)
+    snapshot = snapshot_query.order_by(InventorySnapshot.taken_at.desc()).first()
+
+    tail = select(
+        func.coalesce(func.sum(InventoryTransaction.on_hand_change), 0),
+        func.coalesce(func.sum(InventoryTransaction.reserved_change), 0),
+        func.count(),
+    ).where(InventoryTransaction.inventory_record_id == inventory_record_id)
+    if snapshot is not None:
+        tail = tail.where(InventoryTransaction.created_at > snapshot.taken_at)
+    if as_of is not None:
+        tail = tail.where(InventoryTransaction.created_at <= as_of)
+    on_hand_change, reserved_change, count = session.execute(tail).one()
+
+    quantity = (snapshot.quantity if snapshot else 0) + on_hand_change
+    reserved = (snapshot.reserved_quantity if snapshot else 0) + reserved_change
+    return {
+        "inventory_record_id": inventory_record_id,
+        "as_of": as_of,
+        "quantity": quantity,
+        "reserved_quantity": reserved,
+        "available_quantity": quantity - reserved,
+        "snapshot_at": snapshot.taken_at if snapshot else None,
+        "tail_transactions": count,
+    }
+
+
+# ----- Snapshots -----
+
+def take_snapshots(
+    session_factory: Optional[Callable] = None,
+    cutoff: Optional[datetime] = None,
+    min_transactions: int = INVENTORY_SNAPSHOT_EVERY,
+) -> int:
+    """
+    Snapshot records with at least min_transactions transactions after their
+    last snapshot and at or before cutoff.
+
+    Args:
+        session_factory: Session context factory to use (defaults to get_session)
+        cutoff: Time of the new snapshots (defaults to now minus INVENTORY_SNAPSHOT_LAG_SECONDS)
+        min_transactions: Tail length that triggers a snapshot
+
+    Returns:
+        Number of snapshots taken
+    """
+    cutoff = cutoff or datetime.utcnow() - timedelta(seconds=INVENTORY_SNAPSHOT_LAG_SECONDS)
+    tx = InventoryTransaction.__table__
+    snapshots = InventorySnapshot.__table__
+
+    with (session_factory or get_session)() as session:
+        latest = select(
+            snapshots.c.inventory_record_id, func.max(snapshots.c.taken_at).label("taken_at")
+        ).where(snapshots.c.taken_at <= cutoff).group_by(snapshots.c.inventory_record_id).subquery()
+        previous = snapshots.alias("previous")
+        tails = session.execute(
+            select(
+                tx.c.inventory_record_id,
+                func.coalesce(previous.c.quantity, 0),
+                func.coalesce(previous.c.reserved_quantity, 0),
+                func.count(),
+                func.sum(tx.c.on_hand_change),
+                func.sum(tx.c.reserved_change),
+            )
+            .select_from(
+                tx.outerjoin(latest, latest.c.inventory_record_id == tx.c.inventory_record_id)
+                .outerjoin(previous, and_(
+                    previous.c.inventory_record_id == latest.c.inventory_record_id,
+                    previous.c.taken_at == latest.c.taken_at,
+                ))
+            )
+            .where(tx.c.created_at <= cutoff)
+            .where(or_(latest.c.taken_at.is_(None), tx.c.created_at > latest.c.taken_at))
+            .group_by(tx.c.inventory_record_id, previous.c.quantity, previous.c.reserved_quantity)
+            .having(func.count() >= max(1, min_transactions))
+        ).all()
+        if not tails:
+            return 0
+
+        now = datetime.utcnow()
+        new_snapshots = []
+        for record_id, quantity, reserved, count, on_hand_change, reserved_change in tails:
+            new_snapshots.append({
+                "id": str(uuid.uuid4()),
+                "inventory_record_id": record_id,
+                "taken_at": cutoff,
+                "quantity": quantity + (on_hand_change or 0),
+                "reserved_quantity": reserved + (reserved_change or 0),
+                "transaction_count": count,
+                "created_at": now,
+            })
+        session.execute(insert(snapshots), new_snapshots)
+        session.commit()
+
+    logger.info(f"Took {len(new_snapshots)} inventory snapshots at {cutoff}")
+    return len(new_snapshots)
+
+
+# ----- Partitions (PostgreSQL) -----
+
+def _is_partitioned(conn) -> bool:
+    """Whether the ledger table is a partitioned PostgreSQL table."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(text(
+        f"SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('{LEDGER_TABLE}')"
+    )).scalar())
+
+
+def _partitions(conn) -> List[Tuple[str, Optional[datetime]]]:
+    """(name, upper bound) of each attached partition; the default partition has no bound."""
+    rows = conn.execute(text(f"""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('{LEDGER_TABLE}')
+    """)).all()
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND.search(bound or "")
+        partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+    return partitions
+
+
+def ensure_partitions(engine=None, months_ahead: int = INVENTORY_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the monthly partitions up to months_ahead months from now.
+
+    Does nothing unless the ledger is a partitioned PostgreSQL table.
+
+    Returns:
+        Names of the partitions created
+    """
+    from pycommerce.core.db import engine as default_engine
+
+    created = []
+    with (engine or default_engine).connect() as conn:
+        if not _is_partitioned(conn):
+            return created
+        bounds = [upper for _, upper in _partitions(conn) if upper is not None]
+        start = max(bounds + [month_start(datetime.utcnow())])
+        end = month_start(datetime.utcnow(), months_ahead + 1)
+        while start < end:
+            following = month_start(start, 1)
+            name = f"{LEDGER_TABLE}_p{start:%Y%m}"
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {LEDGER_TABLE} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            ))
+            created.append(name)
+            start = following
+        conn.commit()
+
+    if created:
+        logger.info(f"Created inventory ledger partitions {', '.join(created)}")
+    return created
+
+
+def archive_partitions(
+    engine=None,
+    session_factory: Optional[Callable] = None,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Move partitions older than the archive horizon into the archive schema.
+
+    Every record with transactions in a partition is snapshotted at the
+    partition's upper bound first, so balances never need its rows again.
+    Does nothing unless the ledger is a partitioned PostgreSQL table.
+
+    Returns:
+        Names of the partitions archived
+    """
+    from pycommerce.core.db import engine as default_engine
+
+    engine = engine or default_engine
+    horizon = archive_horizon(now)
+    archived = []
+    with engine.connect() as conn:
+        if not _is_partitioned(conn):
+            return archived
+        expired = sorted(
+            (upper, name) for name, upper in _partitions(conn) if upper is not None and upper <= horizon
+        )
+
+    for upper, name in expired:
+        take_snapshots(session_factory, cutoff=upper, min_transactions=1)
+        with engine.connect() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            conn.execute(text(f"ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            conn.commit()
+        archived.append(name)
+        logger.info(f"Archived inventory ledger partition {name} (transactions before {upper})")
+    return archived
+
+
+def compact_ledger() -> Dict[str, Any]:
+    """Create upcoming partitions, snapshot long tails and archive expired partitions."""
+    return {
+        "partitions_created": ensure_partitions(),
+        "snapshots": take_snapshots(),
+        "partitions_archived": archive_partitions(),
+    }
@@ -0,0 +1,624 @@
+"""
+Scheduled maintenance jobs for PyCommerce.
+
+Jobs are plain functions registered with a cron-style schedule::
+
+    @register_job("purge-abandoned-carts", "17 * * * *")
+    def purge_abandoned_carts():
+        return {"deleted": ...}
+
+A JobRunner in each application process checks the scheduled_jobs table
+every JOB_POLL_SECONDS and runs the jobs that are due. Exclusive jobs (the
+default) run in one process only: the runner takes a PostgreSQL advisory
+lock for the job (a lease on the job's row on other databases), re-checks
+that the job is still due and moves its next run forward before releasing
+it. Jobs that fill process-local caches are registered with
+``exclusive=False`` and run in every process.
+
+Every run is recorded in job_runs with its duration, outcome and the JSON
+summary the job returned; ``scripts/debug/run_jobs.py`` lists jobs, shows
+their history and runs them by hand.
+
+Schedules use the five cron fields (minute hour day-of-month month
+day-of-week, in UTC) with ``*``, lists, ranges and ``/`` steps.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.models.scheduled_job import (
+    JobRun, ScheduledJob, JOB_FAILED, JOB_RUNNING, JOB_SUCCEEDED
+)
+
+logger = logging.getLogger(__name__)
+
+# Run scheduled jobs in this process (set to 0 on processes that should not)
+JOBS_ENABLED = os.environ.get("JOBS_ENABLED", "1") not in ("0", "false", "False")
+# Seconds between checks for due jobs
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "30"))
+# Lease length on databases without advisory locks; longer than any job should run
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "900"))
+# Days of run history kept
+JOB_HISTORY_DAYS = float(os.environ.get("JOB_HISTORY_DAYS", "30"))
+
+
+class CronSchedule:
+    """A five-field cron expression, evaluated in UTC."""
+
+    # (low, high) of minute, hour, day of month, month, day of week (0 and 7 = Sunday)
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        """
+        Parse a cron expression.
+
+        Args:
+            expression: e.g. ``*/5 * * * *`` or ``0 3 * * 1-5``
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        # Cron matches either day field when both are restricted
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            spec, _, step = part.partition("/")
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        if high == 7 and 7 in values:
+            values.discard(7)
+            values.add(0)
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7
+        if self._any_day or self._any_weekday:
+            return moment.day in self.days and weekday in self.weekdays
+        return moment.day in self.days or weekday in self.weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Get the first matching minute after a moment.
+
+        Args:
+            moment: A naive UTC datetime
+
+        Returns:
+            The next run time
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+@dataclass
+class Job:
+    """A registered maintenance job."""
+    name: str
+    schedule: CronSchedule
+    handler: Callable[[], Optional[Dict[str, Any]]]
+    exclusive: bool = True
+
+
+_jobs: Dict[str, Job] = {}
+
+
+def register_job(name: str, schedule: str, exclusive: bool = True) -> Callable:
+    """
+    Register a scheduled job.
+
+    The handler takes no arguments, may return a JSON-serialisable summary
+    that is stored with the run, and signals failure by raising. Registering
+    a name again replaces the previous job.
+
+    Args:
+        name: Job name
+        schedule: Cron expression (UTC)
+        exclusive: Run in one process per schedule tick (False runs it in every process)
+
+    Returns:
+        Decorator registering the handler
+    """
+    cron = CronSchedule(schedule)
+
+    def decorator(handler: Callable[[], Optional[Dict[str, Any]]]) -> Callable[[], Optional[Dict[str, Any]]]:
+        _jobs[name] = Job(name, cron, handler, exclusive)
+        return handler
+    return decorator
+
+
+def get_jobs() -> Dict[str, Job]:
+    """Get the registered jobs by name."""
+    return dict(_jobs)
+
+
+def _lock_key(name: str) -> int:
+    """Signed 64-bit advisory lock key for a job."""
+    digest = hashlib.blake2b(f"job:{name}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class JobRunner:
+    """Runs due jobs, one process per job, and records their history."""
+
+    def __init__(
+        self,
+        jobs: Optional[Dict[str, Job]] = None,
+        poll_interval: float = JOB_POLL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        session_factory: Optional[Callable] = None,
+        worker_id: Optional[str] = None,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            jobs: Jobs to run (defaults to the registered ones)
+            poll_interval: Seconds between checks for due jobs
+            lease_seconds: Lease length where advisory locks are unavailable
+            session_factory: Session factory to use (defaults to SessionLocal)
+            worker_id: Name recorded on runs (defaults to host:pid)
+        """
+        self._jobs = _jobs if jobs is None else jobs
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._session_factory = session_factory or SessionLocal
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # Next run of non-exclusive jobs in this process
+        self._local_next: Dict[str, datetime] = {}
+        self._synced = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start checking for due jobs; a no-op if already running."""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Started job runner with {len(self._jobs)} jobs")
+
+    async def stop(self) -> None:
+        """Stop checking for due jobs; a job in progress finishes in its thread."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_due)
+            except Exception as e:
+                logger.error(f"Error running scheduled jobs: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def sync(self) -> None:
+        """Create rows for new jobs and pick up schedule changes."""
+        now = datetime.utcnow()
+        session = self._session_factory()
+        try:
+            rows = {row.name: row for row in session.query(ScheduledJob).filter(
+                ScheduledJob.name.in_(list(self._jobs))
+            )}
+            for name, job in self._jobs.items():
+                row = rows.get(name)
+                if row is None:
+                    session.add(ScheduledJob(
+                        name=name, schedule=job.schedule.expression, enabled=True,
+                        next_run_at=job.schedule.next_after(now),
+                    ))
+                elif row.schedule != job.schedule.expression:
+                    row.schedule = job.schedule.expression
+                    row.next_run_at = job.schedule.next_after(now)
+            session.commit()
+        except IntegrityError:
+            # Another process created the rows first
+            session.rollback()
+        finally:
+            session.close()
+        self._synced = True
+
+    def due_jobs(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Get the names of jobs that are due.
+
+        Args:
+            now: Current UTC time
+
+        Returns:
+            Job names, exclusive jobs first
+        """
+        now = now or datetime.utcnow()
+        session = self._session_factory()
+        try:
+            due = [row.name for row in session.query(ScheduledJob.name).filter(
+                ScheduledJob.name.in_([name for name, job in self._jobs.items() if job.exclusive]),
+                ScheduledJob.enabled.is_(True),
+                ScheduledJob.next_run_at <= now,
+            ).order_by(ScheduledJob.next_run_at)]
+        finally:
+            session.close()
+        for name, job in self._jobs.items():
+            if not job.exclusive:
+                next_run = self._local_next.setdefault(name, now)
+                if next_run <= now:
+                    due.append(name)
+        return due
+
+    def run_due(self) -> Dict[str, str]:
+        """
+        Run every due job.
+
+        Returns:
+            Mapping of job name to outcome for the jobs this process ran
+        """
+        if not self._synced:
+            self.sync()
+        outcomes = {}
+        for name in self.due_jobs():
+            outcome = self.run_job(name)
+            if outcome is not None:
+                outcomes[name] = outcome
+        return outcomes
+
+    def run_job(self, name: str, force: bool = False) -> Optional[str]:
+        """
+        Run a job if it is due and no other process is running it.
+
+        Args:
+            name: Job name
+            force: Run even if the job is not due (still exclusive)
+
+        Returns:
+            JOB_SUCCEEDED or JOB_FAILED, or None if the job was not run
+        """
+        job = self._jobs.get(name)
+        if job is None:
+            raise KeyError(f"Unknown job: {name}")
+        if not job.exclusive:
+            self._local_next[name] = job.schedule.next_after(datetime.utcnow())
+            return self._execute(job)
+        if not self._synced:
+            self.sync()
+
+        session = self._session_factory()
+        try:
+            if session.get_bind().dialect.name == "postgresql":
+                return self._run_with_advisory_lock(session, job, force)
+            return self._run_with_lease(session, job, force)
+        finally:
+            session.close()
+
+    def _run_with_advisory_lock(self, session, job: Job, force: bool) -> Optional[str]:
+        # Session-level lock on a dedicated connection: held until released or the process dies
+        key = _lock_key(job.name)
+        with session.get_bind().connect() as conn:
+            locked = conn.execute(select(func.pg_try_advisory_lock(key))).scalar()
+            conn.commit()
+            if not locked:
+                return None
+            try:
+                if not self._advance(session, job, force):
+                    return None
+                return self._execute(job)
+            finally:
+                conn.execute(select(func.pg_advisory_unlock(key)))
+                conn.commit()
+
+    def _run_with_lease(self, session, job: Job, force: bool) -> Optional[str]:
+        now = datetime.utcnow()
+        conditions = [
+            ScheduledJob.name == job.name,
+            or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+        ]
+        if not force:
+            conditions += [ScheduledJob.enabled.is_(True), ScheduledJob.next_run_at <= now]
+        claimed = session.execute(
+            update(ScheduledJob)
+            .where(*conditions)
+            .values(
+                lease_owner=self.worker_id,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                next_run_at=job.schedule.next_after(now),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        if claimed != 1:
+            return None
+        try:
+            return self._execute(job)
+        finally:
+            session.execute(
+                update(ScheduledJob)
+                .where(ScheduledJob.name == job.name, ScheduledJob.lease_owner == self.worker_id)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+    def _advance(self, session, job: Job, force: bool) -> bool:
+        """Move a due job's next run forward while holding its lock; False if it is not due."""
+        now = datetime.utcnow()
+        row = session.query(ScheduledJob).filter(ScheduledJob.name == job.name).first()
+        if row is None or (not force and (not row.enabled or row.next_run_at is None or row.next_run_at > now)):
+            session.commit()
+            return False
+        row.next_run_at = job.schedule.next_after(now)
+        session.commit()
+        return True
+
+    def _execute(self, job: Job) -> str:
+        started = datetime.utcnow()
+        run_id = self._record_start(job.name, started)
+        clock = time.perf_counter()
+        try:
+            result = job.handler()
+            status, error = JOB_SUCCEEDED, None
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {str(e)}")
+            result, status, error = None, JOB_FAILED, str(e) or type(e).__name__
+        duration_ms = int((time.perf_counter() - clock) * 1000)
+        self._record_finish(job.name, run_id, status, duration_ms, result, error)
+        logger.info(f"Job {job.name} {status} in {duration_ms}ms")
+        return status
+
+    def _record_start(self, name: str, started: datetime) -> str:
+        session = self._session_factory()
+        try:
+            run = JobRun(job_name=name, worker=self.worker_id, status=JOB_RUNNING, started_at=started)
+            session.add(run)
+            session.execute(
+                update(ScheduledJob).where(ScheduledJob.name == name).values(last_started_at=started)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return run.id
+        finally:
+            session.close()
+
+    def _record_finish(self, name: str, run_id: str, status: str, duration_ms: int,
+                       result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        finished = datetime.utcnow()
+        session = self._session_factory()
+        try:
+            session.execute(
+                update(JobRun).where(JobRun.id == run_id).values(
+                    status=status, finished_at=finished, duration_ms=duration_ms,
+                    result=json.dumps(result, default=str) if result is not None else None,
+                    error=error[:2000] if error else None,
+                ).execution_options(synchronize_session=False)
+            )
+            session.execute(
+                update(ScheduledJob).where(ScheduledJob.name == name).values(
+                    last_finished_at=finished, last_status=status, last_duration_ms=duration_ms,
+                    last_error=error[:2000] if error else None,
+                ).execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def history(self, name: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get recent runs, newest first.
+
+        Args:
+            name: Only runs of this job
+            limit: Maximum number of runs
+
+        Returns:
+            List of run dictionaries
+        """
+        session = self._session_factory()
+        try:
+            query = session.query(JobRun)
+            if name:
+                query = query.filter(JobRun.job_name == name)
+            return [
+                {
+                    "id": run.id,
+                    "job": run.job_name,
+                    "worker": run.worker,
+                    "status": run.status,
+                    "started_at": run.started_at,
+                    "duration_ms": run.duration_ms,
+                    "result": json.loads(run.result) if run.result else None,
+                    "error": run.error,
+                }
+                for run in query.order_by(JobRun.started_at.desc()).limit(limit)
+            ]
+        finally:
+            session.close()
+
+    def latest_result(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the summary of a job's last successful run.
+
+        Args:
+            name: Job name
+
+        Returns:
+            The summary the job returned, or None
+        """
+        session = self._session_factory()
+        try:
+            run = session.query(JobRun).filter(
+                JobRun.job_name == name, JobRun.status == JOB_SUCCEEDED
+            ).order_by(JobRun.started_at.desc()).first()
+            return json.loads(run.result) if run is not None and run.result else None
+        finally:
+            session.close()
+
+    def purge_history(self, older_than_days: float = JOB_HISTORY_DAYS) -> int:
+        """
+        Delete old run history.
+
+        Args:
+            older_than_days: Keep runs started more recently than this
+
+        Returns:
+            The number of runs deleted
+        """
+        session = self._session_factory()
+        try:
+            deleted = session.query(JobRun).filter(
+                JobRun.started_at < datetime.utcnow() - timedelta(days=older_than_days)
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        finally:
+            session.close()
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """
+    Get the process-wide job runner.
+
+    Returns:
+        The JobRunner, configured from the JOB_* environment variables
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner()
+    return _runner
+
+
+async def start_job_runner() -> None:
+    """Start running scheduled jobs (application startup handler)."""
+    if JOBS_ENABLED:
+        await get_job_runner().start()
+
+
+async def stop_job_runner() -> None:
+    """Stop running scheduled jobs (application shutdown handler)."""
+    if _runner is not None:
+        await _runner.stop()
+
+
+# ----- Jobs -----
+
+# Tenants whose product listings are kept warm
+JOB_WARM_TENANTS = int(os.environ.get("JOB_WARM_TENANTS", "10"))
+
+
+def top_tenant_ids(limit: int = JOB_WARM_TENANTS, days: int = 7) -> List[str]:
+    """
+    Get the tenants with the most recent orders.
+
+    Args:
+        limit: Maximum number of tenants
+        days: Window of orders counted
+
+    Returns:
+        Tenant IDs, busiest first
+    """
+    from pycommerce.core.db import get_session
+    from pycommerce.models.order import Order
+
+    with get_session() as session:
+        rows = session.query(Order.tenant_id, func.count(Order.id).label("orders")).filter(
+            Order.created_at >= datetime.utcnow() - timedelta(days=days)
+        ).group_by(Order.tenant_id).order_by(func.count(Order.id).desc()).limit(limit).all()
+        return [str(row.tenant_id) for row in rows]
+
+
+# The product cache lives in each process, so every process warms its own.
+# Runs more often than the 3 minute cache timeout so busy tenants never miss.
+@register_job("warm-product-cache", "*/2 * * * *", exclusive=False)
+def warm_product_cache() -> Dict[str, Any]:
+    """Refresh the default product listing of the busiest tenants."""
+    from pycommerce.services.enhanced_query_optimizer import get_products_by_tenant
+
+    tenants = top_tenant_ids()
+    for tenant_id in tenants:
+        # Same arguments as the product API's default listing, so the cache keys match
+        get_products_by_tenant.refresh(
+            tenant_id=tenant_id, category=None, min_price=None, max_price=None,
+            in_stock=None, limit=100, offset=0,
+        )
+    return {"tenants": len(tenants)}
+
+
+@register_job("low-stock-scan", "*/15 * * * *")
+def scan_low_stock() -> Dict[str, Any]:
+    """Repair the low-stock index after inventory writes that bypassed the managers."""
+    from pycommerce.services.low_stock_index import reconcile_low_stock_index
+
+    return reconcile_low_stock_index()
+
+
+@register_job("compact-inventory-ledger", "7 * * * *")
+def compact_inventory_ledger() -> Dict[str, Any]:
+    """Create ledger partitions ahead, snapshot long record histories and archive expired months."""
+    from pycommerce.services.inventory_ledger import compact_ledger
+
+    return compact_ledger()
+
+
+@register_job("purge-abandoned-carts", "17 * * * *")
+def purge_abandoned_carts() -> Dict[str, Any]:
+    """Delete carts that expired CART_TTL_SECONDS after their last change."""
+    from pycommerce.services.cart_store import get_cart_repository
+
+    return {"deleted": get_cart_repository().purge_expired()}
+
+
+@register_job("purge-job-history", "43 4 * * *")
+def purge_job_history() -> Dict[str, Any]:
+    """Delete run history older than JOB_HISTORY_DAYS."""
+    return {"deleted": get_job_runner().purge_history()}
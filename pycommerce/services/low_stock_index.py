@@ -0,0 +1,194 @@
+"""
+Low-stock index for PyCommerce inventory.
+
+An inventory record is low on stock when a reorder point is set and its
+available quantity is at or below it. Rather than comparing every record on
+each dashboard or inventory page, the inventory managers keep the answer
+on the record:
+
+- ``inventory_records.is_low_stock`` is updated by the same transaction that
+  reserves, releases, sells, returns or adjusts stock. Only flagged records
+  are in the partial index ix_inventory_records_low_stock, so listing them
+  reads the low-stock rows only.
+- ``inventory_low_stock_counts`` holds the number of flagged records per
+  tenant, so the count is a primary-key lookup.
+- Each crossing records an INVENTORY_LOW_STOCK or INVENTORY_RESTOCKED event
+  in the outbox, delivered to subscribers after the transaction commits.
+
+The flag is flipped with a conditional UPDATE, so when two transactions
+cross the threshold at the same time only one of them moves the count and
+records the event. Writes that bypass the managers are picked up by
+``reconcile_low_stock_index``, which the low-stock-scan job runs.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import and_, func, inspect, insert, not_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from pycommerce.core.db import get_session
+from pycommerce.models.db_registry import InventoryRecord, LowStockCount
+from pycommerce.services.event_bus import INVENTORY_LOW_STOCK, INVENTORY_RESTOCKED, record_event
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+
+def is_low_stock(available_quantity: Optional[int], reorder_point: Optional[int]) -> bool:
+    """Whether a record with these quantities belongs in the low-stock index."""
+    reorder_point = reorder_point or 0
+    return reorder_point > 0 and (available_quantity or 0) <= reorder_point
+
+
+def _low_stock_clause(table):
+    """SQL form of is_low_stock for an inventory_records table."""
+    reorder_point = func.coalesce(table.c.reorder_point, 0)
+    return and_(reorder_point > 0, func.coalesce(table.c.available_quantity, 0) <= reorder_point)
+
+
+def _adjust_count(session: Session, tenant_id: str, delta: int) -> None:
+    """Move a tenant's low-stock count by delta in the session's transaction."""
+    table = LowStockCount.__table__
+    now = datetime.utcnow()
+    bump = update(table).where(table.c.tenant_id == tenant_id).values(
+        low_stock_count=table.c.low_stock_count + delta, updated_at=now
+    )
+    if session.execute(bump).rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.execute(insert(table).values(
+                tenant_id=tenant_id, low_stock_count=max(delta, 0), updated_at=now
+            ))
+    except IntegrityError:
+        # Another transaction created the tenant's row first
+        session.execute(bump)
+
+
+def sync_low_stock(session: Session, record) -> Optional[bool]:
+    """
+    Bring a record's low-stock flag in line with its quantities.
+
+    Call after changing available_quantity or reorder_point, before the
+    session commits. The flag, the tenant's count and the crossing event are
+    written in the session's transaction.
+
+    Args:
+        session: The session that changed the record
+        record: An InventoryRecord (from either model registry)
+
+    Returns:
+        True if the record became low on stock, False if it was restocked,
+        None if it did not cross the threshold
+    """
+    low = is_low_stock(record.available_quantity, record.reorder_point)
+
+    if inspect(record).persistent:
+        table = type(record).__table__
+        changed = session.execute(
+            update(table)
+            .where(table.c.id == record.id, table.c.is_low_stock == (not low))
+            .values(is_low_stock=low)
+        ).rowcount
+        set_committed_value(record, "is_low_stock", low)
+        if not changed:
+            return None
+    else:
+        # New records start outside the index
+        record.is_low_stock = low
+        if not low:
+            return None
+
+    _adjust_count(session, record.tenant_id, 1 if low else -1)
+    record_event(session, INVENTORY_LOW_STOCK if low else INVENTORY_RESTOCKED, {
+        "inventory_record_id": record.id,
+        "product_id": record.product_id,
+        "sku": record.sku,
+        "location": record.location,
+        "available_quantity": record.available_quantity,
+        "reorder_point": record.reorder_point,
+        "reorder_quantity": record.reorder_quantity,
+    }, aggregate_id=record.product_id, tenant_id=record.tenant_id)
+    logger.info(
+        f"Product {record.product_id} {'reached its reorder point' if low else 'was restocked'}: "
+        f"{record.available_quantity} available, reorder point {record.reorder_point}"
+    )
+    return low
+
+
+def get_low_stock_count(tenant_id: str, session_factory: Optional[Callable] = None) -> int:
+    """
+    Get the number of low-stock inventory records of a tenant.
+
+    Args:
+        tenant_id: The tenant ID
+        session_factory: Session context factory to use (defaults to get_session)
+
+    Returns:
+        The number of records at or below their reorder point
+    """
+    with (session_factory or get_session)() as session:
+        count = session.execute(
+            select(LowStockCount.low_stock_count).where(LowStockCount.tenant_id == str(tenant_id))
+        ).scalar()
+        return count or 0
+
+
+def reconcile_low_stock_index(session_factory: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    Repair flags and counts that drifted from the inventory quantities.
+
+    Records whose quantities were changed outside the inventory managers are
+    re-flagged (recording their crossing events), then every tenant's count
+    is recomputed from the flags.
+
+    Args:
+        session_factory: Session context factory to use (defaults to get_session)
+
+    Returns:
+        Summary with the records fixed, the counts corrected and the totals
+    """
+    with (session_factory or get_session)() as session:
+        table = InventoryRecord.__table__
+        low = _low_stock_clause(table)
+        stale = session.query(InventoryRecord).filter(
+            (InventoryRecord.is_low_stock & not_(low)) | (~InventoryRecord.is_low_stock & low)
+        ).all()
+        for record in stale:
+            sync_low_stock(session, record)
+
+        actual = dict(session.execute(
+            select(table.c.tenant_id, func.count())
+            .where(table.c.is_low_stock)
+            .group_by(table.c.tenant_id)
+        ).all())
+        counts = LowStockCount.__table__
+        stored = dict(session.execute(select(counts.c.tenant_id, counts.c.low_stock_count)).all())
+
+        corrected = 0
+        now = datetime.utcnow()
+        for tenant_id in set(actual) | set(stored):
+            count = actual.get(tenant_id, 0)
+            if tenant_id not in stored:
+                session.execute(insert(counts).values(tenant_id=tenant_id, low_stock_count=count, updated_at=now))
+            elif stored[tenant_id] != count:
+                session.execute(
+                    update(counts).where(counts.c.tenant_id == tenant_id)
+                    .values(low_stock_count=count, updated_at=now)
+                )
+            else:
+                continue
+            corrected += 1
+        session.commit()
+
+    if stale or corrected:
+        logger.warning(f"Low-stock index repaired: {len(stale)} records re-flagged, {corrected} tenant counts corrected")
+    return {
+        "fixed": len(stale),
+        "corrected_counts": corrected,
+        "low_stock": sum(actual.values()),
+        "tenants": {str(tenant_id): count for tenant_id, count in actual.items()},
+    }
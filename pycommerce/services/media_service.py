@@ -281,6 +281,23 @@ class MediaService:
         
         return filtered_items[start_idx:end_idx]
     
+    def get_by_urls(self, urls: List[str], tenant_id: Optional[str] = None) -> Dict[str, MediaItem]:
+        """
+        Get the media items visible to a tenant that have the given URLs.
+
+        Args:
+            urls: Media URLs
+            tenant_id: Optional tenant ID, with the same visibility rules as list()
+
+        Returns:
+            Dictionary mapping each found URL to its media item
+        """
+        wanted = set(urls)
+        if not wanted:
+            return {}
+        visible = self.list(tenant_id=tenant_id, limit=len(self._media_items) or 1)
+        return {item.url: item for item in visible if item.url in wanted}
+
     def get(self, id: str) -> Optional[MediaItem]:
         """
         Get a media item by ID.
@@ -0,0 +1,151 @@
+"""
+Document number allocation for PyCommerce.
+
+Orders, returns and estimates get numbers like ORD-12-000345: the prefix,
+the id of the tenant's sequence for that kind of document, and the next
+value of that sequence. Sequence ids are unique, so numbers are unique
+across tenants without random parts, and they sort by issue order within a
+tenant.
+
+Sequences live in the number_sequences table. Each process reserves a
+block of NUMBER_BLOCK_SIZE values with one UPDATE (hi/lo allocation) and
+hands numbers out from memory until the block is used up. Reserved values
+are never reissued: values left in a block when a process exits become gaps.
+Within a process numbers are strictly increasing per tenant; across
+processes they are increasing per block, or strictly with NUMBER_BLOCK_SIZE=1.
+"""
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.models.number_sequence import NumberSequence
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Values reserved per database round trip
+NUMBER_BLOCK_SIZE = int(os.environ.get("NUMBER_BLOCK_SIZE", "20"))
+
+# Zero-padded width of the sequence value
+NUMBER_VALUE_WIDTH = 6
+
+ORDER_NUMBERS = "ORD"
+RETURN_NUMBERS = "RET"
+ESTIMATE_NUMBERS = "EST"
+
+
+def format_number(kind: str, sequence_id: int, value: int) -> str:
+    """Format a document number."""
+    return f"{kind}-{sequence_id}-{value:0{NUMBER_VALUE_WIDTH}d}"
+
+
+class NumberAllocator:
+    """Hands out per-tenant document numbers from reserved blocks."""
+
+    def __init__(self, block_size: int = NUMBER_BLOCK_SIZE, session_factory: Optional[Callable] = None):
+        """
+        Initialize the allocator.
+
+        Args:
+            block_size: Values reserved per database round trip
+            session_factory: Session factory to use (defaults to SessionLocal)
+        """
+        self.block_size = max(1, block_size)
+        self._session_factory = session_factory or SessionLocal
+        # (kind, tenant) -> [sequence id, next value, end of block (exclusive)]
+        self._blocks: Dict[Tuple[str, str], list] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.reservations = 0
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._locks_lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+        return lock
+
+    def _reserve(self, kind: str, tenant_id: str) -> Tuple[int, int, int]:
+        """Reserve the next block of a sequence, creating the sequence if needed."""
+        for _ in range(3):
+            session = self._session_factory()
+            try:
+                row = session.execute(
+                    update(NumberSequence)
+                    .where(NumberSequence.tenant_id == tenant_id, NumberSequence.kind == kind)
+                    .values(next_value=NumberSequence.next_value + self.block_size)
+                    .returning(NumberSequence.id, NumberSequence.next_value)
+                ).first()
+                if row is None:
+                    sequence = NumberSequence(tenant_id=tenant_id, kind=kind, next_value=1 + self.block_size)
+                    session.add(sequence)
+                    session.flush()
+                    row = (sequence.id, sequence.next_value)
+                session.commit()
+                self.reservations += 1
+                sequence_id, end = row
+                return sequence_id, end - self.block_size, end
+            except IntegrityError:
+                # Another process created the sequence first; reserve from it
+                session.rollback()
+            finally:
+                session.close()
+        raise RuntimeError(f"Could not reserve {kind} numbers for tenant {tenant_id or '-'}")
+
+    def allocate(self, kind: str, tenant_id: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Allocate the next value of a tenant's sequence.
+
+        Args:
+            kind: Document kind (ORDER_NUMBERS, RETURN_NUMBERS, ESTIMATE_NUMBERS)
+            tenant_id: The tenant the document belongs to
+
+        Returns:
+            Tuple of (sequence id, value)
+        """
+        key = (kind, str(tenant_id or ""))
+        with self._lock(key):
+            block = self._blocks.get(key)
+            if block is None or block[1] >= block[2]:
+                block = list(self._reserve(*key))
+                self._blocks[key] = block
+            value = block[1]
+            block[1] += 1
+            return block[0], value
+
+    def next_number(self, kind: str, tenant_id: Optional[str] = None) -> str:
+        """
+        Get the next document number for a tenant.
+
+        Args:
+            kind: Document kind, also used as the number's prefix
+            tenant_id: The tenant the document belongs to
+
+        Returns:
+            The document number
+        """
+        return format_number(kind, *self.allocate(kind, tenant_id))
+
+
+_allocator: Optional[NumberAllocator] = None
+_allocator_lock = threading.Lock()
+
+
+def get_number_allocator() -> NumberAllocator:
+    """
+    Get the process-wide number allocator.
+
+    Returns:
+        The NumberAllocator, configured from NUMBER_BLOCK_SIZE
+    """
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = NumberAllocator()
+    return _allocator
@@ -0,0 +1,239 @@
+"""
+Password hashing for PyCommerce.
+
+Passwords are hashed with scrypt (hashlib.scrypt), a memory-hard KDF, and
+stored in a versioned format that records the cost parameters:
+
+    $scrypt$v=1$n=16384,r=8,p=1$<salt>$<hash>
+
+Hashes in the legacy "salt:sha256" format, or with cost parameters below the
+configured ones, still verify; needs_rehash reports them so they can be
+upgraded after a successful login.
+
+scrypt costs tens of milliseconds of CPU per call, so async code verifies
+passwords on PasswordVerifierPool: a small thread pool (hashlib.scrypt
+releases the GIL) with a bound on queued verifications. When a login storm
+fills the queue, further logins fail fast with PasswordVerifierBusy instead
+of queueing behind it, and the event loop keeps serving other requests.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# scrypt cost parameters for new hashes (N must be a power of two)
+PASSWORD_SCRYPT_N = int(os.environ.get("PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.environ.get("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.environ.get("PASSWORD_SCRYPT_P", "1"))
+
+# Threads verifying passwords at once
+PASSWORD_VERIFY_WORKERS = int(os.environ.get("PASSWORD_VERIFY_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Verifications waiting or running before new ones are refused
+PASSWORD_VERIFY_QUEUE = int(os.environ.get("PASSWORD_VERIFY_QUEUE", "64"))
+
+SCRYPT_SCHEME = "scrypt"
+SCRYPT_VERSION = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordVerifierBusy(Exception):
+    """Raised when too many password verifications are already queued."""
+
+
+@dataclass(frozen=True)
+class ScryptParams:
+    """scrypt cost parameters."""
+    n: int = PASSWORD_SCRYPT_N
+    r: int = PASSWORD_SCRYPT_R
+    p: int = PASSWORD_SCRYPT_P
+
+    @property
+    def maxmem(self) -> int:
+        """Memory limit for hashlib.scrypt, with headroom over the 128 * N * r it needs."""
+        return 256 * self.n * self.r + 1024 * 1024
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, params: ScryptParams) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=params.n, r=params.r, p=params.p,
+        maxmem=params.maxmem, dklen=KEY_BYTES,
+    )
+
+
+def hash_password(password: str, params: Optional[ScryptParams] = None) -> str:
+    """
+    Hash a password.
+
+    Args:
+        password: The password to hash
+        params: Cost parameters (defaults to the PASSWORD_SCRYPT_* settings)
+
+    Returns:
+        The versioned password hash
+    """
+    params = params or ScryptParams()
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, params)
+    return (
+        f"${SCRYPT_SCHEME}$v={SCRYPT_VERSION}$n={params.n},r={params.r},p={params.p}"
+        f"${_b64encode(salt)}${_b64encode(key)}"
+    )
+
+
+def _parse_scrypt(stored_hash: str):
+    """Split a scrypt hash into (params, salt, key); raises ValueError if malformed."""
+    _, scheme, version, cost, salt, key = stored_hash.split("$")
+    if scheme != SCRYPT_SCHEME or version != f"v={SCRYPT_VERSION}":
+        raise ValueError(f"Unsupported password hash scheme: {scheme} {version}")
+    values = dict(part.split("=", 1) for part in cost.split(","))
+    params = ScryptParams(n=int(values["n"]), r=int(values["r"]), p=int(values["p"]))
+    return params, _b64decode(salt), _b64decode(key)
+
+
+def is_legacy_hash(stored_hash: str) -> bool:
+    """Check whether a hash is in the legacy "salt:sha256" format."""
+    return not stored_hash.startswith("$") and ":" in stored_hash
+
+
+def verify_password(stored_hash: Optional[str], password: str) -> bool:
+    """
+    Verify a password against a stored hash of any supported format.
+
+    Args:
+        stored_hash: The stored password hash
+        password: The password to verify
+
+    Returns:
+        True if the password matches, False otherwise (including malformed hashes)
+    """
+    if not stored_hash:
+        return False
+    try:
+        if is_legacy_hash(stored_hash):
+            salt, pw_hash = stored_hash.split(":", 1)
+            candidate = hashlib.sha256((password + salt).encode()).hexdigest()
+            return hmac.compare_digest(candidate, pw_hash)
+        params, salt, key = _parse_scrypt(stored_hash)
+        return hmac.compare_digest(_scrypt(password, salt, params), key)
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Unreadable password hash: {str(e)}")
+        return False
+
+
+def needs_rehash(stored_hash: Optional[str], params: Optional[ScryptParams] = None) -> bool:
+    """
+    Check whether a hash should be replaced after a successful login.
+
+    Args:
+        stored_hash: The stored password hash
+        params: The current cost parameters
+
+    Returns:
+        True for legacy hashes and hashes weaker than the current parameters
+    """
+    if not stored_hash:
+        return False
+    if is_legacy_hash(stored_hash):
+        return True
+    try:
+        stored, _, _ = _parse_scrypt(stored_hash)
+    except (ValueError, KeyError):
+        return True
+    params = params or ScryptParams()
+    return stored.n < params.n or stored.r < params.r or stored.p < params.p
+
+
+_dummy_hash: Optional[str] = None
+
+
+def dummy_verify(password: str) -> bool:
+    """Spend the same time as a real verification, for logins with an unknown email."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_hex(8))
+    verify_password(_dummy_hash, password)
+    return False
+
+
+class PasswordVerifierPool:
+    """Bounded thread pool that verifies and hashes passwords off the event loop."""
+
+    def __init__(self, workers: int = PASSWORD_VERIFY_WORKERS, queue_size: int = PASSWORD_VERIFY_QUEUE):
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Threads hashing at once
+            queue_size: Calls waiting or running before new ones raise PasswordVerifierBusy
+        """
+        self.workers = max(1, workers)
+        self.queue_size = max(self.workers, queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self.stats = {"verified": 0, "rejected": 0}
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.stats["rejected"] += 1
+            raise PasswordVerifierBusy("Too many password checks in progress")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+    async def verify(self, stored_hash: Optional[str], password: str) -> bool:
+        """Verify a password (see verify_password)."""
+        result = await self._run(verify_password, stored_hash, password)
+        self.stats["verified"] += 1
+        return result
+
+    async def dummy_verify(self, password: str) -> bool:
+        """Verify against a throwaway hash (see dummy_verify)."""
+        return await self._run(dummy_verify, password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password (see hash_password)."""
+        return await self._run(hash_password, password)
+
+    def shutdown(self) -> None:
+        """Stop the pool's threads."""
+        self._executor.shutdown(wait=False)
+
+
+_pool: Optional[PasswordVerifierPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_password_verifier_pool() -> PasswordVerifierPool:
+    """
+    Get the process-wide password verifier pool.
+
+    Returns:
+        The PasswordVerifierPool, configured from the PASSWORD_VERIFY_* environment variables
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordVerifierPool()
+    return _pool
@@ -0,0 +1,51 @@
+"""
+Product cache invalidation for PyCommerce.
+
+Product data is cached in two places: the HTTP validators kept by
+HTTPCacheMiddleware, tagged with surrogate keys, and the query cache of the
+enhanced query optimizer. Every product write path (API, admin, inventory and
+the AI description write-back) calls invalidate_product_caches after its
+commit, so neither serves a product that has changed.
+"""
+import logging
+import sys
+from typing import Optional
+
+from pycommerce.middleware.http_cache import purge_surrogate_key
+
+logger = logging.getLogger(__name__)
+
+
+def purge_product_http_cache(tenant_id: str, product_id: Optional[str] = None):
+    """
+    Purge cached HTTP validators for a tenant's products.
+
+    Args:
+        tenant_id: The tenant whose product listings changed
+        product_id: Optional ID of the product that changed
+    """
+    purge_surrogate_key(f"tenant:{tenant_id}:products")
+    if product_id is not None:
+        purge_surrogate_key(f"product:{product_id}")
+
+
+def invalidate_product_caches(tenant_id: str, product_id: Optional[str] = None):
+    """
+    Invalidate the HTTP validators and query cache entries for products.
+
+    Args:
+        tenant_id: The tenant whose product listings changed
+        product_id: Optional ID of the product that changed
+    """
+    purge_product_http_cache(tenant_id, product_id)
+
+    # The query cache lives in the optimizer module; if this process never
+    # imported it there is nothing cached, and importing it here is slow
+    optimizer = sys.modules.get("pycommerce.services.enhanced_query_optimizer")
+    if optimizer is None:
+        return
+
+    optimizer.invalidate_product_cache(tenant_id=tenant_id)
+    if product_id is not None:
+        optimizer.invalidate_product_cache(product_id=product_id)
+    logger.debug(f"Invalidated product caches for tenant {tenant_id}, product {product_id}")
@@ -6,17 +6,19 @@ using techniques like eager loading, join optimization, and result caching.
 """
 import logging
 import functools
+import math
 import time
 from typing import Dict, List, Any, Optional, Tuple, Callable, TypeVar, Union
 from datetime import datetime, timedelta
 
-from sqlalchemy import func, text
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import joinedload, contains_eager
 
 from pycommerce.core.db import get_session
 from pycommerce.models.order import Order, OrderItem, OrderStatus
 from pycommerce.models.order_note import OrderNote
 from pycommerce.models.product import Product
+from pycommerce.models.tenant import Tenant
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -30,6 +32,12 @@ V = TypeVar('V')
 _cache: Dict[str, Tuple[Any, datetime]] = {}
 _DEFAULT_CACHE_TIMEOUT = 300  # 5 minutes in seconds
 
+# Largest page get_order_summaries will return
+MAX_ORDER_PAGE_SIZE = 200
+
+# Sort keys accepted by get_order_summaries
+ORDER_SUMMARY_SORTS = ("created_at", "order_number", "customer", "total", "status", "items_count", "notes_count")
+
 
 def timed_cache(timeout: int = _DEFAULT_CACHE_TIMEOUT):
     """
@@ -281,6 +289,186 @@ def get_orders_summary_for_tenant(tenant_id: str, filters: Optional[Dict[str, An
         return []
 
 
+def _parse_filter_date(value: Any) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD filter value; datetimes pass through, bad values are ignored."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d")
+    except ValueError:
+        logger.warning(f"Ignoring invalid date filter: {value}")
+        return None
+
+
+def order_filter_clauses(tenant_id: Optional[str], filters: Optional[Dict[str, Any]]) -> List[Any]:
+    """Build WHERE clauses for order list filters."""
+    clauses = []
+    if tenant_id:
+        clauses.append(Order.tenant_id == tenant_id)
+    if not filters:
+        return clauses
+
+    status = filters.get('status')
+    if status:
+        # Accept OrderStatus members as well as status names
+        status = status.name if hasattr(status, 'name') else str(status).upper()
+        clauses.append(Order.status == status)
+
+    if filters.get('date_from'):
+        date_from = _parse_filter_date(filters['date_from'])
+        if date_from:
+            clauses.append(Order.created_at >= date_from)
+
+    if filters.get('date_to'):
+        date_to = _parse_filter_date(filters['date_to'])
+        if date_to:
+            # Add a day to include the entire end date
+            clauses.append(Order.created_at < date_to + timedelta(days=1))
+
+    if filters.get('customer_email'):
+        clauses.append(Order.customer_email.ilike(f"%{filters['customer_email']}%"))
+
+    if filters.get('min_total') is not None:
+        clauses.append(Order.total >= filters['min_total'])
+
+    if filters.get('max_total') is not None:
+        clauses.append(Order.total <= filters['max_total'])
+
+    return clauses
+
+
+def get_order_summaries(
+    tenant_id: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: str = "created_at",
+    descending: bool = True,
+    page: int = 1,
+    per_page: int = 50
+) -> Dict[str, Any]:
+    """
+    Get one page of order summaries with item and note counts.
+    
+    Counts come from correlated subqueries in the page query, so a page
+    costs two statements (the page and the total count) however many
+    orders it shows.
+    
+    Args:
+        tenant_id: The tenant ID to get orders for, or None for all tenants
+        filters: Optional filters for status, date range, customer email and totals
+        sort: One of ORDER_SUMMARY_SORTS; unknown keys sort by created_at
+        descending: Sort direction
+        page: 1-based page number
+        per_page: Orders per page, capped at MAX_ORDER_PAGE_SIZE
+        
+    Returns:
+        Dictionary with 'orders' and pagination fields ('total', 'page',
+        'per_page', 'pages', 'sort', 'descending')
+    """
+    page = max(1, int(page or 1))
+    per_page = max(1, min(int(per_page or 50), MAX_ORDER_PAGE_SIZE))
+    if sort not in ORDER_SUMMARY_SORTS:
+        sort = "created_at"
+    result = {
+        "orders": [],
+        "total": 0,
+        "page": page,
+        "per_page": per_page,
+        "pages": 0,
+        "sort": sort,
+        "descending": descending,
+    }
+
+    try:
+        with get_session() as session:
+            clauses = order_filter_clauses(tenant_id, filters)
+
+            total = session.query(func.count(Order.id)).filter(*clauses).scalar() or 0
+            result["total"] = total
+            result["pages"] = math.ceil(total / per_page)
+            if total == 0 or (page - 1) * per_page >= total:
+                return result
+
+            items_count = (
+                select(func.count(OrderItem.id))
+                .where(OrderItem.order_id == Order.id)
+                .correlate(Order)
+                .scalar_subquery()
+                .label('items_count')
+            )
+            items_quantity = (
+                select(func.coalesce(func.sum(OrderItem.quantity), 0))
+                .where(OrderItem.order_id == Order.id)
+                .correlate(Order)
+                .scalar_subquery()
+                .label('items_quantity')
+            )
+            notes_count = (
+                select(func.count(OrderNote.id))
+                .where(OrderNote.order_id == Order.id)
+                .correlate(Order)
+                .scalar_subquery()
+                .label('notes_count')
+            )
+            sort_columns = {
+                "created_at": Order.created_at,
+                "order_number": Order.order_number,
+                "customer": Order.customer_name,
+                "total": Order.total,
+                "status": Order.status,
+                "items_count": items_count,
+                "notes_count": notes_count,
+            }
+            sort_column = sort_columns[sort]
+
+            query = session.query(
+                Order.id,
+                Order.tenant_id,
+                Tenant.name.label('tenant_name'),
+                Order.order_number,
+                Order.customer_name,
+                Order.customer_email,
+                Order.total,
+                Order.status,
+                Order.created_at,
+                items_count,
+                items_quantity,
+                notes_count
+            ).outerjoin(
+                Tenant, Tenant.id == Order.tenant_id
+            ).filter(
+                *clauses
+            ).order_by(
+                sort_column.desc() if descending else sort_column.asc(),
+                Order.id.desc() if descending else Order.id.asc()
+            ).offset(
+                (page - 1) * per_page
+            ).limit(per_page)
+
+            for row in query.all():
+                result["orders"].append({
+                    "id": str(row.id),
+                    "tenant_id": str(row.tenant_id),
+                    "tenant_name": row.tenant_name or "",
+                    "order_number": row.order_number,
+                    "customer_name": row.customer_name or "",
+                    "customer_email": row.customer_email or "",
+                    "total": row.total,
+                    "status": row.status.value if hasattr(row.status, 'value') else row.status,
+                    "items_count": row.items_count,
+                    "items_quantity": row.items_quantity,
+                    "notes_count": row.notes_count,
+                    "created_at": row.created_at
+                })
+
+            return result
+
+    except Exception as e:
+        logger.error(f"Error in get_order_summaries: {e}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        return result
+
+
 @timed_cache(timeout=30)  # Shorter timeout for frequently changing data
 def get_order_items_with_products(order_id: str) -> List[Dict[str, Any]]:
     """
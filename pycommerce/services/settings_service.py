@@ -4,9 +4,15 @@ Settings service for PyCommerce platform.
 This module provides functionality for storing and retrieving global configuration settings.
 """
 
+import asyncio
+import bisect
+import copy
 import json
 import logging
-from typing import Any, Dict, Optional
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy import Column, String, Text
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -28,8 +34,195 @@ class SystemSetting(Base):
     description = Column(String(500), nullable=True)
     setting_type = Column(String(50), default="string")  # string, boolean, number, json
 
+
+# Row bumped by every write so other workers notice their snapshot is stale
+SETTINGS_VERSION_KEY = "system.settings_version"
+
+# Seconds a worker trusts its snapshot before checking the version row
+SETTINGS_REVALIDATE_SECONDS = float(os.environ.get("SETTINGS_REVALIDATE_SECONDS", "5"))
+
+# Marks stored values that could not be parsed as their declared type
+_UNPARSED = object()
+
+
+def _copy(value: Any) -> Any:
+    """Copy JSON containers so callers can't mutate the shared snapshot."""
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def _parse_value(value: Optional[str], setting_type: Optional[str]) -> Any:
+    """Convert a stored value to its declared type, or _UNPARSED on failure."""
+    if setting_type == "boolean":
+        return (value or "").lower() in ("true", "1", "yes")
+    elif setting_type == "number":
+        try:
+            if "." in value:
+                return float(value)
+            else:
+                return int(value)
+        except (ValueError, TypeError):
+            return _UNPARSED
+    elif setting_type == "json":
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return _UNPARSED
+    else:
+        return value
+
+
+class SettingsSnapshot:
+    """
+    Immutable view of all system settings, parsed once.
+    
+    Keys are kept sorted so prefix queries are a binary search plus a
+    slice instead of a scan.
+    """
+    
+    def __init__(self, rows: List[Tuple[str, Optional[str], Optional[str]]], version: int):
+        """
+        Build a snapshot.
+        
+        Args:
+            rows: (key, value, setting_type) tuples
+            version: The settings version the rows were read at
+        """
+        self.version = version
+        self.checked_at = time.monotonic()
+        self._values: Dict[str, Any] = {}
+        self._raw: Dict[str, Optional[str]] = {}
+        for key, value, setting_type in rows:
+            if key == SETTINGS_VERSION_KEY:
+                continue
+            self._values[key] = _parse_value(value, setting_type)
+            self._raw[key] = value
+        self._keys = sorted(self._values)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a parsed setting, or the default if missing or unparseable."""
+        value = self._values.get(key, _UNPARSED)
+        return default if value is _UNPARSED else _copy(value)
+    
+    def get_many(self, keys: List[str], default: Any = None) -> Dict[str, Any]:
+        """Get several parsed settings at once."""
+        return {key: self.get(key, default) for key in keys}
+    
+    def with_prefix(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        """Get all settings whose key starts with a prefix (all settings if None)."""
+        if prefix:
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", start)
+            keys = self._keys[start:end]
+        else:
+            keys = self._keys
+        
+        # Unparseable values are returned raw, as get_all_settings always has
+        return {
+            key: self._raw[key] if self._values[key] is _UNPARSED else _copy(self._values[key])
+            for key in keys
+        }
+
+
+_snapshot: Optional[SettingsSnapshot] = None
+_snapshot_lock = threading.Lock()
+
 class SettingsService:
-    """Service for managing system settings."""
+    """
+    Service for managing system settings.
+    
+    Reads are served from an in-process SettingsSnapshot holding every
+    setting, loaded with one query and parsed once. Writes bump a version
+    row; after SETTINGS_REVALIDATE_SECONDS a worker reads that single row
+    and reloads the snapshot only if the version moved. Database work runs
+    in a thread so the async methods never block the event loop.
+    """
+    
+    @classmethod
+    def _read_version(cls, session) -> int:
+        row = session.query(SystemSetting.value).filter(SystemSetting.key == SETTINGS_VERSION_KEY).first()
+        try:
+            return int(row[0]) if row else 0
+        except (TypeError, ValueError):
+            return 0
+    
+    @classmethod
+    def _bump_version(cls, session) -> None:
+        setting = session.query(SystemSetting).filter(
+            SystemSetting.key == SETTINGS_VERSION_KEY
+        ).with_for_update().first()
+        if setting:
+            try:
+                setting.value = str(int(setting.value) + 1)
+            except (TypeError, ValueError):
+                setting.value = "1"
+        else:
+            session.add(SystemSetting(
+                key=SETTINGS_VERSION_KEY,
+                value="1",
+                description="Incremented on every settings change",
+                setting_type="number"
+            ))
+    
+    @classmethod
+    def _is_fresh(cls, snapshot: Optional[SettingsSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.checked_at < SETTINGS_REVALIDATE_SECONDS
+    
+    @classmethod
+    def snapshot(cls) -> SettingsSnapshot:
+        """
+        Get the current settings snapshot, loading it if needed.
+        
+        This may query the database; async code should use get_snapshot().
+        
+        Returns:
+            The settings snapshot
+        """
+        global _snapshot
+        current = _snapshot
+        if cls._is_fresh(current):
+            return current
+        
+        with _snapshot_lock:
+            current = _snapshot
+            if cls._is_fresh(current):
+                return current
+            
+            session = db_session()
+            try:
+                version = cls._read_version(session)
+                if current is not None and current.version == version:
+                    current.checked_at = time.monotonic()
+                    return current
+                
+                rows = session.query(SystemSetting.key, SystemSetting.value, SystemSetting.setting_type).all()
+                _snapshot = SettingsSnapshot(rows, version)
+                return _snapshot
+            except SQLAlchemyError as e:
+                logger.error(f"Database error loading settings: {str(e)}")
+                # Keep serving the last snapshot; don't cache an empty one
+                return current if current is not None else SettingsSnapshot([], -1)
+            finally:
+                session.close()
+    
+    @classmethod
+    async def get_snapshot(cls) -> SettingsSnapshot:
+        """
+        Get the current settings snapshot without blocking the event loop.
+        
+        Returns:
+            The settings snapshot
+        """
+        current = _snapshot
+        if cls._is_fresh(current):
+            return current
+        return await asyncio.to_thread(cls.snapshot)
+    
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop this process's settings snapshot so the next read reloads it."""
+        global _snapshot
+        with _snapshot_lock:
+            _snapshot = None
     
     @classmethod
     async def get_setting(cls, key: str, default: Any = None) -> Any:
@@ -43,35 +236,35 @@ class SettingsService:
         Returns:
             The setting value, or the default if not found
         """
-        session = db_session()
-        try:
-            setting = session.query(SystemSetting).filter(SystemSetting.key == key).first()
-            if not setting:
-                return default
-                
-            # Convert value based on setting type
-            if setting.setting_type == "boolean":
-                return setting.value.lower() in ("true", "1", "yes")
-            elif setting.setting_type == "number":
-                try:
-                    if "." in setting.value:
-                        return float(setting.value)
-                    else:
-                        return int(setting.value)
-                except (ValueError, TypeError):
-                    return default
-            elif setting.setting_type == "json":
-                try:
-                    return json.loads(setting.value)
-                except (json.JSONDecodeError, TypeError):
-                    return default
-            else:
-                return setting.value
-        except SQLAlchemyError as e:
-            logger.error(f"Database error retrieving setting {key}: {str(e)}")
-            return default
-        finally:
-            session.close()
+        return (await cls.get_snapshot()).get(key, default)
+    
+    @classmethod
+    async def get_settings(cls, keys: List[str], default: Any = None) -> Dict[str, Any]:
+        """
+        Get several system settings at once.
+        
+        Args:
+            keys: The settings keys
+            default: Default value for settings that don't exist
+            
+        Returns:
+            Dictionary of setting keys and values
+        """
+        return (await cls.get_snapshot()).get_many(keys, default)
+    
+    @classmethod
+    def get_setting_sync(cls, key: str, default: Any = None) -> Any:
+        """
+        Get a system setting by key from synchronous code.
+        
+        Args:
+            key: The settings key
+            default: Default value if setting doesn't exist
+            
+        Returns:
+            The setting value, or the default if not found
+        """
+        return cls.snapshot().get(key, default)
             
     @classmethod
     async def set_setting(cls, key: str, value: Any, description: Optional[str] = None, 
@@ -88,6 +281,10 @@ class SettingsService:
         Returns:
             True if successful, False otherwise
         """
+        return await asyncio.to_thread(cls._set_setting, key, value, description, setting_type)
+    
+    @classmethod
+    def _set_setting(cls, key: str, value: Any, description: Optional[str], setting_type: Optional[str]) -> bool:
         session = db_session()
         try:
             # Determine setting type if not provided
@@ -127,8 +324,10 @@ class SettingsService:
                     setting_type=setting_type
                 )
                 session.add(setting)
-                
+            
+            cls._bump_version(session)
             session.commit()
+            cls.invalidate()
             return True
         except SQLAlchemyError as e:
             session.rollback()
@@ -148,10 +347,16 @@ class SettingsService:
         Returns:
             True if successful, False otherwise
         """
+        return await asyncio.to_thread(cls._delete_setting, key)
+    
+    @classmethod
+    def _delete_setting(cls, key: str) -> bool:
         session = db_session()
         try:
             session.query(SystemSetting).filter(SystemSetting.key == key).delete()
+            cls._bump_version(session)
             session.commit()
+            cls.invalidate()
             return True
         except SQLAlchemyError as e:
             session.rollback()
@@ -171,36 +376,4 @@ class SettingsService:
         Returns:
             Dictionary of setting keys and values
         """
-        session = db_session()
-        try:
-            query = session.query(SystemSetting)
-            if prefix:
-                query = query.filter(SystemSetting.key.startswith(prefix))
-                
-            settings = {}
-            for setting in query.all():
-                # Convert value based on setting type
-                if setting.setting_type == "boolean":
-                    settings[setting.key] = setting.value.lower() in ("true", "1", "yes")
-                elif setting.setting_type == "number":
-                    try:
-                        if "." in setting.value:
-                            settings[setting.key] = float(setting.value)
-                        else:
-                            settings[setting.key] = int(setting.value)
-                    except (ValueError, TypeError):
-                        settings[setting.key] = setting.value
-                elif setting.setting_type == "json":
-                    try:
-                        settings[setting.key] = json.loads(setting.value)
-                    except (json.JSONDecodeError, TypeError):
-                        settings[setting.key] = setting.value
-                else:
-                    settings[setting.key] = setting.value
-                    
-            return settings
-        except SQLAlchemyError as e:
-            logger.error(f"Database error retrieving settings: {str(e)}")
-            return {}
-        finally:
-            session.close()
\ No newline at end of file
+        return (await cls.get_snapshot()).with_prefix(prefix)
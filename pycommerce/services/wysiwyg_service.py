@@ -6,17 +6,28 @@ This module provides utilities for handling WYSIWYG editor operations,
 including content processing, sanitization, and integration with the media library.
 """
 
+import hashlib
+import html
 import logging
+import os
 import re
+import threading
 import uuid
 import json
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
 
 import bleach
-from bs4 import BeautifulSoup
+from bleach.sanitizer import Cleaner
 
 from pycommerce.services.media_service import MediaService
 
+# CSS filtering needs tinycss2; without it style attributes are dropped
+try:
+    from bleach.css_sanitizer import CSSSanitizer
+except ImportError:
+    CSSSanitizer = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -36,10 +47,13 @@ ALLOWED_TAGS = [
     'var', 'video', 'wbr'
 ]
 
+# data-* is allowed only where content needs it: lazy-loaded images and the
+# attributes Quill writes on list items and code blocks
 ALLOWED_ATTRS = {
-    '*': ['class', 'id', 'style', 'data-*'],
+    '*': ['class', 'id', 'style'],
     'a': ['href', 'target', 'rel', 'download', 'title'],
     'img': ['src', 'alt', 'title', 'width', 'height', 'loading', 'srcset', 'sizes', 'data-*'],
+    'div': ['data-language'],
     'iframe': ['src', 'width', 'height', 'frameborder', 'allowfullscreen', 'allow'],
     'video': ['src', 'width', 'height', 'controls', 'autoplay', 'muted', 'loop', 'poster'],
     'audio': ['src', 'controls', 'autoplay', 'muted', 'loop'],
@@ -47,7 +61,7 @@ ALLOWED_ATTRS = {
     'input': ['type', 'value', 'placeholder', 'checked', 'disabled', 'readonly'],
     'button': ['type', 'disabled'],
     'ol': ['start', 'reversed', 'type'],
-    'li': ['value'],
+    'li': ['value', 'data-list'],
     'table': ['width', 'border', 'cellspacing', 'cellpadding'],
     'th': ['width', 'colspan', 'rowspan', 'scope'],
     'td': ['width', 'colspan', 'rowspan'],
@@ -65,6 +79,178 @@ ALLOWED_STYLES = [
 ]
 
 
+# Sanitized results kept in memory, keyed by content hash
+WYSIWYG_CACHE_ENTRIES = int(os.environ.get("WYSIWYG_CACHE_ENTRIES", "256"))
+# Larger documents are sanitized but not cached
+WYSIWYG_CACHE_MAX_CHARS = int(os.environ.get("WYSIWYG_CACHE_MAX_CHARS", str(2 * 1024 * 1024)))
+
+
+def _compile_attribute_filter(allowed: Dict[str, List[str]]):
+    """
+    Compile ALLOWED_ATTRS into a bleach attribute filter.
+
+    Names ending in ``*`` (e.g. ``data-*``) allow any attribute with that
+    prefix, which bleach's list form does not support.
+    """
+    def split(names):
+        return (
+            frozenset(n for n in names if not n.endswith('*')),
+            tuple(n[:-1] for n in names if n.endswith('*')),
+        )
+
+    global_names, global_prefixes = split(allowed.get('*', []))
+    per_tag = {}
+    for tag, names in allowed.items():
+        if tag == '*':
+            continue
+        names, prefixes = split(names)
+        per_tag[tag] = (names | global_names, prefixes + global_prefixes)
+    default = (global_names, global_prefixes)
+
+    def allow_attribute(tag: str, name: str, value: str) -> bool:
+        names, prefixes = per_tag.get(tag, default)
+        return name in names or (bool(prefixes) and name.startswith(prefixes))
+
+    return allow_attribute
+
+
+_ALLOW_ATTRIBUTE = _compile_attribute_filter(ALLOWED_ATTRS)
+
+# Identifies the policy; stored hashes of content sanitized under another
+# policy no longer match, so that content is sanitized again
+SANITIZER_POLICY_ID = hashlib.sha256(json.dumps(
+    [sorted(ALLOWED_TAGS), {k: sorted(v) for k, v in ALLOWED_ATTRS.items()}, sorted(ALLOWED_STYLES), CSSSanitizer is not None],
+    sort_keys=True
+).encode("utf-8")).hexdigest()[:16]
+
+# Media references in sanitized output, which bleach serializes with
+# double-quoted attributes
+_MEDIA_SRC_RE = re.compile(r'<(img|video)\b[^>]*?\ssrc="([^"]*)"', re.IGNORECASE)
+
+# Cleaner instances hold parser state, so each thread gets its own
+_local = threading.local()
+
+
+def _cleaner() -> Cleaner:
+    cleaner = getattr(_local, "cleaner", None)
+    if cleaner is None:
+        cleaner = Cleaner(
+            tags=frozenset(ALLOWED_TAGS),
+            attributes=_ALLOW_ATTRIBUTE,
+            strip=True,
+            css_sanitizer=CSSSanitizer(allowed_css_properties=frozenset(ALLOWED_STYLES)) if CSSSanitizer else None,
+        )
+        _local.cleaner = cleaner
+    return cleaner
+
+
+def content_hash(html_content: str) -> str:
+    """
+    Hash editor content together with the sanitizer policy.
+
+    Args:
+        html_content: Raw editor HTML
+
+    Returns:
+        Hex digest, stored with sanitized content as ``html_hash``
+    """
+    digest = hashlib.sha256(SANITIZER_POLICY_ID.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(html_content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _extract_media_urls(sanitized_html: str) -> Tuple[Tuple[str, str], ...]:
+    """Local media library references in sanitized HTML, as (type, url)."""
+    found = []
+    seen = set()
+    for tag, src in _MEDIA_SRC_RE.findall(sanitized_html):
+        src = html.unescape(src)
+        # Skip external media and data URIs
+        if src.startswith(('http://', 'https://', 'data:')) or '/static/media/' not in src:
+            continue
+        media_type = 'image' if tag.lower() == 'img' else 'video'
+        if (media_type, src) not in seen:
+            seen.add((media_type, src))
+            found.append((media_type, src))
+    return tuple(found)
+
+
+class _SanitizedCache:
+    """LRU cache of (sanitized HTML, media URLs) keyed by content hash."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Tuple[Tuple[str, str], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_cache = _SanitizedCache(WYSIWYG_CACHE_ENTRIES)
+
+
+def _sanitize(html_content: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    key = content_hash(html_content)
+    entry = _cache.get(key)
+    if entry is None:
+        clean_html = _cleaner().clean(html_content)
+        entry = (clean_html, _extract_media_urls(clean_html))
+        if len(html_content) <= WYSIWYG_CACHE_MAX_CHARS:
+            _cache.put(key, entry)
+    return entry
+
+
+def get_sanitizer_cache_stats() -> Dict[str, int]:
+    """Get hit/miss counters of the sanitized content cache."""
+    return {"entries": len(_cache._entries), "hits": _cache.hits, "misses": _cache.misses}
+
+
+def sanitize_html(html_content: Optional[str]) -> str:
+    """
+    Sanitize HTML with the editor policy.
+
+    Used where HTML is stored outside the page builder, such as product
+    descriptions. Unlike WysiwygService it needs no media library.
+
+    Args:
+        html_content: The HTML content to sanitize
+
+    Returns:
+        The sanitized HTML content
+    """
+    try:
+        return _sanitize(html_content or "")[0]
+    except Exception as e:
+        logger.error(f"Error sanitizing HTML: {str(e)}")
+        # Never pass unsanitized markup through; fall back to escaped text
+        return bleach.clean(html_content or "", tags=[], strip=False)
+
+
 class WysiwygService:
     """Service for handling WYSIWYG editor operations."""
     
@@ -76,55 +262,24 @@ class WysiwygService:
         """
         Sanitize HTML content to prevent XSS attacks.
         
+        Results are cached by content hash, so unchanged content is only
+        sanitized once per process.
+        
         Args:
             html_content: The HTML content to sanitize
             
         Returns:
             The sanitized HTML content
         """
-        try:
-            # Clean the HTML with bleach
-            clean_html = bleach.clean(
-                html_content,
-                tags=ALLOWED_TAGS,
-                attributes=ALLOWED_ATTRS,
-                strip=True
-            )
-            
-            # Parse the cleaned HTML with BeautifulSoup for additional processing
-            soup = BeautifulSoup(clean_html, 'html.parser')
-            
-            # Process styles
-            for tag in soup.find_all(style=True):
-                styles = tag['style']
-                # Filter out disallowed styles
-                allowed_style_dict = {}
-                style_rules = re.findall(r'([^:;]+)\s*:\s*([^;]+)', styles)
-                for prop, value in style_rules:
-                    prop = prop.strip().lower()
-                    if any(prop.startswith(allowed) for allowed in ALLOWED_STYLES):
-                        allowed_style_dict[prop] = value.strip()
-                
-                # Rebuild the style attribute
-                if allowed_style_dict:
-                    tag['style'] = '; '.join(f"{prop}: {value}" for prop, value in allowed_style_dict.items())
-                else:
-                    del tag['style']
-            
-            # Return the sanitized HTML
-            return str(soup)
-        except Exception as e:
-            logger.error(f"Error sanitizing HTML: {str(e)}")
-            # Return the original content if sanitization fails (though this is not ideal)
-            return html_content
+        return sanitize_html(html_content)
     
     def process_editor_content(self, content: str, tenant_id: Optional[str] = None) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Process content from the WYSIWYG editor.
         
         This method:
-        1. Extracts and processes any embedded media
-        2. Sanitizes the HTML content
+        1. Sanitizes the HTML content
+        2. Extracts references to media library items
         3. Returns the processed content and a list of any media IDs referenced
         
         Args:
@@ -135,88 +290,65 @@ class WysiwygService:
             Tuple of (processed content, list of media references)
         """
         try:
-            # First, sanitize the HTML
-            sanitized_content = self.sanitize_html(content)
-            
-            # Parse the sanitized HTML
-            soup = BeautifulSoup(sanitized_content, 'html.parser')
-            
-            # Track media references
-            media_references = []
-            
-            # Process images
-            for img in soup.find_all('img'):
-                # Check if the image has a src attribute
-                if not img.get('src'):
-                    continue
-                
-                src = img['src']
-                
-                # Skip external images and data URIs
-                if src.startswith(('http://', 'https://', 'data:')):
-                    continue
-                
-                # Check if this is a reference to a media item in our library
-                if '/static/media/' in src:
-                    # Extract the filename from the URL
-                    filename = src.split('/')[-1]
-                    
-                    # Try to find the media item by URL
-                    media_items = self.media_service.list_media(
-                        tenant_id=tenant_id,
-                        file_type='image/',
-                        limit=1
-                    )
-                    
-                    for item in media_items:
-                        if item.url == src:
-                            # Add to references
-                            media_references.append({
-                                'id': str(item.id),
-                                'type': 'image',
-                                'url': item.url
-                            })
-                            break
-            
-            # Process videos
-            for video in soup.find_all('video'):
-                # Check if the video has a src attribute
-                if not video.get('src'):
-                    continue
-                
-                src = video['src']
-                
-                # Skip external videos
-                if src.startswith(('http://', 'https://')):
-                    continue
-                
-                # Check if this is a reference to a media item in our library
-                if '/static/media/' in src:
-                    # Extract the filename from the URL
-                    filename = src.split('/')[-1]
-                    
-                    # Try to find the media item by URL
-                    media_items = self.media_service.list_media(
-                        tenant_id=tenant_id,
-                        file_type='video/',
-                        limit=1
-                    )
-                    
-                    for item in media_items:
-                        if item.url == src:
-                            # Add to references
-                            media_references.append({
-                                'id': str(item.id),
-                                'type': 'video',
-                                'url': item.url
-                            })
-                            break
-            
-            return str(soup), media_references
+            sanitized_content, media_urls = _sanitize(content or "")
         except Exception as e:
             logger.error(f"Error processing editor content: {str(e)}")
-            # Return the sanitized content if processing fails
             return self.sanitize_html(content), []
+
+        media_references = []
+        if media_urls:
+            try:
+                items = self.media_service.get_by_urls([url for _, url in media_urls], tenant_id)
+                for media_type, url in media_urls:
+                    item = items.get(url)
+                    if item is not None:
+                        media_references.append({
+                            'id': str(item.id),
+                            'type': media_type,
+                            'url': item.url
+                        })
+            except Exception as e:
+                logger.error(f"Error resolving editor media references: {str(e)}")
+
+        return sanitized_content, media_references
+
+    def prepare_block_content(
+        self,
+        content: Dict[str, Any],
+        tenant_id: Optional[str] = None,
+        previous: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Prepare a content block's HTML for storage.
+        
+        The editor's HTML is kept as ``raw_html`` and the sanitized result is
+        stored as ``html`` with ``html_hash``, so pages render the stored
+        HTML without sanitizing. If the block's stored content was sanitized
+        from the same input under the current policy, it is reused as is.
+        
+        Args:
+            content: Block content with an ``html`` key from the editor
+            tenant_id: Optional tenant ID for media handling
+            previous: The block's currently stored content, if any
+            
+        Returns:
+            Tuple of (content to store, list of media references)
+        """
+        raw_html = content.get("html") or ""
+        prepared = dict(content)
+        digest = content_hash(raw_html)
+
+        if previous and previous.get("html_hash") and previous.get("html") is not None:
+            stored_raw = previous.get("raw_html")
+            current = stored_raw is not None and previous["html_hash"] == content_hash(stored_raw)
+            # The editor sends back either what the author typed or the stored sanitized HTML
+            if current and raw_html in (stored_raw, previous["html"]):
+                prepared.update(html=previous["html"], raw_html=stored_raw, html_hash=previous["html_hash"])
+                return prepared, list(previous.get("media_refs") or [])
+
+        sanitized, media_refs = self.process_editor_content(raw_html, tenant_id)
+        prepared.update(html=sanitized, raw_html=raw_html, html_hash=digest, media_refs=media_refs)
+        return prepared, media_refs
     
     def get_editor_config(self, editor_type: str = 'quill', context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
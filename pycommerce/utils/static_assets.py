@@ -0,0 +1,219 @@
+"""
+Static asset fingerprinting and precompression for PyCommerce.
+
+This module builds a manifest that maps logical static paths (``css/admin.css``)
+to content-hashed copies (``dist/css/admin.3f2a9c1b7d4e.css``), writes gzip and
+brotli variants next to each copy, and resolves template URLs through the manifest.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Dict, Iterable, Optional, Tuple
+
+# Brotli is optional; without it only gzip variants are produced
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "static"
+STATIC_URL_PREFIX = "/static"
+DIST_DIRNAME = "dist"
+MANIFEST_FILENAME = "manifest.json"
+
+# User uploads change in place and build output must not be re-processed
+EXCLUDED_DIRS = {"media", DIST_DIRNAME}
+
+# Text formats that benefit from compression; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".html", ".json", ".svg", ".txt", ".xml", ".map", ".ico"}
+MIN_COMPRESS_SIZE = 256
+
+HASH_LENGTH = 12
+
+# Loaded manifests by static directory, with the manifest mtime they were read at
+_manifest_cache: Dict[str, Tuple[Optional[float], Dict[str, str]]] = {}
+
+
+def fingerprint_path(logical_path: str, content_hash: str) -> str:
+    """
+    Insert a content hash into a file name.
+
+    Args:
+        logical_path: Path relative to the static directory, e.g. ``css/admin.css``
+        content_hash: Hex digest of the file contents
+
+    Returns:
+        The fingerprinted path, e.g. ``css/admin.3f2a9c1b7d4e.css``
+    """
+    root, ext = os.path.splitext(logical_path)
+    return f"{root}.{content_hash[:HASH_LENGTH]}{ext}"
+
+
+def _iter_static_files(static_dir: str) -> Iterable[str]:
+    """Yield static file paths relative to the static directory."""
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        if os.path.abspath(dirpath) == os.path.abspath(static_dir):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.startswith("."):
+                continue
+            full_path = os.path.join(dirpath, filename)
+            yield os.path.relpath(full_path, static_dir).replace(os.sep, "/")
+
+
+def _write_compressed_variants(path: str, data: bytes) -> Dict[str, int]:
+    """
+    Write ``.gz`` and ``.br`` siblings for a file when they are smaller.
+
+    Returns:
+        Mapping of encoding to compressed size for the variants written
+    """
+    variants = {}
+
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz_data) < len(data):
+        with open(f"{path}.gz", "wb") as f:
+            f.write(gz_data)
+        variants["gzip"] = len(gz_data)
+
+    if BROTLI_AVAILABLE:
+        br_data = brotli.compress(data, quality=11)
+        if len(br_data) < len(data):
+            with open(f"{path}.br", "wb") as f:
+                f.write(br_data)
+            variants["br"] = len(br_data)
+
+    return variants
+
+
+def build_static_assets(static_dir: str = STATIC_DIR, clean: bool = True) -> Dict[str, Dict]:
+    """
+    Fingerprint and precompress all static assets and write the manifest.
+
+    Args:
+        static_dir: The static directory to process
+        clean: Whether to remove previous build output first
+
+    Returns:
+        The manifest that was written
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    if clean and os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir, exist_ok=True)
+
+    assets = {}
+    for logical_path in _iter_static_files(static_dir):
+        source = os.path.join(static_dir, logical_path)
+        with open(source, "rb") as f:
+            data = f.read()
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        hashed_path = fingerprint_path(logical_path, content_hash)
+        target = os.path.join(dist_dir, hashed_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+
+        variants = {}
+        ext = os.path.splitext(logical_path)[1].lower()
+        if ext in COMPRESSIBLE_EXTENSIONS and len(data) >= MIN_COMPRESS_SIZE:
+            variants = _write_compressed_variants(target, data)
+
+        assets[logical_path] = {
+            "path": f"{DIST_DIRNAME}/{hashed_path}",
+            "hash": content_hash[:HASH_LENGTH],
+            "size": len(data),
+            "encodings": variants,
+        }
+
+    manifest = {"version": 1, "assets": assets}
+    with open(os.path.join(dist_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    logger.info(f"Built {len(assets)} static assets into {dist_dir}")
+    _manifest_cache.pop(static_dir, None)
+    return manifest
+
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """
+    Load the logical-to-fingerprinted path mapping.
+
+    The mapping is kept in memory and re-read when the manifest's mtime
+    changes, so a rebuild is picked up without restarting the server.
+
+    Args:
+        static_dir: The static directory containing the build output
+
+    Returns:
+        Mapping of logical path to fingerprinted path, empty if no build exists
+    """
+    manifest_path = os.path.join(static_dir, DIST_DIRNAME, MANIFEST_FILENAME)
+    try:
+        mtime = os.stat(manifest_path).st_mtime
+    except OSError:
+        mtime = None
+
+    cached = _manifest_cache.get(static_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    assets = {}
+    if mtime is None:
+        logger.info("No static asset manifest found; serving unversioned static URLs")
+    else:
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            assets = {path: entry["path"] for path, entry in manifest.get("assets", {}).items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Error loading static asset manifest: {e}")
+
+    _manifest_cache[static_dir] = (mtime, assets)
+    return assets
+
+
+def static_url(path: str, static_dir: str = STATIC_DIR) -> str:
+    """
+    Resolve a static asset URL through the manifest.
+
+    Intended for templates, e.g. ``{{ static_url('css/admin.css') }}``.
+
+    Args:
+        path: Path relative to the static directory
+        static_dir: The static directory containing the build output
+
+    Returns:
+        The fingerprinted URL if the asset was built, otherwise the plain URL
+    """
+    logical_path = path.lstrip("/")
+    if logical_path.startswith("static/"):
+        logical_path = logical_path[len("static/"):]
+    resolved = load_manifest(static_dir).get(logical_path, logical_path)
+    return f"{STATIC_URL_PREFIX}/{resolved}"
+
+
+def is_fingerprinted(path: str) -> bool:
+    """
+    Check whether a static path points at immutable build output.
+
+    Args:
+        path: Path relative to the static directory
+
+    Returns:
+        True if the path is a fingerprinted build artifact
+    """
+    if not path.startswith(f"{DIST_DIRNAME}/"):
+        return False
+    stem = os.path.splitext(os.path.basename(path))[0]
+    _, _, suffix = stem.rpartition(".")
+    return len(suffix) == HASH_LENGTH and all(c in "0123456789abcdef" for c in suffix)
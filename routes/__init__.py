@@ -2,80 +2,87 @@
 Routes package for PyCommerce application.
 
 This package contains all the route modules for both admin and storefront.
+
+Admin route modules are registered with a LazyRouterRegistry by URL prefix
+and imported on the first request to that prefix (see
+pycommerce.core.lazy_routes); storefront routes are included at startup.
 """
 
+import importlib
+
 from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 
-# Import module setup functions
-from routes.admin.dashboard import setup_routes as setup_dashboard_routes
-from routes.admin.media import setup_routes as setup_media_routes
-from routes.admin.orders import setup_routes as setup_orders_routes
-from routes.admin.products import setup_routes as setup_admin_products_routes
-from routes.admin.settings import setup_routes as setup_settings_routes
-from routes.admin.stores import setup_routes as setup_stores_admin_routes
-# Import new admin routes
-from routes.admin.store_settings import setup_routes as setup_store_settings_routes
-from routes.admin.theme_settings import setup_routes as setup_theme_settings_routes
-from routes.admin.plugins import setup_routes as setup_plugins_routes
-from routes.admin.ai_config import setup_routes as setup_ai_config_routes
-from routes.admin.users import setup_routes as setup_users_routes
-from routes.admin.customers import setup_routes as setup_customers_routes
-from routes.admin.marketing import setup_routes as setup_marketing_routes
-from routes.admin.analytics import setup_routes as setup_analytics_routes
-from routes.admin.shipping import setup_routes as setup_shipping_routes
-from routes.admin.reports import setup_routes as setup_reports_routes
-from routes.admin.returns import setup_routes as setup_returns_routes
-from routes.admin.market_analysis import setup_routes as setup_market_analysis_routes
-from routes.admin.categories import setup_routes as setup_categories_routes
-from routes.admin.tenants import setup_routes as setup_tenants_routes
-# We've moved the test_products implementation to products.py
+from pycommerce.core.lazy_routes import LazyRouterRegistry, serves_group
+
+# Admin route modules and the URL prefixes they serve
+ADMIN_ROUTE_MODULES = [
+    ("routes.admin.dashboard", ["/admin/dashboard", "/admin/change-store"]),
+    ("routes.admin.media", ["/admin/media", "/admin/api"]),
+    ("routes.admin.orders", ["/admin/orders"]),
+    # Using updated products implementation
+    ("routes.admin.products", ["/admin/products"]),
+    ("routes.admin.settings", ["/admin/settings"]),
+    ("routes.admin.stores", ["/admin/stores"]),
+    ("routes.admin.store_settings", ["/admin/store-settings", "/admin/shipping-settings", "/admin/ai-settings", "/admin/api"]),
+    ("routes.admin.theme_settings", ["/admin/theme-settings"]),
+    ("routes.admin.plugins", ["/admin/plugins"]),
+    ("routes.admin.ai_config", ["/admin/ai-config"]),
+    ("routes.admin.users", ["/admin/users"]),
+    ("routes.admin.customers", ["/admin/customers"]),
+    ("routes.admin.marketing", ["/admin/marketing", "/admin/newsletters"]),
+    ("routes.admin.analytics", ["/admin/analytics"]),
+    ("routes.admin.shipping", ["/admin/shipping"]),
+    ("routes.admin.returns", ["/admin/returns", "/admin/orders"]),
+    ("routes.admin.reports", ["/admin/reports"]),
+    ("routes.admin.market_analysis", ["/admin/market-analysis"]),
+    ("routes.admin.categories", ["/admin/categories"]),
+    ("routes.admin.tenants", ["/admin/tenants"]),
+]
+
+# Storefront route modules, included at startup
+STOREFRONT_ROUTE_MODULES = [
+    "routes.storefront.home",
+    "routes.storefront.products",
+    "routes.storefront.stores",
+    "routes.storefront.cart",
+    "routes.storefront.checkout",
+]
+
+
+def get_router_registry(app: FastAPI, templates: Jinja2Templates) -> LazyRouterRegistry:
+    """
+    Get the admin router registry for an application, creating it if needed.
+
+    Args:
+        app: FastAPI application
+        templates: Jinja2Templates for template rendering
+
+    Returns:
+        The application's LazyRouterRegistry
+    """
+    registry = getattr(app.state, "router_registry", None)
+    if registry is None:
+        registry = LazyRouterRegistry(app, templates, group="admin")
+        app.state.router_registry = registry
+    return registry
 
-# Import storefront routes
-from routes.storefront.cart import setup_routes as setup_cart_routes
-from routes.storefront.checkout import setup_routes as setup_checkout_routes
-from routes.storefront.products import setup_routes as setup_products_routes
-from routes.storefront.stores import setup_routes as setup_stores_routes
-from routes.storefront.home import setup_routes as setup_home_routes
 
 def register_routes(app: FastAPI, templates: Jinja2Templates):
     """
     Register all routes with the FastAPI application.
-    
+
     Args:
         app: FastAPI application
         templates: Jinja2Templates for template rendering
     """
-    # Register admin routes
-    app.include_router(setup_dashboard_routes(templates))
-    app.include_router(setup_media_routes(templates))
-    app.include_router(setup_orders_routes(templates))
-    # Using updated products implementation
-    app.include_router(setup_admin_products_routes(templates))
-    app.include_router(setup_settings_routes(templates))
-    app.include_router(setup_stores_admin_routes(templates))
-    
-    # Register new admin routes
-    app.include_router(setup_store_settings_routes(templates))
-    app.include_router(setup_theme_settings_routes(templates))
-    app.include_router(setup_plugins_routes(templates))
-    app.include_router(setup_ai_config_routes(templates))
-    app.include_router(setup_users_routes(templates))
-    app.include_router(setup_customers_routes(templates))
-    app.include_router(setup_marketing_routes(templates))
-    app.include_router(setup_analytics_routes(templates))
-    
-    # Register shipping, returns, reports, market analysis, and categories routes
-    app.include_router(setup_shipping_routes(templates))
-    app.include_router(setup_returns_routes(templates))
-    app.include_router(setup_reports_routes(templates))
-    app.include_router(setup_market_analysis_routes(templates))
-    app.include_router(setup_categories_routes(templates))
-    app.include_router(setup_tenants_routes(templates))
-    
+    # Register admin routes (imported on first request unless LAZY_ROUTERS=false)
+    registry = get_router_registry(app, templates)
+    for module_path, prefixes in ADMIN_ROUTE_MODULES:
+        registry.register(module_path, prefixes)
+
     # Register storefront routes
-    app.include_router(setup_home_routes(templates))
-    app.include_router(setup_products_routes(templates))
-    app.include_router(setup_stores_routes(templates))
-    app.include_router(setup_cart_routes(templates))
-    app.include_router(setup_checkout_routes(templates))
\ No newline at end of file
+    if serves_group("storefront"):
+        for module_path in STOREFRONT_ROUTE_MODULES:
+            module = importlib.import_module(module_path)
+            app.include_router(module.setup_routes(templates))
@@ -3,6 +3,7 @@ Admin routes for AI-generated content.
 
 This module provides routes for generating content using AI integrations.
 """
+import asyncio
 import logging
 import json
 from typing import Dict, Optional, List, Any
@@ -13,6 +14,8 @@ from fastapi.templating import Jinja2Templates
 
 # Import our new AI Service
 from pycommerce.services.ai_service import AIService
+from pycommerce.services.ai_job_service import get_ai_job_service, get_ai_job_runner
+from pycommerce.core.exceptions import AIError
 
 # Import AI provider with error handling (legacy support)
 try:
@@ -102,7 +105,7 @@ async def generate_content_api(request: Request):
 
         # Generate content using our AI service
         logger.info(f"Generating content with prompt: {prompt[:50]}... (style: {style})")
-        result = ai_service.generate_content(prompt, style, tenant_id)
+        result = await asyncio.to_thread(ai_service.generate_content, prompt, style, tenant_id)
 
         if "error" in result:
             return JSONResponse(
@@ -169,7 +172,7 @@ async def generate_content_form(
         # Try using our new AI service first
         try:
             style = "informative"  # Default style
-            result = ai_service.generate_content(generation_prompt, style, tenant_id)
+            result = await asyncio.to_thread(ai_service.generate_content, generation_prompt, style, tenant_id)
             
             if "error" not in result and "content" in result:
                 return {
@@ -183,7 +186,7 @@ async def generate_content_form(
         # Fall back to legacy AI provider if our service fails
         try:
             ai_provider = get_ai_provider_instance(tenant_id)
-            content = ai_provider.generate_text(generation_prompt)
+            content = await asyncio.to_thread(ai_provider.generate_text, generation_prompt)
             
             return {
                 "success": True,
@@ -255,7 +258,7 @@ async def enhance_content(
             )
 
         # Enhance content
-        enhanced_content = ai_provider.enhance_text(content, instructions)
+        enhanced_content = await asyncio.to_thread(ai_provider.enhance_text, content, instructions)
 
         return {
             "success": True,
@@ -314,6 +317,116 @@ async def update_ai_config(request: Request):
             status_code=500
         )
 
+def _selected_tenant_id(request: Request) -> Optional[str]:
+    """Get the ID of the tenant selected in the admin session, if any."""
+    tenant_slug = request.session.get("selected_tenant") if hasattr(request, "session") else None
+    if tenant_slug and tenant_slug != "all":
+        tenant = tenant_manager.get_by_slug(tenant_slug)
+        if tenant:
+            return str(tenant.id)
+    return None
+
+
+@router.post("/admin/api/ai/jobs")
+async def create_ai_job(request: Request):
+    """
+    Queue a batch AI generation job.
+
+    The JSON body is either ``{"kind": "generate" | "enhance", "prompts":
+    [...], "instructions": ...}`` or ``{"kind": "product_descriptions",
+    "product_ids": [...], "missing_only": bool, "tone": ..., "length": ...,
+    "apply": bool}``; ``"provider": "mock"`` runs the job offline. Poll
+    ``/admin/api/ai/jobs/{job_id}`` for progress.
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        return JSONResponse(content={"success": False, "error": "Invalid JSON body"}, status_code=400)
+
+    tenant_id = _selected_tenant_id(request)
+    user = request.session.get("user") or {}
+    kind = data.get("kind", "generate")
+    service = get_ai_job_service()
+
+    try:
+        if kind == "product_descriptions":
+            if not tenant_id:
+                return JSONResponse(
+                    content={"success": False, "error": "Select a store to generate product descriptions"},
+                    status_code=400
+                )
+            job = await asyncio.to_thread(
+                service.create_product_description_job,
+                tenant_id,
+                product_ids=data.get("product_ids"),
+                missing_only=bool(data.get("missing_only", False)),
+                tone=data.get("tone", "professional"),
+                length=data.get("length", "short"),
+                apply=bool(data.get("apply", False)),
+                provider=data.get("provider"),
+                created_by=user.get("email"),
+            )
+        else:
+            prompts = data.get("prompts") or []
+            if not isinstance(prompts, list):
+                return JSONResponse(content={"success": False, "error": "prompts must be a list"}, status_code=400)
+            options = {"instructions": data.get("instructions")} if kind == "enhance" else {}
+            if data.get("provider"):
+                options["provider"] = data["provider"]
+            items = [p if isinstance(p, dict) else {"prompt": str(p)} for p in prompts]
+            job = await asyncio.to_thread(service.create_job, kind, items, tenant_id, options, user.get("email"))
+    except (AIError, ValueError) as e:
+        return JSONResponse(content={"success": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Error creating AI job: {str(e)}")
+        return JSONResponse(content={"success": False, "error": f"Error creating AI job: {str(e)}"}, status_code=500)
+
+    get_ai_job_runner().wake()
+    return JSONResponse(content={"success": True, "job": job}, status_code=202)
+
+
+@router.get("/admin/api/ai/jobs")
+async def list_ai_jobs(request: Request, limit: int = Query(20, ge=1, le=100)):
+    """List recent AI jobs of the selected store."""
+    jobs = await asyncio.to_thread(get_ai_job_service().list_jobs, _selected_tenant_id(request), limit)
+    return JSONResponse(content={"success": True, "jobs": jobs})
+
+
+@router.get("/admin/api/ai/jobs/{job_id}")
+async def get_ai_job(request: Request, job_id: str):
+    """Get an AI job's status and progress."""
+    job = await asyncio.to_thread(get_ai_job_service().get_job, job_id, _selected_tenant_id(request))
+    if job is None:
+        return JSONResponse(content={"success": False, "error": "Job not found"}, status_code=404)
+    return JSONResponse(content={"success": True, "job": job})
+
+
+@router.get("/admin/api/ai/jobs/{job_id}/results")
+async def get_ai_job_results(
+    request: Request,
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[str] = None
+):
+    """Get a page of an AI job's results in submission order."""
+    results = await asyncio.to_thread(
+        get_ai_job_service().get_results, job_id, _selected_tenant_id(request), offset, limit, status
+    )
+    if results is None:
+        return JSONResponse(content={"success": False, "error": "Job not found"}, status_code=404)
+    return JSONResponse(content={"success": True, "results": results, "offset": offset})
+
+
+@router.post("/admin/api/ai/jobs/{job_id}/cancel")
+async def cancel_ai_job(request: Request, job_id: str):
+    """Cancel an AI job's pending items."""
+    cancelled = await asyncio.to_thread(get_ai_job_service().cancel_job, job_id, _selected_tenant_id(request))
+    if not cancelled:
+        return JSONResponse(content={"success": False, "error": "Job not found or already finished"}, status_code=404)
+    return JSONResponse(content={"success": True})
+
+
 def _build_prompt(content_type: str, user_prompt: str, tone: str, length: str) -> str:
     """
     Build a complete prompt for the AI.
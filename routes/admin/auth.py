@@ -9,9 +9,7 @@ from fastapi import APIRouter, Request, Response, HTTPException, Depends, Form,
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_302_FOUND, HTTP_401_UNAUTHORIZED
-import jwt
-from datetime import datetime, timedelta
-import secrets
+from datetime import timedelta
 import hashlib
 
 # Template setup will be passed from main app
@@ -31,46 +29,34 @@ staff_or_admin_required_middleware = None
 # Import models and managers
 try:
     from pycommerce.models.user import UserManager, UserRole
+    from pycommerce.services.password_hashing import PasswordVerifierBusy
     # Initialize managers
     user_manager = UserManager()
 except ImportError as e:
     logger.error(f"Error importing user modules: {str(e)}")
 
-# JWT settings (should be moved to environment variables in production)
-JWT_SECRET = secrets.token_hex(32)  # Generate a random secret key
-JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Longer session for admin users
 
+ADMIN_ROLES = (UserRole.ADMIN, UserRole.STAFF)
 
-def create_access_token(user_id: str, role: str, expires_delta: Optional[timedelta] = None) -> str:
+
+def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token for a user.
     
+    The token embeds the user's role and active flag, so admin requests can
+    be authorized without a user lookup.
+    
     Args:
         user_id: The ID of the user
-        role: The user's role
         expires_delta: Optional expiration time delta
         
     Returns:
         The JWT access token
     """
-    # Set the expiration time
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    # Create the JWT payload
-    payload = {
-        "sub": str(user_id),
-        "exp": expire,
-        "iat": datetime.utcnow(),
-        "role": role,
-        "type": "access"
-    }
-    
-    # Encode and return the token
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return user_manager.create_access_token(
+        user_id, expires_delta=expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
 
 
 def decode_token(token: str):
@@ -81,13 +67,21 @@ def decode_token(token: str):
         token: The JWT token to decode
         
     Returns:
-        The decoded payload, or None if the token is invalid
+        The decoded payload, or None if the token is invalid or revoked
     """
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.PyJWTError:
-        return None
+    return user_manager.decode_token(token)
+
+
+def _session_user(user) -> dict:
+    """Get the session representation of a user."""
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "role": user.role,
+        "full_name": user.full_name
+    }
 
 
 async def get_current_user(request: Request):
@@ -100,39 +94,37 @@ async def get_current_user(request: Request):
     Returns:
         The current user, or None if not authenticated
     """
-    # Check if authentication info is already in the session
-    if "user" in request.session:
-        return request.session["user"]
+    session_user = request.session.get("user")
     
     # Check for access token in cookies
     access_token = request.cookies.get("admin_access_token")
     if not access_token:
-        return None
+        return session_user
     
-    # Decode the token
-    payload = decode_token(access_token)
-    if not payload:
+    # Verify the token; current embedded claims need no user lookup
+    try:
+        principal = user_manager.verify_principal(access_token)
+    except Exception as e:
+        # The revocation state could not be read; treat the request as signed out
+        logger.error(f"Error checking access token: {str(e)}")
         return None
+    if principal is None or principal.role not in ADMIN_ROLES:
+        # Revoked, expired or no longer an admin: drop the cached session user
+        request.session.pop("user", None)
+        return None
+    
+    # The session already holds this user
+    if session_user and session_user.get("id") == principal.user_id and session_user.get("role") == principal.role:
+        return session_user
     
     # Get the user
     try:
-        user_id = payload.get("sub")
-        user = user_manager.get(user_id)
-        
-        # Verify the user is active and has admin privileges
-        if not user.is_active or user.role not in [UserRole.ADMIN, UserRole.STAFF]:
+        user = user_manager.verify_token(access_token)
+        if user is None:
             return None
         
         # Store user in session for efficiency
-        request.session["user"] = {
-            "id": str(user.id),
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "role": user.role,
-            "full_name": user.full_name
-        }
-        
+        request.session["user"] = _session_user(user)
         return request.session["user"]
     except Exception as e:
         logger.warning(f"Error retrieving user from token: {str(e)}")
@@ -205,8 +197,16 @@ def setup_routes(template_instance: Jinja2Templates):
     ):
         """Process admin login."""
         try:
-            # Authenticate user
-            auth_result = user_manager.authenticate(email, password)
+            # Authenticate user (password checks run off the event loop)
+            try:
+                auth_result = await user_manager.authenticate_async(email, password)
+            except PasswordVerifierBusy:
+                logger.warning(f"Login check refused, verifier busy: {email}")
+                return templates.TemplateResponse(
+                    "admin/login.html",
+                    {"request": request, "error": "Too many login attempts right now. Please try again."},
+                    status_code=503
+                )
             
             if not auth_result:
                 logger.warning(f"Failed login attempt for {email}")
@@ -218,7 +218,7 @@ def setup_routes(template_instance: Jinja2Templates):
             user, access_token = auth_result
             
             # Check if user has admin or staff role
-            if user.role not in [UserRole.ADMIN, UserRole.STAFF]:
+            if user.role not in ADMIN_ROLES:
                 logger.warning(f"Non-admin user attempted to log in to admin: {email}")
                 return templates.TemplateResponse(
                     "admin/login.html",
@@ -228,7 +228,6 @@ def setup_routes(template_instance: Jinja2Templates):
             # Generate a custom token with role information
             token = create_access_token(
                 user_id=str(user.id),
-                role=user.role,
                 expires_delta=timedelta(days=30 if remember else 1)
             )
             
@@ -243,14 +242,7 @@ def setup_routes(template_instance: Jinja2Templates):
             )
             
             # Store user in session
-            request.session["user"] = {
-                "id": str(user.id),
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "role": user.role,
-                "full_name": user.full_name
-            }
+            request.session["user"] = _session_user(user)
             
             logger.info(f"Admin login successful: {email}")
             return response
@@ -269,6 +261,11 @@ def setup_routes(template_instance: Jinja2Templates):
         if "user" in request.session:
             del request.session["user"]
         
+        # Revoke the token so a copied cookie stops working
+        access_token = request.cookies.get("admin_access_token")
+        if access_token:
+            user_manager.revoke_token(access_token)
+        
         # Clear auth cookie
         response = RedirectResponse(url="/admin/login", status_code=HTTP_302_FOUND)
         response.delete_cookie(key="admin_access_token", path="/")
@@ -30,7 +30,7 @@ from pycommerce.models.tenant import TenantManager
 from pycommerce.core.db import get_session
 from pycommerce.services.query_optimizer import (
     get_order_with_items_and_notes,
-    get_orders_summary_for_tenant,
+    get_order_summaries,
     get_order_items_with_products,
     invalidate_order_cache,
     invalidate_tenant_orders_cache,
@@ -53,11 +53,6 @@ def get_order_items(order_id):
     order_data = get_order_with_items_and_notes(str(order_id))
     return order_data.get("items", [])
 
-def get_order_items_count(order_id):
-    """Get the count of items for an order using the optimized query service."""
-    order_data = get_order_with_items_and_notes(str(order_id))
-    return len(order_data.get("items", []))
-
 @router.get("/orders", response_class=HTMLResponse)
 async def admin_orders(
     request: Request,
@@ -65,6 +60,10 @@ async def admin_orders(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     email: Optional[str] = None,
+    sort: str = "created_at",
+    direction: str = "desc",
+    page: int = 1,
+    per_page: int = 50,
     status_message: Optional[str] = None,
     status_type: str = "info"
 ):
@@ -92,12 +91,12 @@ async def admin_orders(
                 status_code=303
             )
 
-    # Convert status string to enum if provided
+    # Orders store their status by name
     order_status = None
     if status:
-        try:
-            order_status = OrderStatus(status)
-        except ValueError:
+        if status.upper() in OrderStatus.__members__:
+            order_status = status.upper()
+        else:
             logger.warning(f"Invalid order status: {status}")
 
     # Get orders filtered by tenant and other criteria
@@ -111,80 +110,22 @@ async def admin_orders(
     if email:
         filters['customer_email'] = email
 
-    if selected_tenant_slug.lower() == "all":
-        # Get orders for all stores
-        from routes.admin.tenant_utils import get_orders_for_all_tenants
-        logger.info("Getting orders for all stores")
-        
-        orders = get_orders_for_all_tenants(
-            tenant_manager=tenant_manager,
-            order_manager=order_manager,
-            logger=logger,
-            filters=filters
-        )
-        
-        # Serialize orders for template
-        orders_data = []
-        for order in orders:
-            # Get items count using our session-safe function
-            items_count = get_order_items_count(str(order.id))
-
-            # Try to extract both customer_name and customer_email safely
-            customer_name = ""
-            customer_email = ""
-            status_value = ""
-
-            # Safe extraction with error handling for better stability
-            try:
-                customer_name = order.customer_name if order.customer_name else ""
-            except:
-                pass
-
-            try:
-                customer_email = order.customer_email if order.customer_email else ""
-            except:
-                pass
-
-            # Handle status whether it's an enum value, string, or int
-            try:
-                if hasattr(order.status, 'value'):
-                    # It's an enum
-                    status_value = order.status.value
-                elif isinstance(order.status, int):
-                    # It's already an int
-                    status_value = order.status
-                else:
-                    # It's a string or something else
-                    status_value = order.status
-            except:
-                # Default to a safe value if all fails
-                status_value = 1  # PENDING
-
-            orders_data.append({
-                "id": str(order.id),
-                "customer_name": customer_name,
-                "customer_email": customer_email,
-                "total": order.total,
-                "status": status_value,
-                "items_count": items_count,
-                "created_at": order.created_at
-            })
-    else:
-        # Get orders for specific tenant using optimized query
-        logger.info(f"Getting orders for tenant: {tenant.name} using optimized query")
-        
-        # Use the optimized query function that combines multiple queries and uses caching
-        orders_data = get_orders_summary_for_tenant(
-            tenant_id=str(tenant.id),
-            filters=filters
-        )
+    # One page of orders with item and note counts, across all stores when "all" is selected
+    all_stores = selected_tenant_slug.lower() == "all"
+    logger.info(f"Getting orders for {'all stores' if all_stores else f'tenant: {tenant.name}'}")
+    summary = get_order_summaries(
+        tenant_id=None if all_stores else str(tenant.id),
+        filters=filters,
+        sort=sort,
+        descending=direction != "asc",
+        page=page,
+        per_page=per_page
+    )
+    orders_data = summary["orders"]
 
     # Get all possible order statuses for filter dropdown
     status_options = ["PENDING", "PROCESSING", "PAID", "SHIPPED", "DELIVERED", "COMPLETED", "CANCELLED", "REFUNDED"]
 
-    # Get all tenants for the store selector
-    tenants = tenant_manager.list()
-    
     # Get all tenants for dropdown from tenant_utils
     from routes.admin.tenant_utils import get_all_tenants
     all_tenants = get_all_tenants()
@@ -211,6 +152,14 @@ async def admin_orders(
                 "date_to": date_to,
                 "email": email
             },
+            "pagination": {
+                "page": summary["page"],
+                "per_page": summary["per_page"],
+                "pages": summary["pages"],
+                "total": summary["total"],
+                "sort": summary["sort"],
+                "direction": "desc" if summary["descending"] else "asc"
+            },
             "status_message": status_message,
             "status_type": status_type,
             "cart_item_count": request.session.get("cart_item_count", 0),
@@ -457,124 +406,22 @@ async def admin_update_order_status(request: Request, order_id: str, status: str
         previous_status = order.status
 
         # Update order status
-        success = order_manager.update_status(order_id, order_status)
+        # Store links in emails fall back to this host if the tenant has no domain
+        success = order_manager.update_status(
+            order_id, order_status, store_url=f"https://{request.headers.get('host')}"
+        )
         if success:
             # Invalidate cached data for this order to ensure fresh data on next load
             invalidate_order_cache(order_id)
             # Also invalidate the tenant's order summary cache
             invalidate_tenant_orders_cache(str(tenant.id))
             
-            # If status changed to SHIPPED, send shipping notification email
+            # Shipping notification emails go out from the event bus
             if order_status == "SHIPPED" and previous_status != "SHIPPED":
-                logger.info(f"Order status changed to SHIPPED, sending shipping notification email")
-                try:
-                    # Get updated order after status change
-                    updated_order = order_manager.get_by_id(order_id)
-
-                    # Import needed services
-                    from pycommerce.services.mail_service import get_email_service, init_email_service, EmailConfig
-                    from pycommerce.models.shipment import ShipmentManager, Shipment
-
-                    # Get shipment manager and find or create shipment
-                    shipment_manager = ShipmentManager()
-                    shipments = shipment_manager.get_shipments_for_order(order_id)
-
-                    # Use first shipment or create a new one if none exists
-                    if shipments and len(shipments) > 0:
-                        shipment = shipments[0]
-                        logger.info(f"Using existing shipment {shipment.id}")
-                    else:
-                        # Create a new shipment with basic information
-                        try:
-                            shipping_method = "Standard Shipping"
-                            if hasattr(updated_order, 'shipping_method') and updated_order.shipping_method:
-                                shipping_method = updated_order.shipping_method
-
-                            # Create shipment
-                            shipment = shipment_manager.create_shipment(
-                                order_id=order_id,
-                                shipping_method=shipping_method,
-                                tracking_number=getattr(updated_order, 'tracking_number', None),
-                                carrier=getattr(updated_order, 'shipping_carrier', "Default Carrier")
-                            )
-                            logger.info(f"Created new shipment {shipment.id}")
-
-                            # Add order items to shipment
-                            order_items = get_order_items(order_id) 
-                            for item in order_items:
-                                shipment_manager.add_items_to_shipment(
-                                    shipment_id=shipment.id,
-                                    items=[{
-                                        "order_item_id": str(item.get("id", item.get("order_item_id"))),
-                                        "product_id": str(item.get("product_id")),
-                                        "quantity": item.get("quantity", 1)
-                                    }]
-                                )
-                        except Exception as ship_err:
-                            logger.error(f"Error creating shipment: {str(ship_err)}")
-                            # Continue even if shipment creation fails, use a mock shipment for the email
-                            shipment = Shipment(
-                                id="default",
-                                order_id=order_id,
-                                shipping_method="Standard Shipping",
-                                carrier=getattr(updated_order, 'shipping_carrier', "Default Carrier"),
-                                tracking_number=getattr(updated_order, 'tracking_number', "Not available")
-                            )
-
-                    # Initialize email service
-                    email_service = get_email_service()
-                    if not email_service:
-                        email_service = init_email_service()
-
-                    # Default to test mode if SMTP is not configured
-                    if not email_service.config.enabled:
-                        email_service.enable_test_mode()
-                        logger.warning("Email service in test mode, emails will not be sent")
-
-                    # Get customer email
-                    customer_email = getattr(updated_order, 'customer_email', None)
-                    if not customer_email:
-                        logger.warning(f"No customer email available for order {order_id}")
-                        return RedirectResponse(
-                            url=f"/admin/orders/{order_id}?status_message=Order+status+updated+but+no+customer+email+available+for+notification&status_type=warning", 
-                            status_code=303
-                        )
-
-                    # Get store information
-                    store_name = tenant.name if tenant else "Our Store"
-                    store_url = tenant.domain if tenant and tenant.domain else f"https://{request.headers.get('host')}"
-
-                    # Send shipping notification email
-                    email_sent = email_service.send_shipping_notification(
-                        order=updated_order,
-                        shipment=shipment,
-                        to_email=customer_email,
-                        store_name=store_name,
-                        store_url=store_url,
-                        contact_email=None  # Use default from config
-                    )
-
-                    if email_sent:
-                        logger.info(f"Shipping notification email sent to {customer_email}")
-                        return RedirectResponse(
-                            url=f"/admin/orders/{order_id}?status_message=Order+status+updated+and+shipping+notification+email+sent&status_type=success", 
-                            status_code=303
-                        )
-                    else:
-                        logger.warning(f"Failed to send shipping notification email")
-                        return RedirectResponse(
-                            url=f"/admin/orders/{order_id}?status_message=Order+status+updated+but+shipping+notification+email+failed&status_type=warning", 
-                            status_code=303
-                        )
-
-                except Exception as email_err:
-                    logger.error(f"Error sending shipping notification: {str(email_err)}")
-                    import traceback
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    return RedirectResponse(
-                        url=f"/admin/orders/{order_id}?status_message=Order+status+updated+but+shipping+email+failed:+{str(email_err)}&status_type=warning", 
-                        status_code=303
-                    )
+                return RedirectResponse(
+                    url=f"/admin/orders/{order_id}?status_message=Order+status+updated,+shipping+notification+email+queued&status_type=success", 
+                    status_code=303
+                )
 
             # Default success response
             return RedirectResponse(
@@ -773,7 +620,8 @@ async def admin_update_fulfillment(
             order_id=order_id,
             status=shipping_status,
             tracking_number=tracking_number,
-            carrier=shipping_carrier
+            carrier=shipping_carrier,
+            store_url=f"https://{request.headers.get('host')}"
         )
 
         if success:
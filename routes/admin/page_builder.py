@@ -14,6 +14,7 @@ from fastapi.templating import Jinja2Templates
 from pycommerce.models.page_builder import PageManager, PageSectionManager, ContentBlockManager, PageTemplateManager, Page, PageTemplate
 from pycommerce.models.tenant import TenantManager
 from pycommerce.services.wysiwyg_service import WysiwygService
+from pycommerce.utils.static_assets import static_url
 from pycommerce.services.ai_service import AIService
 from pycommerce.core.db import SessionLocal
 
@@ -204,6 +205,7 @@ def setup_routes(jinja_templates: Jinja2Templates = None):
         template_dir = os.path.join(base_dir, "templates")
         if os.path.exists(template_dir):
             templates = Jinja2Templates(directory=template_dir)
+            templates.env.globals["static_url"] = static_url
             logger.info(f"Created fallback templates object with directory: {template_dir}")
     else:
         logger.info("Templates setup complete")
@@ -625,9 +627,9 @@ async def page_create(
             )
 
         # Process the content if provided
-        processed_content = None
+        block_content = None
         if content:
-            processed_content, media_refs = wysiwyg_service.process_editor_content(content, tenant_id)
+            block_content, media_refs = wysiwyg_service.prepare_block_content({"html": content}, tenant_id)
 
         # Create initial layout data
         layout_data = None
@@ -656,7 +658,7 @@ async def page_create(
         page = page_manager.create(page_data)
 
         # If we have content, create a default section with a text block
-        if processed_content and page:
+        if block_content and page:
             # Create a main content section
             section_data = {
                 "page_id": str(page.id),
@@ -675,9 +677,7 @@ async def page_create(
                 "section_id": str(section.id),
                 "block_type": "text",
                 "position": 0,
-                "content": {
-                    "html": processed_content
-                },
+                "content": block_content,
                 "settings": {
                     "width": "normal"
                 }
@@ -1583,9 +1583,7 @@ async def create_block(
             except:
                 pass
 
-            html_content = block_data["content"]["html"]
-            processed_html, media_refs = wysiwyg_service.process_editor_content(html_content, tenant_id)
-            block_data["content"]["html"] = processed_html
+            block_data["content"], media_refs = wysiwyg_service.prepare_block_content(block_data["content"], tenant_id)
 
         block = block_manager.create(block_data)
         return {
@@ -1649,6 +1647,7 @@ async def update_block(
         # If there's HTML content, process it
         if "content" in block_data and "html" in block_data["content"]:
             tenant_id = None
+            block = None
             try:
                 # Try to get the tenant ID from the block
                 block = block_manager.get(block_id)
@@ -1661,9 +1660,11 @@ async def update_block(
             except:
                 pass
 
-            html_content = block_data["content"]["html"]
-            processed_html, media_refs = wysiwyg_service.process_editor_content(html_content, tenant_id)
-            block_data["content"]["html"] = processed_html
+            # Unchanged HTML keeps its stored sanitized version
+            previous = block.content if block is not None and isinstance(block.content, dict) else None
+            block_data["content"], media_refs = wysiwyg_service.prepare_block_content(
+                block_data["content"], tenant_id, previous
+            )
 
         block = block_manager.update(block_id, block_data)
         if not block:
@@ -14,7 +14,9 @@ from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 
 from pycommerce.models.page_builder import PageManager, PageSectionManager, ContentBlockManager, PageTemplateManager
 from pycommerce.models.tenant import TenantManager
+from pycommerce.core.exceptions import PageError, PageNotFoundError, PageVersionConflictError
 from pycommerce.services.ai_service import AIService
+from pycommerce.services.wysiwyg_service import WysiwygService
 from pycommerce.core.db import SessionLocal
 
 logger = logging.getLogger(__name__)
@@ -22,8 +24,9 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/admin/api/pages", tags=["admin", "pages", "api"])
 
-# Initialize AI service
+# Initialize services
 ai_service = AIService()
+wysiwyg_service = WysiwygService()
 
 def get_managers():
     """Get managers with a fresh session."""
@@ -383,6 +386,100 @@ async def editor_heartbeat(page_id: str, request: Request, data: Dict[str, Any]
             "error": str(e)
         }, status_code=500)
 
+@router.get("/{page_id}/tree", response_class=JSONResponse)
+async def get_page_tree(page_id: str):
+    """Get a page's sections and blocks together with its version."""
+    managers = get_managers()
+    
+    try:
+        tree = managers["page_manager"].get_tree(page_id)
+        if not tree:
+            return JSONResponse({
+                "success": False,
+                "error": "Page not found"
+            }, status_code=404)
+        
+        return JSONResponse({"success": True, **tree})
+    
+    except Exception as e:
+        logger.error(f"Error getting page tree: {str(e)}")
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=500)
+    finally:
+        managers["session"].close()
+
+@router.put("/{page_id}/tree", response_class=JSONResponse)
+async def save_page_tree(page_id: str, data: Dict[str, Any] = Body(...)):
+    """
+    Save the page editor's whole section/block tree in one transaction.
+    
+    Expects ``version`` (the version returned by GET /{page_id}/tree),
+    ``sections`` and optionally ``page`` fields. Responds with 409 and the
+    current version if the page was saved by someone else in the meantime.
+    """
+    version = data.get("version")
+    sections = data.get("sections")
+    if not isinstance(version, int) or not isinstance(sections, list):
+        return JSONResponse({
+            "success": False,
+            "error": "A page version and a list of sections are required"
+        }, status_code=400)
+    
+    managers = get_managers()
+    
+    try:
+        page_manager = managers["page_manager"]
+        page = page_manager.get(page_id)
+        if not page:
+            return JSONResponse({
+                "success": False,
+                "error": "Page not found"
+            }, status_code=404)
+        
+        # Sanitize block HTML as the per-block routes do; unchanged HTML
+        # keeps its stored sanitized version
+        tree = page_manager.get_tree(page_id) or {"sections": []}
+        stored_content = {
+            block["id"]: block["content"]
+            for section in tree["sections"] for block in section["blocks"]
+        }
+        tenant_id = str(page.tenant_id)
+        for section in sections:
+            for block in section.get("blocks") or []:
+                content = block.get("content")
+                if isinstance(content, dict) and "html" in content:
+                    previous = stored_content.get(str(block.get("id")))
+                    block["content"], _ = wysiwyg_service.prepare_block_content(
+                        content, tenant_id, previous if isinstance(previous, dict) else None
+                    )
+        
+        result = page_manager.save_tree(page_id, version, sections, data.get("page"))
+    except PageVersionConflictError as e:
+        return JSONResponse({
+            "success": False,
+            "error": "Page was modified by another editor",
+            "current_version": e.current_version
+        }, status_code=409)
+    except PageNotFoundError as e:
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=404)
+    except PageError as e:
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=500)
+    finally:
+        managers["session"].close()
+    
+    from pycommerce.services.enhanced_query_optimizer import invalidate_page_cache
+    invalidate_page_cache(result["page_id"])
+    
+    return JSONResponse({"success": True, **result})
+
 # Block templates routes
 @router.get("/block-templates", response_class=JSONResponse)
 async def list_block_templates(request: Request):
@@ -12,6 +12,7 @@ from fastapi.templating import Jinja2Templates
 
 from pycommerce.models.tenant import TenantManager
 from pycommerce.plugins import get_plugin_registry
+from pycommerce.plugins.payment.transport import get_transport_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -218,6 +219,19 @@ async def configure_plugin(
             status_code=status.HTTP_303_SEE_OTHER
         )
 
+
+@router.get("/plugins/payments/metrics", tags=["admin", "api"])
+async def payment_metrics():
+    """
+    Get payment provider transport metrics for this worker.
+
+    Returns:
+        Circuit breaker state, in-flight requests and latency histograms
+        per provider operation
+    """
+    return get_transport_metrics()
+
+
 def setup_routes(app_templates):
     """
     Set up routes with the given templates.
@@ -4,14 +4,17 @@ Admin products module for the PyCommerce admin panel.
 This module provides UI and API routes for managing products in the admin interface,
 including API endpoints used by the page builder for product blocks.
 """
+import json
 import logging
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Request, Query, Depends, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.concurrency import iterate_in_threadpool
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
 from pycommerce.models.tenant import TenantManager
 from pycommerce.models.product import ProductManager
+from pycommerce.services.product_cache import invalidate_product_caches
 # These might not exist, so we'll handle them differently
 try:
     from pycommerce.models.category import CategoryManager
@@ -184,6 +187,10 @@ async def admin_update_product(
             except Exception as tenant_update_error:
                 logger.error(f"Error in tenant-specific update: {str(tenant_update_error)}")
                 raise tenant_update_error
+
+        invalidate_product_caches(tenant_id, product_id)
+        if tenant_changed:
+            invalidate_product_caches(old_tenant_id, product_id)
         
         # Get the tenant slug for the redirect
         tenant_slug = ""
@@ -206,121 +213,6 @@ async def admin_update_product(
             status_code=303
         )
 
-@router.get("/{product_id}", response_class=HTMLResponse)
-async def admin_product_edit(
-    request: Request,
-    product_id: str,
-    tenant: Optional[str] = None,
-    status_message: Optional[str] = None,
-    status_type: str = "info"
-):
-    """Edit product page for admin panel."""
-    try:
-        # Debug product_id to make sure it's correct
-        logger.info(f"Attempting to edit product with ID: {product_id}")
-        
-        # Find the product in all available tenants
-        product_obj = None
-        tenant_obj = None
-        
-        # If tenant is provided in the URL, try to get it from that specific tenant
-        if tenant:
-            try:
-                tenant_obj = tenant_manager.get_by_slug(tenant)
-                if tenant_obj:
-                    logger.info(f"Looking for product {product_id} in tenant {tenant} (ID: {tenant_obj.id})")
-                    products = product_manager.get_by_tenant(str(tenant_obj.id))
-                    for prod in products:
-                        if str(prod.id) == product_id:
-                            product_obj = prod
-                            logger.info(f"Found product {product_id} in tenant {tenant}")
-                            break
-            except Exception as tenant_err:
-                logger.warning(f"Error getting tenant {tenant}: {str(tenant_err)}")
-        
-        # If not found yet, search in all tenants
-        if not product_obj:
-            logger.info("Product not found in specified tenant, searching in all tenants")
-            all_tenants = tenant_manager.list()
-            for t in all_tenants:
-                try:
-                    logger.info(f"Checking tenant: {t.name} (ID: {t.id})")
-                    tenant_products = product_manager.get_by_tenant(str(t.id))
-                    for prod in tenant_products:
-                        if str(prod.id) == product_id:
-                            product_obj = prod
-                            tenant_obj = t
-                            logger.info(f"Found product {product_id} in tenant {t.name}")
-                            break
-                    if product_obj:
-                        break
-                except Exception as e:
-                    logger.warning(f"Error checking tenant {t.name}: {str(e)}")
-                    continue
-        
-        if not product_obj:
-            logger.error(f"Product with ID {product_id} not found in any tenant")
-            return RedirectResponse(
-                url=f"/admin/products?status_message=Product+not+found&status_type=danger", 
-                status_code=303
-            )
-        
-        # Get tenant ID from metadata or from the found tenant
-        tenant_id = None
-        if hasattr(product_obj, 'metadata') and product_obj.metadata and 'tenant_id' in product_obj.metadata:
-            tenant_id = product_obj.metadata.get('tenant_id')
-        elif tenant_obj:
-            tenant_id = str(tenant_obj.id)
-        
-        # Format product for template
-        product = {
-            "id": str(product_obj.id),
-            "name": product_obj.name,
-            "sku": product_obj.sku,
-            "price": product_obj.price,
-            "stock": product_obj.stock,
-            "categories": product_obj.categories if hasattr(product_obj, 'categories') else [],
-            "description": product_obj.description if hasattr(product_obj, 'description') else "",
-            "image_url": product_obj.metadata.get('image_url') if hasattr(product_obj, 'metadata') and product_obj.metadata else None,
-            "tenant_id": tenant_id
-        }
-        
-        logger.info(f"Formatted product for template: {product['name']} (ID: {product['id']})")
-        
-        # Get all tenants for the dropdown
-        tenants = []
-        try:
-            tenants_list = tenant_manager.list() or []
-            tenants = [
-                {
-                    "id": str(t.id),
-                    "name": t.name
-                }
-                for t in tenants_list if t and hasattr(t, 'id')
-            ]
-        except Exception as e:
-            logger.error(f"Error fetching tenants: {str(e)}")
-        
-        return templates.TemplateResponse(
-            "admin/product_edit.html", 
-            {
-                "request": request, 
-                "active_page": "products",
-                "product": product,
-                "tenants": tenants,
-                "cart_item_count": request.session.get("cart_item_count", 0),
-                "status_message": status_message,
-                "status_type": status_type
-            }
-        )
-    except Exception as e:
-        logger.error(f"Error fetching product: {str(e)}")
-        error_message = f"Error fetching product: {str(e)}"
-        return RedirectResponse(
-            url=f"/admin/products?status_message={error_message}&status_type=danger", 
-            status_code=303
-        )
-
 @router.get("", response_class=HTMLResponse)
 async def admin_products(
     request: Request,
@@ -329,6 +221,8 @@ async def admin_products(
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     in_stock: Optional[bool] = None,
+    page: int = 1,
+    per_page: int = 50,
     status_message: Optional[str] = None,
     status_type: str = "info"
 ):
@@ -375,11 +269,21 @@ async def admin_products(
         filters["in_stock"] = in_stock
     
     # Fetch products
+    pagination = None
     if selected_tenant_slug.lower() == "all":
-        # Fetch all products when "All Stores" is selected
+        # "All Stores" is paged, so only one page of products is loaded
         logger.info("Fetching products for all stores")
         from routes.admin.tenant_utils import get_products_for_all_tenants
-        products = get_products_for_all_tenants(tenant_manager, product_manager, logger, filters)
+        products_page = get_products_for_all_tenants(
+            tenant_manager, product_manager, logger, filters, page=page, per_page=per_page
+        )
+        products = products_page.items
+        pagination = {
+            "page": products_page.page,
+            "per_page": products_page.per_page,
+            "total": products_page.total,
+            "pages": products_page.pages
+        }
     else:
         # Fetch products for specific tenant
         logger.info(f"Fetching products for tenant: {tenant_obj.name} (ID: {tenant_obj.id})")
@@ -401,7 +305,8 @@ async def admin_products(
         price = product.price
         stock = product.stock if hasattr(product, "stock") else 0
         sku = product.sku if hasattr(product, "sku") else ""
-        tenant_name = tenant_obj.name
+        # Cross-tenant queries tag each product with its store
+        tenant_name = getattr(product, "tenant_name", None) or tenant_obj.name
         categories = product.categories if hasattr(product, "categories") else []
         
         # Store in list for template
@@ -462,6 +367,17 @@ async def admin_products(
             "min_price": min_price,
             "max_price": max_price,
             "in_stock": in_stock,
+            "pagination": pagination,
+            "page_query": {
+                key: value for key, value in {
+                    "tenant": selected_tenant_slug,
+                    "category": category,
+                    "min_price": min_price,
+                    "max_price": max_price,
+                    "in_stock": in_stock,
+                    "per_page": per_page
+                }.items() if value is not None
+            },
             "cart_item_count": request.session.get("cart_item_count", 0),
             "status_message": status_message,
             "status_type": status_type
@@ -587,54 +503,161 @@ async def admin_all_products(request: Request):
     """
     try:
         logger.info("Admin API request for ALL products across tenants")
+        from pycommerce.services.cross_tenant_query import products_query, stream
         
-        # Get all tenants
-        all_tenants = []
-        try:
-            all_tenants = tenant_manager.list() or []
-        except Exception as e:
-            logger.error(f"Error getting tenant list: {str(e)}")
-            return {"error": f"Error getting tenant list: {str(e)}"}
+        def product_json(product):
+            """Format a product for the JSON response."""
+            return {
+                "id": str(product.id),
+                "name": product.name,
+                "sku": product.sku,
+                "price": product.price,
+                "stock": product.stock or 0,
+                "categories": product.categories or [],
+                "description": product.description or "",
+                "image_url": None,
+                "tenant_id": str(product.tenant_id),
+                "tenant_name": product.tenant_name,
+                "tenant_slug": product.tenant_slug
+            }
         
-        # Collect all products from all tenants
-        all_products = []
-        for tenant in all_tenants:
+        def body():
+            # Products are streamed from one cross-tenant query in batches.
+            # The status line is already sent, so errors end the JSON with an error field
+            count = 0
+            yield '{"products": ['
             try:
-                tenant_products = product_manager.get_by_tenant(str(tenant.id)) or []
-                # Format products for JSON response
-                for product in tenant_products:
-                    # Get image URL from metadata if available
-                    image_url = None
-                    if hasattr(product, 'metadata') and product.metadata:
-                        image_url = product.metadata.get('image_url')
-                    
-                    all_products.append({
-                        "id": str(product.id),
-                        "name": product.name,
-                        "sku": product.sku,
-                        "price": product.price,
-                        "stock": product.stock if hasattr(product, 'stock') else 0,
-                        "categories": product.categories if hasattr(product, 'categories') else [],
-                        "description": product.description if hasattr(product, 'description') else "",
-                        "image_url": image_url,
-                        "tenant_id": str(tenant.id),
-                        "tenant_name": tenant.name,
-                        "tenant_slug": tenant.slug
-                    })
+                for product in stream(products_query()):
+                    yield ("," if count else "") + json.dumps(product_json(product))
+                    count += 1
             except Exception as e:
-                logger.warning(f"Error getting products for tenant {tenant.name}: {str(e)}")
-                continue
-        
-        logger.info(f"Found {len(all_products)} products across all tenants")
+                logger.error(f"Error streaming all products after {count}: {str(e)}")
+                yield f'], "count": {count}, "error": {json.dumps(f"Server error: {str(e)}")}}}'
+                return
+            yield f'], "count": {count}}}'
+            logger.info(f"Streamed {count} products across all tenants")
         
-        return {
-            "products": all_products,
-            "count": len(all_products)
-        }
+        return StreamingResponse(iterate_in_threadpool(body()), media_type="application/json")
     except Exception as e:
         logger.error(f"Error in admin all products API: {str(e)}")
         return {"error": f"Server error: {str(e)}"}
 
+# Registered after the fixed paths above so /api and /all are not taken as product IDs
+@router.get("/{product_id}", response_class=HTMLResponse)
+async def admin_product_edit(
+    request: Request,
+    product_id: str,
+    tenant: Optional[str] = None,
+    status_message: Optional[str] = None,
+    status_type: str = "info"
+):
+    """Edit product page for admin panel."""
+    try:
+        # Debug product_id to make sure it's correct
+        logger.info(f"Attempting to edit product with ID: {product_id}")
+        
+        # Find the product in all available tenants
+        product_obj = None
+        tenant_obj = None
+        
+        # If tenant is provided in the URL, try to get it from that specific tenant
+        if tenant:
+            try:
+                tenant_obj = tenant_manager.get_by_slug(tenant)
+                if tenant_obj:
+                    logger.info(f"Looking for product {product_id} in tenant {tenant} (ID: {tenant_obj.id})")
+                    products = product_manager.get_by_tenant(str(tenant_obj.id))
+                    for prod in products:
+                        if str(prod.id) == product_id:
+                            product_obj = prod
+                            logger.info(f"Found product {product_id} in tenant {tenant}")
+                            break
+            except Exception as tenant_err:
+                logger.warning(f"Error getting tenant {tenant}: {str(tenant_err)}")
+        
+        # If not found yet, search in all tenants
+        if not product_obj:
+            logger.info("Product not found in specified tenant, searching in all tenants")
+            all_tenants = tenant_manager.list()
+            for t in all_tenants:
+                try:
+                    logger.info(f"Checking tenant: {t.name} (ID: {t.id})")
+                    tenant_products = product_manager.get_by_tenant(str(t.id))
+                    for prod in tenant_products:
+                        if str(prod.id) == product_id:
+                            product_obj = prod
+                            tenant_obj = t
+                            logger.info(f"Found product {product_id} in tenant {t.name}")
+                            break
+                    if product_obj:
+                        break
+                except Exception as e:
+                    logger.warning(f"Error checking tenant {t.name}: {str(e)}")
+                    continue
+        
+        if not product_obj:
+            logger.error(f"Product with ID {product_id} not found in any tenant")
+            return RedirectResponse(
+                url=f"/admin/products?status_message=Product+not+found&status_type=danger", 
+                status_code=303
+            )
+        
+        # Get tenant ID from metadata or from the found tenant
+        tenant_id = None
+        if hasattr(product_obj, 'metadata') and product_obj.metadata and 'tenant_id' in product_obj.metadata:
+            tenant_id = product_obj.metadata.get('tenant_id')
+        elif tenant_obj:
+            tenant_id = str(tenant_obj.id)
+        
+        # Format product for template
+        product = {
+            "id": str(product_obj.id),
+            "name": product_obj.name,
+            "sku": product_obj.sku,
+            "price": product_obj.price,
+            "stock": product_obj.stock,
+            "categories": product_obj.categories if hasattr(product_obj, 'categories') else [],
+            "description": product_obj.description if hasattr(product_obj, 'description') else "",
+            "image_url": product_obj.metadata.get('image_url') if hasattr(product_obj, 'metadata') and product_obj.metadata else None,
+            "tenant_id": tenant_id
+        }
+        
+        logger.info(f"Formatted product for template: {product['name']} (ID: {product['id']})")
+        
+        # Get all tenants for the dropdown
+        tenants = []
+        try:
+            tenants_list = tenant_manager.list() or []
+            tenants = [
+                {
+                    "id": str(t.id),
+                    "name": t.name
+                }
+                for t in tenants_list if t and hasattr(t, 'id')
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching tenants: {str(e)}")
+        
+        return templates.TemplateResponse(
+            "admin/product_edit.html", 
+            {
+                "request": request, 
+                "active_page": "products",
+                "product": product,
+                "tenants": tenants,
+                "cart_item_count": request.session.get("cart_item_count", 0),
+                "status_message": status_message,
+                "status_type": status_type
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error fetching product: {str(e)}")
+        error_message = f"Error fetching product: {str(e)}"
+        return RedirectResponse(
+            url=f"/admin/products?status_message={error_message}&status_type=danger", 
+            status_code=303
+        )
+
 def setup_routes(app_templates):
     """
     Set up routes with the given templates.
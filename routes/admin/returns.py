@@ -51,7 +51,7 @@ def setup_routes(app_templates):
     return router
 
 
-from routes.admin.tenant_utils import get_selected_tenant, get_all_tenants, get_objects_for_all_tenants, create_virtual_all_tenant
+from routes.admin.tenant_utils import get_selected_tenant, get_all_tenants, create_virtual_all_tenant
 
 @router.get("/returns", response_class=HTMLResponse)
 async def returns_list(
@@ -60,6 +60,8 @@ async def returns_list(
     status: str = Query(None),
     date_from: str = Query(None),
     date_to: str = Query(None),
+    page: int = Query(1),
+    per_page: int = Query(50),
     status_message: str = Query(None),
     status_type: str = Query("info")
 ):
@@ -93,15 +95,17 @@ async def returns_list(
                 logger.warning(f"Invalid date_to format: {date_to}")
         
         # Get returns based on tenant selection
+        pagination = None
         if selected_tenant_slug == "all":
-            # Get returns for all tenants
-            return_requests = get_objects_for_all_tenants(
-                tenant_manager, 
-                return_manager, 
-                "get_for_tenant", 
-                logger=logger, 
-                filters=filters
-            )
+            # "All Stores" is paged, so only one page of returns is loaded
+            returns_page = return_manager.get_for_all_tenants(filters=filters, page=page, per_page=per_page)
+            return_requests = returns_page.items
+            pagination = {
+                "page": returns_page.page,
+                "per_page": returns_page.per_page,
+                "total": returns_page.total,
+                "pages": returns_page.pages
+            }
         else:
             # Get tenant info
             tenant_obj = tenant_manager.get_by_slug(selected_tenant_slug)
@@ -158,6 +162,16 @@ async def returns_list(
                     "date_from": date_from,
                     "date_to": date_to
                 },
+                "pagination": pagination,
+                "page_query": {
+                    key: value for key, value in {
+                        "tenant": selected_tenant_slug,
+                        "status": status,
+                        "date_from": date_from,
+                        "date_to": date_to,
+                        "per_page": per_page
+                    }.items() if value
+                },
                 "status_message": status_message,
                 "status_type": status_type,
                 "cart_item_count": request.session.get("cart_item_count", 0),
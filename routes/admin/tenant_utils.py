@@ -292,65 +292,53 @@ def create_virtual_all_tenant():
         "active": True
     }
 
-def get_products_for_all_tenants(tenant_manager, product_manager, logger, filters=None):
+def get_products_for_all_tenants(tenant_manager, product_manager, logger, filters=None, page=1, per_page=50):
     """
-    Fetch products from all tenants.
+    Fetch one page of products from all tenants.
+
+    Products come from a single query joined to the tenants table; each
+    product has tenant_name and tenant_slug attributes.
 
     Args:
         tenant_manager: The tenant manager instance
         product_manager: The product manager instance
         logger: The logger to use
         filters: Optional dictionary of filters to apply
+        page: 1-based page number
+        per_page: Products per page
 
     Returns:
-        List of products from all tenants
+        CrossTenantPage of products from all tenants
     """
     if filters is None:
         filters = {}
 
-    try:
-        # First try to get all tenants
-        all_tenants = tenant_manager.list() or []
-
-        # Then fetch products for each tenant and combine them
-        all_products = []
-        for tenant in all_tenants:
-            try:
-                tenant_products = product_manager.get_by_tenant(
-                    tenant_id=str(tenant.id),
-                    **filters
-                )
-                all_products.extend(tenant_products)
-                logger.info(f"Found {len(tenant_products)} products for tenant {tenant.name}")
-            except Exception as e:
-                logger.error(f"Error fetching products for tenant {tenant.name}: {str(e)}")
-
-        logger.info(f"Found {len(all_products)} products across all stores")
+    from pycommerce.services.cross_tenant_query import CrossTenantPage, paginate, products_query
 
-        # If no products found, fall back to list() method
-        if not all_products:
-            logger.info("No products found using tenant queries, trying list() method")
-            all_products = product_manager.list(**filters)
-            logger.info(f"Found {len(all_products)} products using list() method")
-
-        return all_products
+    try:
+        products = paginate(products_query(filters), page, per_page)
+        logger.info(f"Found {products.total} products across all stores, showing page {products.page}")
+        return products
     except Exception as e:
         logger.error(f"Error fetching all products: {str(e)}")
-        # Fallback to the general list method
-        all_products = product_manager.list(**filters)
-        logger.info(f"Falling back to list() method, found {len(all_products)} products")
-        return all_products
+        return CrossTenantPage(page=page, per_page=per_page)
 
-def get_items_for_all_tenants(tenant_manager, item_manager, get_method_name, logger, filters=None):
+def get_items_for_all_tenants(tenant_manager, item_manager, get_method_name, logger, filters=None, page=1, per_page=50):
     """
     Generic function to fetch items from all tenants.
 
+    Managers with a get_for_all_tenants(filters=..., page=..., per_page=...)
+    method answer with one page of a single cross-tenant query; others are
+    queried tenant by tenant.
+
     Args:
         tenant_manager: The tenant manager instance
         item_manager: The manager instance for specific items
         get_method_name: The method name to use to get items for a tenant (e.g., 'get_by_tenant')
         logger: The logger to use
         filters: Optional dictionary of filters to apply
+        page: 1-based page number for managers with get_for_all_tenants
+        per_page: Page size for managers with get_for_all_tenants
 
     Returns:
         List of items from all tenants
@@ -359,6 +347,11 @@ def get_items_for_all_tenants(tenant_manager, item_manager, get_method_name, log
         filters = {}
 
     try:
+        if hasattr(item_manager, 'get_for_all_tenants'):
+            all_items = item_manager.get_for_all_tenants(filters=filters, page=page, per_page=per_page).items
+            logger.info(f"Found {len(all_items)} items across all stores")
+            return all_items
+
         # First try to get all tenants
         all_tenants = tenant_manager.list() or []
 
@@ -395,7 +388,7 @@ def get_items_for_all_tenants(tenant_manager, item_manager, get_method_name, log
             return all_items
         return []
 
-def get_objects_for_all_tenants(tenant_manager, object_manager, get_method_name, id_param_name='tenant_id', logger=None, filters=None, fallback_method_name=None):
+def get_objects_for_all_tenants(tenant_manager, object_manager, get_method_name, id_param_name='tenant_id', logger=None, filters=None, fallback_method_name=None, page=1, per_page=50):
     """
     Generalized function to fetch any object type from all tenants.
 
@@ -407,6 +400,12 @@ def get_objects_for_all_tenants(tenant_manager, object_manager, get_method_name,
         logger: Optional logger to use
         filters: Optional dictionary of filters to apply
         fallback_method_name: Optional fallback method name if per-tenant fetch fails
+        page: 1-based page number for managers with get_for_all_tenants
+        per_page: Page size for managers with get_for_all_tenants
+
+    Managers with a get_for_all_tenants(filters=..., page=..., per_page=...)
+    method answer with one page of a single cross-tenant query; others are
+    queried tenant by tenant.
 
     Returns:
         List of objects from all tenants
@@ -418,6 +417,11 @@ def get_objects_for_all_tenants(tenant_manager, object_manager, get_method_name,
         filters = {}
 
     try:
+        if hasattr(object_manager, 'get_for_all_tenants'):
+            all_objects = object_manager.get_for_all_tenants(filters=filters, page=page, per_page=per_page).items
+            logger.info(f"Found {len(all_objects)} objects across all stores")
+            return all_objects
+
         # First try to get all tenants
         all_tenants = tenant_manager.list() or []
 
@@ -491,61 +495,36 @@ def get_objects_for_all_tenants(tenant_manager, object_manager, get_method_name,
 
         return []
 
-def get_orders_for_all_tenants(tenant_manager, order_manager, logger, filters=None):
+def get_orders_for_all_tenants(tenant_manager, order_manager, logger, filters=None, page=1, per_page=50):
     """
-    Fetch orders from all tenants.
+    Fetch one page of orders from all tenants.
+
+    Orders come from a single query joined to the tenants table; each
+    order has tenant_name and tenant_slug attributes.
 
     Args:
         tenant_manager: The tenant manager instance
         order_manager: The order manager instance
         logger: The logger to use
         filters: Optional dictionary of filters to apply
+        page: 1-based page number
+        per_page: Orders per page
 
     Returns:
-        List of orders from all tenants
+        CrossTenantPage of orders from all tenants
     """
-    if filters is None:
-        filters = {}
-
-    try:
-        # First try to get all tenants
-        all_tenants = tenant_manager.list() or []
-
-        # Then fetch orders for each tenant and combine them
-        all_orders = []
-        for tenant in all_tenants:
-            try:
-                tenant_orders = order_manager.get_for_tenant(
-                    tenant_id=str(tenant.id),
-                    filters=filters
-                )
-                all_orders.extend(tenant_orders)
-                logger.info(f"Found {len(tenant_orders)} orders for tenant {tenant.name}")
-            except Exception as e:
-                logger.error(f"Error fetching orders for tenant {tenant.name}: {str(e)}")
-
-        logger.info(f"Found {len(all_orders)} orders across all stores")
-
-        # If no orders found, fall back to a list method if available
-        if not all_orders and hasattr(order_manager, 'list'):
-            logger.info("No orders found using tenant queries, trying list() method")
-            all_orders = order_manager.list(**filters)
-            logger.info(f"Found {len(all_orders)} orders using list() method")
-
-        return all_orders
-    except Exception as e:
-        logger.error(f"Error fetching all orders: {str(e)}")
-        # Fallback to the general list method if available
-        if hasattr(order_manager, 'list'):
-            all_orders = order_manager.list(**filters)
-            logger.info(f"Falling back to list() method, found {len(all_orders)} orders")
-            return all_orders
-        return []
+    orders = order_manager.get_for_all_tenants(filters=filters, page=page, per_page=per_page)
+    logger.info(f"Found {orders.total} orders across all stores, showing page {orders.page}")
+    return orders
 
 def get_categories_for_all_tenants(tenant_manager, category_manager, logger, include_inactive=False):
     """
     Fetch categories from all tenants.
 
+    Uses the category manager's single cross-tenant query when it has one,
+    otherwise queries tenant by tenant. Each category gets a tenant_name
+    attribute for display.
+
     Args:
         tenant_manager: The tenant manager instance
         category_manager: The category manager instance
@@ -555,7 +534,16 @@ def get_categories_for_all_tenants(tenant_manager, category_manager, logger, inc
     Returns:
         List of categories from all tenants
     """
+    if not category_manager:
+        logger.warning("Category manager not available")
+        return []
+
     try:
+        if hasattr(category_manager, 'get_categories_for_all_tenants'):
+            all_categories = category_manager.get_categories_for_all_tenants(include_inactive=include_inactive)
+            logger.info(f"Found {len(all_categories)} categories across all stores")
+            return all_categories
+
         # First try to get all tenants
         all_tenants = tenant_manager.list() or []
 
@@ -563,19 +551,16 @@ def get_categories_for_all_tenants(tenant_manager, category_manager, logger, inc
         all_categories = []
         for tenant in all_tenants:
             try:
-                if category_manager:
-                    tenant_categories = category_manager.get_all_categories(
-                        tenant_id=str(tenant.id),
-                        include_inactive=include_inactive
-                    )
-                    logger.info(f"Found {len(tenant_categories)} categories for tenant {tenant.name}")
-
-                    # Add tenant name to category objects for display
-                    for category in tenant_categories:
-                        category.tenant_name = tenant.name
-                        all_categories.append(category)
-                else:
-                    logger.warning(f"Category manager not available for tenant {tenant.name}")
+                tenant_categories = category_manager.get_all_categories(
+                    tenant_id=str(tenant.id),
+                    include_inactive=include_inactive
+                )
+                logger.info(f"Found {len(tenant_categories)} categories for tenant {tenant.name}")
+
+                # Add tenant name to category objects for display
+                for category in tenant_categories:
+                    category.tenant_name = tenant.name
+                    all_categories.append(category)
             except Exception as e:
                 logger.error(f"Error fetching categories for tenant {tenant.name}: {str(e)}")
 
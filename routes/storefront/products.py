@@ -13,6 +13,7 @@ from pycommerce.models.tenant import TenantManager
 from pycommerce.models.product import ProductManager
 from pycommerce.models.cart import CartManager
 from pycommerce.services.recommendation import RecommendationService
+from pycommerce.middleware.http_cache import cache_policy, set_cache_validators
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,6 +28,7 @@ product_manager = ProductManager()
 cart_manager = CartManager()
 
 @router.get("", response_class=HTMLResponse)
+@cache_policy(private=True, vary=["Cookie"])
 async def products(
     request: Request,
     tenant: Optional[str] = None,
@@ -130,6 +132,7 @@ async def products(
     )
 
 @router.get("/{product_id}", response_class=HTMLResponse)
+@cache_policy(private=True, vary=["Cookie"])
 async def product_detail(request: Request, product_id: str):
     """Product detail page."""
     product_data = None
@@ -168,6 +171,15 @@ async def product_detail(request: Request, product_id: str):
         except Exception:
             pass
     
+    if product_data:
+        # The cart badge is part of the page, so it is part of the version
+        set_cache_validators(
+            request,
+            last_modified=product.updated_at,
+            version=cart_item_count,
+            surrogate_keys=[f"product:{product_id}"]
+        )
+    
     return templates.TemplateResponse(
         "product_detail.html", 
         {
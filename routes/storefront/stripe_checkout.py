@@ -4,6 +4,7 @@ Stripe checkout integration for PyCommerce.
 This module provides routes for integrating with Stripe's hosted checkout page.
 """
 
+import asyncio
 import os
 import logging
 import stripe
@@ -235,8 +236,9 @@ def setup_routes(app):
                 if not parsed_items:
                     return JSONResponse(content={"error": "No items provided"}, status_code=400)
                 
-                # Create a new Stripe checkout session
-                checkout_session = stripe.checkout.Session.create(
+                # Create a new Stripe checkout session (the SDK blocks, so keep it off the event loop)
+                checkout_session = await asyncio.to_thread(
+                    stripe.checkout.Session.create,
                     payment_method_types=['card'],
                     line_items=parsed_items,
                     mode='payment',
@@ -259,65 +261,9 @@ def setup_routes(app):
         
         @router.post("/webhook")
         async def api_stripe_webhook(request: Request):
-            """Handle Stripe webhook events."""
-            payload = await request.body()
-            sig_header = request.headers.get('stripe-signature')
-            
-            # Use webhook secret from config or environment
-            webhook_secret = STRIPE_WEBHOOK_SECRET or os.environ.get('STRIPE_WEBHOOK_SECRET')
-            
-            try:
-                if webhook_secret:
-                    # Verify the webhook signature
-                    event = stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
-                else:
-                    # If no webhook secret is set, parse the payload directly (only for development)
-                    body = await request.json()
-                    event = stripe.Event.construct_from(body, stripe.api_key)
-                
-                # Handle the event
-                if event.type == 'checkout.session.completed':
-                    session = event.data.object
-                    
-                    # Get the order ID from the metadata
-                    order_id = session.metadata.get('order_id')
-                    
-                    if order_id:
-                        # Update the order status based on the payment status
-                        try:
-                            from pycommerce.models.order import OrderManager
-                            order_manager = OrderManager()
-                            
-                            # Update the order status to paid - use the correct method
-                            if hasattr(order_manager, 'update_status'):
-                                order_manager.update_status(order_id, OrderStatus.PAID)
-                            elif hasattr(order_manager, 'update_order_status'):
-                                order_manager.update_order_status(order_id, OrderStatus.PAID)
-                            else:
-                                # Fallback - try to update directly in the database
-                                logger.warning("OrderManager missing update method, using direct DB update")
-                                from sqlalchemy import text
-                                from pycommerce.core.db import get_engine
-                                engine = get_engine()
-                                with engine.connect() as conn:
-                                    conn.execute(
-                                        text("UPDATE orders SET status = :status WHERE id = :order_id"),
-                                        {"status": OrderStatus.PAID.value, "order_id": order_id}
-                                    )
-                                    conn.commit()
-                            
-                            logger.info(f"Order {order_id} marked as paid")
-                        except Exception as e:
-                            logger.error(f"Error updating order status: {e}")
-                    
-                    # Log the completed checkout
-                    logger.info(f"Checkout session {session.id} completed")
-                
-                # Return a success response
-                return JSONResponse(content={'status': 'success', 'event': event.type})
-            except Exception as e:
-                logger.error(f"Error processing webhook: {e}")
-                return JSONResponse(content={'status': 'error', 'message': str(e)}, status_code=400)
+            """Receive Stripe webhook events through the webhook ingestion pipeline."""
+            from pycommerce.plugins.payment.webhooks import receive_webhook
+            return await receive_webhook("stripe", request)
         
         @router.get("/success")
         async def api_payment_success(request: Request):
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request authentication overhead.
+
+Creates users and tokens, revokes a number of other tokens, and reports the
+time per request to verify a token:
+- baseline: decode the JWT and look the user up, as before caching
+- verify_token: decode, in-process revocation check and the principal cache
+- verify_principal: decode, in-process revocation check and embedded claims (no lookup)
+- stale claims: verify_principal after the user changed (one lookup, then cached)
+- uncached check: verify_principal with REVOCATION_REFRESH_SECONDS=0 (one query)
+
+Usage:
+    python scripts/debug/benchmark_auth.py
+    python scripts/debug/benchmark_auth.py --users 1000 --revoked 100000 --requests 20000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def per_request(fn, tokens, requests: int) -> float:
+    """Mean time of fn(token) over random tokens, in microseconds."""
+    rng = random.Random(0)
+    picks = [rng.choice(tokens) for _ in range(requests)]
+    start = time.perf_counter()
+    for token in picks:
+        fn(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    """Run the authentication benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark token verification per request")
+    parser.add_argument("--users", type=int, default=500, help="Users with one token each")
+    parser.add_argument("--revoked", type=int, default=1000, help="Other tokens on the revocation list")
+    parser.add_argument("--requests", type=int, default=10000, help="Verifications per measurement")
+    args = parser.parse_args()
+
+    import jwt
+    from pycommerce.core.db import engine
+    from pycommerce.models import user as user_module
+    from pycommerce.models.auth_revocation import RevokedToken, UserClaimsVersion
+    from pycommerce.models.user import UserManager
+    from pycommerce.services.auth_cache import RevocationList
+
+    for model in (RevokedToken, UserClaimsVersion):
+        model.__table__.create(engine, checkfirst=True)
+
+    manager = UserManager()
+    users = [
+        manager.create({"email": f"user{i}@example.com", "first_name": "User", "last_name": str(i)})
+        for i in range(args.users)
+    ]
+    tokens = [manager.create_access_token(user.id) for user in users]
+    for i in range(args.revoked):
+        manager._revocations.revoke_token(f"revoked-{i}", int(time.time()) + 3600)
+
+    def baseline(token):
+        payload = jwt.decode(token, user_module.JWT_SECRET, algorithms=[user_module.JWT_ALGORITHM])
+        user = manager.get(payload["sub"])
+        return user if user.is_active else None
+
+    results = [
+        ("baseline", per_request(baseline, tokens, args.requests)),
+        ("verify_token", per_request(manager.verify_token, tokens, args.requests)),
+        ("verify_principal", per_request(manager.verify_principal, tokens, args.requests)),
+    ]
+    for user in users:
+        manager.update(user.id, {"first_name": "Changed"})
+    results.append(("stale claims", per_request(manager.verify_principal, tokens, args.requests)))
+    manager._revocations = RevocationList(ttl=0)
+    results.append(("uncached check", per_request(manager.verify_principal, tokens, args.requests)))
+
+    print(f"{args.users} users, {len(manager._revocations)} revoked tokens, {args.requests} requests")
+    for name, micros in results:
+        print(f"{name:<18} {micros:>10.1f}us/request")
+    cache = manager._principals
+    print(f"Principal cache: {cache.hits} hits, {cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
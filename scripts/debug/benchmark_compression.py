@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression per endpoint.
+
+Fetches each endpoint uncompressed from a running server (or builds a
+synthetic product-listing payload with --synthetic) and reports, for every
+encoding the CompressionMiddleware can produce, the bytes on the wire and
+the CPU time spent compressing.
+
+Usage:
+    python scripts/debug/benchmark_compression.py --base-url http://localhost:5000 \\
+        /api/products /admin/products/all /api/market-analysis/trends
+    python scripts/debug/benchmark_compression.py --synthetic 5000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pycommerce.middleware.compression import (
+    ROUTE_CLASS_LEVELS,
+    DEFAULT_ROUTE_CLASSES,
+    available_encodings,
+    create_compressor,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def route_class_for(path: str) -> str:
+    """Mirror CompressionMiddleware's route class lookup."""
+    for prefix, route_class in DEFAULT_ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return route_class
+    return "storefront"
+
+
+def synthetic_payload(count: int) -> bytes:
+    """Build a product-listing JSON payload similar to /api/products."""
+    products = [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "name": f"Product {i}",
+            "description": f"Description for product {i} with some marketing copy.",
+            "price": round(9.99 + i % 500, 2),
+            "sku": f"SKU-{i:06d}",
+            "stock": i % 37,
+            "tenant_id": "tech",
+            "categories": ["electronics", "accessories"][: 1 + i % 2],
+            "created_at": "2025-04-01T12:00:00",
+            "updated_at": "2025-04-15T08:30:00",
+        }
+        for i in range(count)
+    ]
+    return json.dumps(products).encode()
+
+
+def fetch(base_url: str, path: str, cookies: Dict[str, str]) -> bytes:
+    """Fetch an endpoint without compression."""
+    import httpx
+
+    response = httpx.get(
+        f"{base_url.rstrip('/')}{path}",
+        headers={"Accept-Encoding": "identity"},
+        cookies=cookies,
+        timeout=60,
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def measure(body: bytes, encoding: str, route_class: str, rounds: int) -> Tuple[int, float]:
+    """
+    Compress a body the way the middleware streams it.
+
+    Returns:
+        Compressed size in bytes and mean CPU milliseconds per response
+    """
+    size = 0
+    start = time.process_time()
+    for _ in range(rounds):
+        compressor = create_compressor(encoding, route_class)
+        size = 0
+        for offset in range(0, len(body), CHUNK_SIZE):
+            size += len(compressor.compress(body[offset:offset + CHUNK_SIZE]))
+        size += len(compressor.finish())
+    cpu_ms = (time.process_time() - start) * 1000 / rounds
+    return size, cpu_ms
+
+
+def report(name: str, body: bytes, route_class: str, rounds: int) -> List[Dict]:
+    """Print and return the results for one endpoint."""
+    print(f"\n{name}  [{route_class}: gzip/br/zstd levels {ROUTE_CLASS_LEVELS[route_class]}]")
+    print(f"  {'encoding':<10}{'bytes':>12}{'ratio':>8}{'cpu ms':>10}{'MB/s':>10}")
+    print(f"  {'identity':<10}{len(body):>12,}{1.0:>8.2f}{0.0:>10.2f}{'-':>10}")
+
+    rows = []
+    for encoding in available_encodings():
+        size, cpu_ms = measure(body, encoding, route_class, rounds)
+        throughput = (len(body) / 1_000_000) / (cpu_ms / 1000) if cpu_ms else 0.0
+        print(f"  {encoding:<10}{size:>12,}{len(body) / max(size, 1):>8.2f}{cpu_ms:>10.2f}{throughput:>10.1f}")
+        rows.append({
+            "endpoint": name,
+            "encoding": encoding,
+            "bytes": size,
+            "original_bytes": len(body),
+            "cpu_ms": round(cpu_ms, 3),
+        })
+    return rows
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark response compression per endpoint")
+    parser.add_argument("paths", nargs="*", help="Endpoint paths to fetch, e.g. /api/products")
+    parser.add_argument("--base-url", default="http://localhost:5000", help="Running server URL")
+    parser.add_argument("--session", help="Session cookie value for admin endpoints")
+    parser.add_argument("--synthetic", type=int, help="Benchmark a synthetic listing of N products")
+    parser.add_argument("--rounds", type=int, default=5, help="Compression rounds per measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    if args.synthetic:
+        body = synthetic_payload(args.synthetic)
+        results += report(f"synthetic /api/products ({args.synthetic} products)", body, "api", args.rounds)
+
+    cookies = {"session": args.session} if args.session else {}
+    for path in args.paths:
+        try:
+            body = fetch(args.base_url, path, cookies)
+        except Exception as e:
+            logger.error(f"Error fetching {path}: {e}")
+            continue
+        results += report(path, body, route_class_for(path), args.rounds)
+
+    if not results:
+        parser.error("give endpoint paths or --synthetic N")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification throughput and its effect on the event loop.
+
+Reports, for the legacy salted SHA-256 format and scrypt at each cost:
+- logins/sec on one core (verifications in a single thread)
+- logins/sec through the verifier pool during a login storm, per worker
+- the worst event loop stall seen while the storm runs, compared with
+  verifying inline on the loop
+
+Usage:
+    python scripts/debug/benchmark_passwords.py
+    python scripts/debug/benchmark_passwords.py --costs 14 15 16 --logins 200 --workers 4
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+logging.basicConfig(level=logging.WARNING)
+
+
+async def max_loop_stall(work) -> float:
+    """Run work() while ticking the loop every millisecond; return the longest stall in ms."""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.005)
+    await work()
+    done = True
+    await task
+    return worst * 1000
+
+
+def main():
+    """Run the password benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark password verification")
+    parser.add_argument("--costs", type=int, nargs="+", default=[14, 15], help="scrypt N as powers of two")
+    parser.add_argument("--logins", type=int, default=100, help="Logins per measurement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Verifier pool threads")
+    args = parser.parse_args()
+
+    from pycommerce.services import password_hashing as ph
+
+    salt = "0123456789abcdef"
+    formats = [("legacy sha256", f"{salt}:{hashlib.sha256(('password' + salt).encode()).hexdigest()}")]
+    formats += [(f"scrypt N=2^{cost}", ph.hash_password("password", ph.ScryptParams(n=2 ** cost))) for cost in args.costs]
+
+    print(f"{args.logins} logins per run, {args.workers} pool workers")
+    print(f"{'format':<16} {'1 core':>12} {'pool':>12} {'per worker':>12} {'inline stall':>13} {'pool stall':>11}")
+    for name, stored in formats:
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            ph.verify_password(stored, "password")
+        single = args.logins / (time.perf_counter() - start)
+
+        pool = ph.PasswordVerifierPool(workers=args.workers, queue_size=args.logins)
+
+        async def storm():
+            await asyncio.gather(*(pool.verify(stored, "password") for _ in range(args.logins)))
+
+        async def inline():
+            for _ in range(args.logins):
+                ph.verify_password(stored, "password")
+
+        start = time.perf_counter()
+        pool_stall = asyncio.run(max_loop_stall(storm))
+        pooled = args.logins / (time.perf_counter() - start)
+        inline_stall = asyncio.run(max_loop_stall(inline))
+        pool.shutdown()
+
+        print(f"{name:<16} {single:>10.0f}/s {pooled:>10.0f}/s {pooled / args.workers:>10.0f}/s "
+              f"{inline_stall:>11.1f}ms {pool_stall:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark WYSIWYG content sanitization on large documents.
+
+Builds synthetic rich-text pages (headings, styled paragraphs, tables,
+lists, embedded images and videos, plus some markup the policy strips) or
+reads HTML files, and reports the time to sanitize each document cold
+(first save), warm (cache hit) and the time the save path takes when the
+block's stored content is reused.
+
+Usage:
+    python scripts/debug/benchmark_sanitizer.py
+    python scripts/debug/benchmark_sanitizer.py --sizes 10 100 1000 --repeat 20
+    python scripts/debug/benchmark_sanitizer.py --file page.html
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def synthetic_document(sections: int, seed: int = 0) -> str:
+    """Build an editor document with the given number of sections."""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(sections):
+        parts.append(f'<h2 class="ql-align-center" data-section="{i}">Section {i}</h2>')
+        parts.append(
+            f'<p style="color: #333; font-size: 16px; position: fixed" onclick="track({i})">'
+            f'Paragraph {i} with <strong>bold</strong>, <em>emphasis</em> and a '
+            f'<a href="/products/{i}" target="_blank">link</a> '
+            f'{"lorem ipsum dolor sit amet " * rng.randint(5, 20)}</p>'
+        )
+        parts.append(f'<img src="/static/media/image-{i}.jpg" alt="Image {i}" width="600" loading="lazy">')
+        if i % 5 == 0:
+            parts.append(f'<video src="/static/media/clip-{i}.mp4" controls width="640"></video>')
+        if i % 3 == 0:
+            rows = "".join(f"<tr><td>Spec {r}</td><td>{rng.randint(1, 999)}</td></tr>" for r in range(8))
+            parts.append(f'<table border="1"><tbody>{rows}</tbody></table>')
+        if i % 4 == 0:
+            parts.append("<ul>" + "".join(f"<li>Feature {n}</li>" for n in range(6)) + "</ul>")
+        if i % 7 == 0:
+            parts.append(f'<script>alert({i})</script><iframe src="javascript:alert({i})"></iframe>')
+    return "\n".join(parts)
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-repeat wall time of fn() in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark(documents: List[Tuple[str, str]], repeat: int) -> None:
+    """Print cold, warm and stored-content timings for each document."""
+    import bleach
+    from pycommerce.services import wysiwyg_service as ws
+
+    service = ws.WysiwygService()
+    print(f"{'document':<22} {'size':>10} {'baseline':>10} {'cold':>10} {'cached':>10} {'stored':>10}  media")
+    for name, document in documents:
+        # Per-call bleach.clean, as before the policy was precompiled
+        def baseline():
+            bleach.clean(document, tags=ws.ALLOWED_TAGS, attributes=ws.ALLOWED_ATTRS, strip=True)
+
+        def cold():
+            ws._cache.clear()
+            service.process_editor_content(document)
+
+        stored, refs = service.prepare_block_content({"html": document})
+        baseline_ms = timed(baseline, repeat)
+        cold_ms = timed(cold, repeat)
+        cached_ms = timed(lambda: service.process_editor_content(document), repeat)
+        stored_ms = timed(lambda: service.prepare_block_content({"html": stored["html"]}, previous=stored), repeat)
+        print(f"{name:<22} {len(document):>10,} {baseline_ms:>8.2f}ms {cold_ms:>8.2f}ms "
+              f"{cached_ms:>8.3f}ms {stored_ms:>8.3f}ms  {len(ws._extract_media_urls(stored['html']))} urls")
+    print(f"Cache: {ws.get_sanitizer_cache_stats()}")
+
+
+def main():
+    """Run the sanitizer benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark WYSIWYG HTML sanitization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Sections per synthetic document")
+    parser.add_argument("--file", nargs="*", default=[], help="HTML files to benchmark instead")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    if args.file:
+        documents = []
+        for path in args.file:
+            with open(path, encoding="utf-8") as f:
+                documents.append((os.path.basename(path), f.read()))
+    else:
+        documents = [(f"synthetic-{n}", synthetic_document(n)) for n in args.sizes]
+    benchmark(documents, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
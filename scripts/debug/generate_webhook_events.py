@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Generate stub Stripe/PayPal webhook events for load testing.
+
+Builds realistic event sequences for a set of orders (e.g.
+payment_intent.created followed by payment_intent.succeeded), mixes in
+redeliveries of the same event, and either writes them as JSON lines or
+posts them to a webhook endpoint concurrently and reports latency and
+throughput. Stripe events are signed with --secret (default
+STRIPE_WEBHOOK_SECRET); PayPal events are sent unsigned, which the
+application only accepts outside production with
+PAYMENT_ALLOW_UNSIGNED_WEBHOOKS=true.
+
+Usage:
+    python scripts/debug/generate_webhook_events.py --count 1000 --output events.jsonl
+    python scripts/debug/generate_webhook_events.py --count 5000 --orders 500 --duplicates 0.1 \\
+        --url http://localhost:8000/api/plugins/stripe_payment/webhook --concurrency 100
+    python scripts/debug/generate_webhook_events.py --input events.jsonl \\
+        --url http://localhost:8000/api/plugins/stripe_payment/webhook
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+
+# Event types sent per order, in order
+DEFAULT_SEQUENCES = {
+    "stripe": ["payment_intent.created", "payment_intent.succeeded"],
+    "paypal": ["CHECKOUT.ORDER.APPROVED", "PAYMENT.CAPTURE.COMPLETED"],
+}
+
+
+def stripe_event(event_type: str, order_id: str, amount: int) -> Dict:
+    """Build a Stripe event for an order."""
+    return {
+        "id": f"evt_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {
+            "object": {
+                "id": f"pi_{uuid.uuid5(uuid.NAMESPACE_OID, order_id).hex[:24]}",
+                "object": "payment_intent",
+                "amount": amount,
+                "currency": "usd",
+                "metadata": {"order_id": order_id},
+            }
+        },
+    }
+
+
+def paypal_event(event_type: str, order_id: str, amount: int) -> Dict:
+    """Build a PayPal event for an order."""
+    return {
+        "id": f"WH-{uuid.uuid4().hex[:17].upper()}",
+        "event_version": "1.0",
+        "resource_type": "capture" if event_type.startswith("PAYMENT.") else "checkout-order",
+        "event_type": event_type,
+        "create_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "resource": {
+            "id": uuid.uuid5(uuid.NAMESPACE_OID, order_id).hex[:17].upper(),
+            "custom_id": order_id,
+            "amount": {"currency_code": "USD", "value": f"{amount / 100:.2f}"},
+        },
+    }
+
+
+def generate(provider: str, count: int, orders: int, duplicates: float, types: Optional[List[str]], seed: Optional[int]) -> List[Dict]:
+    """
+    Generate events for a provider.
+
+    Orders' sequences are interleaved, each in its own order, and a share
+    of events is repeated verbatim like a provider redelivery.
+
+    Returns:
+        List of {"provider": ..., "body": ...} records
+    """
+    rng = random.Random(seed)
+    sequence = types or DEFAULT_SEQUENCES[provider]
+    build = stripe_event if provider == "stripe" else paypal_event
+
+    pending = []
+    for _ in range(orders):
+        order_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        amount = rng.randint(500, 50000)
+        pending.append([json.dumps(build(event_type, order_id, amount)) for event_type in sequence])
+
+    records = []
+    while len(records) < count and pending:
+        index = rng.randrange(len(pending))
+        body = pending[index].pop(0)
+        if not pending[index]:
+            pending.pop(index)
+        records.append({"provider": provider, "body": body})
+        if duplicates and rng.random() < duplicates and len(records) < count:
+            records.append({"provider": provider, "body": body})
+    return records
+
+
+def build_headers(provider: str, body: str, secret: Optional[str]) -> Dict[str, str]:
+    """Headers for a delivery, signing Stripe events when a secret is set."""
+    headers = {"Content-Type": "application/json"}
+    if provider == "stripe" and secret:
+        from pycommerce.plugins.payment.webhooks import sign_stripe_payload
+        headers["Stripe-Signature"] = sign_stripe_payload(body.encode("utf-8"), secret)
+    return headers
+
+
+async def send(records: List[Dict], url: str, concurrency: int, secret: Optional[str]) -> None:
+    """Post events to a webhook endpoint and print a latency report."""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    duplicates = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def post(record: Dict) -> None:
+            nonlocal duplicates
+            async with semaphore:
+                headers = build_headers(record["provider"], record["body"], secret)
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, content=record["body"], headers=headers)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+                if response.status_code == 200 and response.json().get("duplicate"):
+                    duplicates += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(post(record) for record in records))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    print(f"Sent {len(records)} events in {elapsed:.2f}s ({len(records) / elapsed if elapsed else 0:.0f} events/s)")
+    print(f"  Responses: {dict(statuses)}  duplicates acknowledged: {duplicates}")
+    print(f"  Latency p50 {percentile(0.5):.1f}ms  p95 {percentile(0.95):.1f}ms  p99 {percentile(0.99):.1f}ms")
+
+
+def main():
+    """Generate and optionally send stub webhook events."""
+    parser = argparse.ArgumentParser(description="Generate stub payment webhook events for load testing")
+    parser.add_argument("--provider", choices=["stripe", "paypal"], default="stripe", help="Event format")
+    parser.add_argument("--count", type=int, default=100, help="Number of events (including duplicates)")
+    parser.add_argument("--orders", type=int, help="Number of distinct orders (default: count / sequence length)")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Share of events redelivered, 0-1")
+    parser.add_argument("--types", help="Comma-separated event type sequence per order")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--input", help="Send events from a JSON lines file instead of generating them")
+    parser.add_argument("--output", help="Write events as JSON lines to this file (default: stdout)")
+    parser.add_argument("--url", help="Webhook endpoint to post events to")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent requests when posting")
+    parser.add_argument("--secret", default=os.environ.get("STRIPE_WEBHOOK_SECRET"), help="Stripe signing secret")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        types = [t.strip() for t in args.types.split(",")] if args.types else None
+        per_order = len(types or DEFAULT_SEQUENCES[args.provider])
+        orders = args.orders or max(1, args.count // per_order)
+        records = generate(args.provider, args.count, orders, args.duplicates, types, args.seed)
+
+    if args.url:
+        asyncio.run(send(records, args.url, args.concurrency, args.secret))
+        return
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Stripe and PayPal APIs used by the payment plugins.
+
+Serves the endpoints StripePaymentPlugin and PayPalPaymentPlugin call,
+with configurable latency and failure rates, so timeouts, retries, the
+circuit breaker and latency histograms can be exercised without a provider
+account. Point the plugins at it with the transport's base URL overrides:
+
+    python scripts/debug/mock_payment_server.py --port 8900 --latency 150 --error-rate 0.2
+    PAYMENT_STRIPE_BASE_URL=http://127.0.0.1:8900/stripe/v1 \\
+    PAYMENT_PAYPAL_BASE_URL=http://127.0.0.1:8900/paypal python main.py
+
+Failure behaviour can be changed while running:
+
+    curl -X POST 'http://127.0.0.1:8900/_control?error_rate=1&latency=2000'
+
+Idempotency-Key / PayPal-Request-Id headers are honoured like the real
+APIs: a repeated key returns the first response.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_mock_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 503) -> FastAPI:
+    """
+    Build the mock provider application.
+
+    Args:
+        latency_ms: Added latency per request
+        jitter_ms: Random extra latency, up to this many ms
+        error_rate: Share of requests answered with error_status, 0-1
+        error_status: Status code of injected failures
+
+    Returns:
+        The FastAPI application; ``app.state.mock`` holds the settings and
+        request counters
+    """
+    app = FastAPI(title="Mock payment providers")
+    app.state.mock = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "requests": 0,
+        "failures": 0,
+    }
+    payment_intents: Dict[str, Dict[str, Any]] = {}
+    paypal_orders: Dict[str, Dict[str, Any]] = {}
+    idempotent_responses: Dict[str, Any] = {}
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        settings = app.state.mock
+        if request.url.path == "/_control":
+            return await call_next(request)
+        settings["requests"] += 1
+        delay = settings["latency_ms"] + random.uniform(0, settings["jitter_ms"])
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if random.random() < settings["error_rate"]:
+            settings["failures"] += 1
+            return JSONResponse({"error": {"type": "api_error", "message": "Injected failure"}}, status_code=settings["error_status"])
+
+        key = request.headers.get("idempotency-key") or request.headers.get("paypal-request-id")
+        if key and key in idempotent_responses:
+            return JSONResponse(idempotent_responses[key])
+        response = await call_next(request)
+        if key and response.status_code < 400:
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            idempotent_responses[key] = json.loads(body)
+            return JSONResponse(idempotent_responses[key], status_code=response.status_code)
+        return response
+
+    @app.post("/_control")
+    async def control(
+        latency: Optional[float] = None,
+        jitter: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        error_status: Optional[int] = None,
+    ):
+        settings = app.state.mock
+        if latency is not None:
+            settings["latency_ms"] = latency
+        if jitter is not None:
+            settings["jitter_ms"] = jitter
+        if error_rate is not None:
+            settings["error_rate"] = error_rate
+        if error_status is not None:
+            settings["error_status"] = error_status
+        return settings
+
+    # Stripe
+
+    @app.post("/stripe/v1/payment_intents")
+    async def create_payment_intent(request: Request):
+        form = await request.form()
+        intent_id = f"pi_{uuid.uuid4().hex[:24]}"
+        payment_intents[intent_id] = {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": int(form.get("amount", 0)),
+            "currency": form.get("currency", "usd"),
+            "status": "succeeded",
+            "client_secret": f"{intent_id}_secret_mock",
+            "metadata": {"order_id": form.get("metadata[order_id]")},
+        }
+        return payment_intents[intent_id]
+
+    @app.get("/stripe/v1/payment_intents/{intent_id}")
+    async def get_payment_intent(intent_id: str):
+        if intent_id not in payment_intents:
+            return JSONResponse(
+                {"error": {"type": "invalid_request_error", "message": f"No such payment_intent: '{intent_id}'"}},
+                status_code=404,
+            )
+        return payment_intents[intent_id]
+
+    @app.post("/stripe/v1/refunds")
+    async def create_refund(request: Request):
+        form = await request.form()
+        intent = payment_intents.get(form.get("payment_intent"), {})
+        return {
+            "id": f"re_{uuid.uuid4().hex[:24]}",
+            "object": "refund",
+            "amount": int(form.get("amount") or intent.get("amount", 0)),
+            "status": "succeeded",
+        }
+
+    # PayPal
+
+    @app.post("/paypal/v1/oauth2/token")
+    async def paypal_token():
+        return {"access_token": f"A21AA{uuid.uuid4().hex}", "token_type": "Bearer", "expires_in": 32400}
+
+    @app.post("/paypal/v2/checkout/orders")
+    async def create_paypal_order(request: Request):
+        data = await request.json()
+        order_id = uuid.uuid4().hex[:17].upper()
+        paypal_orders[order_id] = {
+            "id": order_id,
+            "status": "CREATED",
+            "purchase_units": data.get("purchase_units", []),
+            "links": [{"rel": "approve", "href": f"https://www.sandbox.paypal.com/checkoutnow?token={order_id}"}],
+        }
+        return paypal_orders[order_id]
+
+    @app.get("/paypal/v2/checkout/orders/{order_id}")
+    async def get_paypal_order(order_id: str):
+        if order_id not in paypal_orders:
+            return JSONResponse({"name": "RESOURCE_NOT_FOUND"}, status_code=404)
+        return paypal_orders[order_id]
+
+    @app.post("/paypal/v2/checkout/orders/{order_id}/capture")
+    async def capture_paypal_order(order_id: str):
+        order = paypal_orders.get(order_id)
+        if order is None:
+            return JSONResponse({"name": "RESOURCE_NOT_FOUND"}, status_code=404)
+        order["status"] = "COMPLETED"
+        amount = (order["purchase_units"] or [{}])[0].get("amount", {})
+        capture = {"id": uuid.uuid4().hex[:17].upper(), "status": "COMPLETED", "amount": amount}
+        return {**order, "purchase_units": [{"payments": {"captures": [capture]}}]}
+
+    @app.get("/paypal/v2/payments/captures/{capture_id}")
+    async def get_paypal_capture(capture_id: str):
+        return {"id": capture_id, "status": "COMPLETED", "amount": {"currency_code": "USD", "value": "10.00"}}
+
+    @app.post("/paypal/v2/payments/captures/{capture_id}/refund")
+    async def refund_paypal_capture(capture_id: str, request: Request):
+        data = await request.json() if await request.body() else {}
+        return {
+            "id": uuid.uuid4().hex[:17].upper(),
+            "status": "COMPLETED",
+            "amount": data.get("amount", {"currency_code": "USD", "value": "10.00"}),
+        }
+
+    return app
+
+
+def main():
+    """Run the mock payment provider server."""
+    parser = argparse.ArgumentParser(description="Mock Stripe/PayPal API server for payment load testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8900, help="Port")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency up to this many ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail, 0-1")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of injected failures")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_mock_app(args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f"Mock payment providers on http://{args.host}:{args.port} (started {time.strftime('%H:%M:%S')})")
+    print(f"  PAYMENT_STRIPE_BASE_URL=http://{args.host}:{args.port}/stripe/v1")
+    print(f"  PAYMENT_PAYPAL_BASE_URL=http://{args.host}:{args.port}/paypal")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Inspect, replay and process stored payment webhook events.
+
+Lists events from the webhook_events table, puts selected events back into
+the pending state (resetting their attempts), and optionally processes due
+events in this process with the same worker pool the application uses.
+
+Usage:
+    python scripts/debug/replay_webhooks.py --status dead                  # list dead events
+    python scripts/debug/replay_webhooks.py --status dead --requeue        # replay them in the app
+    python scripts/debug/replay_webhooks.py --order 0b6c... --requeue --all-statuses --process
+    python scripts/debug/replay_webhooks.py --process --workers 8          # drain the backlog here
+    python scripts/debug/replay_webhooks.py --follow                       # run as a standalone processor
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import update
+
+from pycommerce.core.db import SessionLocal
+from pycommerce.models.webhook_event import WebhookEvent, WEBHOOK_DEAD, WEBHOOK_PENDING, WEBHOOK_STATUSES
+from pycommerce.plugins.payment.webhooks import WebhookProcessor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def select_events(session, args):
+    """Build the event query for the command line filters."""
+    query = session.query(WebhookEvent)
+    if args.ids:
+        query = query.filter(WebhookEvent.id.in_(args.ids) | WebhookEvent.event_id.in_(args.ids))
+    if args.provider:
+        query = query.filter(WebhookEvent.provider == args.provider)
+    if args.order:
+        query = query.filter(WebhookEvent.order_id == args.order)
+    if args.type:
+        query = query.filter(WebhookEvent.event_type == args.type)
+    if args.since:
+        query = query.filter(WebhookEvent.received_at >= datetime.utcnow() - timedelta(hours=args.since))
+    if not args.all_statuses:
+        query = query.filter(WebhookEvent.status == args.status)
+    return query.order_by(WebhookEvent.received_at, WebhookEvent.id)
+
+
+def list_events(args) -> list:
+    """Print matching events and return their IDs."""
+    session = SessionLocal()
+    try:
+        events = select_events(session, args).limit(args.limit).all()
+        for event in events:
+            error = f"  {event.last_error[:60]}" if event.last_error else ""
+            print(
+                f"{event.received_at:%Y-%m-%d %H:%M:%S}  {event.provider:<6}  {event.status:<10}  "
+                f"{event.attempts:>2}  {event.event_type:<32}  {event.order_id or '-':<36}  {event.event_id}{error}"
+            )
+        print(f"{len(events)} event(s)")
+        return [event.id for event in events]
+    finally:
+        session.close()
+
+
+def requeue(event_ids: list) -> int:
+    """Put events back into the pending state with no attempts."""
+    if not event_ids:
+        return 0
+    session = SessionLocal()
+    try:
+        result = session.execute(
+            update(WebhookEvent)
+            .where(WebhookEvent.id.in_(event_ids))
+            .values(status=WEBHOOK_PENDING, attempts=0, next_attempt_at=None, locked_at=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        return result.rowcount
+    finally:
+        session.close()
+
+
+async def process(args) -> dict:
+    """Process due events with a local worker pool."""
+    processor = WebhookProcessor(workers=args.workers, poll_interval=args.poll if args.follow else 0)
+    await processor.start()
+    try:
+        if args.follow:
+            logger.info("Processing webhook events, press Ctrl+C to stop")
+            await asyncio.Event().wait()
+        return await processor.drain(timeout=args.timeout)
+    finally:
+        await processor.stop()
+
+
+def main():
+    """Run the webhook replay tool."""
+    parser = argparse.ArgumentParser(description="Inspect, replay and process stored payment webhooks")
+    parser.add_argument("ids", nargs="*", help="Webhook event row IDs or provider event IDs")
+    parser.add_argument("--provider", choices=["stripe", "paypal"], help="Only events from this provider")
+    parser.add_argument("--order", help="Only events for this order ID")
+    parser.add_argument("--type", help="Only events of this type, e.g. payment_intent.succeeded")
+    parser.add_argument("--since", type=float, help="Only events received in the last N hours")
+    parser.add_argument("--status", choices=WEBHOOK_STATUSES, default=WEBHOOK_DEAD, help="Status filter (default: dead)")
+    parser.add_argument("--all-statuses", action="store_true", help="Ignore the status filter")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum number of events to select")
+    parser.add_argument("--requeue", action="store_true", help="Reset selected events to pending")
+    parser.add_argument("--process", action="store_true", help="Process due events in this process")
+    parser.add_argument("--follow", action="store_true", help="Keep processing events until interrupted")
+    parser.add_argument("--workers", type=int, default=4, help="Workers for --process/--follow")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between scans with --follow")
+    parser.add_argument("--timeout", type=float, help="Stop --process after this many seconds")
+    args = parser.parse_args()
+
+    if not args.follow:
+        event_ids = list_events(args)
+        if args.requeue:
+            print(f"Requeued {requeue(event_ids)} event(s)")
+
+    if args.process or args.follow:
+        start = time.perf_counter()
+        try:
+            stats = asyncio.run(process(args))
+        except KeyboardInterrupt:
+            return
+        elapsed = time.perf_counter() - start
+        handled = stats["processed"] + stats["dead"] + stats["retried"]
+        print(
+            f"Processed {stats['processed']}, retried {stats['retried']}, dead {stats['dead']} "
+            f"in {elapsed:.2f}s ({handled / elapsed if elapsed else 0:.0f} events/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
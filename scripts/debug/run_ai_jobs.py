@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Submit, process and inspect batch AI generation jobs.
+
+Jobs are normally processed by the application's AIJobRunner; this script
+runs the same runner in-process, which is useful for backfills and for load
+testing with the offline mock provider.
+
+Usage:
+    python scripts/debug/run_ai_jobs.py --list
+    python scripts/debug/run_ai_jobs.py --job 3f2a...                        # progress of a job
+    python scripts/debug/run_ai_jobs.py --products --tenant <id> --missing-only --apply --process
+    python scripts/debug/run_ai_jobs.py --prompts 5000 --distinct 1000 --mock --latency 200 --process --workers 16
+    python scripts/debug/run_ai_jobs.py --process                            # drain queued jobs here
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_job(job: dict) -> None:
+    """Print one line per job."""
+    counts = " ".join(f"{status}={count}" for status, count in job["counts"].items() if count)
+    print(f"{job['id']}  {job['kind']:<20} {job['status']:<10} {job['progress']:5.1f}%  "
+          f"cached={job['cached']}  {counts}  created {job['created_at']}")
+
+
+async def process(args, service) -> None:
+    """Run an AIJobRunner until the queued jobs are done."""
+    from pycommerce.services.ai_job_service import AIJobRunner, TenantRateLimiter
+
+    limiter = TenantRateLimiter(args.rate) if args.rate is not None else None
+    runner = AIJobRunner(workers=args.workers, service=service, limiter=limiter)
+    await runner.start()
+    start = time.perf_counter()
+    try:
+        stats = await runner.drain(timeout=args.timeout)
+    finally:
+        await runner.stop()
+    elapsed = time.perf_counter() - start
+    generated = stats["done"] - stats["cached"]
+    print(f"Processed in {elapsed:.2f}s: {json.dumps(stats)}")
+    if elapsed:
+        print(f"  {stats['done'] / elapsed:.1f} items/s, {generated / elapsed:.1f} provider calls/s")
+
+
+def main():
+    """Submit, process and inspect AI jobs."""
+    parser = argparse.ArgumentParser(description="Batch AI generation jobs")
+    parser.add_argument("--list", action="store_true", help="List recent jobs")
+    parser.add_argument("--job", help="Show a job's progress")
+    parser.add_argument("--results", action="store_true", help="With --job, print its results")
+    parser.add_argument("--tenant", help="Tenant ID for new jobs and --list")
+    parser.add_argument("--products", action="store_true", help="Submit a product description job")
+    parser.add_argument("--missing-only", action="store_true", help="Only products without a description")
+    parser.add_argument("--apply", action="store_true", help="Write generated descriptions to the products")
+    parser.add_argument("--prompts", type=int, help="Submit a generate job with this many synthetic prompts")
+    parser.add_argument("--distinct", type=int, help="Distinct prompts among --prompts (repeats exercise the cache)")
+    parser.add_argument("--mock", action="store_true", help="Use the offline mock provider")
+    parser.add_argument("--latency", type=float, help="Mock provider latency in ms")
+    parser.add_argument("--process", action="store_true", help="Process queued jobs in this process")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent provider calls with --process")
+    parser.add_argument("--rate", type=float, help="Provider calls per tenant per minute (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, help="Stop processing after this many seconds")
+    args = parser.parse_args()
+
+    if args.latency is not None:
+        os.environ["AI_MOCK_LATENCY_MS"] = str(args.latency)
+
+    from pycommerce.core.db import init_db
+    from pycommerce.services.ai_job_service import AIJobService
+
+    init_db()
+    service = AIJobService()
+    provider = "mock" if args.mock else None
+
+    if args.products:
+        if not args.tenant:
+            parser.error("--products needs --tenant")
+        print_job(service.create_product_description_job(
+            args.tenant, missing_only=args.missing_only, apply=args.apply, provider=provider
+        ))
+    elif args.prompts:
+        distinct = max(1, args.distinct or args.prompts)
+        items = [{"prompt": f"Write a short product blurb for item #{i % distinct}"} for i in range(args.prompts)]
+        print_job(service.create_job("generate", items, args.tenant, {"provider": provider} if provider else {}))
+
+    if args.process:
+        asyncio.run(process(args, service))
+
+    if args.job:
+        job = service.get_job(args.job)
+        if job is None:
+            print(f"Job {args.job} not found")
+            return
+        print_job(job)
+        if args.results:
+            offset = 0
+            while True:
+                page = service.get_results(args.job, offset=offset, limit=500)
+                if not page:
+                    break
+                for item in page:
+                    print(json.dumps(item))
+                offset += len(page)
+
+    if args.list:
+        for job in service.list_jobs(args.tenant, limit=50):
+            print_job(job)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+List, run and inspect scheduled maintenance jobs.
+
+Jobs are normally run by the application's JobRunner; this script runs
+them by hand (still exclusive: a job another process is running is
+skipped) and shows their run history.
+
+Usage:
+    python scripts/debug/run_jobs.py --list
+    python scripts/debug/run_jobs.py --history low-stock-scan --limit 5
+    python scripts/debug/run_jobs.py --run purge-abandoned-carts
+    python scripts/debug/run_jobs.py --due                 # run whatever is due now
+    python scripts/debug/run_jobs.py --loop                # run due jobs until interrupted
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def print_jobs(runner) -> None:
+    """Print one line per registered job with its schedule and last run."""
+    from pycommerce.core.db import SessionLocal
+    from pycommerce.models.scheduled_job import ScheduledJob
+    from pycommerce.services.job_runner import get_jobs
+
+    runner.sync()
+    session = SessionLocal()
+    try:
+        rows = {row.name: row for row in session.query(ScheduledJob)}
+    finally:
+        session.close()
+    for name, job in sorted(get_jobs().items()):
+        row = rows.get(name)
+        last = f"{row.last_status} in {row.last_duration_ms}ms at {row.last_finished_at}" if row and row.last_status else "never run"
+        scope = "exclusive" if job.exclusive else "per-process"
+        print(f"{name:<24} {job.schedule.expression:<14} {scope:<11} next {row.next_run_at if row else '-'}  last {last}")
+
+
+def print_history(runner, name, limit: int) -> None:
+    """Print recent runs, newest first."""
+    for run in runner.history(name, limit):
+        duration = f"{run['duration_ms']}ms" if run["duration_ms"] is not None else "-"
+        outcome = run["error"] or json.dumps(run["result"])[:120]
+        print(f"{run['started_at']}  {run['job']:<24} {run['status']:<10} {duration:>8}  {run['worker']}  {outcome}")
+
+
+def main():
+    """List, run and inspect scheduled jobs."""
+    parser = argparse.ArgumentParser(description="Scheduled maintenance jobs")
+    parser.add_argument("--list", action="store_true", help="List jobs, schedules and last runs")
+    parser.add_argument("--history", nargs="?", const="", help="Show run history (of one job if named)")
+    parser.add_argument("--limit", type=int, default=20, help="Runs shown with --history")
+    parser.add_argument("--run", help="Run a job now, whether or not it is due")
+    parser.add_argument("--due", action="store_true", help="Run the jobs that are due")
+    parser.add_argument("--loop", action="store_true", help="Run due jobs every JOB_POLL_SECONDS until interrupted")
+    args = parser.parse_args()
+
+    from pycommerce.core.db import init_db
+    from pycommerce.services.job_runner import get_job_runner
+
+    init_db()
+    runner = get_job_runner()
+
+    if args.list:
+        print_jobs(runner)
+    if args.run:
+        status = runner.run_job(args.run, force=True)
+        print(f"{args.run}: {status or 'skipped (running in another process)'}")
+        result = runner.latest_result(args.run)
+        if status and result is not None:
+            print(json.dumps(result, indent=2, default=str))
+    if args.due:
+        print(json.dumps(runner.run_due()))
+    if args.loop:
+        try:
+            while True:
+                outcomes = runner.run_due()
+                if outcomes:
+                    logger.info(f"Ran {json.dumps(outcomes)}")
+                time.sleep(runner.poll_interval)
+        except KeyboardInterrupt:
+            pass
+    if args.history is not None:
+        print_history(runner, args.history or None, args.limit)
+    if not (args.list or args.run or args.due or args.loop or args.history is not None):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Startup import-time report.
+
+Imports an application module in a fresh interpreter under
+``python -X importtime`` and summarizes where cold-start time goes: the
+slowest modules by cumulative and self time, time per top-level package,
+total import time and resident memory after import.
+
+Usage:
+    python scripts/debug/startup_report.py                 # web_app, default settings
+    python scripts/debug/startup_report.py --module app_factory --top 40
+    WORKER_ROLE=storefront python scripts/debug/startup_report.py
+    LAZY_ROUTERS=false python scripts/debug/startup_report.py   # compare with eager routers
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Run inside the child interpreter; psutil is imported first so it isn't timed
+_CHILD_CODE = """
+import importlib, json, sys, time
+try:
+    import psutil
+except ImportError:
+    psutil = None
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+rss = psutil.Process().memory_info().rss if psutil else None
+sys.stdout.write(json.dumps({{"wall_seconds": elapsed, "rss_bytes": rss, "modules": len(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        stderr: The interpreter's stderr
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, rest = line.split(":", 1)
+            self_us, cumulative_us, name = rest.split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def run_import(module: str) -> Tuple[List[Tuple[str, int, int]], Dict]:
+    """Import a module in a child interpreter and collect timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE.format(module=module)],
+        cwd=PROJECT_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(result.stderr)
+    summary = {}
+    if result.stdout.strip():
+        try:
+            summary = json.loads(result.stdout.strip().splitlines()[-1])
+        except ValueError:
+            pass
+    if result.returncode != 0:
+        summary["error"] = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+    return rows, summary
+
+
+def main():
+    """Print the startup report."""
+    parser = argparse.ArgumentParser(description="Report import-time cost of application startup")
+    parser.add_argument("--module", default="web_app", help="Module to import (default: web_app)")
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to list")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    rows, summary = run_import(args.module)
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    by_cumulative = sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]
+    by_self = sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]
+    by_package = sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "worker_role": os.environ.get("WORKER_ROLE", "all"),
+            "lazy_routers": os.environ.get("LAZY_ROUTERS", "true"),
+            "summary": summary,
+            "by_cumulative": by_cumulative,
+            "by_self": by_self,
+            "by_package": by_package,
+        }, indent=2))
+        return
+
+    print(f"Startup report for '{args.module}'")
+    print(f"  WORKER_ROLE={os.environ.get('WORKER_ROLE', 'all')}  LAZY_ROUTERS={os.environ.get('LAZY_ROUTERS', 'true')}")
+    if "error" in summary:
+        print(f"  Import failed: {summary['error']}")
+    if "wall_seconds" in summary:
+        print(f"  Wall time:      {summary['wall_seconds']:.2f}s")
+        print(f"  Modules loaded: {summary['modules']}")
+    if summary.get("rss_bytes"):
+        print(f"  RSS after import: {summary['rss_bytes'] / 1024 / 1024:.1f} MB")
+
+    print(f"\nSlowest imports (cumulative):")
+    for name, _, cumulative_us in by_cumulative:
+        print(f"  {cumulative_us / 1000:>9.1f} ms  {name}")
+
+    print(f"\nSlowest imports (self):")
+    for name, self_us, _ in by_self:
+        print(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+    print(f"\nTime by top-level package (self):")
+    for package, self_us in by_package:
+        print(f"  {self_us / 1000:>9.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
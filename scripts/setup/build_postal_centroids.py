@@ -0,0 +1,50 @@
+"""
+Build the postal code centroid database used for shipping distances.
+
+Reads a CSV with country, postal_code, latitude and longitude columns, or a
+GeoNames postal code dump (e.g. allCountries.txt from
+https://download.geonames.org/export/zip/), and writes the memory-mapped
+centroid file read by pycommerce.plugins.shipping.geo.
+
+Usage:
+    python scripts/setup/build_postal_centroids.py allCountries.txt [--output data/postal_centroids.bin]
+    python scripts/setup/build_postal_centroids.py centroids.csv --countries US,CA,GB
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pycommerce.plugins.shipping.geo import (
+    DEFAULT_CENTROIDS_PATH,
+    build_centroid_file,
+    read_centroid_csv,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the centroid database build."""
+    parser = argparse.ArgumentParser(description="Build the postal code centroid database")
+    parser.add_argument("source", help="CSV file or GeoNames .txt dump")
+    parser.add_argument("--output", default=DEFAULT_CENTROIDS_PATH, help="Output file")
+    parser.add_argument("--countries", help="Comma-separated country codes to keep (default: all)")
+    args = parser.parse_args()
+
+    rows = read_centroid_csv(args.source)
+    if args.countries:
+        countries = {c.strip().upper() for c in args.countries.split(",") if c.strip()}
+        rows = (row for row in rows if row[0].upper() in countries)
+
+    count = build_centroid_file(rows, args.output)
+    size = os.path.getsize(args.output)
+    print(f"Wrote {count:,} postal code centroids to {args.output} ({size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
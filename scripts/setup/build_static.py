@@ -0,0 +1,48 @@
+"""
+Build fingerprinted, precompressed static assets.
+
+Hashes every file under static/ (except user media), copies it to
+static/dist/ with the hash in its name, writes gzip/brotli variants and
+a manifest.json used by the static_url() template helper.
+
+Usage:
+    python scripts/setup/build_static.py [--static-dir static] [--no-clean]
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pycommerce.utils.static_assets import build_static_assets, BROTLI_AVAILABLE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the static asset build."""
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument("--static-dir", default="static", help="Static directory to process")
+    parser.add_argument("--no-clean", action="store_true", help="Keep previous build output")
+    args = parser.parse_args()
+
+    if not BROTLI_AVAILABLE:
+        logger.warning("brotli is not installed; only gzip variants will be written")
+
+    manifest = build_static_assets(args.static_dir, clean=not args.no_clean)
+    assets = manifest["assets"]
+
+    original = sum(entry["size"] for entry in assets.values())
+    compressed = sum(
+        min([entry["size"]] + list(entry["encodings"].values())) for entry in assets.values()
+    )
+    print(f"Built {len(assets)} assets")
+    print(f"  Original size:      {original:,} bytes")
+    print(f"  Smallest on wire:   {compressed:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Tests for batch AI jobs: prompt hashing, per-tenant rate limits and item processing.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.core.exceptions import AIRateLimitError
+from pycommerce.models.ai_job import (
+    AIJob, AIJobItem, AIResultCache,
+    AI_ITEM_CANCELLED, AI_ITEM_DONE, AI_ITEM_FAILED, AI_ITEM_PENDING, AI_ITEM_RUNNING,
+    AI_JOB_CANCELLED, AI_JOB_COMPLETED,
+)
+from pycommerce.models.db_registry import Product
+from pycommerce.plugins.ai.providers import get_ai_provider
+from pycommerce.services import ai_job_service
+from pycommerce.services.ai_job_service import (
+    AIJobRunner,
+    AIJobService,
+    TenantRateLimiter,
+    build_product_prompt,
+    prompt_hash,
+    provider_identity,
+)
+
+
+def test_prompt_hash_distinguishes_inputs():
+    """Identical requests share a hash; provider, kind and instructions change it."""
+    base = prompt_hash("openai:gpt-4", "generate", "Describe a mug")
+    assert base == prompt_hash("openai:gpt-4", "generate", "Describe a mug")
+    assert base != prompt_hash("openai:gpt-3.5-turbo", "generate", "Describe a mug")
+    assert base != prompt_hash("openai:gpt-4", "enhance", "Describe a mug")
+    assert prompt_hash("mock:", "enhance", "text", "seo") != prompt_hash("mock:", "enhance", "text", "formal")
+
+
+def test_provider_identity_uses_registered_name():
+    """Unknown providers fall back to the mock and are identified as such."""
+    assert provider_identity(get_ai_provider("mock", {})) == "mock:"
+    assert provider_identity(get_ai_provider("no-such-provider", {"model": "x"})) == "mock:x"
+
+
+def test_rate_limiter_buckets_per_tenant():
+    """Each tenant gets its own burst, refilled at the configured rate."""
+    now = [0.0]
+    limiter = TenantRateLimiter(rate_per_minute=60, burst=2, clock=lambda: now[0])
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") == 0
+    assert limiter.try_acquire("a") > 0
+    assert limiter.limited_tenants() == ["a"]
+    assert limiter.try_acquire("b") == 0
+
+    now[0] = 1.0
+    assert limiter.try_acquire("a") == 0
+
+
+def test_rate_limiter_disabled():
+    """A zero rate disables limiting."""
+    limiter = TenantRateLimiter(rate_per_minute=0, burst=1)
+    assert all(limiter.try_acquire("a") == 0 for _ in range(100))
+    assert limiter.limited_tenants() == []
+
+
+def test_product_prompt_includes_details():
+    """Product prompts carry the product's name, SKU and categories."""
+    prompt = build_product_prompt({"name": "Mug", "sku": "M-1", "categories": ["Kitchen"], "description": ""}, tone="casual")
+    assert "Product: Mug" in prompt
+    assert "SKU: M-1" in prompt
+    assert "Categories: Kitchen" in prompt
+    assert "casual tone" in prompt
+
+
+class StubProvider:
+    """Provider that records its calls; failures and a gate can be queued."""
+    name = "stub"
+    model = "test"
+
+    def __init__(self):
+        self.calls = []
+        self.errors = []
+        self.gate = None
+
+    def generate_text(self, prompt, options=None):
+        self.calls.append(prompt)
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"Generated: {prompt}"
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    stub = StubProvider()
+    monkeypatch.setattr(ai_job_service, "resolve_provider", lambda tenant_id=None, provider_name=None: stub)
+    return stub
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ai_jobs.db'}", connect_args={"check_same_thread": False})
+    for model in (AIJob, AIJobItem, AIResultCache):
+        model.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def service(session_factory):
+    return AIJobService(session_factory, limiter=TenantRateLimiter(rate_per_minute=0))
+
+
+@pytest.fixture
+def runner(service, provider):
+    return AIJobRunner(workers=0, max_attempts=2, service=service)
+
+
+def job_items(session_factory, job_id):
+    with session_factory() as session:
+        return session.query(AIJobItem).filter(AIJobItem.job_id == job_id).order_by(AIJobItem.position).all()
+
+
+def set_item(session_factory, item_id, **values):
+    with session_factory() as session:
+        session.execute(update(AIJobItem).where(AIJobItem.id == item_id).values(**values))
+        session.commit()
+
+
+def test_claim_takes_a_lease_once(service, runner, session_factory):
+    """A claimed item is leased to one worker until the lease goes stale."""
+    job = service.create_job("generate", [{"prompt": "Mug"}], tenant_id="t1")
+    (item,) = job_items(session_factory, job["id"])
+
+    claimed = runner._claim(item.id)
+    assert claimed["prompt"] == "Mug" and claimed["attempts"] == 1
+    (item,) = job_items(session_factory, job["id"])
+    assert item.status == AI_ITEM_RUNNING and item.locked_at is not None
+    assert service.get_job(job["id"])["status"] == "running"
+
+    assert runner.process_item(item.id) is None
+    assert runner.stats["skipped"] == 1
+    assert runner.release_stale() == 0
+
+    set_item(session_factory, item.id, locked_at=datetime.utcnow() - timedelta(days=1))
+    assert runner.release_stale() == 1
+    assert runner.process_item(item.id) == AI_ITEM_DONE
+    assert service.get_job(job["id"])["status"] == AI_JOB_COMPLETED
+
+
+def test_identical_prompts_are_generated_once(service, runner, provider, session_factory):
+    """Duplicate prompts reuse the cached result, within a job and across jobs."""
+    job = service.create_job("generate", [{"prompt": "Mug"}, {"prompt": "Mug"}, {"prompt": "Cup"}])
+    for item in job_items(session_factory, job["id"]):
+        assert runner.process_item(item.id) == AI_ITEM_DONE
+
+    assert provider.calls == ["Mug", "Cup"]
+    assert [(item.result, item.cached) for item in job_items(session_factory, job["id"])] == [
+        ("Generated: Mug", 0), ("Generated: Mug", 1), ("Generated: Cup", 0),
+    ]
+    assert runner.stats["cached"] == 1
+
+    again = service.create_job("generate", [{"prompt": "Cup"}])
+    assert again["status"] == AI_JOB_COMPLETED
+    assert again["cached"] == 1
+    assert provider.calls == ["Mug", "Cup"]
+
+
+def test_duplicate_waits_for_inflight_generation(service, runner, provider, session_factory):
+    """A worker given a prompt already being generated waits for that result."""
+    job = service.create_job("generate", [{"prompt": "Mug"}, {"prompt": "Mug"}])
+    first, second = job_items(session_factory, job["id"])
+    provider.gate = threading.Event()
+    statuses = {}
+
+    class WatchedEvent(threading.Event):
+        def __init__(self):
+            super().__init__()
+            self.waiting = threading.Event()
+
+        def wait(self, timeout=None):
+            self.waiting.set()
+            return super().wait(timeout)
+
+    first_worker = threading.Thread(target=lambda: statuses.update(first=runner.process_item(first.id)))
+    first_worker.start()
+    for _ in range(500):
+        if provider.calls:
+            break
+        time.sleep(0.01)
+    watched = runner._inflight[first.prompt_hash] = WatchedEvent()
+
+    second_worker = threading.Thread(target=lambda: statuses.update(second=runner.process_item(second.id)))
+    second_worker.start()
+    assert watched.waiting.wait(5)
+    provider.gate.set()
+    first_worker.join(5)
+    second_worker.join(5)
+
+    assert statuses == {"first": AI_ITEM_DONE, "second": AI_ITEM_DONE}
+    assert provider.calls == ["Mug"]
+    assert [item.cached for item in job_items(session_factory, job["id"])] == [0, 1]
+
+
+def test_duplicate_does_not_hold_a_worker(service, provider, session_factory):
+    """A duplicate waits one poll interval, then goes back to pending for the poller."""
+    runner = AIJobRunner(workers=0, poll_interval=0.05, service=service)
+    job = service.create_job("generate", [{"prompt": "Mug"}])
+    (item,) = job_items(session_factory, job["id"])
+    runner._inflight[item.prompt_hash] = threading.Event()
+
+    started = time.monotonic()
+    assert runner.process_item(item.id) == AI_ITEM_PENDING
+    assert time.monotonic() - started < 5
+    (item,) = job_items(session_factory, job["id"])
+    assert item.attempts == 0 and item.next_attempt_at is not None
+    assert provider.calls == []
+
+
+def test_applied_descriptions_are_sanitized_and_purged(service, runner, provider, session_factory, monkeypatch):
+    """Generated HTML is sanitized before it is written and the product's caches are invalidated."""
+    Product.__table__.create(session_factory.kw["bind"])
+    with session_factory() as session:
+        session.add(Product(id="p1", tenant_id="t1", name="Mug", price=5, sku="M-1"))
+        session.commit()
+    purged = []
+    monkeypatch.setattr(ai_job_service, "invalidate_product_caches", lambda *args: purged.append(args))
+    provider.generate_text = lambda prompt, options=None: '<p onclick="x()">Nice</p><script>x()</script>'
+
+    job = service.create_product_description_job("t1", apply=True)
+    (item,) = job_items(session_factory, job["id"])
+    assert runner.process_item(item.id) == AI_ITEM_DONE
+
+    with session_factory() as session:
+        assert session.get(Product, "p1").description == "<p>Nice</p>x()"
+    assert purged == [("t1", "p1")]
+
+
+def test_throttled_items_are_retried(service, provider, session_factory):
+    """Rate-limited items go back to pending without using up an attempt."""
+    limiter = TenantRateLimiter(rate_per_minute=1, burst=1)
+    runner = AIJobRunner(workers=0, max_attempts=2, service=service, limiter=limiter)
+    job = service.create_job("generate", [{"prompt": "Mug"}, {"prompt": "Cup"}], tenant_id="t1")
+    first, second = job_items(session_factory, job["id"])
+
+    assert runner.process_item(first.id) == AI_ITEM_DONE
+    assert runner.process_item(second.id) == AI_ITEM_PENDING
+    assert runner.stats["throttled"] == 1
+    item = job_items(session_factory, job["id"])[1]
+    assert item.attempts == 0 and item.next_attempt_at > datetime.utcnow()
+    assert runner.due_items() == []
+
+    # A provider-side rate limit counts as a failed attempt and backs off
+    runner.limiter = TenantRateLimiter(rate_per_minute=0)
+    provider.errors.append(AIRateLimitError("slow down"))
+    set_item(session_factory, second.id, next_attempt_at=None)
+    assert runner.process_item(second.id) == AI_ITEM_PENDING
+    item = job_items(session_factory, job["id"])[1]
+    assert item.attempts == 1 and item.last_error == "slow down"
+    assert item.next_attempt_at > datetime.utcnow()
+    assert runner.stats["retried"] == 1
+
+    set_item(session_factory, second.id, next_attempt_at=None)
+    assert runner.process_item(second.id) == AI_ITEM_DONE
+    assert service.get_job(job["id"])["status"] == AI_JOB_COMPLETED
+
+
+def test_item_fails_after_max_attempts(service, runner, provider, session_factory):
+    """An item that keeps failing is marked failed and its job finishes."""
+    job = service.create_job("generate", [{"prompt": "Mug"}])
+    (item,) = job_items(session_factory, job["id"])
+    provider.errors = [RuntimeError("boom"), RuntimeError("boom again")]
+
+    assert runner.process_item(item.id) == AI_ITEM_PENDING
+    set_item(session_factory, item.id, next_attempt_at=None)
+    assert runner.process_item(item.id) == AI_ITEM_FAILED
+
+    (item,) = job_items(session_factory, job["id"])
+    assert item.attempts == 2 and item.last_error == "boom again" and item.result is None
+    job = service.get_job(job["id"])
+    assert job["status"] == AI_JOB_COMPLETED
+    assert job["counts"][AI_ITEM_FAILED] == 1
+
+
+def test_cancel_job(service, runner, provider, session_factory):
+    """Cancelling stops pending items; claimed items finish."""
+    job = service.create_job("generate", [{"prompt": "Mug"}, {"prompt": "Cup"}], tenant_id="t1")
+    first, second = job_items(session_factory, job["id"])
+    runner._claim(first.id)
+
+    assert not service.cancel_job(job["id"], tenant_id="t2")
+    assert service.cancel_job(job["id"], tenant_id="t1")
+    assert [item.status for item in job_items(session_factory, job["id"])] == [AI_ITEM_RUNNING, AI_ITEM_CANCELLED]
+    assert runner.process_item(second.id) is None
+    assert service.get_job(job["id"])["status"] == AI_JOB_CANCELLED
+    assert not service.cancel_job(job["id"])
+    assert provider.calls == []
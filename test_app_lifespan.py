@@ -0,0 +1,44 @@
+"""
+Tests for starting and stopping background services with the app.
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app_factory
+
+SERVICES = [
+    "preload_credentials",
+    "start_webhook_processor",
+    "start_ai_job_runner",
+    "start_cart_store",
+    "start_event_dispatcher",
+    "start_job_runner",
+    "stop_job_runner",
+    "stop_event_dispatcher",
+    "stop_cart_store",
+    "stop_ai_job_runner",
+    "stop_webhook_processor",
+    "close_transports",
+]
+
+
+def test_lifespan_starts_and_stops_services_in_order(monkeypatch):
+    """Services start before the first request and stop in reverse order on shutdown."""
+    calls = []
+    for name in SERVICES:
+        if name == "preload_credentials":
+            monkeypatch.setattr(app_factory, name, lambda: calls.append("preload_credentials"))
+        else:
+            async def record(name=name):
+                calls.append(name)
+            monkeypatch.setattr(app_factory, name, record)
+
+    app = FastAPI(lifespan=app_factory.lifespan)
+
+    @app.get("/ping")
+    def ping():
+        return {"started": list(calls)}
+
+    with TestClient(app) as client:
+        assert client.get("/ping").json() == {"started": SERVICES[:6]}
+    assert calls == SERVICES
@@ -0,0 +1,180 @@
+"""
+Tests for token verification caching, embedded claims and revocation.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.models.auth_revocation import RevokedToken, UserClaimsVersion
+from pycommerce.models.user import UserManager, UserRole
+from pycommerce.services.auth_cache import RevocationList
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    for model in (RevokedToken, UserClaimsVersion):
+        model.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def manager(session_factory):
+    return UserManager(RevocationList(session_factory))
+
+
+def make_user(manager, role=UserRole.STAFF):
+    return manager.create(
+        {"email": "staff@example.com", "first_name": "Sam", "last_name": "Lee", "role": role},
+        password="secret-1",
+    )
+
+
+def count_lookups(manager):
+    calls = []
+    get = manager.get
+    manager.get = lambda user_id: calls.append(user_id) or get(user_id)
+    return calls
+
+
+def test_verify_token_caches_user(manager):
+    """Repeated verification of a token looks the user up once."""
+    user = make_user(manager)
+    token = manager.create_access_token(user.id)
+    calls = count_lookups(manager)
+
+    assert manager.verify_token(token).id == user.id
+    assert manager.verify_token(token).id == user.id
+    assert len(calls) == 1
+
+    manager.update(user.id, {"first_name": "Samantha"})
+    calls.clear()
+    assert manager.verify_token(token).first_name == "Samantha"
+    assert len(calls) == 1
+
+
+def test_embedded_claims_skip_lookup_until_user_changes(manager):
+    """Current claims verify without a lookup; stale claims fall back to the user."""
+    user = make_user(manager)
+    token = manager.create_access_token(user.id)
+    calls = count_lookups(manager)
+
+    principal = manager.verify_principal(token)
+    assert principal.user_id == str(user.id)
+    assert principal.role == "staff"
+    assert calls == []
+
+    manager.update(user.id, {"role": UserRole.ADMIN})
+    calls.clear()
+    assert manager.verify_principal(token).role == "admin"
+    assert len(calls) == 1
+
+
+def test_revoked_tokens_are_rejected(manager):
+    """Logout, password changes and deactivation end existing tokens."""
+    user = make_user(manager)
+    first, second = manager.create_access_token(user.id), manager.create_access_token(user.id)
+
+    assert manager.revoke_token(first)
+    assert manager.verify_token(first) is None
+    assert manager.verify_token(second) is not None
+
+    manager.update(user.id, {}, password="secret-2")
+    assert manager.verify_principal(second) is None
+    assert manager.verify_token(manager.create_access_token(user.id)) is not None
+
+    manager.update(user.id, {"is_active": False})
+    assert manager.verify_token(manager.create_access_token(user.id)) is None
+
+
+def test_revocation_list_drops_expired_tokens(session_factory):
+    """Revoked token ids are kept only until the token would have expired."""
+    now = [1000]
+    revocations = RevocationList(session_factory, clock=lambda: now[0])
+    revocations.revoke_token("a", expires_at=1100)
+    revocations.revoke_token("b", expires_at=2000)
+    assert revocations.is_revoked({"sub": "u", "jti": "a"})
+
+    now[0] = 1500
+    revocations.revoke_token("c", expires_at=3000)
+    assert len(revocations) == 2
+    assert not revocations.is_revoked({"sub": "u", "jti": "a"})
+
+
+def test_revocations_apply_across_workers(session_factory):
+    """Logout, demotion and deactivation in one worker apply in another after its refresh interval."""
+    now = [0.0]
+    worker_a = UserManager(RevocationList(session_factory))
+    worker_b = UserManager(RevocationList(session_factory, ttl=5, monotonic=lambda: now[0]))
+    user = make_user(worker_a, role=UserRole.ADMIN)
+    # Both workers read the same user store
+    worker_b._users, worker_b._email_index = worker_a._users, worker_a._email_index
+
+    first, second = worker_a.create_access_token(user.id), worker_a.create_access_token(user.id)
+    assert worker_b.verify_principal(first).role == "admin"
+    assert worker_b.verify_token(second).id == user.id
+
+    assert worker_a.revoke_token(first)
+    assert worker_b.verify_principal(first) is not None
+    now[0] += 5
+    assert worker_b.verify_principal(first) is None
+
+    worker_a.update(user.id, {"role": UserRole.STAFF})
+    now[0] += 5
+    assert worker_b.verify_principal(second).role == "staff"
+
+    worker_a.update(user.id, {"is_active": False})
+    now[0] += 5
+    assert worker_b.verify_principal(second) is None
+    assert worker_b.verify_token(second) is None
+
+
+def test_common_path_makes_no_queries(session_factory):
+    """Tokens are checked against the in-process copy; local changes apply at once."""
+    manager = UserManager(RevocationList(session_factory, ttl=60))
+    user = make_user(manager)
+    token = manager.create_access_token(user.id)
+    assert manager.verify_principal(token) is not None
+
+    statements = []
+    event.listen(session_factory.kw["bind"], "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for _ in range(10):
+        assert manager.verify_principal(token).user_id == str(user.id)
+    assert statements == []
+
+    manager.update(user.id, {"is_active": False})
+    statements.clear()
+    assert manager.verify_principal(token) is None
+    assert statements == []
+
+
+def test_unreachable_store_keeps_last_copy(session_factory):
+    """A failed refresh keeps serving the last copy; with no copy the error is raised."""
+    now = [0.0]
+    revocations = RevocationList(session_factory, ttl=5, monotonic=lambda: now[0])
+    revocations.revoke_token("a", expires_at=2 ** 31 - 1)
+    assert revocations.is_revoked({"sub": "u", "jti": "a"})
+
+    revocations._session_factory = sessionmaker(bind=create_engine("sqlite://"))
+    now[0] += 5
+    assert revocations.is_revoked({"sub": "u", "jti": "a"})
+    assert not revocations.is_revoked({"sub": "u", "jti": "b"})
+
+    with pytest.raises(OperationalError):
+        RevocationList(revocations._session_factory).check({"sub": "u", "jti": "a"})
+
+
+def test_admin_user_is_signed_out_when_store_fails(monkeypatch):
+    """An unreadable revocation store signs the request out instead of failing it."""
+    from routes.admin import auth
+
+    def fail(token):
+        raise OperationalError("SELECT", {}, Exception("unreachable"))
+
+    monkeypatch.setattr(auth.user_manager, "verify_principal", fail)
+    request = type("FakeRequest", (), {"session": {}, "cookies": {"admin_access_token": "token"}})()
+    assert asyncio.run(auth.get_current_user(request)) is None
@@ -0,0 +1,187 @@
+"""
+Tests for the shared cart store: SQL persistence, write-behind and expiry.
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from pycommerce.core.exceptions import CartError
+from pycommerce.models.cart import CartManager
+from pycommerce.services.cart_store import (
+    CachedCartRepository,
+    MemoryCartRepository,
+    SQLCartRepository,
+    cart_items_table,
+    cart_metadata,
+)
+
+
+@pytest.fixture
+def sql_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    cart_metadata.create_all(engine)
+    return engine
+
+
+def worker(engine, **options):
+    """A CartManager as one worker process would have it."""
+    options.setdefault("flush_interval", 60)
+    options.setdefault("sweep_interval", 0)
+    return CartManager(CachedCartRepository(SQLCartRepository(engine), **options))
+
+
+def test_cart_is_shared_between_workers(sql_engine):
+    """A cart written by one worker is read by another after the flush."""
+    first, second = worker(sql_engine), worker(sql_engine)
+    product_id = uuid4()
+    cart = first.create()
+    first.add_item(cart.id, product_id, 2)
+    first.add_item(cart.id, product_id, 1)
+
+    with pytest.raises(CartError):
+        second.get(cart.id)
+
+    first._repository.flush()
+    items = second.get(cart.id).items
+    assert [(item.product_id, item.quantity) for item in items] == [(product_id, 3)]
+
+
+def test_concurrent_adds_are_not_lost(sql_engine):
+    """Adds made by two workers from the same starting cart are all kept; quantity sets are last-writer-wins."""
+    first, second = worker(sql_engine), worker(sql_engine)
+    existing, new = uuid4(), uuid4()
+    cart = first.create()
+    first.add_item(cart.id, existing, 1)
+    first._repository.flush()
+
+    # Both workers read the cart before either writes its changes
+    second.get(cart.id)
+    first.add_item(cart.id, existing, 2)
+    first.add_item(cart.id, new, 1)
+    second.add_item(cart.id, existing, 3)
+    second.add_item(cart.id, new, 4)
+    first._repository.flush()
+    second._repository.flush()
+
+    items = worker(sql_engine).get(cart.id).items
+    assert {item.product_id: item.quantity for item in items} == {existing: 6, new: 5}
+
+    # Setting a quantity replaces every stored copy of the line
+    first.update_item(cart.id, new, 2)
+    first._repository.flush()
+    second.update_item(cart.id, existing, 1)
+    second._repository.flush()
+    with sql_engine.connect() as conn:
+        rows = conn.execute(select(cart_items_table.c.product_id, cart_items_table.c.quantity)).all()
+    assert sorted(rows) == sorted([(str(existing), 1), (str(new), 2)])
+
+
+def test_line_updates_are_coalesced(sql_engine):
+    """Several changes to a line are written once, and removed lines are deleted."""
+    manager = worker(sql_engine)
+    keep, drop = uuid4(), uuid4()
+    cart = manager.create()
+    manager.add_item(cart.id, keep, 1)
+    manager.add_item(cart.id, drop, 1)
+    for quantity in range(2, 6):
+        manager.update_item(cart.id, keep, quantity)
+    manager._repository.flush()
+    manager.remove_item(cart.id, drop)
+    assert manager._repository.flush() == 1
+
+    with sql_engine.connect() as conn:
+        rows = conn.execute(select(cart_items_table.c.product_id, cart_items_table.c.quantity)).all()
+    assert rows == [(str(keep), 5)]
+
+    manager.clear(cart.id)
+    manager._repository.flush()
+    with sql_engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(cart_items_table)).scalar() == 0
+
+
+def test_expired_carts_are_hidden_and_swept(sql_engine):
+    """Carts past their TTL are not returned and the sweep deletes them."""
+    repository = SQLCartRepository(sql_engine, ttl=60)
+    manager = CartManager(repository)
+    cart = manager.create()
+    manager.add_item(cart.id, uuid4(), 1)
+
+    assert repository.purge_expired() == 0
+    assert repository.purge_expired(datetime.now() + timedelta(seconds=120)) == 1
+    with pytest.raises(CartError):
+        manager.get(cart.id)
+    with sql_engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(cart_items_table)).scalar() == 0
+
+
+def test_memory_repository_keeps_manager_behaviour():
+    """The in-process repository supports the full CartManager API."""
+    manager = CartManager(MemoryCartRepository())
+    user_id, product_id = uuid4(), uuid4()
+    cart = manager.get_user_cart(user_id)
+    assert manager.get_user_cart(user_id).id == cart.id
+
+    manager.add_item(cart.id, product_id, 2)
+    assert manager.get(cart.id).items[0].quantity == 2
+    with pytest.raises(CartError):
+        manager.update_item(cart.id, uuid4(), 1)
+
+    manager.delete(cart.id)
+    with pytest.raises(CartError):
+        manager.get(cart.id)
+    assert manager.get_user_cart(user_id).id != cart.id
+
+
+class FlakyRepository(MemoryCartRepository):
+    """A backend whose writes fail while failing is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+
+    def apply(self, changes):
+        if self.failing:
+            raise ConnectionError("database unavailable")
+        super().apply(changes)
+
+
+def test_failed_flush_keeps_changes_for_retry():
+    """Failed writes stay pending, back off, and are written once the backend recovers."""
+    backend = FlakyRepository()
+    repository = CachedCartRepository(backend, flush_interval=60, sweep_interval=0, retry_delay=0.05)
+    manager = CartManager(repository)
+    product_id = uuid4()
+    cart = manager.create()
+    manager.add_item(cart.id, product_id, 1)
+
+    assert repository.flush() == 0
+    assert repository.flush() == 0  # waiting to be retried
+    assert repository.stats["retries"] == 1
+    manager.add_item(cart.id, product_id, 2)  # served from the tier while unwritten
+    assert manager.get(cart.id).items[0].quantity == 3
+
+    backend.failing = False
+    assert repository.flush(force=True) == 1
+    assert backend.get(cart.id).items[0].quantity == 3
+    assert repository.flush() == 0
+
+
+def test_flush_gives_up_after_max_attempts():
+    """A cart that keeps failing is dropped and reported as an error."""
+    backend = FlakyRepository()
+    repository = CachedCartRepository(backend, flush_interval=60, sweep_interval=0, max_attempts=2, retry_delay=0)
+    manager = CartManager(repository)
+    cart = manager.create()
+
+    assert repository.flush() == 0
+    with pytest.raises(CartError):
+        repository.flush()
+    assert repository.stats["errors"] == 1
+    assert repository.flush() == 0
+    backend.failing = False
+    with pytest.raises(CartError):
+        manager.get(cart.id)
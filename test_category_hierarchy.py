@@ -0,0 +1,178 @@
+"""
+Tests for category materialized paths, tree building and CategoryManager.
+"""
+
+import pytest
+from flask import Flask
+
+from models import Category, Product, ProductCategory, Tenant, db
+from pycommerce.models import category as category_module
+from pycommerce.models.category import (
+    CategoryManager,
+    build_category_tree,
+    category_path,
+    compute_category_paths,
+    invalidate_category_tree,
+)
+
+
+def test_category_path_nests_under_parent():
+    """A child's path extends its parent's, so subtrees share a prefix."""
+    root = category_path(None, "r")
+    child = category_path(root, "c")
+    assert root == "/r/"
+    assert child == "/r/c/"
+    assert child.startswith(root)
+    assert not category_path(None, "r2").startswith(root)
+
+
+def test_compute_category_paths():
+    """Paths and depths follow parent links regardless of row order."""
+    paths = compute_category_paths([("c", "b"), ("a", None), ("b", "a"), ("x", None)])
+    assert paths == {
+        "a": ("/a/", 0),
+        "b": ("/a/b/", 1),
+        "c": ("/a/b/c/", 2),
+        "x": ("/x/", 0),
+    }
+
+
+def test_compute_category_paths_orphans_and_cycles():
+    """Missing parents and parent cycles do not loop forever."""
+    paths = compute_category_paths([("o", "missing"), ("p", "q"), ("q", "p")])
+    assert paths["o"] == ("/o/", 0)
+    assert {paths["p"][1], paths["q"][1]} == {0, 1}
+
+
+def test_build_category_tree():
+    """Children nest under parents; children of missing parents are dropped."""
+    tree = build_category_tree([
+        {"id": "b", "parent_id": "a", "name": "B"},
+        {"id": "a", "parent_id": None, "name": "A"},
+        {"id": "z", "parent_id": "inactive", "name": "Z"},
+    ])
+    assert [node["name"] for node in tree] == ["A"]
+    assert [child["name"] for child in tree[0]["children"]] == ["B"]
+
+
+TENANT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'categories.db'}"
+    db.init_app(app)
+    with app.app_context():
+        for model in (Tenant, Category, Product, ProductCategory):
+            model.__table__.create(db.engine)
+        db.session.add(Tenant(id=TENANT_ID, name="Shop", slug="shop"))
+        db.session.commit()
+    monkeypatch.setattr(category_module, "flask_app", app)
+    invalidate_category_tree(TENANT_ID)
+    return app
+
+
+@pytest.fixture
+def manager(app):
+    return CategoryManager()
+
+
+def create(manager, app, slug, parent=None):
+    """Create a category through the manager and return its id."""
+    assert manager.create_category(TENANT_ID, slug.title(), slug, parent_id=parent) is not None
+    with app.app_context():
+        return Category.query.filter_by(tenant_id=TENANT_ID, slug=slug).one().id
+
+
+def paths(app):
+    with app.app_context():
+        return {c.slug: (c.path, c.depth) for c in Category.query.all()}
+
+
+def tree_slugs(nodes):
+    return {node["slug"]: tree_slugs(node["children"]) for node in nodes}
+
+
+@pytest.fixture
+def hierarchy(manager, app):
+    """Categories a > a1 > a2 and b."""
+    a = create(manager, app, "a")
+    a1 = create(manager, app, "a1", a)
+    a2 = create(manager, app, "a2", a1)
+    b = create(manager, app, "b")
+    return {"a": a, "a1": a1, "a2": a2, "b": b}
+
+
+def test_move_category_rewrites_subtree_paths(manager, app, hierarchy):
+    """Moving a category rewrites its own and every descendant's path and depth."""
+    a, a1, a2, b = (hierarchy[slug] for slug in ("a", "a1", "a2", "b"))
+    assert paths(app)["a2"] == (f"/{a}/{a1}/{a2}/", 2)
+
+    assert manager.update_category(a1, parent_id=b) is not None
+    assert paths(app) == {
+        "a": (f"/{a}/", 0),
+        "a1": (f"/{b}/{a1}/", 1),
+        "a2": (f"/{b}/{a1}/{a2}/", 2),
+        "b": (f"/{b}/", 0),
+    }
+
+    assert manager.update_category(a1, parent_id=None) is not None
+    assert paths(app)["a1"] == (f"/{a1}/", 0)
+    assert paths(app)["a2"] == (f"/{a1}/{a2}/", 1)
+
+
+def test_move_category_rejects_own_subtree(manager, app, hierarchy):
+    """A category cannot become its own parent or a child of its descendants."""
+    before = paths(app)
+    assert manager.update_category(hierarchy["a"], parent_id=hierarchy["a2"]) is None
+    assert manager.update_category(hierarchy["a"], parent_id=hierarchy["a"]) is None
+    assert paths(app) == before
+    with app.app_context():
+        assert db.session.get(Category, hierarchy["a"]).parent_id is None
+
+
+def test_get_products_in_category_includes_subcategories(manager, app, hierarchy):
+    """Products of every subcategory are found by the category's path prefix."""
+    with app.app_context():
+        for slug in ("a", "a2", "b"):
+            product = Product(tenant_id=TENANT_ID, name=f"in-{slug}", price=1.0, sku=slug)
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(ProductCategory(product_id=product.id, category_id=hierarchy[slug]))
+        db.session.commit()
+
+    def names(category_id, **kwargs):
+        return {p.name for p in manager.get_products_in_category(category_id, **kwargs)}
+
+    assert names(hierarchy["a"]) == {"in-a", "in-a2"}
+    assert names(hierarchy["a1"]) == {"in-a2"}
+    assert names(hierarchy["a"], include_subcategories=False) == {"in-a"}
+    assert names(hierarchy["b"]) == {"in-b"}
+
+
+def test_category_tree_cache_invalidated_on_writes(manager, app, hierarchy):
+    """Cached trees are served until a create, move or delete through the manager."""
+    assert tree_slugs(manager.get_category_tree(TENANT_ID)) == {"a": {"a1": {"a2": {}}}, "b": {}}
+
+    # Writes made behind the manager's back are not seen while the tree is cached
+    with app.app_context():
+        db.session.add(Category(tenant_id=TENANT_ID, name="Hidden", slug="hidden"))
+        db.session.commit()
+    assert "hidden" not in tree_slugs(manager.get_category_tree(TENANT_ID))
+
+    c = create(manager, app, "c", hierarchy["b"])
+    assert tree_slugs(manager.get_category_tree(TENANT_ID)) == {
+        "a": {"a1": {"a2": {}}}, "b": {"c": {}}, "hidden": {},
+    }
+
+    manager.update_category(hierarchy["a1"], parent_id=c)
+    assert tree_slugs(manager.get_category_tree(TENANT_ID)) == {
+        "a": {}, "b": {"c": {"a1": {"a2": {}}}}, "hidden": {},
+    }
+
+    with app.app_context():
+        assert manager.delete_category(hierarchy["a"])
+    assert tree_slugs(manager.get_category_tree(TENANT_ID)) == {
+        "b": {"c": {"a1": {"a2": {}}}}, "hidden": {},
+    }
@@ -0,0 +1,177 @@
+"""
+Tests for the response compression middleware.
+"""
+import asyncio
+import gzip
+
+import pytest
+
+from pycommerce.middleware import compression
+from pycommerce.middleware.compression import (
+    DEFAULT_MINIMUM_SIZE,
+    CompressionMiddleware,
+    available_encodings,
+    negotiate_encoding,
+)
+
+HTML = ("<tr><td>Order</td><td>42.00</td></tr>\n" * 200).encode()
+ALL = ("br", "zstd", "gzip")
+
+
+def decompress(encoding, data):
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return compression.brotli.decompress(data)
+    # Streamed zstd frames carry no content size
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def make_app(chunks, content_type="text/html; charset=utf-8", headers=()):
+    """An ASGI app sending the given body chunks with the given headers."""
+    async def app(scope, receive, send):
+        raw = [(b"content-type", content_type.encode())]
+        raw += [(name.lower().encode(), value.encode()) for name, value in headers]
+        if len(chunks) == 1:
+            raw.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": raw})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def request(app, accept_encoding="gzip", path="/products", method="GET", **options):
+    """Run one request through CompressionMiddleware; returns (headers, body messages)."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+    asyncio.run(CompressionMiddleware(app, **options)(scope, receive, send))
+    start, *bodies = messages
+    headers = {}
+    for name, value in start["headers"]:
+        headers.setdefault(name.decode(), []).append(value.decode())
+    return {name: ", ".join(values) for name, values in headers.items()}, bodies
+
+
+def body_of(bodies):
+    assert not bodies[-1].get("more_body", False)
+    return b"".join(message["body"] for message in bodies)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br, zstd", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("zstd, gzip;q=0.9", "zstd"),
+    ("GZIP", "gzip"),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ("*, br;q=0", "zstd"),
+    ("gzip;q=bogus, br;q=0.2", "br"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    """q-values win over server preference, which breaks ties; q=0 refuses a coding."""
+    assert negotiate_encoding(accept_encoding, ALL) == expected
+
+
+def test_negotiate_encoding_only_offers_available_codecs():
+    """Codecs that are not installed are never chosen."""
+    assert negotiate_encoding("br, zstd", ["gzip"]) is None
+    assert available_encodings()[-1] == "gzip"
+    assert ("br" in available_encodings()) == compression.BROTLI_AVAILABLE
+    assert ("zstd" in available_encodings()) == compression.ZSTD_AVAILABLE
+
+
+@pytest.mark.parametrize("encoding", [
+    "gzip",
+    pytest.param("br", marks=pytest.mark.skipif(not compression.BROTLI_AVAILABLE, reason="brotli not installed")),
+    pytest.param("zstd", marks=pytest.mark.skipif(not compression.ZSTD_AVAILABLE, reason="zstandard not installed")),
+])
+def test_body_round_trips(encoding):
+    """Compressed bodies decode to the original with matching headers."""
+    headers, bodies = request(make_app([HTML]), accept_encoding=encoding)
+    assert headers["content-encoding"] == encoding
+    assert headers["vary"] == "Accept-Encoding"
+    body = body_of(bodies)
+    assert int(headers["content-length"]) == len(body) < len(HTML)
+    assert decompress(encoding, body) == HTML
+
+
+def test_minimum_size_threshold():
+    """Bodies under minimum_size are sent as-is; the threshold itself is compressed."""
+    small = b"x" * (DEFAULT_MINIMUM_SIZE - 1)
+    headers, bodies = request(make_app([small]))
+    assert "content-encoding" not in headers
+    assert "vary" not in headers
+    assert body_of(bodies) == small
+
+    exact = b"x" * DEFAULT_MINIMUM_SIZE
+    headers, bodies = request(make_app([exact]))
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body_of(bodies)) == exact
+
+    headers, _ = request(make_app([exact]), minimum_size=DEFAULT_MINIMUM_SIZE + 1)
+    assert "content-encoding" not in headers
+
+
+def test_vary_and_etag_headers():
+    """Accept-Encoding joins an existing Vary header and strong ETags become weak."""
+    headers, _ = request(make_app([HTML], headers=[("Vary", "Cookie"), ("ETag", '"v1"')]))
+    assert headers["vary"] == "Cookie, Accept-Encoding"
+    assert headers["etag"] == 'W/"v1"'
+
+
+def test_already_encoded_responses_pass_through():
+    """Responses with a Content-Encoding are never compressed twice."""
+    encoded = gzip.compress(HTML)
+    headers, bodies = request(make_app([encoded], headers=[("Content-Encoding", "gzip")]), accept_encoding="br, gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert "vary" not in headers
+    assert body_of(bodies) == encoded
+
+
+def test_ineligible_requests_and_types_pass_through():
+    """Other content types, HEAD, excluded paths and clients without Accept-Encoding are untouched."""
+    cases = [
+        request(make_app([HTML], content_type="image/png")),
+        request(make_app([HTML]), method="HEAD"),
+        request(make_app([HTML]), path="/static/css/admin.css"),
+        request(make_app([HTML]), accept_encoding=None),
+        request(make_app([HTML]), accept_encoding="identity"),
+    ]
+    for headers, bodies in cases:
+        assert "content-encoding" not in headers
+        assert body_of(bodies) == HTML
+
+
+def test_event_streams_pass_through_chunk_by_chunk():
+    """Server-sent events are not compressed, so each event is delivered as it is sent."""
+    events = [f"data: {i}\n\n".encode() * 200 for i in range(3)]
+    headers, bodies = request(make_app(events, content_type="text/event-stream"))
+    assert "content-encoding" not in headers
+    assert [message["body"] for message in bodies] == events
+
+
+def test_streaming_responses_are_compressed_incrementally():
+    """Streamed HTML is compressed chunk by chunk without buffering or a Content-Length."""
+    chunks = [HTML[i:i + 2000] for i in range(0, len(HTML), 2000)]
+    headers, bodies = request(make_app(chunks))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert len(bodies) > 1
+    assert all(message["more_body"] for message in bodies[:-1])
+    assert gzip.decompress(body_of(bodies)) == HTML
@@ -0,0 +1,136 @@
+"""
+Tests for encrypted credential storage and the decrypted credentials cache.
+"""
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.services import credentials_manager as credentials_module
+from pycommerce.services.credentials_manager import CredentialsManager
+from pycommerce.services.settings_service import SystemSetting
+
+STRIPE = {"api_key": "sk_test_1", "public_key": "pk_test_1", "enabled": True}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    SystemSetting.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(credentials_module, "db_session", factory)
+    monkeypatch.setenv("CREDENTIALS_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    return factory
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(credentials_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def manager(session_factory, clock):
+    return CredentialsManager(cache_ttl=60)
+
+
+@pytest.fixture
+def other_worker(session_factory, clock):
+    """A second manager with its own cache, standing in for another process."""
+    return CredentialsManager(cache_ttl=60)
+
+
+def test_credentials_are_encrypted_at_rest(manager, session_factory):
+    """Sensitive fields are stored encrypted and decrypted on read."""
+    assert manager.store_credentials("stripe", STRIPE)
+    with session_factory() as session:
+        stored = session.get(SystemSetting, "credentials.stripe").value
+    assert "sk_test_1" not in stored
+    assert "pk_test_1" not in stored
+    assert manager.get_credentials("stripe") == STRIPE
+    assert "sk_test_1" not in repr(manager._cache)
+
+
+def test_cached_credentials_expire_after_ttl(manager, other_worker, clock):
+    """Saves made elsewhere are served stale only until the TTL runs out."""
+    other_worker.store_credentials("stripe", STRIPE)
+    assert manager.get_credentials("stripe") == STRIPE
+
+    other_worker.store_credentials("stripe", {**STRIPE, "api_key": "sk_test_2"})
+    clock.now += 59
+    assert manager.get_credentials("stripe")["api_key"] == "sk_test_1"
+    clock.now += 2
+    assert manager.get_credentials("stripe")["api_key"] == "sk_test_2"
+    assert manager.cache_stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+    # Callers get copies of the cached values
+    manager.get_credentials("stripe")["api_key"] = "changed"
+    assert manager.get_credentials("stripe")["api_key"] == "sk_test_2"
+
+
+def test_update_invalidates_cache(manager):
+    """Saves are seen at once; global saves reach tenants that fall back to them."""
+    manager.store_credentials("stripe", STRIPE)
+    manager.store_credentials("stripe", {**STRIPE, "api_key": "sk_tenant_b"}, tenant_id="b")
+    assert manager.get_credentials("stripe", "a")["api_key"] == "sk_test_1"
+    assert manager.get_credentials("stripe", "b")["api_key"] == "sk_tenant_b"
+
+    manager.store_credentials("stripe", {**STRIPE, "api_key": "sk_test_2"})
+    assert manager.get_credentials("stripe", "a")["api_key"] == "sk_test_2"
+    assert manager.get_credentials("stripe")["api_key"] == "sk_test_2"
+
+    manager.store_credentials("stripe", {**STRIPE, "api_key": "sk_tenant_a"}, tenant_id="a")
+    assert manager.get_credentials("stripe", "a")["api_key"] == "sk_tenant_a"
+    assert manager.get_credentials("stripe", "b")["api_key"] == "sk_tenant_b"
+
+
+def test_delete_invalidates_cache(manager):
+    """Deleting tenant credentials falls back to the global ones; deleting those leaves nothing."""
+    manager.store_credentials("stripe", STRIPE)
+    manager.store_credentials("stripe", {**STRIPE, "api_key": "sk_tenant_a"}, tenant_id="a")
+    assert manager.get_credentials("stripe", "a")["api_key"] == "sk_tenant_a"
+
+    assert manager.delete_credentials("stripe", tenant_id="a")
+    assert manager.get_credentials("stripe", "a")["api_key"] == "sk_test_1"
+
+    assert manager.delete_credentials("stripe")
+    assert manager.get_credentials("stripe", "a") == {}
+    assert manager.get_credentials("stripe") == {}
+    assert not manager.delete_credentials("stripe")
+
+
+def test_preload_populates_cache(manager, monkeypatch):
+    """Preloading caches every tenant and provider, so later reads skip the database."""
+    manager.store_credentials("stripe", STRIPE)
+    manager.store_credentials("paypal", {"client_id": "cid", "client_secret": "cs"}, tenant_id="a")
+    manager.invalidate()
+
+    assert manager.preload(["a", "b"]) == 6
+    assert manager.cache_stats()["entries"] == 6
+
+    def no_database():
+        raise AssertionError("credentials read from the database")
+
+    monkeypatch.setattr(credentials_module, "db_session", no_database)
+    assert manager.get_credentials("stripe", "b") == STRIPE
+    assert manager.get_credentials("paypal", "a") == {"client_id": "cid", "client_secret": "cs"}
+    assert manager.get_credentials("paypal", "b") == {}
+    assert manager.cache_stats()["misses"] == 0
+
+
+def test_zero_ttl_disables_cache(session_factory, clock):
+    """With cache_ttl=0 every read goes to the database."""
+    manager = CredentialsManager(cache_ttl=0)
+    manager.store_credentials("stripe", STRIPE)
+    assert manager.get_credentials("stripe") == STRIPE
+    manager.preload(["a"])
+    assert manager.cache_stats()["entries"] == 0
@@ -0,0 +1,190 @@
+"""
+Tests for cross-tenant query statements and pagination.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from starlette.middleware.sessions import SessionMiddleware
+
+from pycommerce.models.db_registry import Product, Tenant
+from pycommerce.models.order import Order, OrderItem
+from pycommerce.models.return_request import ReturnItem, ReturnManager, ReturnRequest
+from pycommerce.services import cross_tenant_query
+from pycommerce.services.cross_tenant_query import (
+    CrossTenantPage,
+    orders_query,
+    paginate,
+    products_query,
+    returns_query,
+)
+from routes.admin import products as products_routes
+from routes.admin import returns as returns_routes
+
+
+def test_products_query_is_one_statement_with_tenant_join():
+    """Products for all stores come from one filtered, tenant-joined statement."""
+    sql = str(products_query({"category": "Mugs", "min_price": 10, "in_stock": True}).statement)
+    assert "LEFT OUTER JOIN tenants" in sql
+    assert "tenant_name" in sql and "tenant_slug" in sql
+    assert "LIKE" in sql
+    assert "products.price >=" in sql
+    assert "products.stock >" in sql
+
+
+def test_orders_query_orders_newest_first():
+    """Orders are sorted newest first so shard results merge in the same order."""
+    query = orders_query({"status": "paid"})
+    sql = str(query.statement)
+    assert "ORDER BY orders.created_at DESC" in sql
+    assert "orders.status =" in sql
+    assert query.descending
+
+
+def test_page_count():
+    """Pages round up and an empty result has no pages."""
+    assert CrossTenantPage(total=101, per_page=50).pages == 3
+    assert CrossTenantPage(total=0, per_page=50).pages == 0
+
+
+MODELS = (Tenant, Product, Order, OrderItem, ReturnRequest, ReturnItem)
+
+
+def seed(url, tenants):
+    """Create a database with, per tenant, three products and two returned orders."""
+    engine = create_engine(url)
+    for model in MODELS:
+        model.__table__.create(engine)
+    with engine.begin() as connection:
+        for slug, offset in tenants:
+            tenant_id = f"tenant-{slug}"
+            connection.execute(Tenant.__table__.insert(), [{"id": tenant_id, "name": slug.title(), "slug": slug}])
+            connection.execute(Product.__table__.insert(), [
+                {"id": f"{slug}-p{i}", "tenant_id": tenant_id, "name": f"Product {i}", "price": 10.0 * i,
+                 "sku": f"{slug}-{i}", "stock": i - 1, "categories": []}
+                for i in range(1, 4)
+            ])
+            for i in range(2):
+                order_id = f"{slug}-o{i}"
+                connection.execute(Order.__table__.insert(), [{
+                    "id": order_id, "tenant_id": tenant_id, "order_number": order_id, "total": 5.0, "status": "PAID",
+                }])
+                connection.execute(ReturnRequest.__table__.insert(), [{
+                    "id": f"{slug}-r{i}", "order_id": order_id, "return_number": f"{slug}-R{i}",
+                    "status": "REQUESTED", "is_refunded": False,
+                    "requested_at": datetime(2025, 1, 1) + timedelta(days=offset + i),
+                }])
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    engine = seed(f"sqlite:///{tmp_path / 'primary.db'}", [("alpha", 0), ("beta", 2)])
+    monkeypatch.setattr(cross_tenant_query, "_shard_engines", [engine])
+    return engine
+
+
+def test_products_are_paged_in_store_order(primary):
+    """Pages slice the store-ordered product list and report totals."""
+    result = paginate(products_query(), page=2, per_page=4)
+    assert (result.total, result.pages, result.page) == (6, 2, 2)
+    assert [product.id for product in result.items] == ["beta-p2", "beta-p3"]
+    assert {product.tenant_name for product in result.items} == {"Beta"}
+
+    in_stock = paginate(products_query({"in_stock": True}), per_page=10)
+    assert in_stock.total == 4
+
+
+def test_sharded_pages_match_a_single_database(tmp_path, monkeypatch):
+    """Rows merged from several shards page exactly like one database holding them all."""
+    shards = [
+        seed(f"sqlite:///{tmp_path / 'shard-1.db'}", [("alpha", 0)]),
+        seed(f"sqlite:///{tmp_path / 'shard-2.db'}", [("beta", 1), ("gamma", 3)]),
+    ]
+    single = seed(f"sqlite:///{tmp_path / 'single.db'}", [("alpha", 0), ("beta", 1), ("gamma", 3)])
+
+    def pages(engines):
+        monkeypatch.setattr(cross_tenant_query, "_shard_engines", engines)
+        return [
+            [(item.id, item.tenant_slug) for item in paginate(returns_query(), page, 4).items]
+            for page in (1, 2)
+        ]
+
+    assert pages(shards) == pages([single])
+    assert pages(shards)[0][0] == ("gamma-r1", "gamma")
+
+
+def test_managers_return_one_page(primary):
+    """get_for_all_tenants returns a page of results, never the whole table."""
+    result = ReturnManager().get_for_all_tenants({"status": "REQUESTED"}, page=1, per_page=3)
+    assert result.total == 4
+    assert [item.id for item in result.items] == ["beta-r1", "beta-r0", "alpha-r1"]
+
+
+class RecordingTemplates:
+    """Stands in for the app's templates and keeps the last context rendered."""
+
+    def TemplateResponse(self, name, context):
+        self.name, self.context = name, context
+        return HTMLResponse(name)
+
+
+@pytest.fixture
+def admin(primary, monkeypatch):
+    templates = RecordingTemplates()
+    monkeypatch.setattr(products_routes, "templates", templates)
+    monkeypatch.setattr(returns_routes, "templates", templates)
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="test")
+    app.include_router(products_routes.router)
+    app.include_router(returns_routes.router)
+    return TestClient(app), templates
+
+
+def test_all_stores_products_page(admin):
+    """The "All Stores" products view loads only the requested page and links the rest."""
+    client, templates = admin
+    response = client.get("/admin/products", params={"tenant": "all", "min_price": 20, "page": 2, "per_page": 2})
+    assert response.status_code == 200
+    assert [product["id"] for product in templates.context["products"]] == ["beta-p2", "beta-p3"]
+    assert templates.context["pagination"] == {"page": 2, "per_page": 2, "total": 4, "pages": 2}
+    assert templates.context["page_query"] == {"tenant": "all", "min_price": 20.0, "per_page": 2}
+
+
+def test_all_stores_returns_page(admin):
+    """The "All Stores" returns view is paged by the cross-tenant query."""
+    client, templates = admin
+    response = client.get("/admin/returns", params={"tenant": "all", "page": 2, "per_page": 3})
+    assert response.status_code == 200
+    assert [row["return_number"] for row in templates.context["returns"]] == ["alpha-R0"]
+    assert templates.context["pagination"]["pages"] == 2
+
+
+def test_pager_links_keep_filters():
+    """The shared pager partial links neighbouring pages with the other query parameters."""
+    template = Jinja2Templates(directory="templates").get_template("admin/partials/pagination.html")
+    html = template.render(pagination={"page": 2, "pages": 3}, page_query={"tenant": "all", "per_page": 2})
+    assert 'href="?tenant=all&amp;per_page=2&amp;page=1"' in html
+    assert 'href="?tenant=all&amp;per_page=2&amp;page=3"' in html
+    assert template.render(pagination={"page": 1, "pages": 1}, page_query={}).strip() == ""
+
+
+def test_streamed_products_end_in_valid_json_on_error(admin, monkeypatch):
+    """A failure mid-stream still ends the JSON body, with an error field."""
+    client, _ = admin
+    stream = cross_tenant_query.stream
+
+    def failing_stream(query):
+        yield from stream(query)
+        raise RuntimeError("connection lost")
+
+    assert client.get("/admin/products/all").json()["count"] == 6
+    monkeypatch.setattr(cross_tenant_query, "stream", failing_stream)
+    body = json.loads(client.get("/admin/products/all").text)
+    assert body["count"] == 6
+    assert "connection lost" in body["error"]
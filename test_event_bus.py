@@ -0,0 +1,182 @@
+"""
+Tests for the transactional outbox and event dispatcher.
+"""
+
+import asyncio
+
+from pycommerce.models.outbox_event import OutboxEvent, OUTBOX_DEAD, OUTBOX_PENDING, OUTBOX_PROCESSED
+from pycommerce.services import event_bus
+from pycommerce.services.event_bus import (
+    ORDER_STATUS_CHANGED, RETURN_REFUNDED, EventDispatcher, Subscriber, record_event
+)
+
+
+def record(factory, count, event_type=ORDER_STATUS_CHANGED, commit=True):
+    session = factory()
+    for i in range(count):
+        record_event(session, event_type, {"order_id": f"order-{i}", "status": "PAID"},
+                     aggregate_id=f"order-{i}", tenant_id="tenant-a")
+    if commit:
+        session.commit()
+    else:
+        session.rollback()
+    session.close()
+
+
+def statuses(factory):
+    session = factory()
+    try:
+        return [row.status for row in session.query(OutboxEvent.status)]
+    finally:
+        session.close()
+
+
+def test_events_are_stored_with_the_transaction_and_delivered_in_batches(make_session_factory):
+    """Rolled back events never exist; committed ones reach each subscriber in batches."""
+    factory = make_session_factory(OutboxEvent)
+    record(factory, 3, commit=False)
+    record(factory, 5)
+    record(factory, 2, event_type=RETURN_REFUNDED)
+
+    calls = {"orders": [], "all": []}
+    subscribers = {
+        "orders": Subscriber("orders", {ORDER_STATUS_CHANGED}, lambda events: calls["orders"].append(events)),
+        "all": Subscriber("all", {ORDER_STATUS_CHANGED, RETURN_REFUNDED}, lambda events: calls["all"].append(events)),
+    }
+    dispatcher = EventDispatcher(batch_size=4, session_factory=factory, subscribers=subscribers)
+
+    assert dispatcher.dispatch_pending() == 7
+    assert [len(batch) for batch in calls["orders"]] == [4, 1]
+    assert [len(batch) for batch in calls["all"]] == [4, 3]
+    assert calls["orders"][0][0].payload == {"order_id": "order-0", "status": "PAID"}
+    assert statuses(factory) == [OUTBOX_PROCESSED] * 7
+    assert dispatcher.dispatch_pending() == 0
+
+
+def test_failed_events_are_retried_for_the_failing_subscriber_only(make_session_factory):
+    """At-least-once: failures are retried without repeating successful deliveries, then go dead."""
+    factory = make_session_factory(OutboxEvent)
+    record(factory, 3)
+
+    mailed = []
+    cached = []
+
+    def mail(events):
+        mailed.extend(e.aggregate_id for e in events)
+        return [e for e in events if e.aggregate_id == "order-1"]
+
+    subscribers = {
+        "cache": Subscriber("cache", {ORDER_STATUS_CHANGED}, lambda events: cached.extend(events)),
+        "mail": Subscriber("mail", {ORDER_STATUS_CHANGED}, mail),
+    }
+    dispatcher = EventDispatcher(max_attempts=2, session_factory=factory, subscribers=subscribers)
+    dispatcher.dispatch_pending()
+    assert sorted(statuses(factory)) == [OUTBOX_PENDING, OUTBOX_PROCESSED, OUTBOX_PROCESSED]
+
+    # Make the retry due now
+    session = factory()
+    session.query(OutboxEvent).update({OutboxEvent.next_attempt_at: None})
+    session.commit()
+    session.close()
+
+    dispatcher.dispatch_pending()
+    assert mailed == ["order-0", "order-1", "order-2", "order-1"]
+    assert len(cached) == 3
+    assert sorted(statuses(factory)) == [OUTBOX_DEAD, OUTBOX_PROCESSED, OUTBOX_PROCESSED]
+    assert dispatcher.stats == {OUTBOX_PROCESSED: 2, OUTBOX_DEAD: 1, "retried": 1, "batches": 2}
+
+
+def test_claims_are_exclusive_across_dispatchers(make_session_factory):
+    """Two dispatchers sharing the table never claim the same event."""
+    factory = make_session_factory(OutboxEvent)
+    record(factory, 10)
+    first = EventDispatcher(session_factory=factory, subscribers={})
+    second = EventDispatcher(session_factory=factory, subscribers={})
+
+    a = first.claim_batch(6)
+    b = second.claim_batch(6)
+    assert len(a) == 6 and len(b) == 4
+    assert not {e.id for e in a} & {e.id for e in b}
+
+
+def test_commit_wakes_the_running_dispatcher(make_session_factory, monkeypatch):
+    """Committing an event delivers it without waiting for the poll interval."""
+    factory = make_session_factory(OutboxEvent)
+    delivered = asyncio.Event()
+    received = []
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+
+        def handler(events):
+            received.extend(events)
+            loop.call_soon_threadsafe(delivered.set)
+
+        dispatcher = EventDispatcher(
+            workers=2, poll_interval=60, session_factory=factory,
+            subscribers={"test": Subscriber("test", {ORDER_STATUS_CHANGED}, handler)},
+        )
+        monkeypatch.setattr(event_bus, "_dispatcher", dispatcher)
+        await dispatcher.start()
+        try:
+            # Let the claimer find the table empty and go to sleep
+            await asyncio.sleep(0.1)
+            await asyncio.to_thread(record, factory, 1)
+            await asyncio.wait_for(delivered.wait(), timeout=5)
+        finally:
+            await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert [e.aggregate_id for e in received] == ["order-0"]
+
+
+class FakeEmailService:
+    def __init__(self):
+        self.config = type("Config", (), {"enabled": True})()
+        self.sent = []
+
+    def send_shipping_notification(self, **kwargs):
+        self.sent.append(kwargs)
+        return True
+
+
+def test_shipping_mail_links_to_the_originating_host(make_session_factory, monkeypatch):
+    """Tenants without a domain get store links to the host the order was shipped from."""
+    from types import SimpleNamespace
+
+    from pycommerce.models import order as order_module
+    from pycommerce.models import shipment as shipment_module
+    from pycommerce.models import tenant as tenant_module
+    from pycommerce.services import mail_service
+
+    factory = make_session_factory(OutboxEvent)
+    tenants = {
+        "tenant-a": SimpleNamespace(name="Alpha", domain=None),
+        "tenant-b": SimpleNamespace(name="Beta", domain="https://beta.example.com"),
+    }
+    session = factory()
+    for order_id, tenant_id in (("order-a", "tenant-a"), ("order-b", "tenant-b")):
+        order = SimpleNamespace(id=order_id, status="SHIPPED", tenant_id=tenant_id)
+        order_module.record_order_status_changed(
+            session, order, "PAID", "update_status", store_url="https://shop.example.com"
+        )
+    session.commit()
+    session.close()
+
+    email_service = FakeEmailService()
+    monkeypatch.setattr(mail_service, "get_email_service", lambda: email_service)
+    monkeypatch.setattr(order_module, "OrderManager", lambda: SimpleNamespace(
+        get_by_id=lambda order_id: SimpleNamespace(id=order_id, customer_email=f"{order_id}@example.com")
+    ))
+    monkeypatch.setattr(shipment_module, "ShipmentManager", lambda: SimpleNamespace(
+        get_shipments_for_order=lambda order_id: [SimpleNamespace(id=f"shipment-{order_id}")]
+    ))
+    monkeypatch.setattr(tenant_module, "TenantManager", lambda: SimpleNamespace(get=tenants.get))
+
+    subscribers = {"shipping-mail": event_bus._subscribers["shipping-mail"]}
+    dispatcher = EventDispatcher(session_factory=factory, subscribers=subscribers)
+    assert dispatcher.dispatch_pending() == 2
+    assert {mail["to_email"]: mail["store_url"] for mail in email_service.sent} == {
+        "order-a@example.com": "https://shop.example.com",
+        "order-b@example.com": "https://beta.example.com",
+    }
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the project root to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from pycommerce.middleware.http_cache import (
+    HTTPCacheMiddleware,
+    cache_policy,
+    set_cache_validators,
+    purge_surrogate_key,
+    clear_validator_cache
+)
+
+
+class TestHTTPCacheMiddleware(unittest.TestCase):
+    """Test cases for ETag/Cache-Control handling."""
+
+    def setUp(self):
+        clear_validator_cache()
+        self.calls = 0
+        app = FastAPI()
+
+        @app.get("/catalog")
+        @cache_policy(s_maxage=60)
+        async def catalog(request: Request):
+            self.calls += 1
+            set_cache_validators(
+                request,
+                last_modified=datetime(2025, 1, 1, 12, 0, 0),
+                version=2,
+                surrogate_keys=["tenant:tech:products"]
+            )
+            return [{"id": "1"}, {"id": "2"}]
+
+        @app.get("/account")
+        @cache_policy(private=True, vary=["Cookie"])
+        async def account():
+            self.calls += 1
+            return {"name": "Jane"}
+
+        @app.get("/login")
+        @cache_policy(private=True)
+        async def login():
+            response = JSONResponse({"ok": True})
+            response.set_cookie("session", "abc")
+            response.set_cookie("theme", "dark")
+            return response
+
+        @app.get("/uncached")
+        async def uncached():
+            return {"ok": True}
+
+        app.add_middleware(HTTPCacheMiddleware)
+        self.client = TestClient(app)
+
+    def test_validators_and_headers(self):
+        """Opted-in routes get weak ETags, Last-Modified and policy headers."""
+        response = self.client.get("/catalog")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["etag"].startswith('W/"'))
+        self.assertEqual(response.headers["last-modified"], "Wed, 01 Jan 2025 12:00:00 GMT")
+        self.assertIn("s-maxage=60", response.headers["cache-control"])
+        self.assertIn("X-Tenant-ID", response.headers["vary"])
+        self.assertEqual(response.headers["surrogate-key"], "tenant:tech:products")
+
+        self.assertNotIn("etag", self.client.get("/uncached").headers)
+
+    def test_conditional_request_skips_handler(self):
+        """A matching If-None-Match is answered without running the route."""
+        etag = self.client.get("/catalog").headers["etag"]
+
+        response = self.client.get("/catalog", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+        response = self.client.get(
+            "/catalog", headers={"If-Modified-Since": "Wed, 01 Jan 2025 12:00:00 GMT"}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+    def test_purge_forces_revalidation(self):
+        """Purging a surrogate key sends the next request to the route."""
+        etag = self.client.get("/catalog").headers["etag"]
+        purge_surrogate_key("tenant:tech:products")
+
+        response = self.client.get("/catalog", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 2)
+
+    def test_private_responses_hash_body(self):
+        """Private routes without versions are validated by body hash."""
+        response = self.client.get("/account")
+        self.assertTrue(response.headers["cache-control"].startswith("private"))
+        self.assertIn("Cookie", response.headers["vary"])
+
+        response = self.client.get("/account", headers={"If-None-Match": response.headers["etag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.calls, 2)
+
+    def test_body_hash_keeps_repeated_headers(self):
+        """Rebuilding the hashed response keeps every Set-Cookie header."""
+        response = self.client.get("/login")
+        self.assertTrue(response.headers["etag"].startswith('W/"'))
+        self.assertEqual(
+            sorted(response.headers.get_list("set-cookie")),
+            ["session=abc; Path=/; SameSite=lax", "theme=dark; Path=/; SameSite=lax"]
+        )
+        self.assertEqual(response.json(), {"ok": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
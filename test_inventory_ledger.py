@@ -0,0 +1,150 @@
+"""
+Tests for the inventory transaction ledger: balances, snapshots and paging.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from pycommerce.models.db_registry import InventoryRecord, LowStockCount, Product
+from pycommerce.models.inventory import InventoryManager, InventorySnapshot, InventoryTransaction
+from pycommerce.models.outbox_event import OutboxEvent
+from pycommerce.services import product_cache
+from pycommerce.services.inventory_ledger import (
+    ensure_partitions, inventory_balance, month_start, take_snapshots, transaction_page
+)
+
+
+def setup(make_session_factory):
+    factory = make_session_factory(
+        Product, InventoryRecord, LowStockCount, InventoryTransaction, InventorySnapshot, OutboxEvent
+    )
+    engine = factory.kw["bind"]
+    session = factory()
+    session.add(Product(id="p1", tenant_id="tenant-a", name="Widget", price=100, sku="W-1"))
+    session.commit()
+    session.close()
+    return engine, factory, InventoryManager(session_factory=factory)
+
+
+def record_state(factory):
+    session = factory()
+    try:
+        record = session.query(InventoryRecord).one()
+        return record.id, {
+            "quantity": record.quantity,
+            "reserved_quantity": record.reserved_quantity,
+            "available_quantity": record.available_quantity,
+        }
+    finally:
+        session.close()
+
+
+def balance(factory, record_id, as_of=None):
+    session = factory()
+    try:
+        result = inventory_balance(session, record_id, as_of)
+        return {key: result[key] for key in ("quantity", "reserved_quantity", "available_quantity")}
+    finally:
+        session.close()
+
+
+def test_ledger_balance_matches_record_now_and_as_of(make_session_factory):
+    """Every operation records its quantity changes; order completion consumes stock."""
+    engine, factory, manager = setup(make_session_factory)
+    manager.create_or_update_inventory("p1", "tenant-a", 20)
+    manager.reserve_inventory("p1", 5, "order-1")
+    manager.reserve_inventory("p1", 3, "order-2")
+    record_id, after_reserve = record_state(factory)
+    middle = datetime.utcnow()
+
+    manager.release_inventory("p1", 10, "order-2")  # only 3 were reserved
+    manager.complete_order_inventory("order-1", [{"product_id": "p1", "quantity": 5}])
+    manager.process_return("p1", 2, "return-1")
+    manager.create_or_update_inventory("p1", "tenant-a", 30)
+
+    record_id, state = record_state(factory)
+    assert state == {"quantity": 30, "reserved_quantity": 0, "available_quantity": 30}
+    assert balance(factory, record_id) == state
+    assert balance(factory, record_id, as_of=middle) == after_reserve == {
+        "quantity": 20, "reserved_quantity": 8, "available_quantity": 12
+    }
+    assert manager.get_inventory_balance("p1")["quantity"] == 30
+
+
+def test_snapshots_shorten_the_tail_without_changing_balances(make_session_factory):
+    """A snapshot folds in the transactions up to its cutoff."""
+    engine, factory, manager = setup(make_session_factory)
+    manager.create_or_update_inventory("p1", "tenant-a", 10)
+    for i in range(4):
+        manager.reserve_inventory("p1", 1, f"order-{i}")
+    middle = datetime.utcnow()
+    manager.process_return("p1", 5, "return-1")
+
+    assert take_snapshots(factory, cutoff=middle, min_transactions=10) == 0
+    assert take_snapshots(factory, cutoff=middle, min_transactions=2) == 1
+    manager.reserve_inventory("p1", 2, "order-9")
+    assert take_snapshots(factory, cutoff=datetime.utcnow(), min_transactions=2) == 1
+
+    record_id, state = record_state(factory)
+    session = factory()
+    result = inventory_balance(session, record_id)
+    assert result["tail_transactions"] == 0
+    assert [s.transaction_count for s in session.query(InventorySnapshot).order_by(InventorySnapshot.taken_at)] == [5, 2]
+    session.close()
+    assert balance(factory, record_id) == state == {"quantity": 15, "reserved_quantity": 6, "available_quantity": 9}
+    assert balance(factory, record_id, as_of=middle) == {"quantity": 10, "reserved_quantity": 4, "available_quantity": 6}
+
+
+def test_keyset_pages_walk_history_newest_first(make_session_factory):
+    """Pages follow each other without gaps or repeats, including rows with equal timestamps."""
+    engine, factory, manager = setup(make_session_factory)
+    manager.create_or_update_inventory("p1", "tenant-a", 50)
+    for i in range(3):
+        manager.reserve_inventory("p1", 1, f"order-{i}")
+    manager.complete_order_inventory("order-x", [{"product_id": "p1", "quantity": 1}] * 3)
+
+    record_id, _ = record_state(factory)
+    session = factory()
+    expected = [row.id for row in session.query(InventoryTransaction).order_by(
+        InventoryTransaction.created_at.desc(), InventoryTransaction.id.desc())]
+    assert len(expected) == 7
+
+    seen, cursor, sizes = [], None, []
+    while True:
+        page = transaction_page(session, record_id, limit=3, cursor=cursor)
+        sizes.append(len(page["transactions"]))
+        seen.extend(row.id for row in page["transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sizes == [3, 3, 1] and seen == expected
+    assert [row.transaction_type for row in transaction_page(session, record_id, transaction_type="initial")["transactions"]] == ["initial"]
+    with pytest.raises(ValueError):
+        transaction_page(session, record_id, cursor="not-a-cursor")
+    session.close()
+
+
+def test_partitions_are_postgresql_only(make_session_factory):
+    """Month arithmetic for partition bounds; other databases keep one table."""
+    engine, factory, manager = setup(make_session_factory)
+    assert month_start(datetime(2025, 11, 18, 9), 2) == datetime(2026, 1, 1)
+    assert month_start(datetime(2025, 1, 31), -13) == datetime(2023, 12, 1)
+    assert ensure_partitions(engine) == []
+
+
+def test_inventory_writes_invalidate_product_caches(make_session_factory, monkeypatch):
+    """Every write purges the product's HTTP validators and query cache after its commit."""
+    engine, factory, manager = setup(make_session_factory)
+    purged = []
+    monkeypatch.setattr(
+        product_cache, "purge_surrogate_key", lambda key: purged.append(key) or 0
+    )
+
+    manager.create_or_update_inventory("p1", "tenant-a", 20)
+    manager.reserve_inventory("p1", 5, "order-1")
+    manager.release_inventory("p1", 2, "order-1")
+    manager.complete_order_inventory("order-1", [{"product_id": "p1", "quantity": 3}])
+    manager.process_return("p1", 1, "return-1")
+
+    assert purged == ["tenant:tenant-a:products", "product:p1"] * 5
@@ -0,0 +1,106 @@
+"""
+Tests for cron schedules and the scheduled job runner.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from pycommerce.models.scheduled_job import JobRun, ScheduledJob, JOB_FAILED, JOB_SUCCEEDED
+from pycommerce.services.job_runner import CronSchedule, Job, JobRunner
+
+
+def make_due(factory, name):
+    session = factory()
+    session.query(ScheduledJob).filter(ScheduledJob.name == name).update(
+        {ScheduledJob.next_run_at: datetime(2000, 1, 1)}
+    )
+    session.commit()
+    session.close()
+
+
+def test_cron_schedules():
+    """Steps, ranges, lists and the day-of-month/day-of-week rule."""
+    start = datetime(2025, 10, 18, 10, 7, 30)  # a Saturday
+    assert CronSchedule("*/15 * * * *").next_after(start) == datetime(2025, 10, 18, 10, 15)
+    assert CronSchedule("17 * * * *").next_after(start) == datetime(2025, 10, 18, 10, 17)
+    assert CronSchedule("0 3 * * 1-5").next_after(start) == datetime(2025, 10, 20, 3, 0)
+    assert CronSchedule("30 9 1,15 * *").next_after(start) == datetime(2025, 11, 1, 9, 30)
+    assert CronSchedule("0 0 1 1 *").next_after(start) == datetime(2026, 1, 1, 0, 0)
+    # Either day field matches when both are restricted; 7 is Sunday
+    assert CronSchedule("0 12 1 * 7").next_after(start) == datetime(2025, 10, 19, 12, 0)
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+    with pytest.raises(ValueError):
+        CronSchedule("* * *")
+
+
+def test_due_jobs_run_once_across_runners_and_record_history(make_session_factory):
+    """Two processes share the schedule; each due tick runs in only one of them."""
+    factory = make_session_factory(ScheduledJob, JobRun)
+    calls = []
+    jobs = {
+        "scan": Job("scan", CronSchedule("*/5 * * * *"), lambda: calls.append("scan") or {"found": 3}),
+        "broken": Job("broken", CronSchedule("0 * * * *"), lambda: 1 / 0),
+    }
+    first = JobRunner(jobs=jobs, session_factory=factory, worker_id="a")
+    second = JobRunner(jobs=jobs, session_factory=factory, worker_id="b")
+
+    # Registering schedules the first run in the future
+    assert first.run_due() == {} and second.run_due() == {}
+
+    make_due(factory, "scan")
+    make_due(factory, "broken")
+    assert first.run_due() == {"scan": JOB_SUCCEEDED, "broken": JOB_FAILED}
+    assert second.run_due() == {}
+    assert calls == ["scan"]
+
+    history = first.history()
+    assert {(run["job"], run["status"], run["worker"]) for run in history} == {
+        ("broken", JOB_FAILED, "a"), ("scan", JOB_SUCCEEDED, "a")
+    }
+    assert first.latest_result("scan") == {"found": 3}
+    assert "division by zero" in first.history("broken")[0]["error"]
+
+    session = factory()
+    row = session.query(ScheduledJob).filter(ScheduledJob.name == "scan").one()
+    assert row.last_status == JOB_SUCCEEDED and row.last_duration_ms is not None
+    assert row.next_run_at > datetime.utcnow() and row.lease_owner is None
+    session.close()
+
+
+def test_leased_job_is_skipped(make_session_factory):
+    """A job leased by a running process is not started again, even by hand."""
+    factory = make_session_factory(ScheduledJob, JobRun)
+    calls = []
+    jobs = {"purge": Job("purge", CronSchedule("17 * * * *"), lambda: calls.append(1))}
+    runner = JobRunner(jobs=jobs, session_factory=factory, worker_id="a")
+    runner.sync()
+
+    session = factory()
+    session.query(ScheduledJob).update({
+        ScheduledJob.lease_owner: "b",
+        ScheduledJob.lease_expires_at: datetime(2100, 1, 1),
+        ScheduledJob.next_run_at: datetime(2000, 1, 1),
+    })
+    session.commit()
+    session.close()
+
+    assert runner.run_due() == {}
+    assert runner.run_job("purge", force=True) is None
+    assert calls == []
+
+
+def test_per_process_jobs_run_in_every_runner(make_session_factory):
+    """Non-exclusive jobs (process-local cache warmup) run in each process."""
+    factory = make_session_factory(ScheduledJob, JobRun)
+    calls = []
+    jobs = {"warm": Job("warm", CronSchedule("*/2 * * * *"), lambda: calls.append(1), exclusive=False)}
+    first = JobRunner(jobs=jobs, session_factory=factory)
+    second = JobRunner(jobs=jobs, session_factory=factory)
+
+    assert first.run_due() == {"warm": JOB_SUCCEEDED}
+    assert second.run_due() == {"warm": JOB_SUCCEEDED}
+    # Not due again until the next tick
+    assert first.run_due() == {}
+    assert len(calls) == 2
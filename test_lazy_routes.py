@@ -0,0 +1,104 @@
+"""
+Tests for importing admin route modules on their first request.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+from starlette.middleware.sessions import SessionMiddleware
+
+from pycommerce.core.lazy_routes import LazyRouterMiddleware, serves_group
+from routes import ADMIN_ROUTE_MODULES, get_router_registry, register_routes
+
+
+def build_app(monkeypatch, lazy):
+    """Wire admin routes the way create_app does, on an admin-only worker."""
+    monkeypatch.setenv("WORKER_ROLE", "admin")
+    monkeypatch.setenv("LAZY_ROUTERS", "true" if lazy else "false")
+    app = FastAPI()
+    templates = Jinja2Templates(directory="templates")
+    register_routes(app, templates)
+    app.add_middleware(LazyRouterMiddleware, registry=get_router_registry(app, templates))
+    app.add_middleware(SessionMiddleware, secret_key="test")
+    return app
+
+
+def get(app, path):
+    response = TestClient(app).get(path, follow_redirects=False)
+    return response.status_code, response.headers.get("location")
+
+
+@pytest.fixture
+def eager_app(monkeypatch):
+    return build_app(monkeypatch, lazy=False)
+
+
+@pytest.fixture
+def lazy_app(monkeypatch):
+    return build_app(monkeypatch, lazy=True)
+
+
+def test_eager_registry_imports_every_admin_module(eager_app):
+    """With LAZY_ROUTERS=false every admin module is imported at startup."""
+    registry = eager_app.state.router_registry
+    assert registry.pending() == []
+    assert registry._routers["routes.admin.orders"].loaded
+
+
+def test_admin_route_loads_on_first_request(lazy_app, eager_app):
+    """The first request imports the prefix's modules and answers as an eagerly loaded app would."""
+    registry = lazy_app.state.router_registry
+    assert sorted(registry.pending()) == sorted(module for module, _ in ADMIN_ROUTE_MODULES)
+
+    status = get(lazy_app, "/admin/orders")
+    assert status == get(eager_app, "/admin/orders")
+    assert status[0] == 303  # no store selected yet
+
+    # Both modules serving /admin/orders are loaded, nothing else is
+    pending = registry.pending()
+    assert "routes.admin.orders" not in pending
+    assert "routes.admin.returns" not in pending
+    assert len(pending) == len(ADMIN_ROUTE_MODULES) - 2
+    assert registry._routers["routes.admin.orders"].loaded
+    assert registry._routers["routes.admin.returns"].loaded
+
+    # Later requests are routed without loading anything again
+    assert get(lazy_app, "/admin/orders") == status
+    assert registry.load_for_path("/admin/orders") == 0
+
+
+def test_payment_metrics_are_served(lazy_app, monkeypatch):
+    """Payment transport metrics are reachable under the admin plugins prefix."""
+    from pycommerce.plugins.payment import transport as transport_module
+
+    transport = transport_module.ProviderTransport("stripe", "https://api.stripe.test")
+    transport.histogram("charge").observe(0.05)
+    monkeypatch.setattr(transport_module, "_transports", {"stripe": transport})
+
+    response = TestClient(lazy_app).get("/admin/plugins/payments/metrics")
+    assert response.status_code == 200
+    metrics = response.json()["stripe"]
+    assert metrics["breaker"]["state"] == "closed"
+    assert metrics["operations"]["charge"]["count"] == 1
+
+
+def test_unregistered_admin_path_loads_nothing(lazy_app, eager_app):
+    """Paths outside every prefix stay 404 and import no modules."""
+    registry = lazy_app.state.router_registry
+    before = registry.pending()
+    assert get(lazy_app, "/admin/no-such-page") == get(eager_app, "/admin/no-such-page")
+    assert get(lazy_app, "/admin/no-such-page")[0] == 404
+    assert registry.pending() == before
+
+
+def test_worker_roles(monkeypatch):
+    """Storefront workers skip admin routes and admin workers skip the storefront."""
+    assert serves_group("admin", "all") and serves_group("storefront", "all")
+    assert serves_group("admin", "admin") and not serves_group("storefront", "admin")
+    assert serves_group("storefront", "storefront") and not serves_group("admin", "storefront")
+
+    monkeypatch.setenv("WORKER_ROLE", "storefront")
+    app = FastAPI()
+    registry = get_router_registry(app, Jinja2Templates(directory="templates"))
+    registry.register("routes.admin.orders", ["/admin/orders"])
+    assert registry.pending() == []
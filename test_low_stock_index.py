@@ -0,0 +1,92 @@
+"""
+Tests for the maintained low-stock index.
+"""
+
+from pycommerce.models.db_registry import InventoryRecord, LowStockCount, Product
+from pycommerce.models.inventory import InventoryManager, InventoryTransaction
+from pycommerce.models.outbox_event import OutboxEvent
+from pycommerce.services.event_bus import INVENTORY_LOW_STOCK, INVENTORY_RESTOCKED
+from pycommerce.services.low_stock_index import get_low_stock_count, reconcile_low_stock_index
+
+
+MODELS = (Product, InventoryRecord, LowStockCount, InventoryTransaction, OutboxEvent)
+
+
+def add_products(factory, tenant_id, count):
+    session = factory()
+    ids = [f"{tenant_id}-p{i}" for i in range(count)]
+    for product_id in ids:
+        session.add(Product(id=product_id, tenant_id=tenant_id, name=product_id, price=100, sku=product_id))
+    session.commit()
+    session.close()
+    return ids
+
+
+def events(factory):
+    session = factory()
+    try:
+        return [(row.event_type, row.aggregate_id) for row in session.query(OutboxEvent).order_by(OutboxEvent.created_at)]
+    finally:
+        session.close()
+
+
+def test_threshold_crossings_update_flag_count_and_events(make_session_factory):
+    """Reserving past the reorder point flags the record once; releasing clears it."""
+    factory = make_session_factory(*MODELS)
+    manager = InventoryManager(session_factory=factory)
+    first, second = add_products(factory, "tenant-a", 2)
+    manager.create_or_update_inventory(first, "tenant-a", 10, reorder_point=4)
+    manager.create_or_update_inventory(second, "tenant-a", 10, reorder_point=4)
+    assert manager.get_low_stock_count("tenant-a") == 0
+
+    manager.reserve_inventory(first, 6, "order-1")
+    manager.reserve_inventory(first, 2, "order-2")  # already low: no second crossing
+    assert manager.get_low_stock_count("tenant-a") == 1
+    assert [item["product_id"] for item in manager.get_low_stock_products("tenant-a")] == [first]
+    assert manager.get_low_stock_products("tenant-b") == []
+
+    manager.release_inventory(first, 8, "order-1")
+    assert manager.get_low_stock_count("tenant-a") == 0
+    assert manager.get_low_stock_products("tenant-a") == []
+    assert events(factory) == [(INVENTORY_LOW_STOCK, first), (INVENTORY_RESTOCKED, first)]
+
+
+def test_new_low_records_returns_and_completed_orders(make_session_factory):
+    """Records created below their reorder point count at once; returns restock them."""
+    factory = make_session_factory(*MODELS)
+    manager = InventoryManager(session_factory=factory)
+    first, second = add_products(factory, "tenant-a", 2)
+    manager.create_or_update_inventory(first, "tenant-a", 2, reorder_point=5)
+    manager.create_or_update_inventory(second, "tenant-a", 8, reorder_point=5)
+    assert get_low_stock_count("tenant-a", factory) == 1
+
+    manager.reserve_inventory(second, 3, "order-1")
+    manager.complete_order_inventory("order-1", [{"product_id": second, "quantity": 3}])
+    assert get_low_stock_count("tenant-a", factory) == 2
+
+    manager.process_return(first, 10, "return-1")
+    assert get_low_stock_count("tenant-a", factory) == 1
+    assert [item["product_id"] for item in manager.get_low_stock_products("tenant-a")] == [second]
+
+
+def test_reconcile_repairs_out_of_band_writes(make_session_factory):
+    """Quantities changed behind the managers' backs are re-flagged and recounted."""
+    factory = make_session_factory(*MODELS)
+    manager = InventoryManager(session_factory=factory)
+    products = add_products(factory, "tenant-a", 3)
+    for product_id in products:
+        manager.create_or_update_inventory(product_id, "tenant-a", 10, reorder_point=3)
+
+    session = factory()
+    session.query(InventoryRecord).filter(InventoryRecord.product_id.in_(products[:2])).update(
+        {InventoryRecord.available_quantity: 1}, synchronize_session=False
+    )
+    session.query(LowStockCount).delete()
+    session.commit()
+    session.close()
+
+    summary = reconcile_low_stock_index(factory)
+    assert summary["fixed"] == 2 and summary["tenants"] == {"tenant-a": 2}
+    assert get_low_stock_count("tenant-a", factory) == 2
+    assert reconcile_low_stock_index(factory)["fixed"] == 0
+    assert [event_type for event_type, _ in events(factory)] == [INVENTORY_LOW_STOCK] * 2
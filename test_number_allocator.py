@@ -0,0 +1,44 @@
+"""
+Tests for per-tenant document number allocation.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pycommerce.models.number_sequence import NumberSequence
+from pycommerce.services.number_allocator import ORDER_NUMBERS, RETURN_NUMBERS, NumberAllocator
+
+
+def test_numbers_increase_per_tenant(make_session_factory):
+    """Each tenant and document kind has its own increasing sequence."""
+    allocator = NumberAllocator(block_size=3, session_factory=make_session_factory(NumberSequence))
+    first = [allocator.next_number(ORDER_NUMBERS, "tenant-a") for _ in range(5)]
+    other = allocator.next_number(ORDER_NUMBERS, "tenant-b")
+    returns = allocator.next_number(RETURN_NUMBERS, "tenant-a")
+
+    prefix = first[0].rsplit("-", 1)[0]
+    assert first == [f"{prefix}-{n:06d}" for n in range(1, 6)]
+    assert other.endswith("-000001") and not other.startswith(prefix + "-")
+    assert returns.startswith("RET-") and returns.endswith("-000001")
+    # Five numbers from blocks of three, plus one block for each other sequence
+    assert allocator.reservations == 4
+
+
+def test_workers_never_share_numbers(make_session_factory):
+    """Allocators in different processes reserve disjoint blocks."""
+    factory = make_session_factory(NumberSequence)
+    workers = [NumberAllocator(block_size=4, session_factory=factory) for _ in range(3)]
+    numbers = [workers[i % 3].allocate(ORDER_NUMBERS, "tenant-a")[1] for i in range(30)]
+    assert len(set(numbers)) == 30
+    # Each worker's numbers increase
+    for i in range(3):
+        own = numbers[i::3]
+        assert own == sorted(own)
+
+
+def test_concurrent_allocation_is_unique(make_session_factory):
+    """Threads sharing an allocator get distinct numbers."""
+    allocator = NumberAllocator(block_size=5, session_factory=make_session_factory(NumberSequence))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        numbers = list(pool.map(lambda _: allocator.next_number(ORDER_NUMBERS, "tenant-a"), range(200)))
+    assert len(set(numbers)) == 200
+    assert allocator.reservations == 40
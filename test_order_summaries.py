@@ -0,0 +1,166 @@
+"""
+Tests for the paged admin order list and its summary query.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.middleware.sessions import SessionMiddleware
+
+from pycommerce.models import tenant as tenant_module
+from pycommerce.models.db_registry import Product, Tenant
+from pycommerce.models.order import Order, OrderItem, OrderStatus
+from pycommerce.models.order_note import OrderNote
+from pycommerce.services import query_optimizer
+from pycommerce.services.query_optimizer import MAX_ORDER_PAGE_SIZE, get_order_summaries
+from routes.admin import orders as orders_routes
+
+START = datetime(2025, 1, 1)
+
+# order number -> (tenant, days after START, total, status, item quantities, notes)
+ORDERS = {
+    "A-1": ("alpha", 0, 10.0, "PENDING", [2, 3], 1),
+    "A-2": ("alpha", 1, 30.0, "SHIPPED", [1], 0),
+    "A-3": ("alpha", 2, 20.0, "PENDING", [], 2),
+    "B-1": ("beta", 3, 5.0, "PENDING", [4], 0),
+}
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    for model in (Tenant, Product, Order, OrderItem, OrderNote):
+        model.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+
+    with factory() as session:
+        tenants = {
+            slug: Tenant(id=f"tenant-{slug}", name=slug.title(), slug=slug)
+            for slug in ("alpha", "beta")
+        }
+        session.add_all(tenants.values())
+        session.add(Product(id="product-1", tenant_id="tenant-alpha", name="Widget", price=100, sku="W"))
+        for number, (slug, days, total, status, quantities, notes) in ORDERS.items():
+            order = Order(
+                id=f"order-{number}", tenant_id=tenants[slug].id, order_number=number,
+                customer_name=f"Customer {number}", total=total, status=status,
+                created_at=START + timedelta(days=days),
+            )
+            session.add(order)
+            session.add_all(
+                OrderItem(order_id=order.id, product_id="product-1", quantity=quantity, price=1.0)
+                for quantity in quantities
+            )
+            session.add_all(OrderNote(order_id=order.id, content=f"note {i}") for i in range(notes))
+        session.commit()
+
+    monkeypatch.setattr(query_optimizer, "get_session", factory)
+    return factory
+
+
+def numbers(summary):
+    return [order["order_number"] for order in summary["orders"]]
+
+
+def test_order_summaries_aggregate_items_and_notes(session_factory):
+    """Each row carries its store name and item/note aggregates; orders without items count zero."""
+    summary = get_order_summaries("tenant-alpha")
+    assert numbers(summary) == ["A-3", "A-2", "A-1"]
+    assert summary["total"] == 3
+
+    rows = {order["order_number"]: order for order in summary["orders"]}
+    assert rows["A-1"]["items_count"] == 2
+    assert rows["A-1"]["items_quantity"] == 5
+    assert rows["A-1"]["notes_count"] == 1
+    assert rows["A-3"]["items_count"] == 0
+    assert rows["A-3"]["items_quantity"] == 0
+    assert rows["A-3"]["notes_count"] == 2
+    assert {order["tenant_name"] for order in summary["orders"]} == {"Alpha"}
+
+
+def test_order_summaries_sorting(session_factory):
+    """Sorting is done in SQL on plain and aggregated columns; unknown keys fall back to date."""
+    assert numbers(get_order_summaries("tenant-alpha", sort="total", descending=False)) == ["A-1", "A-3", "A-2"]
+    assert numbers(get_order_summaries("tenant-alpha", sort="items_count")) == ["A-1", "A-2", "A-3"]
+    assert numbers(get_order_summaries("tenant-alpha", sort="notes_count")) == ["A-3", "A-1", "A-2"]
+
+    summary = get_order_summaries("tenant-alpha", sort="id; DROP TABLE orders")
+    assert summary["sort"] == "created_at"
+    assert numbers(summary) == ["A-3", "A-2", "A-1"]
+
+    summary = get_order_summaries(None, descending=False)
+    assert numbers(summary) == ["A-1", "A-2", "A-3", "B-1"]
+    assert summary["orders"][-1]["tenant_name"] == "Beta"
+
+
+def test_order_summaries_status_filter(session_factory):
+    """Status filters accept names in any case and OrderStatus members."""
+    assert numbers(get_order_summaries("tenant-alpha", {"status": "pending"})) == ["A-3", "A-1"]
+    assert numbers(get_order_summaries(None, {"status": OrderStatus.PENDING})) == ["B-1", "A-3", "A-1"]
+    assert numbers(get_order_summaries(None, {"status": "SHIPPED"})) == ["A-2"]
+    assert get_order_summaries(None, {"status": "REFUNDED"})["total"] == 0
+
+
+def test_order_summaries_paging(session_factory):
+    """Pages are sliced in SQL; page sizes are capped and out-of-range pages are empty."""
+    first = get_order_summaries(None, per_page=3)
+    assert numbers(first) == ["B-1", "A-3", "A-2"]
+    assert (first["total"], first["pages"]) == (4, 2)
+    assert numbers(get_order_summaries(None, per_page=3, page=2)) == ["A-1"]
+
+    beyond = get_order_summaries(None, per_page=3, page=5)
+    assert beyond["orders"] == []
+    assert beyond["total"] == 4
+
+    assert get_order_summaries(None, per_page=10_000)["per_page"] == MAX_ORDER_PAGE_SIZE
+    assert get_order_summaries(None, page=0, per_page=0)["page"] == 1
+
+
+class RecordingTemplates:
+    """Stands in for the app's templates and keeps the last context rendered."""
+
+    def TemplateResponse(self, name, context):
+        self.name, self.context = name, context
+        return HTMLResponse(name)
+
+
+@pytest.fixture
+def admin(session_factory, monkeypatch):
+    monkeypatch.setattr(tenant_module, "db_session", session_factory)
+    templates = RecordingTemplates()
+    monkeypatch.setattr(orders_routes, "templates", templates)
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="test")
+    app.include_router(orders_routes.router)
+    return TestClient(app), templates
+
+
+def test_admin_orders_route_pages_filters_and_sorts(admin):
+    """The order list passes status, sort and paging through to the summary query."""
+    client, templates = admin
+    response = client.get("/admin/orders", params={
+        "tenant": "alpha", "status": "pending", "sort": "total", "direction": "asc",
+        "per_page": 1, "page": 2,
+    })
+    assert response.status_code == 200
+    assert templates.name == "admin/orders.html"
+    assert numbers(templates.context) == ["A-3"]
+    assert templates.context["pagination"] == {
+        "page": 2, "per_page": 1, "pages": 2, "total": 2, "sort": "total", "direction": "asc",
+    }
+    assert templates.context["orders"][0]["notes_count"] == 2
+
+
+def test_admin_orders_route_all_stores(admin):
+    """"All Stores" lists every tenant's orders in one page with their store names."""
+    client, templates = admin
+    response = client.get("/admin/orders", params={"tenant": "all"})
+    assert response.status_code == 200
+    assert templates.context["all_stores_selected"]
+    assert numbers(templates.context) == ["B-1", "A-3", "A-2", "A-1"]
+    assert [order["tenant_name"] for order in templates.context["orders"]] == ["Beta", "Alpha", "Alpha", "Alpha"]
+    assert templates.context["orders"][0]["items_quantity"] == 4
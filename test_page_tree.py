@@ -0,0 +1,216 @@
+"""
+Tests for saving the page editor's section/block tree in one request.
+"""
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.core.exceptions import PageNotFoundError, PageVersionConflictError
+from pycommerce.models.db_registry import Tenant
+from pycommerce.models.page_builder import (
+    ContentBlock,
+    ContentBlockManager,
+    Page,
+    PageManager,
+    PageSection,
+    PageSectionManager,
+)
+from routes.admin import page_builder_api
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pages.db'}")
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys(dbapi_connection, _):
+        # Section deletes cascade to their blocks, as on PostgreSQL
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    for model in (Tenant, Page, PageSection, ContentBlock):
+        model.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def page_id(session_factory):
+    tenant_id = uuid.uuid4()
+    with session_factory() as session:
+        session.execute(Tenant.__table__.insert().values(id=tenant_id.hex, name="Shop", slug="shop"))
+        page = Page(tenant_id=tenant_id, title="Home", slug="home")
+        session.add(page)
+        session.commit()
+        return str(page.id)
+
+
+def save(session_factory, page_id, version, sections):
+    with session_factory() as session:
+        return PageManager(session).save_tree(page_id, version, sections)
+
+
+def get_tree(session_factory, page_id):
+    with session_factory() as session:
+        return PageManager(session).get_tree(page_id)
+
+
+def two_section_page(session_factory, page_id):
+    """Save a page with sections A (blocks a1, a2) and B (block b1)."""
+    save(session_factory, page_id, 1, [
+        {"id": "tmp-a", "section_type": "hero", "blocks": [
+            {"id": "tmp-a1", "block_type": "text", "content": {"text": "a1"}},
+            {"id": "tmp-a2", "block_type": "text", "content": {"text": "a2"}},
+        ]},
+        {"id": "tmp-b", "section_type": "text-block", "blocks": [
+            {"id": "tmp-b1", "block_type": "text", "content": {"text": "b1"}},
+        ]},
+    ])
+    return get_tree(session_factory, page_id)
+
+
+def test_save_tree_inserts_and_reorders(session_factory, page_id):
+    """New sections and blocks get ids, positions follow list order and the version moves on."""
+    tree = two_section_page(session_factory, page_id)
+    assert tree["version"] == 2
+    assert [s["section_type"] for s in tree["sections"]] == ["hero", "text-block"]
+    section_a, section_b = tree["sections"]
+
+    section_a["blocks"].reverse()
+    result = save(session_factory, page_id, 2, [section_b, section_a])
+    assert result["version"] == 3
+    assert result["stats"]["sections_inserted"] == 0
+    assert result["stats"]["blocks_deleted"] == 0
+
+    tree = get_tree(session_factory, page_id)
+    assert [s["id"] for s in tree["sections"]] == [section_b["id"], section_a["id"]]
+    assert [b["content"]["text"] for b in tree["sections"][1]["blocks"]] == ["a2", "a1"]
+
+
+def test_save_tree_moves_block_out_of_deleted_section(session_factory, page_id):
+    """A block moved out of a section removed in the same save survives the cascade."""
+    section_a, section_b = two_section_page(session_factory, page_id)["sections"]
+    moved = section_a["blocks"][1]
+
+    result = save(session_factory, page_id, 2, [
+        {**section_b, "blocks": section_b["blocks"] + [moved]},
+        {"id": "tmp-c", "section_type": "gallery", "blocks": [section_a["blocks"][0]]},
+    ])
+    assert result["stats"]["sections_deleted"] == 1
+    assert result["stats"]["blocks_deleted"] == 0
+
+    tree = get_tree(session_factory, page_id)
+    assert [s["section_type"] for s in tree["sections"]] == ["text-block", "gallery"]
+    assert [b["id"] for b in tree["sections"][0]["blocks"]] == [section_b["blocks"][0]["id"], moved["id"]]
+    assert [b["id"] for b in tree["sections"][1]["blocks"]] == [section_a["blocks"][0]["id"]]
+    with session_factory() as session:
+        assert session.query(ContentBlock).count() == 3
+
+
+def test_save_tree_rejects_stale_version(session_factory, page_id):
+    """Saving from an outdated version raises a conflict and changes nothing."""
+    tree = two_section_page(session_factory, page_id)
+
+    with pytest.raises(PageVersionConflictError) as excinfo:
+        save(session_factory, page_id, 1, [])
+    assert excinfo.value.current_version == 2
+    assert get_tree(session_factory, page_id) == tree
+
+
+
+def test_section_and_block_edits_bump_version(session_factory, page_id):
+    """Edits made through the per-section and per-block managers make older tree saves conflict."""
+    section_a, section_b = two_section_page(session_factory, page_id)["sections"]
+    a, b = uuid.UUID(section_a["id"]), uuid.UUID(section_b["id"])
+    a1, b1 = uuid.UUID(section_a["blocks"][0]["id"]), uuid.UUID(section_b["blocks"][0]["id"])
+    steps = [
+        lambda session: PageSectionManager(session).update(a, {"settings": {"dark": True}}),
+        lambda session: ContentBlockManager(session).update(b1, {"content": {"text": "b2"}}),
+        lambda session: ContentBlockManager(session).create({"section_id": b, "block_type": "text", "content": {"text": "b3"}}),
+        lambda session: ContentBlockManager(session).delete(a1),
+        lambda session: PageSectionManager(session).delete(a),
+    ]
+    for version, step in enumerate(steps, start=3):
+        with session_factory() as session:
+            assert step(session)
+        assert get_tree(session_factory, page_id)["version"] == version
+
+    with pytest.raises(PageVersionConflictError) as excinfo:
+        save(session_factory, page_id, 2, [])
+    assert excinfo.value.current_version == 7
+    assert [b["content"]["text"] for b in get_tree(session_factory, page_id)["sections"][0]["blocks"]] == ["b2", "b3"]
+
+    with pytest.raises(PageNotFoundError):
+        save(session_factory, str(uuid.uuid4()), 1, [])
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    monkeypatch.setattr(page_builder_api, "SessionLocal", session_factory)
+    app = FastAPI()
+    app.include_router(page_builder_api.router)
+    return TestClient(app)
+
+
+def test_tree_api_round_trip(client, session_factory, page_id):
+    """GET returns the tree with its version; PUT applies a move-and-delete and sanitizes HTML."""
+    section_a, section_b = two_section_page(session_factory, page_id)["sections"]
+
+    response = client.get(f"/admin/api/pages/{page_id}/tree")
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert [s["id"] for s in response.json()["sections"]] == [section_a["id"], section_b["id"]]
+
+    response = client.put(f"/admin/api/pages/{page_id}/tree", json={"version": 2, "sections": [
+        {**section_b, "blocks": section_b["blocks"] + section_a["blocks"] + [
+            {"id": "tmp-html", "block_type": "text", "content": {"html": "<p>Hi</p><script>x()</script>"}},
+        ]},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["version"] == 3
+    assert body["stats"]["sections_deleted"] == 1
+
+    (section,) = get_tree(session_factory, page_id)["sections"]
+    assert len(section["blocks"]) == 4
+    content = section["blocks"][-1]["content"]
+    assert "<script" not in content["html"]
+    assert content["raw_html"] == "<p>Hi</p><script>x()</script>"
+
+
+def test_tree_api_reports_version_conflict(client, session_factory, page_id):
+    """A PUT based on a stale version responds 409 with the current version."""
+    two_section_page(session_factory, page_id)
+
+    response = client.put(f"/admin/api/pages/{page_id}/tree", json={"version": 1, "sections": []})
+    assert response.status_code == 409
+    assert response.json()["current_version"] == 2
+    assert len(get_tree(session_factory, page_id)["sections"]) == 2
+
+
+def test_tree_api_unknown_page(client):
+    """Unknown pages are 404 for both reading and saving."""
+    page_id = str(uuid.uuid4())
+    assert client.get(f"/admin/api/pages/{page_id}/tree").status_code == 404
+    response = client.put(f"/admin/api/pages/{page_id}/tree", json={"version": 1, "sections": []})
+    assert response.status_code == 404
+
+
+def test_tree_api_keeps_stored_sanitized_html(client, session_factory, page_id):
+    """Once sanitized, sending back the stored block content leaves the block untouched."""
+    save(session_factory, page_id, 1, [{"id": "tmp-a", "blocks": [
+        {"id": "tmp-a1", "block_type": "text", "content": {"html": "<p>Hi</p>"}},
+    ]}])
+    response = client.put(f"/admin/api/pages/{page_id}/tree", json={
+        "version": 2, "sections": get_tree(session_factory, page_id)["sections"],
+    })
+    assert response.status_code == 200
+    assert response.json()["stats"]["blocks_updated"] == 1
+    tree = get_tree(session_factory, page_id)
+
+    response = client.put(f"/admin/api/pages/{page_id}/tree", json={"version": 3, "sections": tree["sections"]})
+    assert response.status_code == 200
+    assert response.json()["stats"]["blocks_updated"] == 0
+    assert get_tree(session_factory, page_id)["sections"] == tree["sections"]
@@ -0,0 +1,116 @@
+"""
+Tests for versioned password hashing, rehash on login and the verifier pool.
+"""
+
+import asyncio
+import hashlib
+
+import pytest
+
+from pycommerce.models.user import UserManager
+from pycommerce.services.password_hashing import (
+    PasswordVerifierBusy,
+    PasswordVerifierPool,
+    ScryptParams,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
+
+FAST = ScryptParams(n=2 ** 10, r=8, p=1)
+
+
+def legacy_hash(password, salt="0123456789abcdef"):
+    return f"{salt}:{hashlib.sha256((password + salt).encode()).hexdigest()}"
+
+
+def test_scrypt_hash_round_trip():
+    """Hashes record their parameters and verify only the right password."""
+    stored = hash_password("hunter2", FAST)
+    assert stored.startswith("$scrypt$v=1$n=1024,r=8,p=1$")
+    assert verify_password(stored, "hunter2")
+    assert not verify_password(stored, "hunter3")
+    assert not verify_password("$scrypt$v=9$bad", "hunter2")
+    assert not verify_password(None, "hunter2")
+
+
+def test_needs_rehash():
+    """Legacy hashes and hashes below the current cost are upgraded."""
+    assert needs_rehash(legacy_hash("pw"))
+    assert needs_rehash(hash_password("pw", FAST), ScryptParams(n=2 ** 11))
+    assert not needs_rehash(hash_password("pw", FAST), FAST)
+
+
+def test_login_upgrades_legacy_hash():
+    """A legacy hash still logs in, and is replaced by a scrypt hash."""
+    manager = UserManager()
+    user = manager.create({
+        "email": "legacy@example.com", "first_name": "Lee", "last_name": "Gacy",
+        "password_hash": legacy_hash("old-password"),
+    })
+    assert verify_password(user.password_hash, "old-password")
+
+    assert asyncio.run(manager.authenticate_async("legacy@example.com", "wrong")) is None
+    assert user.password_hash == legacy_hash("old-password")
+
+    result = asyncio.run(manager.authenticate_async("legacy@example.com", "old-password"))
+    assert result is not None and result[0].id == user.id
+    assert user.password_hash.startswith("$scrypt$")
+    assert manager.authenticate("legacy@example.com", "old-password") is not None
+    assert manager.authenticate("nobody@example.com", "old-password") is None
+
+
+def test_verifier_pool_refuses_when_full():
+    """Verifications beyond the queue limit fail fast."""
+    pool = PasswordVerifierPool(workers=1, queue_size=1)
+    stored = hash_password("pw", FAST)
+
+    async def run():
+        return await asyncio.gather(pool.verify(stored, "pw"), pool.verify(stored, "pw"), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+    assert first is True
+    assert isinstance(second, PasswordVerifierBusy)
+    assert pool.stats["rejected"] == 1
+    pool.shutdown()
+
+
+def test_user_routes_hash_on_the_pool(monkeypatch):
+    """Registration and password changes hash on the verifier pool, not the event loop."""
+    from fastapi import HTTPException
+
+    from pycommerce.api.routes import users as users_routes
+
+    pool = PasswordVerifierPool(workers=1, queue_size=1)
+    monkeypatch.setattr(users_routes, "get_password_verifier_pool", lambda: pool)
+    manager = UserManager()
+
+    def inline_hash(password):
+        raise AssertionError("password hashed on the event loop")
+
+    monkeypatch.setattr(manager, "_hash_password", inline_hash)
+    created = asyncio.run(users_routes.create_user(
+        users_routes.UserCreate(email="pool@example.com", first_name="Po", last_name="Ol", password="first-pw"),
+        user_manager=manager,
+    ))
+    user = manager.get(created.id)
+    assert verify_password(user.password_hash, "first-pw")
+
+    asyncio.run(users_routes.update_user(
+        created.id, users_routes.UserUpdate(password="second-pw"), user_manager=manager,
+    ))
+    assert verify_password(user.password_hash, "second-pw")
+    assert pool.stats["rejected"] == 0
+
+    # A saturated pool turns the request away instead of hashing inline
+    async def busy(password):
+        raise PasswordVerifierBusy()
+
+    monkeypatch.setattr(pool, "hash", busy)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(users_routes.update_user(
+            created.id, users_routes.UserUpdate(password="third-pw"), user_manager=manager,
+        ))
+    assert excinfo.value.status_code == 503
+    assert verify_password(user.password_hash, "second-pw")
+    pool.shutdown()
@@ -0,0 +1,140 @@
+"""
+Tests for the pooled payment provider transport.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from pycommerce.core.exceptions import PaymentProviderUnavailableError
+from pycommerce.plugins.payment import transport as transport_module
+from pycommerce.plugins.payment.transport import CircuitBreaker, LatencyHistogram, ProviderTransport
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(transport_module, "RETRY_BASE_SECONDS", 0.001)
+
+
+def failing_transport(calls, status=503):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(status, json={"error": "unavailable"})
+    return httpx.MockTransport(handler)
+
+
+def test_retries_only_idempotent_calls():
+    """GETs and keyed POSTs are retried; plain POSTs are not."""
+    calls = []
+    transport = ProviderTransport(
+        "test", "https://provider.test", transport=failing_transport(calls),
+        breaker=CircuitBreaker(failure_threshold=100),
+    )
+    transport.max_retries = 2
+
+    async def run():
+        await transport.request("GET", "/status", "status")
+        get_calls = len(calls)
+        await transport.request("POST", "/charges", "charge", headers={"Idempotency-Key": "k1"})
+        keyed_calls = len(calls) - get_calls
+        await transport.request("POST", "/charges", "charge")
+        await transport.aclose()
+        return get_calls, keyed_calls, len(calls) - get_calls - keyed_calls
+
+    assert asyncio.run(run()) == (3, 3, 1)
+
+
+def test_breaker_opens_and_recovers():
+    """Consecutive failures open the breaker; a successful trial closes it."""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    now[0] = 11
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_fails_fast():
+    """Requests are rejected without a network call while the breaker is open."""
+    calls = []
+    transport = ProviderTransport(
+        "test", "https://provider.test", transport=failing_transport(calls),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    transport.max_retries = 0
+
+    async def run():
+        await transport.request("GET", "/status", "status")
+        with pytest.raises(PaymentProviderUnavailableError):
+            await transport.request("GET", "/status", "status")
+        await transport.aclose()
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_rate_limited_responses_count_as_failures():
+    """429 responses open the breaker like server errors."""
+    calls = []
+    transport = ProviderTransport(
+        "test", "https://provider.test", transport=failing_transport(calls, status=429),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    )
+    transport.max_retries = 0
+
+    async def run():
+        for _ in range(2):
+            assert (await transport.request("GET", "/status", "status")).status_code == 429
+        with pytest.raises(PaymentProviderUnavailableError):
+            await transport.request("GET", "/status", "status")
+        await transport.aclose()
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_concurrency_limit_throttles():
+    """Callers that cannot get a slot within the queue timeout fail fast."""
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={})
+
+    transport = ProviderTransport("test", "https://provider.test", transport=httpx.MockTransport(handler))
+    transport.max_concurrency = 1
+    transport.queue_timeout = 0.05
+
+    async def run():
+        results = await asyncio.gather(
+            transport.request("GET", "/a", "status"),
+            transport.request("GET", "/b", "status"),
+            return_exceptions=True,
+        )
+        await transport.aclose()
+        return results
+
+    first, second = asyncio.run(run())
+    assert first.status_code == 200
+    assert isinstance(second, PaymentProviderUnavailableError)
+    assert transport.metrics()["operations"]["status"]["outcomes"]["throttled"] == 1
+
+
+def test_histogram_percentiles():
+    """Percentiles are reported as bucket upper bounds."""
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.004)
+    for _ in range(10):
+        histogram.observe(0.8)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50_ms"] == 5
+    assert snapshot["p99_ms"] == 1000
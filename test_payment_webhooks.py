@@ -0,0 +1,126 @@
+"""
+Tests for payment webhook signature verification and event parsing.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.core.exceptions import PaymentWebhookError
+from pycommerce.models import order as order_module
+from pycommerce.models.order import Order
+from pycommerce.models.outbox_event import OutboxEvent
+from pycommerce.models.webhook_event import WEBHOOK_PROCESSED, WebhookEvent
+from pycommerce.plugins.payment import config as payment_config
+from pycommerce.plugins.payment.webhooks import (
+    WebhookProcessor,
+    _paypal_order_id,
+    _stripe_order_id,
+    ingest_webhook,
+    retry_delay,
+    sign_stripe_payload,
+    verify_stripe_signature,
+)
+from pycommerce.services.event_bus import ORDER_STATUS_CHANGED
+
+SECRET = "whsec_test"
+BODY = b'{"id": "evt_1", "type": "payment_intent.succeeded"}'
+
+
+def test_stripe_signature_roundtrip():
+    """A payload signed with the secret verifies."""
+    header = sign_stripe_payload(BODY, SECRET, timestamp=1700000000)
+    verify_stripe_signature(BODY, header, SECRET, now=1700000060)
+
+
+def test_stripe_signature_rejects_tampering():
+    """Wrong secrets, modified bodies, stale and missing headers are rejected."""
+    header = sign_stripe_payload(BODY, SECRET, timestamp=1700000000)
+    with pytest.raises(PaymentWebhookError):
+        verify_stripe_signature(BODY, header, "whsec_other", now=1700000000)
+    with pytest.raises(PaymentWebhookError):
+        verify_stripe_signature(BODY + b" ", header, SECRET, now=1700000000)
+    with pytest.raises(PaymentWebhookError):
+        verify_stripe_signature(BODY, header, SECRET, now=1700000000 + 3600)
+    with pytest.raises(PaymentWebhookError):
+        verify_stripe_signature(BODY, None, SECRET)
+
+
+def test_order_id_extraction():
+    """Order IDs are found in Stripe metadata and PayPal custom IDs."""
+    assert _stripe_order_id({"data": {"object": {"metadata": {"order_id": "o1"}}}}) == "o1"
+    assert _stripe_order_id({"data": {"object": {"client_reference_id": "o2"}}}) == "o2"
+    assert _paypal_order_id({"resource": {"custom_id": "o3"}}) == "o3"
+    assert _paypal_order_id({"resource": {"purchase_units": [{"reference_id": "o4"}]}}) == "o4"
+    assert _paypal_order_id({"resource": {}}) is None
+
+
+def test_retry_delay_backs_off():
+    """Retry delays grow exponentially up to the cap."""
+    assert retry_delay(1) < retry_delay(4)
+    assert retry_delay(100) <= 3600 * 1.2
+
+
+@pytest.fixture
+def unsigned_config(monkeypatch):
+    """No webhook secrets configured, in the default development environment."""
+    monkeypatch.setattr(payment_config, "STRIPE_WEBHOOK_SECRET", "")
+    monkeypatch.setattr(payment_config, "PAYPAL_WEBHOOK_ID", "")
+    monkeypatch.setattr(payment_config, "ENVIRONMENT", "development")
+    monkeypatch.setattr(payment_config, "ALLOW_UNSIGNED_WEBHOOKS", False)
+
+
+def test_unsigned_events_are_refused_by_default(tmp_path, unsigned_config, monkeypatch):
+    """Without a secret, forged events are rejected unless unsigned webhooks are enabled."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'webhooks.db'}")
+    WebhookEvent.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+
+    for provider in ("stripe", "paypal"):
+        with pytest.raises(PaymentWebhookError):
+            ingest_webhook(provider, BODY, {}, session_factory=factory)
+    session = factory()
+    assert session.query(WebhookEvent).count() == 0
+    session.close()
+
+    monkeypatch.setattr(payment_config, "ALLOW_UNSIGNED_WEBHOOKS", True)
+    event, created = ingest_webhook("stripe", BODY, {}, session_factory=factory)
+    assert created and event["event_id"] == "evt_1"
+    session = factory()
+    assert session.query(WebhookEvent).one().signature_verified is False
+    session.close()
+
+    # The opt-in never applies in production
+    monkeypatch.setattr(payment_config, "ENVIRONMENT", "production")
+    with pytest.raises(PaymentWebhookError):
+        ingest_webhook("stripe", BODY, {}, session_factory=factory)
+
+
+def test_one_checkout_marks_the_order_paid_once(make_session_factory, unsigned_config, monkeypatch):
+    """Stripe's session and payment intent events for one payment record a single PAID change."""
+    factory = make_session_factory(WebhookEvent, Order, OutboxEvent)
+    monkeypatch.setattr(order_module, "get_session", factory)
+    monkeypatch.setattr(payment_config, "ALLOW_UNSIGNED_WEBHOOKS", True)
+    with factory() as session:
+        session.add(Order(id="o1", tenant_id="t1", order_number="A-1", status="PENDING", total=10.0))
+        session.commit()
+
+    processor = WebhookProcessor(workers=0, session_factory=factory)
+    paid_at = []
+    for event_id, event_type in (("evt_1", "checkout.session.completed"), ("evt_2", "payment_intent.succeeded")):
+        body = json.dumps({
+            "id": event_id, "type": event_type, "data": {"object": {"metadata": {"order_id": "o1"}}},
+        }).encode()
+        event, created = ingest_webhook("stripe", body, {}, session_factory=factory)
+        assert created
+        assert processor.process_event(event["id"]) == WEBHOOK_PROCESSED
+        with factory() as session:
+            paid_at.append(session.get(Order, "o1").paid_at)
+
+    assert paid_at[0] is not None and paid_at[1] == paid_at[0]
+    with factory() as session:
+        assert session.get(Order, "o1").status == "PAID"
+        changes = session.query(OutboxEvent).filter(OutboxEvent.event_type == ORDER_STATUS_CHANGED).all()
+    assert [json.loads(change.payload)["status"] for change in changes] == ["PAID"]
@@ -0,0 +1,120 @@
+"""
+Tests for database-backed plugin configuration and its versioned cache.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.core import plugin as plugin_module
+from pycommerce.core.exceptions import ConfigError
+from pycommerce.core.plugin import PluginConfigManager as PluginConfigStore
+from pycommerce.models.db_registry import PluginConfig, Tenant
+from pycommerce.models.plugin_config import PluginConfigManager
+
+TENANT_ID = "tenant-1"
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plugins.db'}")
+    for model in (Tenant, PluginConfig):
+        model.__table__.create(engine)
+    PluginConfigStore.invalidate(all_tenants=True)
+    yield sessionmaker(bind=engine)
+    PluginConfigStore.invalidate(all_tenants=True)
+
+
+def bump_in_other_process(session_factory, plugin_id, config):
+    """Update a row the way another worker would, without touching this process's cache."""
+    with session_factory() as session:
+        row = session.query(PluginConfig).filter_by(plugin_id=plugin_id, tenant_id=TENANT_ID).one()
+        row.config = config
+        row.version = PluginConfig.version + 1
+        session.commit()
+
+
+def test_save_and_get_round_trip(session_factory):
+    """Saved configs are read back per tenant, with enabled flags and versions."""
+    store = PluginConfigStore(session_factory=session_factory)
+    store.save_config("stripe", TENANT_ID, {"api_key": "sk_test", "webhook": {"secret": "whsec"}})
+    store.save_config("stripe", None, {"api_key": "sk_global"})
+
+    reader = PluginConfigStore(session_factory=session_factory)
+    assert reader.get_config("stripe", TENANT_ID) == {"api_key": "sk_test", "webhook": {"secret": "whsec"}}
+    assert reader.get_config("stripe") == {"api_key": "sk_global"}
+    assert reader.get_configs(TENANT_ID) == {"stripe": {"api_key": "sk_test", "webhook": {"secret": "whsec"}}}
+
+    # Callers get copies, not the cached dictionaries
+    reader.get_config("stripe", TENANT_ID)["webhook"]["secret"] = "changed"
+    assert reader.get_config("stripe", TENANT_ID)["webhook"]["secret"] == "whsec"
+
+    assert reader.is_enabled("stripe", TENANT_ID)
+    reader.set_enabled("stripe", TENANT_ID, False)
+    assert not store.is_enabled("stripe", TENANT_ID)
+    assert store.get_config("stripe", TENANT_ID)["api_key"] == "sk_test"
+
+    (entry,) = store.list_configs("stripe", TENANT_ID)
+    assert entry["version"] == 2
+    assert not entry["enabled"]
+
+
+def test_missing_config(session_factory):
+    """Unknown plugins and tenants read as empty, enabled configs; deleting them is a no-op."""
+    store = PluginConfigStore(session_factory=session_factory)
+    assert store.get_config("paypal", TENANT_ID) == {}
+    assert store.get_configs("no-such-tenant") == {}
+    assert store.is_enabled("paypal", TENANT_ID)
+    assert not store.delete_config("paypal", TENANT_ID)
+
+    manager = PluginConfigManager(store)
+    assert manager.get_config("paypal", TENANT_ID) == {}
+    assert not manager.delete_config("paypal", TENANT_ID)
+
+    store.save_config("paypal", TENANT_ID, {"client_id": "abc"})
+    assert manager.delete_config("paypal", TENANT_ID)
+    assert manager.get_config("paypal", TENANT_ID) == {}
+
+
+def test_write_invalidates_other_instances(session_factory):
+    """The cache is shared by every manager in the process, so a save is seen at once."""
+    reader = PluginConfigStore(session_factory=session_factory)
+    writer = PluginConfigStore(session_factory=session_factory)
+    writer.save_config("stripe", TENANT_ID, {"api_key": "v1"})
+    assert reader.get_config("stripe", TENANT_ID) == {"api_key": "v1"}
+
+    writer.save_config("stripe", TENANT_ID, {"api_key": "v2"})
+    assert reader.get_config("stripe", TENANT_ID) == {"api_key": "v2"}
+
+
+def test_version_bump_from_another_process(session_factory, monkeypatch):
+    """Changes made elsewhere are picked up by comparing row versions after the revalidate window."""
+    store = PluginConfigStore(session_factory=session_factory)
+    store.save_config("stripe", TENANT_ID, {"api_key": "v1"})
+    store.save_config("paypal", TENANT_ID, {"client_id": "p1"})
+    assert store.get_config("stripe", TENANT_ID) == {"api_key": "v1"}
+
+    # Within the window the cached value is served
+    monkeypatch.setattr(plugin_module, "CONFIG_REVALIDATE_SECONDS", 3600)
+    bump_in_other_process(session_factory, "stripe", {"api_key": "v2"})
+    assert store.get_config("stripe", TENANT_ID) == {"api_key": "v1"}
+
+    monkeypatch.setattr(plugin_module, "CONFIG_REVALIDATE_SECONDS", 0)
+    assert store.get_config("stripe", TENANT_ID) == {"api_key": "v2"}
+    assert store.get_config("paypal", TENANT_ID) == {"client_id": "p1"}
+
+    # Unchanged versions keep the cached entries instead of reloading them
+    cached = plugin_module._config_cache[TENANT_ID]
+    assert store.get_config("stripe", TENANT_ID) == {"api_key": "v2"}
+    assert plugin_module._config_cache[TENANT_ID] is cached
+
+
+def test_manager_wraps_store_errors():
+    """Storage failures surface as ConfigError from the model-level manager."""
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    manager = PluginConfigManager(PluginConfigStore(session_factory=broken_session))
+    with pytest.raises(ConfigError):
+        manager.get_config("stripe", "tenant-without-cache")
+    with pytest.raises(ConfigError):
+        manager.save_config("stripe", {"api_key": "x"}, TENANT_ID)
@@ -0,0 +1,130 @@
+"""
+Tests for system settings and the versioned settings snapshot.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.services import settings_service as settings_module
+from pycommerce.services.settings_service import (
+    SETTINGS_VERSION_KEY,
+    SettingsService,
+    SystemSetting,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    SystemSetting.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(settings_module, "db_session", factory)
+    SettingsService.invalidate()
+    yield factory
+    SettingsService.invalidate()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(settings_module, "time", clock)
+    return clock
+
+
+def stored_version(session_factory):
+    with session_factory() as session:
+        return SettingsService._read_version(session)
+
+
+def write_in_other_process(session_factory, key, value):
+    """Update a setting the way another worker would, without touching this process's snapshot."""
+    with session_factory() as session:
+        session.get(SystemSetting, key).value = value
+        SettingsService._bump_version(session)
+        session.commit()
+
+
+def test_write_bumps_version_and_is_visible(session_factory, clock):
+    """Every write bumps the version row and is seen by the next read in this process."""
+    assert stored_version(session_factory) == 0
+    assert asyncio.run(SettingsService.set_setting("store.name", "Alpha"))
+    assert stored_version(session_factory) == 1
+    assert SettingsService.get_setting_sync("store.name") == "Alpha"
+
+    snapshot = SettingsService.snapshot()
+    assert snapshot.version == 1
+    assert asyncio.run(SettingsService.set_setting("store.name", "Beta"))
+    assert stored_version(session_factory) == 2
+    assert asyncio.run(SettingsService.get_setting("store.name")) == "Beta"
+    assert SettingsService.snapshot() is not snapshot
+    assert snapshot.get("store.name") == "Alpha"
+
+    assert asyncio.run(SettingsService.delete_setting("store.name"))
+    assert stored_version(session_factory) == 3
+    assert SettingsService.get_setting_sync("store.name", "missing") == "missing"
+
+
+def test_stale_snapshot_is_refreshed(session_factory, clock):
+    """Writes from other workers are served stale only until the revalidate window runs out."""
+    asyncio.run(SettingsService.set_setting("store.name", "Alpha"))
+    snapshot = SettingsService.snapshot()
+
+    write_in_other_process(session_factory, "store.name", "Beta")
+    clock.now += settings_module.SETTINGS_REVALIDATE_SECONDS - 1
+    assert SettingsService.get_setting_sync("store.name") == "Alpha"
+
+    clock.now += 2
+    assert SettingsService.get_setting_sync("store.name") == "Beta"
+    refreshed = SettingsService.snapshot()
+    assert refreshed is not snapshot
+    assert refreshed.version == stored_version(session_factory)
+
+    # An unchanged version keeps the snapshot instead of reloading it
+    clock.now += settings_module.SETTINGS_REVALIDATE_SECONDS + 1
+    assert SettingsService.snapshot() is refreshed
+    assert refreshed.checked_at == clock.now
+
+
+def test_values_are_typed_and_prefix_filtered(session_factory, clock):
+    """Values come back as their stored type, prefix queries exclude the version row."""
+    asyncio.run(SettingsService.set_setting("payment.enabled", True))
+    asyncio.run(SettingsService.set_setting("payment.fee", 2.5))
+    asyncio.run(SettingsService.set_setting("payment.methods", ["card", "paypal"]))
+    asyncio.run(SettingsService.set_setting("shipping.zones", 3))
+
+    assert asyncio.run(SettingsService.get_all_settings("payment.")) == {
+        "payment.enabled": True,
+        "payment.fee": 2.5,
+        "payment.methods": ["card", "paypal"],
+    }
+    assert SETTINGS_VERSION_KEY not in asyncio.run(SettingsService.get_all_settings())
+    assert asyncio.run(SettingsService.get_settings(["shipping.zones", "missing"], 0)) == {
+        "shipping.zones": 3,
+        "missing": 0,
+    }
+
+    # Callers get copies, not the snapshot's containers
+    asyncio.run(SettingsService.get_setting("payment.methods")).append("cash")
+    assert asyncio.run(SettingsService.get_setting("payment.methods")) == ["card", "paypal"]
+
+
+def test_database_error_keeps_last_snapshot(session_factory, clock, monkeypatch):
+    """If the version check fails the last snapshot keeps being served."""
+    asyncio.run(SettingsService.set_setting("store.name", "Alpha"))
+    snapshot = SettingsService.snapshot()
+
+    engine = create_engine("sqlite://")
+    monkeypatch.setattr(settings_module, "db_session", sessionmaker(bind=engine))
+    clock.now += settings_module.SETTINGS_REVALIDATE_SECONDS + 1
+    assert SettingsService.snapshot() is snapshot
+    assert SettingsService.get_setting_sync("store.name") == "Alpha"
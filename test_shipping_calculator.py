@@ -1,5 +1,20 @@
+import os
 import sys
-from pycommerce.plugins.shipping.calculator import ShippingRateCalculator, ShippingZone
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pycommerce.core import db as core_db
+from pycommerce.core.plugin import PluginConfigManager as PluginConfigStore
+from pycommerce.models.db_registry import PluginConfig, Tenant
+from pycommerce.models.plugin_config import PluginConfigManager
+from pycommerce.plugins.shipping.calculator import ShippingRateCalculator, ShippingRateTable, ShippingZone
+from pycommerce.plugins.shipping.geo import PostalCentroidTable, build_centroid_file, haversine_km
+from pycommerce.plugins.shipping.standard import SHIPPING_CONFIG_ID, StandardShippingPlugin, invalidate_rate_table
 
 def test_premium_shipping():
     """Test the premium shipping option in the ShippingRateCalculator."""
@@ -84,5 +99,217 @@ def test_premium_shipping():
     
     print("\nDone!")
 
+def test_rate_table_matches_calculator():
+    """Test that compiled rate tables quote the same as the calculator."""
+    calculator = ShippingRateCalculator(free_shipping_threshold=50.0)
+    items = [
+        {"weight": 0.2, "quantity": 3, "price": 9.5, "dimensions": {"width": 25, "height": 5, "length": 35}},
+        {"weight": 1.3, "quantity": 1, "price": 12.0},
+    ]
+    
+    for origin in ["US", "CA", "GB", "JP"]:
+        table = ShippingRateTable(calculator, store_country=origin)
+        for destination in ["US", "CA", "MX", "GB", "FR", "AU"]:
+            for order_total in [10.0, 60.0]:
+                expected = calculator.calculate_rates(items, origin, destination, order_total)
+                assert table.quote(items, destination, order_total) == expected
+
+
+def test_distance_bands():
+    """Test distance-band surcharges on domestic rates."""
+    calculator = ShippingRateCalculator(
+        distance_bands=[{"max_km": None, "surcharge": 6.0}, {"max_km": 200, "surcharge": 0.0}]
+    )
+    table = ShippingRateTable(calculator, store_country="US")
+    items = [{"weight": 1.0, "quantity": 1}]
+    
+    near = table.quote(items, "US", distance_km=150)
+    far = table.quote(items, "US", distance_km=2500)
+    unknown = table.quote(items, "US")
+    
+    assert near[0]["price"] == unknown[0]["price"] == 6.49
+    assert far[0]["price"] == 12.49
+    assert far == calculator.calculate_rates(items, "US", "US", distance_km=2500)
+
+
+def test_postal_centroid_table():
+    """Test building, memory-mapping and querying a centroid file."""
+    rows = [
+        ("US", "10001", 40.7506, -73.9972),
+        ("US", "90210", 34.0901, -118.4065),
+        ("GB", "SW1A", 51.5010, -0.1416),
+        ("CA", "M5V 3L9", 43.6426, -79.3871),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "centroids.bin")
+        assert build_centroid_file(rows, path) == 4
+        
+        table = PostalCentroidTable(path)
+        try:
+            assert len(table) == 4
+            new_york = table.lookup("us", "10001")
+            assert abs(new_york[0] - 40.7506) < 1e-4
+            # Full UK postcode falls back to the stored district
+            assert table.lookup("GB", "SW1A 1AA") is not None
+            assert table.lookup("CA", "m5v3l9") is not None
+            assert table.lookup("US", "33101") is None
+            
+            distance = haversine_km(*new_york, *table.lookup("US", "90210"))
+            assert 3900 < distance < 4000
+        finally:
+            table.close()
+
+
+TENANT_ID = "tenant-1"
+OTHER_TENANT_ID = "tenant-2"
+
+
+@pytest.fixture
+def shipping(tmp_path, monkeypatch):
+    """A shipping plugin serving TENANT_ID, with plugin configs in a sqlite database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'plugins.db'}")
+    for model in (Tenant, PluginConfig):
+        model.__table__.create(engine)
+    monkeypatch.setattr(core_db, "SessionLocal", sessionmaker(bind=engine))
+    PluginConfigStore.invalidate(all_tenants=True)
+    invalidate_rate_table()
+
+    plugin = StandardShippingPlugin()
+    monkeypatch.setattr(plugin, "get_tenant_from_host", lambda request=None: TENANT_ID)
+    yield plugin
+    PluginConfigStore.invalidate(all_tenants=True)
+    invalidate_rate_table()
+
+
+def test_batch_quotes_match_single_quotes(shipping):
+    """Each batch entry quotes exactly what calculate_rates would, in order."""
+    PluginConfigManager().save_config(SHIPPING_CONFIG_ID, {"free_shipping_threshold": 40.0}, TENANT_ID)
+    shirts = [{"weight": 0.2, "quantity": 3, "price": 9.5, "dimensions": {"width": 25, "height": 5, "length": 35}}]
+    boots = [{"weight": 1.3, "quantity": 2, "price": 30.0}]
+    quotes = [
+        {"items": shirts, "destination": {"country": "US", "postal_code": "10001"}},
+        {"items": boots, "destination": {"country": "us", "postal_code": "10001"}},
+        {"items": shirts, "destination": {"country": "CA", "postal_code": "M5V 3L9"}},
+        {"items": boots, "destination": {"country": "GB"}},
+        {"items": shirts, "destination": {"country": "AU"}},
+    ]
+
+    results = shipping.calculate_rates_batch(quotes)
+    assert [result["rates"] for result in results] == [
+        shipping.calculate_rates(quote["items"], quote["destination"]) for quote in quotes
+    ]
+    assert results[1]["rates"][0]["free_shipping"]
+
+    invalid = shipping.calculate_rates_batch([{"items": shirts, "destination": {}}, quotes[0]])
+    assert "error" in invalid[0]
+    assert invalid[1] == results[0]
+
+    app = FastAPI()
+    app.include_router(shipping.get_router())
+    response = TestClient(app).post("/calculate-batch", json={"quotes": quotes})
+    assert response.status_code == 200
+    assert response.json()["results"] == results
+
+
+def test_config_change_invalidates_compiled_table(shipping):
+    """Saving or deleting a tenant's shipping config drops only that tenant's compiled table."""
+    items = [{"weight": 1.0, "quantity": 1}]
+    us = {"country": "US"}
+    table = shipping.get_rate_table(TENANT_ID)
+    other = shipping.get_rate_table(OTHER_TENANT_ID)
+    assert shipping.get_rate_table(TENANT_ID) is table
+    assert shipping.calculate_rates(items, us)[0]["price"] == 6.49
+
+    config = {"weight_rates": {ShippingZone.DOMESTIC.value: {"base_rate": 9.99}}}
+    PluginConfigManager().save_config(SHIPPING_CONFIG_ID, config, TENANT_ID)
+    assert shipping.get_rate_table(TENANT_ID) is not table
+    assert shipping.get_rate_table(OTHER_TENANT_ID) is other
+    assert shipping.calculate_rates(items, us)[0]["price"] == 10.49
+
+    # Other plugins' configs leave the table alone
+    table = shipping.get_rate_table(TENANT_ID)
+    PluginConfigManager().save_config("stripe", {"api_key": "sk_test"}, TENANT_ID)
+    assert shipping.get_rate_table(TENANT_ID) is table
+
+    PluginConfigManager().delete_config(SHIPPING_CONFIG_ID, TENANT_ID)
+    assert shipping.calculate_rates(items, us)[0]["price"] == 6.49
+
+
+
+def test_saves_in_other_workers_rebuild_table(shipping, monkeypatch):
+    """A config saved by another worker is picked up once the plugin config cache revalidates."""
+    from pycommerce.core import plugin as core_plugin
+
+    items = [{"weight": 1.0, "quantity": 1}]
+    us = {"country": "US"}
+    PluginConfigManager().save_config(SHIPPING_CONFIG_ID, {"free_shipping_threshold": 40.0}, TENANT_ID)
+    table = shipping.get_rate_table(TENANT_ID)
+    assert shipping.get_rate_table(TENANT_ID) is table
+
+    # Another worker saves: the row changes, but this process's listeners never run
+    with core_db.SessionLocal() as session:
+        row = session.query(PluginConfig).filter_by(plugin_id=SHIPPING_CONFIG_ID, tenant_id=TENANT_ID).one()
+        row.config = {"weight_rates": {ShippingZone.DOMESTIC.value: {"base_rate": 9.99}}}
+        row.version = row.version + 1
+        session.commit()
+    assert shipping.get_rate_table(TENANT_ID) is table
+
+    monkeypatch.setattr(core_plugin, "CONFIG_REVALIDATE_SECONDS", 0)
+    assert shipping.get_rate_table(TENANT_ID) is not table
+    assert shipping.calculate_rates(items, us)[0]["price"] == 10.49
+
+
+class FakeTenant:
+    def __init__(self, tenant_id):
+        self.id = tenant_id
+
+
+class FakeTenantManager:
+    domains = {"one.example.com": "tenant-1", "two.example.com": "tenant-2", "three.example.com": "tenant-3"}
+    lookups = 0
+    listed = 0
+
+    def get_by_domain(self, domain):
+        FakeTenantManager.lookups += 1
+        tenant_id = self.domains.get(domain)
+        return FakeTenant(tenant_id) if tenant_id else None
+
+    def list(self):
+        FakeTenantManager.listed += 1
+        return [FakeTenant("default")]
+
+
+def test_tenant_host_cache_is_bounded(monkeypatch):
+    """Only hosts that resolve to a tenant are cached, and only the most recently used ones."""
+    from collections import OrderedDict
+
+    from pycommerce.plugins.shipping import standard
+
+    monkeypatch.setattr(standard, "TenantManager", FakeTenantManager)
+    monkeypatch.setattr(standard, "TENANT_HOST_CACHE_SIZE", 2)
+    monkeypatch.setattr(standard, "_tenant_by_host", OrderedDict())
+    monkeypatch.setattr(standard, "_default_tenant", None)
+    monkeypatch.setattr(FakeTenantManager, "lookups", 0)
+    monkeypatch.setattr(FakeTenantManager, "listed", 0)
+    plugin = StandardShippingPlugin()
+
+    def tenant_for(host):
+        return plugin.get_tenant_from_host(type("Request", (), {"headers": {"host": host}})())
+
+    assert tenant_for("one.example.com:8000") == "tenant-1"
+    assert tenant_for("one.example.com") == "tenant-1"
+    assert FakeTenantManager.lookups == 1
+
+    # Unknown hosts get the default tenant without being cached
+    for n in range(50):
+        assert tenant_for(f"random-{n}.example.net") == "default"
+    assert list(standard._tenant_by_host) == ["one.example.com"]
+    assert FakeTenantManager.listed == 1
+
+    assert tenant_for("two.example.com") == "tenant-2"
+    assert tenant_for("three.example.com") == "tenant-3"
+    assert list(standard._tenant_by_host) == ["two.example.com", "three.example.com"]
+
+
 if __name__ == "__main__":
-    test_premium_shipping()
\ No newline at end of file
+    test_premium_shipping()
@@ -0,0 +1,117 @@
+"""
+Tests for fingerprinted static assets, static_url() and static file caching headers.
+"""
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from pycommerce.middleware.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+)
+from pycommerce.utils.static_assets import (
+    build_static_assets,
+    is_fingerprinted,
+    load_manifest,
+    static_url,
+)
+
+CSS = "body { color: #333; }\n" * 40
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "admin.css").write_text(CSS)
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_text("console.log(1);\n")
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "upload.css").write_text(CSS)
+    return str(tmp_path)
+
+
+def test_static_url_without_build(static_dir):
+    """Without a manifest, URLs stay unversioned."""
+    assert load_manifest(static_dir) == {}
+    assert static_url("css/admin.css", static_dir) == "/static/css/admin.css"
+    assert static_url("/static/js/app.js", static_dir) == "/static/js/app.js"
+
+
+def test_build_fingerprints_assets(static_dir):
+    """Built assets resolve to hashed copies; user media is left out."""
+    manifest = build_static_assets(static_dir)
+    assets = manifest["assets"]
+    assert set(assets) == {"css/admin.css", "js/app.js"}
+
+    path = assets["css/admin.css"]["path"]
+    assert is_fingerprinted(path)
+    assert os.path.isfile(os.path.join(static_dir, path))
+    assert "gzip" in assets["css/admin.css"]["encodings"]
+    assert "gzip" not in assets["js/app.js"]["encodings"]  # too small to compress
+
+    assert static_url("css/admin.css", static_dir) == f"/static/{path}"
+    assert static_url("static/css/admin.css", static_dir) == f"/static/{path}"
+    assert static_url("css/missing.css", static_dir) == "/static/css/missing.css"
+    assert not is_fingerprinted("css/admin.css")
+
+
+def test_manifest_reloads_when_rebuilt(static_dir):
+    """A manifest rewritten by another process is picked up by its mtime."""
+    build_static_assets(static_dir)
+    first = static_url("css/admin.css", static_dir)
+    assert static_url("css/admin.css", static_dir) == first  # served from memory
+
+    manifest_path = os.path.join(static_dir, "dist", "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["assets"]["css/admin.css"]["path"] = "dist/css/admin.0123456789ab.css"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    # Rewrites within the filesystem's mtime resolution would look unchanged
+    stat = os.stat(manifest_path)
+    os.utime(manifest_path, (stat.st_atime, stat.st_mtime + 5))
+
+    assert static_url("css/admin.css", static_dir) == "/static/dist/css/admin.0123456789ab.css"
+
+    os.remove(manifest_path)
+    assert static_url("css/admin.css", static_dir) == "/static/css/admin.css"
+
+
+@pytest.fixture
+def client(static_dir):
+    build_static_assets(static_dir)
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=static_dir), name="static")
+    return TestClient(app)
+
+
+def test_fingerprinted_files_are_immutable(client, static_dir):
+    """Hashed build output is cached for a year; plain paths must revalidate."""
+    url = static_url("css/admin.css", static_dir)
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == CSS
+
+    response = client.get("/static/css/admin.css", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_precompressed_variant_is_served(client, static_dir):
+    """Clients accepting gzip get the .gz sibling with the original media type."""
+    url = static_url("css/admin.css", static_dir)
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.text == CSS  # decoded by the client
+
+    raw = client.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in raw.headers
+    assert raw.content == CSS.encode()
@@ -0,0 +1,78 @@
+"""
+Tests for WYSIWYG content sanitization and stored sanitized content.
+"""
+
+from pycommerce.models.product import ProductManager
+from pycommerce.services.wysiwyg_service import WysiwygService, content_hash
+
+DIRTY = (
+    '<p style="color: red; position: fixed" data-align="center" onclick="steal()">Hi</p>'
+    '<script>alert(1)</script><a href="javascript:alert(1)">x</a>'
+    '<img src="/static/media/photo.jpg" alt="Photo">'
+)
+
+
+def test_sanitize_applies_policy():
+    """Scripts, event handlers and disallowed styles are removed; allowed markup stays."""
+    clean = WysiwygService().sanitize_html(DIRTY)
+    assert "<script" not in clean
+    assert "onclick" not in clean
+    assert "javascript:" not in clean
+    assert "position" not in clean
+    assert "color: red" in clean
+    assert "data-align" not in clean
+    assert '<img src="/static/media/photo.jpg" alt="Photo">' in clean
+
+
+def test_data_attributes_only_where_needed():
+    """data-* survives on images and Quill's list items, not on other tags."""
+    clean = WysiwygService().sanitize_html(
+        '<ol><li data-list="bullet" data-x="1">One</li></ol>'
+        '<img src="/a.jpg" data-src="/b.jpg"><span data-track="1">t</span>'
+    )
+    assert 'data-list="bullet"' in clean
+    assert 'data-src="/b.jpg"' in clean
+    assert "data-x" not in clean
+    assert "data-track" not in clean
+
+
+def test_product_descriptions_are_stored_sanitized():
+    """Product create and update store the sanitized description."""
+    manager = ProductManager()
+    product = manager.create({"sku": "W-1", "name": "Widget", "price": 1, "description": DIRTY})
+    assert product.description == WysiwygService().sanitize_html(DIRTY)
+
+    manager.update(product.id, {"description": '<b onmouseover="x()">Bold</b>'})
+    assert product.description == "<b>Bold</b>"
+
+
+def test_sanitize_is_cached_and_stable():
+    """Sanitizing the same content twice gives the same output."""
+    service = WysiwygService()
+    assert service.sanitize_html(DIRTY) == service.sanitize_html(DIRTY)
+    assert content_hash(DIRTY) == content_hash(DIRTY)
+    assert content_hash(DIRTY) != content_hash(DIRTY + " ")
+
+
+def test_prepare_block_content_stores_raw_and_sanitized():
+    """Blocks keep the editor input, the sanitized HTML and its hash."""
+    service = WysiwygService()
+    stored, _ = service.prepare_block_content({"html": DIRTY, "title": "Intro"})
+    assert stored["raw_html"] == DIRTY
+    assert stored["html"] == service.sanitize_html(DIRTY)
+    assert stored["html_hash"] == content_hash(DIRTY)
+    assert stored["title"] == "Intro"
+
+    # Saving the stored sanitized HTML again reuses the stored version
+    resaved, _ = service.prepare_block_content({"html": stored["html"]}, previous=stored)
+    assert resaved["raw_html"] == DIRTY
+    assert resaved["html"] == stored["html"]
+
+
+def test_prepare_block_content_resanitizes_changes():
+    """Changed content is sanitized again."""
+    service = WysiwygService()
+    stored, _ = service.prepare_block_content({"html": DIRTY})
+    changed, _ = service.prepare_block_content({"html": "<p>New<script>x()</script></p>"}, previous=stored)
+    assert changed["raw_html"] == "<p>New<script>x()</script></p>"
+    assert "<script" not in changed["html"]
@@ -25,197 +25,107 @@ try:
     # Check if static files are already mounted
     if not any(getattr(route, "path", "") == "/static" for route in app.routes):
         logger.info("Mounting static files directory")
-        from fastapi.staticfiles import StaticFiles
-        app.mount("/static", StaticFiles(directory="static"), name="static")
+        from pycommerce.middleware.static_files import PrecompressedStaticFiles
+        app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
         logger.info("Static files mounted successfully")
 except Exception as e:
     logger.error(f"Error mounting static files: {e}")
 
 # Register admin routes
-try:
-    from routes.admin.auth import setup_routes as setup_auth_routes
-    from routes.admin.dashboard import setup_routes as setup_dashboard_routes
-    from routes.admin.products import setup_routes as setup_products_routes
-    from routes.admin.orders import setup_routes as setup_orders_routes
-    from routes.admin.customers import setup_routes as setup_customers_routes
-    from routes.admin.settings import setup_routes as setup_settings_routes
-    from routes.admin.plugins import setup_routes as setup_plugins_routes
-    from routes.admin.simple_plugins import setup_routes as setup_simple_plugins_routes
-    # from routes.admin.direct_plugins import setup_routes as setup_direct_plugins_routes
-    from routes.admin.tenants import setup_routes as setup_tenants_routes
-    from routes.admin.media import setup_routes as setup_media_routes
-    from routes.admin.inventory import setup_routes as setup_inventory_routes
-    from routes.admin.analytics import setup_routes as setup_analytics_routes
-    from routes.admin.page_builder import setup_routes as setup_page_builder_routes
-    from routes.admin.api import setup_routes as setup_admin_api_routes
-    from routes.admin.store_settings import setup_routes as setup_store_settings_routes
-    from routes.admin.marketing import setup_routes as setup_marketing_routes
-    from routes.admin.users import setup_routes as setup_users_routes
-    from routes.admin.categories import setup_routes as setup_categories_routes
-    from routes.admin.ai_config import setup_routes as setup_ai_config_routes
-    from routes.admin.theme_settings import setup_routes as setup_theme_settings_routes
-    from routes.admin.returns import setup_routes as setup_returns_routes
-    from routes.admin.debug import setup_routes as setup_debug_routes # Added import for debug routes
-    from routes.admin.ai_content import setup_routes as setup_ai_content_routes
-    from routes.admin.security import setup_routes as setup_security_routes
-    from routes.admin.estimates_setup import setup_routes as setup_estimates_routes
-
-    # Include admin routers
-    # First set up auth routes since other admin routes depend on them
-    auth_router = setup_auth_routes(templates)
-    app.include_router(auth_router)
-    
-    dashboard_router = setup_dashboard_routes(templates)
-    app.include_router(dashboard_router)
-
-    products_router = setup_products_routes(templates)
-    app.include_router(products_router)
-
-    orders_router = setup_orders_routes(templates)
-    app.include_router(orders_router)
-
-    customers_router = setup_customers_routes(templates)
-    app.include_router(customers_router)
-
-    settings_router = setup_settings_routes(templates)
-    app.include_router(settings_router)
-
-    plugins_router = setup_plugins_routes(templates)
-    app.include_router(plugins_router)
-    
-    # Add the simplified plugins router
-    simple_plugins_router = setup_simple_plugins_routes(templates)
-    app.include_router(simple_plugins_router)
-    logger.info("Simplified plugins routes registered successfully")
-
-    tenants_router = setup_tenants_routes(templates)
-    app.include_router(tenants_router)
+# Modules are imported on the first request to one of their prefixes
+# (or at startup when LAZY_ROUTERS=false); admin-only and storefront-only
+# worker pools are selected with WORKER_ROLE.
+from routes import get_router_registry
+from pycommerce.core.lazy_routes import serves_group
+
+admin_routers = get_router_registry(app, templates)
+
+# Auth routes first since other admin routes depend on them
+admin_routers.register("routes.admin.auth", ["/admin/login", "/admin/logout"])
+admin_routers.register("routes.admin.dashboard", ["/admin/dashboard", "/admin/change-store"])
+admin_routers.register("routes.admin.products", ["/admin/products"])
+admin_routers.register("routes.admin.orders", ["/admin/orders"])
+admin_routers.register("routes.admin.customers", ["/admin/customers"])
+admin_routers.register("routes.admin.settings", ["/admin/settings"])
+admin_routers.register("routes.admin.plugins", ["/admin/plugins"])
+admin_routers.register("routes.admin.simple_plugins", ["/admin/plugins-simple"])
+# admin_routers.register("routes.admin.direct_plugins", ["/admin/direct-plugins"])
+admin_routers.register("routes.admin.tenants", ["/admin/tenants"])
+admin_routers.register("routes.admin.media", ["/admin/media", "/admin/api"])
+admin_routers.register("routes.admin.inventory", ["/admin/inventory"])
+admin_routers.register("routes.admin.analytics", ["/admin/analytics"])
+admin_routers.register(
+    "routes.admin.page_builder",
+    ["/admin/pages", "/admin/page-templates", "/admin/pages-debug", "/admin/debug-pages",
+     "/admin/debug-template", "/admin/admin", "/admin/api"]
+)
+admin_routers.register(
+    "routes.admin.store_settings",
+    ["/admin/store-settings", "/admin/shipping-settings", "/admin/ai-settings", "/admin/api"]
+)
+admin_routers.register("routes.admin.marketing", ["/admin/marketing", "/admin/newsletters"])
+admin_routers.register("routes.admin.users", ["/admin/users"])
+admin_routers.register("routes.admin.categories", ["/admin/categories"])
+admin_routers.register("routes.admin.ai_config", ["/admin/ai-config"])
+admin_routers.register("routes.admin.theme_settings", ["/admin/theme-settings"])
+admin_routers.register("routes.admin.returns", ["/admin/returns", "/admin/orders"])
+admin_routers.register("routes.admin.debug", ["/admin/debug"])
+admin_routers.register("routes.admin.ai_content", ["/admin/ai", "/admin/api"])
+admin_routers.register(
+    "routes.admin.security",
+    ["/admin/security", "/admin/roles", "/admin/permissions", "/admin/audit-logs"]
+)
+admin_routers.register("routes.admin.api", ["/admin/api"], pass_templates=False)
+admin_routers.register("routes.admin.estimates_setup", ["/admin/estimates"])
+# Store settings test routes
+admin_routers.register(
+    "routes.admin.store_settings_test",
+    ["/admin/store-settings-test", "/admin/api/store-settings-test"]
+)
 
-    media_router = setup_media_routes(templates)
-    app.include_router(media_router)
-
-    inventory_router = setup_inventory_routes(templates)
-    app.include_router(inventory_router)
-
-    analytics_router = setup_analytics_routes(templates)
-    app.include_router(analytics_router)
-
-    # Ensure templates is properly passed to page builder routes
+# Register storefront routes
+if serves_group("storefront"):
     try:
-        # Make sure the templates object is correctly initialized
-        if templates is None:
-            logger.error("Templates object is None, cannot initialize page builder routes properly")
-            from fastapi.templating import Jinja2Templates
-            import os
-            templates = Jinja2Templates(directory=os.path.join(os.getcwd(), "templates"))
-            logger.info("Created new templates object for page builder")
-
-        page_builder_router = setup_page_builder_routes(templates)
-        app.include_router(page_builder_router)
-        logger.info("Page Builder routes initialized successfully with templates")
-    except Exception as e:
-        logger.error(f"Error setting up page builder routes: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
-
-    # Add the additional routers
-    store_settings_router = setup_store_settings_routes(templates)
-    app.include_router(store_settings_router)
-
-    marketing_router = setup_marketing_routes(templates)
-    app.include_router(marketing_router)
-
-    users_router = setup_users_routes(templates)
-    app.include_router(users_router)
+        from routes.storefront.home import setup_routes as setup_home_routes
+        from routes.storefront.products import setup_routes as setup_storefront_products_routes
+        from routes.storefront.cart import setup_routes as setup_cart_routes
+        from routes.storefront.checkout import setup_routes as setup_checkout_routes
+        from routes.storefront.pages import setup_routes as setup_pages_routes
+        from routes.storefront.stores import setup_routes as setup_storefront_stores_routes
+        from routes.storefront.stripe_checkout import setup_routes as setup_stripe_checkout_routes
 
-    categories_router = setup_categories_routes(templates)
-    app.include_router(categories_router)
+        # Include storefront routers
+        home_router = setup_home_routes(templates)
+        app.include_router(home_router)
 
-    ai_config_router = setup_ai_config_routes(templates)
-    app.include_router(ai_config_router)
+        products_router = setup_storefront_products_routes(templates)
+        app.include_router(products_router)
 
-    theme_settings_router = setup_theme_settings_routes(templates)
-    app.include_router(theme_settings_router)
+        cart_router = setup_cart_routes(templates)
+        app.include_router(cart_router)
 
-    returns_router = setup_returns_routes(templates)
-    app.include_router(returns_router)
+        checkout_router = setup_checkout_routes(templates)
+        app.include_router(checkout_router)
 
-    debug_router = setup_debug_routes(templates) # Initialize debug routes
-    app.include_router(debug_router)
-    
-    security_router = setup_security_routes(templates) # Initialize security routes
-    app.include_router(security_router)
-    
-    # Add admin API routes
-    admin_api_router = setup_admin_api_routes()
-    app.include_router(admin_api_router)
-    logger.info("Admin API routes registered successfully")
-    
-    # Simple plugins routes already registered above
-    
-    # Direct plugins routes disabled temporarily
-    # direct_plugins_router = setup_direct_plugins_routes(templates)
-    # app.include_router(direct_plugins_router)
-    
-    # Initialize estimates routes
-    estimates_router = setup_estimates_routes(templates)
-    app.include_router(estimates_router)
-
-    logger.info("Admin routes registered successfully")
-except ImportError as e:
-    logger.warning(f"Failed to register admin routes: {str(e)}")
-
-# Register storefront routes
-try:
-    from routes.storefront.home import setup_routes as setup_home_routes
-    from routes.storefront.products import setup_routes as setup_storefront_products_routes
-    from routes.storefront.cart import setup_routes as setup_cart_routes
-    from routes.storefront.checkout import setup_routes as setup_checkout_routes
-    from routes.storefront.pages import setup_routes as setup_pages_routes
-    from routes.storefront.stores import setup_routes as setup_storefront_stores_routes
-    from routes.storefront.stripe_checkout import setup_routes as setup_stripe_checkout_routes
+        pages_router = setup_pages_routes(templates)
+        app.include_router(pages_router)
 
-    # Include storefront routers
-    home_router = setup_home_routes(templates)
-    app.include_router(home_router)
+        storefront_stores_router = setup_storefront_stores_routes(templates)
+        app.include_router(storefront_stores_router)
 
-    products_router = setup_storefront_products_routes(templates)
-    app.include_router(products_router)
+        # Register Stripe checkout routes
+        stripe_checkout_router = setup_stripe_checkout_routes(app)
+        logger.info("Stripe checkout routes registered successfully")
 
-    cart_router = setup_cart_routes(templates)
-    app.include_router(cart_router)
+        # Register integrated Stripe demo routes
+        from routes.storefront.integrated_stripe_demo import setup_routes as setup_integrated_stripe_demo
+        integrated_stripe_demo_router = setup_integrated_stripe_demo(templates)
+        app.include_router(integrated_stripe_demo_router)
+        logger.info("Integrated Stripe demo routes registered successfully")
 
-    checkout_router = setup_checkout_routes(templates)
-    app.include_router(checkout_router)
-
-    pages_router = setup_pages_routes(templates)
-    app.include_router(pages_router)
-
-    storefront_stores_router = setup_storefront_stores_routes(templates)
-    app.include_router(storefront_stores_router)
-    
-    # Register Stripe checkout routes
-    stripe_checkout_router = setup_stripe_checkout_routes(app)
-    logger.info("Stripe checkout routes registered successfully")
-    
-    # Register integrated Stripe demo routes
-    from routes.storefront.integrated_stripe_demo import setup_routes as setup_integrated_stripe_demo
-    integrated_stripe_demo_router = setup_integrated_stripe_demo(templates)
-    app.include_router(integrated_stripe_demo_router)
-    logger.info("Integrated Stripe demo routes registered successfully")
-
-    logger.info("Storefront routes registered successfully")
-except ImportError as e:
-    logger.warning(f"Failed to register storefront routes: {str(e)}")
-
-# Register store settings test routes
-try:
-    from routes.admin.store_settings_test import setup_routes
-    test_routes_router = setup_routes(templates)
-    app.include_router(test_routes_router)
-    logger.info("Store settings test routes registered successfully")
-except ImportError as e:
-    logger.warning(f"Failed to register store settings test routes: {str(e)}")
+        logger.info("Storefront routes registered successfully")
+    except ImportError as e:
+        logger.warning(f"Failed to register storefront routes: {str(e)}")
 
 # Register API routes
 try:
@@ -282,6 +192,9 @@ async def get_openapi_schema():
     """
     from fastapi.openapi.utils import get_openapi
     
+    # Lazily registered admin routers must be loaded to appear in the schema
+    admin_routers.load_all()
+    
     # Generate the OpenAPI schema dynamically
     openapi_schema = get_openapi(
         title="PyCommerce API",
@@ -8,6 +8,7 @@ and HTML templates.
 import os
 import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI, Depends, Query, HTTPException, Request, Form, Cookie, File, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, JSONResponse
@@ -24,6 +25,7 @@ logger = logging.getLogger(__name__)
 # Initialize PyCommerce SDK
 from pycommerce.core.db import init_db
 from pycommerce.core.migrations import init_migrations
+from pycommerce.core.exceptions import CartError
 from pycommerce.models.tenant import TenantManager
 from pycommerce.models.product import ProductManager
 from pycommerce.models.user import UserManager
@@ -40,7 +42,14 @@ from pycommerce.plugins.ai.config import get_ai_providers, load_ai_config
 from pycommerce.api.routes import checkout as checkout_router
 from pycommerce.api.routes import users as users_router
 from pycommerce.services.media_service import MediaService
+from pycommerce.services.cart_store import start_cart_store, stop_cart_store
+from pycommerce.services.event_bus import start_event_dispatcher, stop_event_dispatcher
+from pycommerce.services.job_runner import start_job_runner, stop_job_runner
 from pycommerce.api.routes import media as media_router
+from pycommerce.middleware.static_files import PrecompressedStaticFiles
+from pycommerce.middleware.compression import CompressionMiddleware
+from pycommerce.middleware.http_cache import HTTPCacheMiddleware
+from pycommerce.utils.static_assets import static_url
 
 # Import plugin modules
 from pycommerce.plugins import StripePaymentPlugin, StandardShippingPlugin
@@ -66,20 +75,47 @@ from pycommerce.models.order import OrderManager
 cart_manager = CartManager()
 order_manager = OrderManager()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown."""
+    # Write cart changes behind and sweep expired carts
+    await start_cart_store()
+
+    # Deliver order lifecycle events (mail, cache invalidation) to subscribers
+    await start_event_dispatcher()
+
+    # Run scheduled maintenance jobs (cache warmup, low-stock scan, ledger compaction, cart purge)
+    await start_job_runner()
+
+    try:
+        yield
+    finally:
+        await stop_job_runner()
+        await stop_event_dispatcher()
+        await stop_cart_store()
+
+
 # Create the FastAPI app
 app = FastAPI(
     title="PyCommerce Web",
     description="Web interface for PyCommerce Platform",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
 # Add session middleware for cart functionality
 app.add_middleware(SessionMiddleware, secret_key=os.environ.get("SESSION_SECRET", "supersecretkey"))
 
+# Add ETag/Cache-Control handling for routes that declare a cache policy
+app.add_middleware(HTTPCacheMiddleware)
+
+# Compress HTML/JSON responses (outermost, so it sees final bodies)
+app.add_middleware(CompressionMiddleware)
+
 # Mount static files directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
 # Setup user manager in the routes
 users_router.set_user_manager(user_manager)
@@ -111,6 +147,7 @@ media_service = MediaService()
 
 # Set up templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_url
 
 # Get TinyMCE API key from environment
 # No need for external API keys with Quill.js
@@ -2390,10 +2427,15 @@ def get_session_cart(request: Request):
     cart_id = session.get("cart_id")
     
     try:
+        cart = None
         if cart_id:
             # Get existing cart
-            cart = cart_manager.get(cart_id)
-        else:
+            try:
+                cart = cart_manager.get(cart_id)
+            except CartError:
+                # The cart expired or was deleted; start a new one
+                logger.debug(f"Session cart {cart_id} not found")
+        if cart is None:
             # Create new cart
             cart = cart_manager.create()
             session["cart_id"] = str(cart.id)
@@ -2464,6 +2506,12 @@ async def add_to_cart(
     cart_id = session.get("cart_id")
     
     try:
+        if cart_id:
+            try:
+                cart_manager.get(cart_id)
+            except CartError:
+                # The cart expired or was deleted; start a new one
+                cart_id = None
         if not cart_id:
             # Create new cart
             cart = cart_manager.create()